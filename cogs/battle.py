@@ -1,6 +1,5 @@
 import discord
 from discord.ext import commands
-import random
 import asyncio
 import time
 from cogs.card_images import card_images
@@ -8,13 +7,17 @@ from cogs.cards1 import cards_list as cards1
 from cogs.cards2 import cards_list as cards2
 from cogs.cards3 import cards_list as cards3
 from utils.rewards import get_gold_drop, get_exp_drop
-from utils.probability import calculate_critical, calculate_dodge
+from utils.rng import new_stream
+from utils.battle_engine import BattleEngine, DUEL_RULES, make_combatant
+from utils.battle_text import describe_turn
+from utils import regen
 
 class Battle(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
         self.cursor = self.db.conn.cursor()
+        self.player_state = bot.player_state
     
     @commands.cooldown(1, 5, commands.BucketType.user)
     @commands.command(name="battle")
@@ -23,24 +26,12 @@ class Battle(commands.Cog):
         user_id = ctx.author.id
 
         # Check if user exists
-        self.cursor.execute("SELECT stamina, level FROM players WHERE user_id = ?", (user_id,))
-        player_data = self.cursor.fetchone()
+        state = await self.player_state.get("players", user_id)
         
-        if not player_data:
+        if not state:
             await ctx.send(f"{ctx.author.mention}, you need to use `!start` first!")
             return
         
-        stamina, player_level = player_data
-        
-        # Check stamina
-        if stamina < 3:
-            await ctx.send(f"{ctx.author.mention}, you need at least **3 stamina** to battle!")
-            return
-        
-        # Deduct stamina
-        self.cursor.execute("UPDATE players SET stamina = stamina - 3 WHERE user_id = ?", (user_id,))
-        self.db.conn.commit()
-        
         # Get player's equipped card
         self.cursor.execute("""
             SELECT id, name, attack, defense, speed, level, 
@@ -58,6 +49,18 @@ class Battle(commands.Cog):
         
         card_id, card_name, attack, defense, speed, level, element, skill, skill_desc, skill_mp, crit_rate, dodge_rate, rarity, image_url = player_card
         
+        # Player level isn't part of the cached state, so it comes from the row itself
+        self.cursor.execute("SELECT level FROM players WHERE user_id = ?", (user_id,))
+        player_level = self.cursor.fetchone()[0]
+        
+        # Spend stamina (regenerated since it was last spent), checked and deducted in one step
+        if not regen.spend(state, "stamina", 3):
+            await ctx.send(f"{ctx.author.mention}, you need at least **3 stamina** to battle!")
+            return
+        
+        # Every roll in this battle, enemy pick included, comes from one seeded stream
+        rng = new_stream()
+        
         # Combine all cards and filter by player level
         all_cards = cards1 + cards2 + cards3
         
@@ -68,7 +71,7 @@ class Battle(commands.Cog):
         # Select suitable opponents
         suitable_enemies = []
         for card in all_cards:
-            enemy_level = random.randint(min_enemy_level, max_enemy_level)
+            enemy_level = rng.randint(min_enemy_level, max_enemy_level)
             if enemy_level <= max_enemy_level:
                 # Create a copy of the card with the adjusted level
                 enemy_card = card.copy()
@@ -76,7 +79,7 @@ class Battle(commands.Cog):
                 suitable_enemies.append(enemy_card)
         
         # Pick a random enemy
-        enemy_card_data = random.choice(suitable_enemies)
+        enemy_card_data = rng.choice(suitable_enemies)
         
         # Adjust enemy stats based on level
         enemy_level = enemy_card_data["level"]
@@ -84,7 +87,6 @@ class Battle(commands.Cog):
         enemy_defense = enemy_card_data["defense"] + (enemy_level * 3)
         enemy_speed = enemy_card_data.get("speed", 50) + (enemy_level * 2)
         enemy_hp = 500 + (enemy_level * 15)
-        enemy_max_hp = enemy_hp
         enemy_mp = 100
         enemy_max_mp = 100
         enemy_crit_rate = enemy_card_data.get("critical_rate", 5)
@@ -93,269 +95,88 @@ class Battle(commands.Cog):
         # Get enemy image
         enemy_image = card_images.get(enemy_card_data["name"], None)
         
-        # Setup player stats
-        player_hp = 500 + (level * 15)
-        player_max_hp = player_hp
-        
-        # Get player MP from database
-        self.cursor.execute("SELECT mp FROM players WHERE user_id = ?", (user_id,))
-        player_mp = self.cursor.fetchone()[0]
-        player_max_mp = 100 + (level * 5)  # Scale max MP with level
+        # Get player MP from the player state cache
+        player_mp = regen.current(await self.player_state.get("players", user_id), "mp")
+        
+        # Set up both sides; the engine runs the battle, this loop only renders it
+        player = make_combatant(
+            ctx.author.display_name, attack, defense, speed,
+            500 + (level * 15), mp=player_mp, max_mp=100 + (level * 5),  # Scale max MP with level
+            element=element, skill=skill, skill_cost=skill_mp, skill_description=skill_desc,
+            crit_rate=crit_rate, dodge_rate=dodge_rate,
+            skill_chance=0.3, low_hp_skill_chance=0.7, level=level
+        )
+        enemy = make_combatant(
+            enemy_card_data["name"], enemy_attack, enemy_defense, enemy_speed,
+            enemy_hp, mp=enemy_mp, max_mp=enemy_max_mp,
+            element=enemy_card_data.get("element"),
+            skill=enemy_card_data.get("skill", "Basic Attack"),
+            skill_cost=enemy_card_data.get("skill_mp_cost", 20),
+            skill_description=enemy_card_data.get("skill_description"),
+            skill_cooldown=enemy_card_data.get("skill_cooldown"),
+            crit_rate=enemy_crit_rate, dodge_rate=enemy_dodge_rate,
+            skill_chance=0.3, low_hp_skill_chance=0.7, level=enemy_level
+        )
+        engine = BattleEngine(player, enemy, rng=rng, rules=DUEL_RULES)
         
         # Battle setup
         battle_message = await ctx.send("⚔️ **Battle Start!**")
-        turn = 0
-        
-        # Determine who goes first based on speed
-        player_first = speed >= enemy_speed
-        current_turn = "player" if player_first else "enemy"
-        
-        # Battle effects and animations
-        battle_effects = ["Bonked", "Whacked", "Booped", "Thwacked", "Slammed", "Pummeled"]
         
-        # Skill cooldowns
-        player_skill_cooldown = 0
-        enemy_skill_cooldown = 0
-        
-        # Status effects (turns remaining)
-        player_status = {}
-        enemy_status = {}
+        # Generate HP and MP bars
+        def resource_bar(current, max_val, char_filled="█", char_empty="░"):
+            percentage = current / max_val
+            filled = int(percentage * 10)
+            empty = 10 - filled
+            return f"**`{char_filled * filled}{char_empty * empty}`** **`{current}/{max_val}`**"
         
         # Battle loop
-        while player_hp > 0 and enemy_hp > 0:
-            turn += 1
+        while not engine.finished:
             await asyncio.sleep(1.5)  # Slightly faster pacing
             
-            # Generate HP and MP bars
-            def resource_bar(current, max_val, char_filled="█", char_empty="░"):
-                percentage = current / max_val
-                filled = int(percentage * 10)
-                empty = 10 - filled
-                return f"**`{char_filled * filled}{char_empty * empty}`** **`{current}/{max_val}`**"
-            
-            # Handle status effects
-            for status, turns in list(player_status.items()):
-                if status == "burning":
-                    burn_damage = int(player_max_hp * 0.05)  # 5% damage
-                    player_hp = max(0, player_hp - burn_damage)
-                    
-                player_status[status] -= 1
-                if player_status[status] <= 0:
-                    del player_status[status]
-            
-            for status, turns in list(enemy_status.items()):
-                if status == "burning":
-                    burn_damage = int(enemy_max_hp * 0.05)  # 5% damage
-                    enemy_hp = max(0, enemy_hp - burn_damage)
-                    
-                enemy_status[status] -= 1
-                if enemy_status[status] <= 0:
-                    del enemy_status[status]
-            
-            # Handle cooldowns
-            if player_skill_cooldown > 0:
-                player_skill_cooldown -= 1
-            if enemy_skill_cooldown > 0:
-                enemy_skill_cooldown -= 1
-            
-            # Battle logic
-            if current_turn == "player":
-                # Player's turn
-                # Check if player has enough MP to use skill
-                can_use_skill = player_mp >= skill_mp and player_skill_cooldown == 0
-                
-                # Randomly decide to use skill (more likely if HP is low)
-                skill_chance = 0.3
-                if player_hp < player_max_hp * 0.4:  # Below 40% HP
-                    skill_chance = 0.7
-                
-                use_skill = can_use_skill and random.random() < skill_chance
-                
-                if use_skill:
-                    # Use skill
-                    player_mp -= skill_mp
-                    player_skill_cooldown = 3  # Set cooldown
-                    
-                    # Apply skill effects
-                    if "fire" in skill.lower() or "flame" in skill.lower():
-                        enemy_status["burning"] = 3  # Burning for 3 turns
-                        damage_multiplier = 1.3
-                    elif "heal" in skill.lower():
-                        heal_amount = int(player_max_hp * 0.2)  # Heal 20% of max HP
-                        player_hp = min(player_max_hp, player_hp + heal_amount)
-                        damage_multiplier = 0.5
-                    else:
-                        damage_multiplier = 1.5  # Generic damage boost
-                    
-                    # Calculate damage with skill boost
-                    base_damage = max(5, attack - (enemy_defense // 2))
-                    damage = int(base_damage * damage_multiplier)
-                    
-                    # Critical hit chance
-                    is_critical = calculate_critical(crit_rate)
-                    if is_critical:
-                        damage = int(damage * 1.5)
-                    
-                    # Apply damage
-                    enemy_hp = max(0, enemy_hp - damage)
-                    
-                    # Build action text
-                    action_text = f"**{ctx.author.display_name}** used **{skill}**!"
-                    damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"Dealt `-{damage}`!"
-                    
-                    if "burning" in enemy_status:
-                        damage_text += " 🔥 Enemy is burning!"
-                    elif "heal" in skill.lower():
-                        damage_text = f"💖 Healed `+{heal_amount}`!"
-                    
-                else:
-                    # Regular attack
-                    base_damage = max(5, attack - (enemy_defense // 2))
-                    
-                    # Check for dodge
-                    is_dodged = calculate_dodge(enemy_dodge_rate)
-                    
-                    if is_dodged:
-                        damage = 0
-                        action_text = f"**{ctx.author.display_name}** attacked!"
-                        damage_text = "😎 Enemy dodged the attack!"
-                    else:
-                        # Critical hit chance
-                        is_critical = calculate_critical(crit_rate)
-                        damage = base_damage * 1.5 if is_critical else base_damage
-                        
-                        # Apply damage
-                        enemy_hp = max(0, enemy_hp - damage)
-                        
-                        action_text = f"**{ctx.author.display_name}** attacked!"
-                        damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"Dealt `-{damage}`!"
-                
-                current_turn = "enemy"
-                
-            else:
-                # Enemy's turn
-                # Check if enemy has enough MP to use skill
-                enemy_skill = enemy_card_data.get("skill", "Basic Attack")
-                enemy_skill_mp_cost = enemy_card_data.get("skill_mp_cost", 20)
-                can_use_skill = enemy_mp >= enemy_skill_mp_cost and enemy_skill_cooldown == 0
-                
-                # Randomly decide to use skill (more likely if HP is low)
-                skill_chance = 0.3
-                if enemy_hp < enemy_max_hp * 0.4:  # Below 40% HP
-                    skill_chance = 0.7
-                
-                use_skill = can_use_skill and random.random() < skill_chance
-                
-                if use_skill:
-                    # Use skill
-                    enemy_mp -= enemy_skill_mp_cost
-                    enemy_skill_cooldown = 3  # Set cooldown
-                    
-                    # Apply skill effects
-                    if "fire" in enemy_skill.lower() or "flame" in enemy_skill.lower():
-                        player_status["burning"] = 3  # Burning for 3 turns
-                        damage_multiplier = 1.3
-                    elif "heal" in enemy_skill.lower():
-                        heal_amount = int(enemy_max_hp * 0.2)  # Heal 20% of max HP
-                        enemy_hp = min(enemy_max_hp, enemy_hp + heal_amount)
-                        damage_multiplier = 0.5
-                    else:
-                        damage_multiplier = 1.5  # Generic damage boost
-                    
-                    # Calculate damage with skill boost
-                    base_damage = max(5, enemy_attack - (defense // 2))
-                    damage = int(base_damage * damage_multiplier)
-                    
-                    # Critical hit chance
-                    is_critical = calculate_critical(enemy_crit_rate)
-                    if is_critical:
-                        damage = int(damage * 1.5)
-                    
-                    # Apply damage
-                    player_hp = max(0, player_hp - damage)
-                    
-                    # Build action text
-                    action_text = f"**{enemy_card_data['name']}** used **{enemy_skill}**!"
-                    damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"Dealt `-{damage}`!"
-                    
-                    if "burning" in player_status:
-                        damage_text += " 🔥 You are burning!"
-                    elif "heal" in enemy_skill.lower():
-                        damage_text = f"💖 Healed `+{heal_amount}`!"
-                    
-                else:
-                    # Regular attack
-                    base_damage = max(5, enemy_attack - (defense // 2))
-                    
-                    # Check for dodge
-                    is_dodged = calculate_dodge(dodge_rate)
-                    
-                    if is_dodged:
-                        damage = 0
-                        action_text = f"**{enemy_card_data['name']}** attacked!"
-                        damage_text = "😎 You dodged the attack!"
-                    else:
-                        # Critical hit chance
-                        is_critical = calculate_critical(enemy_crit_rate)
-                        damage = base_damage * 1.5 if is_critical else base_damage
-                        
-                        # Apply damage
-                        player_hp = max(0, player_hp - damage)
-                        
-                        action_text = f"**{enemy_card_data['name']}** attacked!"
-                        damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"{random.choice(battle_effects)} for `-{damage}`!"
-                
-                current_turn = "player"
-            
-            # MP regeneration (5% of max MP per turn)
-            player_mp = min(player_max_mp, player_mp + int(player_max_mp * 0.05))
-            enemy_mp = min(enemy_max_mp, enemy_mp + int(enemy_max_mp * 0.05))
+            events = engine.step()
+            action_text, damage_text = describe_turn(events, engine, {"a": "Enemy is", "b": "You are"})
             
             # Create battle embed
-            title = f"Turn {turn}: {current_turn.capitalize()}'s Turn Next"
+            title = f"Turn {engine.turn}: {'Player' if engine.next_side == 'a' else 'Enemy'}'s Turn Next"
             embed = discord.Embed(title=title, color=discord.Color.purple())
             
-            # Player info
-            player_status_text = ", ".join([f"{status.capitalize()}" for status in player_status]) if player_status else "None"
-            embed.add_field(
-                name=f"{ctx.author.display_name} - {card_name} (Lvl {level})",
-                value=f"HP: {resource_bar(player_hp, player_max_hp)}\n"
-                      f"MP: {resource_bar(player_mp, player_max_mp, '🔷', '⬜')}\n"
-                      f"Status: {player_status_text}\n"
-                      f"Skill Ready: {'✅' if player_skill_cooldown == 0 else f'❌ ({player_skill_cooldown} turns)'}",
-                inline=False
-            )
-            
-            # Enemy info
-            enemy_status_text = ", ".join([f"{status.capitalize()}" for status in enemy_status]) if enemy_status else "None"
-            embed.add_field(
-                name=f"{enemy_card_data['name']} (Lvl {enemy_level})",
-                value=f"HP: {resource_bar(enemy_hp, enemy_max_hp)}\n"
-                      f"MP: {resource_bar(enemy_mp, enemy_max_mp, '🔷', '⬜')}\n"
-                      f"Status: {enemy_status_text}\n"
-                      f"Skill Ready: {'✅' if enemy_skill_cooldown == 0 else f'❌ ({enemy_skill_cooldown} turns)'}",
-                inline=False
-            )
+            # Player and enemy info
+            for fighter, field_name in ((player, f"{ctx.author.display_name} - {card_name} (Lvl {level})"),
+                                        (enemy, f"{enemy_card_data['name']} (Lvl {enemy_level})")):
+                cooldown = fighter["cooldown"]
+                status_text = ", ".join([f"{status.capitalize()}" for status in fighter["status"]]) if fighter["status"] else "None"
+                embed.add_field(
+                    name=field_name,
+                    value=f"HP: {resource_bar(fighter['hp'], fighter['max_hp'])}\n"
+                          f"MP: {resource_bar(fighter['mp'], fighter['max_mp'], '🔷', '⬜')}\n"
+                          f"Status: {status_text}\n"
+                          f"Skill Ready: {'✅' if cooldown == 0 else f'❌ ({cooldown} turns)'}",
+                    inline=False
+                )
             
             # Last action
             embed.add_field(name="Last Action", value=f"{action_text}\n{damage_text}", inline=False)
             
             # Set image
-            if image_url and turn == 1:
+            if image_url and engine.turn == 1:
                 embed.set_thumbnail(url=image_url)
-            if enemy_image and turn == 1:
+            if enemy_image and engine.turn == 1:
                 embed.set_image(url=enemy_image)
             
             await battle_message.edit(embed=embed)
         
+        # Final battle state
+        turn = engine.turn
+        player_mp = player["mp"]
+        
         # Battle ended - determine winner
-        player_won = enemy_hp <= 0
+        player_won = engine.winner == "a"
         
         # Save battle record
         self.cursor.execute("""
-            INSERT INTO battles (user_id, player_card, enemy_card, turns, result)
-            VALUES (?, ?, ?, ?, ?)
-        """, (user_id, card_name, enemy_card_data["name"], turn, "Win" if player_won else "Loss"))
+            INSERT INTO battles (user_id, player_card, enemy_card, turns, result, seed)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, card_name, enemy_card_data["name"], turn, "Win" if player_won else "Loss", rng.seed_value))
         
         # Update player stats
         if player_won:
@@ -366,8 +187,8 @@ class Battle(commands.Cog):
         # Calculate rewards
         if player_won:
             # Calculate gold and exp earned
-            gold_earned = get_gold_drop(enemy_level)
-            exp_gained = get_exp_drop(enemy_level)
+            gold_earned = get_gold_drop(enemy_level, rng=rng, user_id=user_id)
+            exp_gained = get_exp_drop(enemy_level, rng=rng, user_id=user_id)
             
             # Update player gold in database
             self.cursor.execute("UPDATE players SET gold = gold + ? WHERE user_id = ?", (gold_earned, user_id,))
@@ -390,9 +211,9 @@ class Battle(commands.Cog):
                 card_xp = card_xp - xp_needed
                 
                 # Update card level and stats
-                attack_boost = random.randint(3, 7)
-                defense_boost = random.randint(2, 5)
-                speed_boost = random.randint(1, 3)
+                attack_boost = rng.randint(3, 7)
+                defense_boost = rng.randint(2, 5)
+                speed_boost = rng.randint(1, 3)
                 
                 self.cursor.execute("""
                     UPDATE usercards 
@@ -426,16 +247,20 @@ class Battle(commands.Cog):
                 # Update player level
                 self.cursor.execute("""
                     UPDATE players 
-                    SET level = ?, xp = ?, 
-                        max_stamina = max_stamina + 2,
-                        max_mp = max_mp + 10
+                    SET level = ?, xp = ?
                     WHERE user_id = ?
                 """, (new_player_level, player_xp, user_id))
                 
+                # Raise the stamina and MP caps (settling regeneration up to now first)
+                state = await self.player_state.get("players", user_id)
+                state.update(regen.settle(state, "stamina", maximum=state["max_stamina"] + 2))
+                state.update(regen.settle(state, "mp", maximum=state["max_mp"] + 10))
+                
                 player_leveled_up = True
         
-        # Update MP in database
-        self.cursor.execute("UPDATE players SET mp = ? WHERE user_id = ?", (player_mp, user_id))
+        # Update MP (written back with the next state flush)
+        state = await self.player_state.get("players", user_id)
+        state.update(regen.settle(state, "mp", value=player_mp))
         
         # Commit changes
         self.db.conn.commit()
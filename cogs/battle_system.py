@@ -9,37 +9,42 @@ import random
 import time
 import asyncio
 import math
-from datetime import datetime, timedelta
+import logging
 
 import discord
 from discord import ui, Interaction, ButtonStyle
 
+from utils.rng import new_stream
+from utils.battle_engine import BattleEngine, SCALED_RULES, make_combatant, scaled_damage
+from utils.elements import ELEMENTS
+from utils import regen
+from utils.rewards import boosted
+
+logger = logging.getLogger('bot.battle_system')
+
 class BattleSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.aio = self.db.aio
+        self.catalog = bot.catalog
+        self.player_state = bot.player_state
         self.active_battles = {}  # Track active battles to prevent duplicates
         
-    def get_player_card(self, user_id):
-        """Get the player's equipped card with detailed stats."""
-        cursor = self.db.conn.cursor()
-        cursor.execute("""
+    async def get_player_card(self, player_id):
+        """Get the player's equipped card with detailed stats (player_id is api_players.id)."""
+        card_dict = await self.aio.fetchone("""
             SELECT c.*, uc.level, uc.xp, uc.id as user_card_id
             FROM api_user_cards uc
             JOIN api_cards c ON uc.card_id = c.id
-            JOIN api_players p ON uc.player_id = p.id
-            WHERE p.discord_id = ? AND uc.equipped = 1
-        """, (user_id,))
+            WHERE uc.player_id = ? AND uc.equipped = 1
+        """, (player_id,), as_dict=True)
         
-        card = cursor.fetchone()
-        cursor.close()
-        
-        if not card:
+        if not card_dict:
             return None
-            
-        # Convert to dictionary for easier access
-        columns = [col[0] for col in cursor.description]
-        card_dict = {columns[i]: card[i] for i in range(len(columns))}
+        
+        # Level and XP may have unflushed changes
+        self.player_state.overlay("api_user_cards", card_dict['user_card_id'], card_dict)
         
         # Calculate stats based on level
         level_bonus = (card_dict['level'] - 1) * 0.1  # 10% per level
@@ -57,87 +62,42 @@ class BattleSystem(commands.Cog):
         
         return card_dict
         
-    def get_player_data(self, user_id):
+    async def get_player_data(self, user_id):
         """Get player's battle-relevant data."""
-        cursor = self.db.conn.cursor()
-        cursor.execute("""
-            SELECT id, username, level, xp, stamina, max_stamina, 
-                   last_stamina_update, gold, diamonds, wins, losses
-            FROM api_players
-            WHERE discord_id = ?
-        """, (user_id,))
-        
-        player = cursor.fetchone()
-        cursor.close()
+        player = await self.player_state.get("api_players", user_id)
         
         if not player:
             return None
-            
-        # Convert to dictionary for easier access
-        columns = [col[0] for col in cursor.description]
-        player_dict = {columns[i]: player[i] for i in range(len(columns))}
         
-        # Calculate current stamina based on regeneration time
-        if player_dict['last_stamina_update']:
-            last_update = datetime.fromisoformat(player_dict['last_stamina_update'].replace('Z', '+00:00'))
-            current_time = datetime.utcnow()
-            hours_passed = (current_time - last_update).total_seconds() / 3600
-            
-            # Regenerate 1 stamina per 10 minutes (6 per hour)
-            stamina_gained = int(hours_passed * 6)
-            
-            if stamina_gained > 0:
-                new_stamina = min(player_dict['stamina'] + stamina_gained, player_dict['max_stamina'])
-                player_dict['stamina'] = new_stamina
-                
-                # Update in database
-                cursor = self.db.conn.cursor()
-                cursor.execute("""
-                    UPDATE api_players 
-                    SET stamina = ?, last_stamina_update = ? 
-                    WHERE id = ?
-                """, (new_stamina, current_time.isoformat(), player_dict['id']))
-                self.db.conn.commit()
-                cursor.close()
-        
-        return player_dict
-        
-    def update_player_mp(self, user_id, mp):
+        # Stamina and MP regenerate over time; computed here, only written when they change
+        data = player.snapshot()
+        data['stamina'] = regen.current(player, 'stamina')
+        data['mp'] = regen.current(player, 'mp')
+        return data
+        
+    async def update_player_mp(self, user_id, mp):
         """Update player's MP."""
-        # MP is not stored persistently, it's just for battle
-        pass
-        
-    def update_player_stamina(self, user_id, stamina):
-        """Update player's stamina."""
-        cursor = self.db.conn.cursor()
-        cursor.execute("""
-            UPDATE api_players 
-            SET stamina = ?, last_stamina_update = ? 
-            WHERE discord_id = ?
-        """, (stamina, datetime.utcnow().isoformat(), user_id))
-        self.db.conn.commit()
-        cursor.close()
+        player = await self.player_state.get("api_players", user_id)
+        if player:
+            player.update(regen.settle(player, 'mp', value=mp))
         
-    def add_player_exp(self, user_id, exp_amount):
-        """Add experience to the player and handle level ups."""
-        cursor = self.db.conn.cursor()
+    async def spend_player_stamina(self, user_id, amount):
+        """Spend player's stamina if they have enough; returns whether it was spent."""
+        player = await self.player_state.get("api_players", user_id)
+        return player is not None and regen.spend(player, 'stamina', amount)
         
+    async def add_player_exp(self, user_id, exp_amount):
+        """Add experience to the player and handle level ups."""
         # Get current player level and XP
-        cursor.execute("""
-            SELECT id, level, xp, max_stamina
-            FROM api_players
-            WHERE discord_id = ?
-        """, (user_id,))
+        player = await self.player_state.get("api_players", user_id)
         
-        player = cursor.fetchone()
         if not player:
-            cursor.close()
             return False, 0, 0
             
-        player_id, current_level, current_xp, current_max_stamina = player
+        current_level = player['level']
         
         # Add XP
-        new_xp = current_xp + exp_amount
+        new_xp = player['xp'] + exp_amount
         
         # Check for level up
         required_xp = self.get_required_player_xp(current_level)
@@ -150,20 +110,13 @@ class BattleSystem(commands.Cog):
             level_ups += 1
             required_xp = self.get_required_player_xp(new_level)
         
+        # Update player (in memory; written back with the next flush)
+        player.set('level', new_level)
+        player.set('xp', new_xp)
+        
         # Calculate new stamina cap if leveled up
-        new_max_stamina = current_max_stamina
         if level_ups > 0:
-            new_max_stamina = 100 + (new_level * 5)  # Base 100 + 5 per level
-        
-        # Update player
-        cursor.execute("""
-            UPDATE api_players
-            SET level = ?, xp = ?, max_stamina = ?
-            WHERE id = ?
-        """, (new_level, new_xp, new_max_stamina, player_id))
-        
-        self.db.conn.commit()
-        cursor.close()
+            player.update(regen.settle(player, 'stamina', maximum=100 + (new_level * 5)))  # Base 100 + 5 per level
         
         return (level_ups > 0), new_level, level_ups
         
@@ -171,27 +124,26 @@ class BattleSystem(commands.Cog):
         """Calculate required XP for next player level."""
         return 100 * level + int(math.pow(level, 1.5) * 20)
         
-    def add_card_exp(self, card_id, exp_amount):
+    async def add_card_exp(self, card_id, exp_amount, rarity=None, owner=None):
         """Add experience to a card and handle level ups."""
-        cursor = self.db.conn.cursor()
-        
         # Get current card level and XP
-        cursor.execute("""
-            SELECT uc.id, uc.level, uc.xp, c.rarity
-            FROM api_user_cards uc
-            JOIN api_cards c ON uc.card_id = c.id
-            WHERE uc.id = ?
-        """, (card_id,))
+        card = await self.player_state.get("api_user_cards", card_id, owner)
         
-        card = cursor.fetchone()
         if not card:
-            cursor.close()
             return False, 0, 0
+        
+        if rarity is None:
+            rarity = await self.aio.fetchval("""
+                SELECT c.rarity
+                FROM api_user_cards uc
+                JOIN api_cards c ON uc.card_id = c.id
+                WHERE uc.id = ?
+            """, (card_id,))
             
-        user_card_id, current_level, current_xp, rarity = card
+        current_level = card['level']
         
         # Add XP
-        new_xp = current_xp + exp_amount
+        new_xp = card['xp'] + exp_amount
         
         # Check for level up (XP requirements increase with rarity)
         rarity_multiplier = {
@@ -212,15 +164,9 @@ class BattleSystem(commands.Cog):
             level_ups += 1
             required_xp = self.get_required_card_xp(new_level, rarity_multiplier)
         
-        # Update card
-        cursor.execute("""
-            UPDATE api_user_cards
-            SET level = ?, xp = ?
-            WHERE id = ?
-        """, (new_level, new_xp, user_card_id))
-        
-        self.db.conn.commit()
-        cursor.close()
+        # Update card (in memory; written back with the next flush)
+        card.set('level', new_level)
+        card.set('xp', new_xp)
         
         return (level_ups > 0), new_level, level_ups
         
@@ -229,7 +175,7 @@ class BattleSystem(commands.Cog):
         base_xp = 50 * level + int(math.pow(level, 1.8) * 10)
         return int(base_xp * rarity_multiplier)
         
-    def generate_enemy(self, player_level, dungeon_id=None, floor=None, is_boss=False):
+    async def generate_enemy(self, player_level, dungeon_id=None, floor=None, is_boss=False):
         """Generate an enemy based on player level and optionally dungeon info."""
         # Base enemy scaling
         level_factor = 0.8 if not is_boss else 1.5
@@ -240,9 +186,6 @@ class BattleSystem(commands.Cog):
             floor_factor = 1.0 + (floor * 0.1)
             enemy_level = max(enemy_level, int(player_level * floor_factor))
         
-        # Get potential card templates
-        cursor = self.db.conn.cursor()
-        
         # For bosses, select higher rarity cards
         if is_boss:
             rarities = ["Epic", "Legendary"]
@@ -250,19 +193,11 @@ class BattleSystem(commands.Cog):
             # Regular enemies use more common rarities
             rarities = ["Common", "Uncommon", "Rare"] 
         
-        rarities_placeholders = ", ".join(["?" for _ in rarities])
-        
-        cursor.execute(f"""
-            SELECT * FROM api_cards
-            WHERE rarity IN ({rarities_placeholders})
-            ORDER BY RANDOM()
-            LIMIT 1
-        """, rarities)
-        
-        card = cursor.fetchone()
-        cursor.close()
+        # Random pick from the in-memory catalog (a copy, safe to scale below)
+        await self.catalog.refresh_if_stale()
+        enemy = self.catalog.random_card(rarities)
         
-        if not card:
+        if not enemy:
             # Fallback in case no cards are found
             return {
                 "name": f"Level {enemy_level} Slime",
@@ -284,10 +219,6 @@ class BattleSystem(commands.Cog):
                 "image_url": None
             }
         
-        # Convert to dictionary
-        columns = [col[0] for col in cursor.description]
-        enemy = {columns[i]: card[i] for i in range(len(columns))}
-        
         # Scale enemy stats based on level
         stat_multiplier = 1.0 + (enemy_level * 0.1)
         if is_boss:
@@ -321,65 +252,30 @@ class BattleSystem(commands.Cog):
         
         return enemy
         
-    def calculate_damage(self, attacker, defender, is_skill=False):
-        """Calculate damage dealt in an attack."""
-        # Base damage from attack stat
-        base_damage = attacker["attack"]
-        
-        # Adjustments for skill usage
-        if is_skill:
-            base_damage = int(base_damage * 1.5)  # Skills do 50% more damage
-        
-        # Apply variance (±10%)
-        variance = random.uniform(0.9, 1.1)
-        damage = int(base_damage * variance)
-        
-        # Check for critical hit
-        is_critical = random.random() * 100 < attacker.get("crit_chance", 5)
-        if is_critical:
-            damage = int(damage * 1.8)  # Critical hits do 80% more damage
-        
-        # Calculate defense reduction
-        defense_factor = 100 / (100 + defender["defense"])
-        damage = int(damage * defense_factor)
-        
+    def calculate_damage(self, attacker, defender, is_skill=False, rng=None):
+        """Calculate damage dealt in an attack (rolls come from rng, the battle's stream)."""
         # Check for elemental effectiveness
         element_multiplier = self.calculate_element_effectiveness(
             attacker.get("element", "Normal"),
             defender.get("element", "Normal")
         )
-        damage = int(damage * element_multiplier)
-        is_effective = element_multiplier > 1.0
         
-        # Ensure minimum damage
-        damage = max(1, damage)
+        # The formula itself lives in the battle engine
+        damage, is_critical = scaled_damage(
+            attacker["attack"],
+            defender["defense"],
+            attacker.get("crit_chance", 5),
+            element_multiplier,
+            is_skill=is_skill,
+            rng=rng
+        )
         
-        return damage, is_critical, is_effective
+        return damage, is_critical, element_multiplier > 1.0
         
     def calculate_element_effectiveness(self, attacker_element, defender_element):
         """Calculate elemental effectiveness multiplier."""
-        # Element effectiveness chart
-        effectiveness = {
-            "Fire": {"Water": 0.5, "Ice": 2.0, "Earth": 0.7, "Air": 1.2},
-            "Water": {"Fire": 2.0, "Electric": 0.5, "Earth": 1.2, "Ice": 0.7},
-            "Earth": {"Air": 0.5, "Fire": 1.2, "Electric": 2.0, "Water": 0.7},
-            "Air": {"Earth": 2.0, "Electric": 0.7, "Ice": 0.5, "Fire": 0.7},
-            "Electric": {"Water": 2.0, "Air": 1.2, "Earth": 0.5, "Ice": 0.7},
-            "Ice": {"Fire": 0.5, "Water": 1.2, "Air": 2.0, "Earth": 0.7},
-            "Light": {"Dark": 2.0, "Cute": 0.7, "Star": 0.5},
-            "Dark": {"Light": 0.5, "Sweet": 0.7, "Star": 2.0},
-            "Cute": {"Light": 1.2, "Dark": 0.7, "Sweet": 2.0},
-            "Sweet": {"Cute": 0.5, "Dark": 1.2, "Light": 0.7},
-            "Star": {"Light": 1.5, "Dark": 0.5, "Cute": 1.2, "Sweet": 1.2}
-        }
-        
-        # Default is neutral effectiveness
-        if attacker_element not in effectiveness:
-            return 1.0
-            
-        # Get defender-specific multiplier
-        element_chart = effectiveness[attacker_element]
-        return element_chart.get(defender_element, 1.0)
+        # One shared chart for every battle mode
+        return ELEMENTS.multiplier(attacker_element, defender_element)
         
     def resource_bar(self, current, maximum, length=10, filled="█", empty="░"):
         """Generate a visual bar for resources like HP and MP."""
@@ -431,27 +327,26 @@ class BattleSystem(commands.Cog):
         efficiency_factor = max(0.5, 1.0 - (turns_taken * 0.05))
         
         # Calculate final rewards
-        gained_xp = int(base_xp * efficiency_factor)
-        gained_gold = int(base_gold * efficiency_factor)
+        gained_xp = boosted(base_xp * efficiency_factor, user_id, "exp")
+        gained_gold = boosted(base_gold * efficiency_factor, user_id, "gold")
         
         # Award player XP
-        leveled_up, new_level, level_ups = self.add_player_exp(user_id, gained_xp)
+        leveled_up, new_level, level_ups = await self.add_player_exp(user_id, gained_xp)
         
         # Award card XP
-        card_leveled, card_new_level, card_level_ups = self.add_card_exp(
+        card_leveled, card_new_level, card_level_ups = await self.add_card_exp(
             player_card["user_card_id"], 
-            int(gained_xp * 0.8)  # Card gets 80% of player XP
+            int(gained_xp * 0.8),  # Card gets 80% of player XP
+            player_card["rarity"],
+            user_id
         )
         
         # Award gold
-        cursor = self.db.conn.cursor()
-        cursor.execute("""
+        await self.aio.execute("""
             UPDATE api_players
             SET gold = gold + ?, wins = wins + 1
             WHERE discord_id = ?
         """, (gained_gold, user_id))
-        self.db.conn.commit()
-        cursor.close()
         
         # Return reward information
         return {
@@ -466,7 +361,7 @@ class BattleSystem(commands.Cog):
         }
         
     def format_battle_status(self, player_name, player_card, player_hp, player_max_hp, player_mp, player_max_mp,
-                           enemy_name, enemy_hp, enemy_max_hp, enemy_mp, enemy_max_mp):
+                           enemy_name, enemy_hp, enemy_max_hp, enemy_mp, enemy_max_mp, enemy):
         """Format the current battle status for display."""
         # Player HP/MP bars
         player_hp_bar = self.resource_bar(player_hp, player_max_hp)
@@ -501,6 +396,72 @@ class BattleSystem(commands.Cog):
         
         return status
         
+    def make_battle_engine(self, player_name, player_card, player_hp, player_max_hp, player_mp, player_max_mp,
+                           enemy, enemy_skill_chance=0.4, rng=None, **rules):
+        """Set up the headless engine for a button battle (player is side "a")."""
+        player = make_combatant(
+            player_name,
+            player_card["attack"],
+            player_card["defense"],
+            player_card.get("adjusted_speed", player_card.get("speed", 0)),
+            player_hp,
+            max_hp=player_max_hp,
+            mp=player_mp,
+            max_mp=player_max_mp,
+            element=player_card.get("element", "Normal"),
+            skill=player_card.get("skill"),
+            skill_cost=player_card.get("mp_cost", 20),
+            crit_rate=player_card.get("crit_chance", 5),
+            level=player_card.get("level", 1)
+        )
+        
+        opponent = make_combatant(
+            enemy["name"],
+            enemy["attack"],
+            enemy["defense"],
+            enemy.get("speed", 0),
+            enemy["hp"],
+            max_hp=enemy["max_hp"],
+            mp=enemy["mp"],
+            max_mp=enemy["max_mp"],
+            element=enemy.get("element", "Normal"),
+            skill=enemy.get("skill"),
+            skill_cost=enemy.get("skill_cost", 15),
+            crit_rate=enemy.get("crit_chance", 5),
+            skill_chance=enemy_skill_chance,
+            level=enemy.get("level", 1)
+        )
+        
+        return BattleEngine(
+            player,
+            opponent,
+            rng=rng,
+            rules=dict(SCALED_RULES, **rules)
+        )
+        
+    def render_battle_events(self, events, engine):
+        """Turn engine events into battle log entries."""
+        log = []
+        for event in events:
+            if event["type"] not in ("attack", "skill"):
+                continue
+                
+            attacker = engine.combatants[event["side"]]
+            defender = engine.combatants[event["target"]]
+            log.append(self.format_move_result(
+                attacker["name"],
+                defender["name"],
+                event["damage"],
+                event["target_hp"],
+                event["target_max_hp"],
+                event["critical"],
+                event["effective"],
+                is_skill=event["type"] == "skill",
+                skill_name=event.get("skill")
+            ))
+            
+        return log
+        
     class BattleView(ui.View):
         def __init__(self, battle_cog, ctx, player_data, player_card, enemy):
             super().__init__(timeout=120)
@@ -510,22 +471,74 @@ class BattleSystem(commands.Cog):
             self.player_card = player_card
             self.enemy = enemy
             
-            # Battle state
-            self.player_hp = player_card["adjusted_attack"] * 2  # Based on attack for variety
-            self.player_max_hp = self.player_hp
-            self.player_mp = player_card["max_mp"]
-            self.player_max_mp = player_card["max_mp"]
-            
-            self.enemy_hp = enemy["hp"]
-            self.enemy_max_hp = enemy["max_hp"]
-            self.enemy_mp = enemy["mp"]
-            self.enemy_max_mp = enemy["max_mp"]
+            # Every roll in this battle comes from one seeded stream
+            self.rng = new_stream()
+            
+            # The engine owns the battle state; this view only renders it
+            player_hp = player_card["adjusted_attack"] * 2  # Based on attack for variety
+            self.engine = battle_cog.make_battle_engine(
+                ctx.author.display_name,
+                player_card,
+                player_hp,
+                player_hp,
+                player_card["max_mp"],
+                player_card["max_mp"],
+                enemy,
+                rng=self.rng,
+                flee_chance=self.flee_chance
+            )
+            self.player = self.engine.combatants["a"]
+            self.opponent = self.engine.combatants["b"]
             
             self.battle_log = []
-            self.turn_count = 0
-            self.battle_over = False
             self.update_button_states()
             
+        @property
+        def player_hp(self):
+            return self.player["hp"]
+            
+        @property
+        def player_max_hp(self):
+            return self.player["max_hp"]
+            
+        @property
+        def player_mp(self):
+            return self.player["mp"]
+            
+        @property
+        def player_max_mp(self):
+            return self.player["max_mp"]
+            
+        @property
+        def enemy_hp(self):
+            return self.opponent["hp"]
+            
+        @property
+        def enemy_max_hp(self):
+            return self.opponent["max_hp"]
+            
+        @property
+        def enemy_mp(self):
+            return self.opponent["mp"]
+            
+        @property
+        def enemy_max_mp(self):
+            return self.opponent["max_mp"]
+            
+        @property
+        def turn_count(self):
+            return self.engine.round
+            
+        @property
+        def battle_over(self):
+            return self.engine.finished
+            
+        @staticmethod
+        def flee_chance(player, enemy):
+            """60% chance to succeed, increased by player speed compared to enemy."""
+            speed_factor = player["speed"] / max(1, enemy["speed"])
+            return min(90, 60 + (speed_factor - 1) * 20)
+            
         async def interaction_check(self, interaction):
             """Check if the interaction is from the battle owner."""
             return interaction.user.id == self.ctx.author.id
@@ -539,53 +552,40 @@ class BattleSystem(commands.Cog):
                 return
                 
             # Update skill button based on MP
-            skill_cost = self.player_card.get("mp_cost", 20)
+            skill_cost = self.player["skill_cost"]
             self.children[1].disabled = self.player_mp < skill_cost
             
             skill_name = self.player_card.get("skill", "Unknown Skill")
             self.children[1].label = f"{skill_name} ({skill_cost} MP)"
             
+        async def play_round(self, interaction, action):
+            """Run one round through the engine and render it."""
+            events = self.engine.play_round(action)
+            self.battle_log.extend(self.battle_cog.render_battle_events(events, self.engine))
+            
+            # Flee attempts get their own message
+            message = ""
+            for event in events:
+                if event["type"] == "flee":
+                    message = "🏃 You successfully fled from battle!" if event["success"] else "❌ Failed to flee! Enemy attacks!"
+                    
+            if self.engine.winner == "a":
+                await self.end_battle(interaction, "player")
+            elif self.engine.winner == "b":
+                await self.end_battle(interaction, "enemy")
+            else:
+                if self.battle_over:
+                    # Successful flee
+                    self.battle_cog.active_battles.pop(self.ctx.author.id, None)
+                await self.update_battle_message(interaction, message)
+                
         @ui.button(label="Attack", style=ButtonStyle.danger)
         async def attack_button(self, interaction: Interaction, button: ui.Button):
             """Execute a basic attack."""
             if self.battle_over:
                 return
                 
-            # Increment turn counter
-            self.turn_count += 1
-            
-            # Calculate damage
-            damage, is_critical, is_effective = self.battle_cog.calculate_damage(
-                self.player_card, self.enemy, is_skill=False
-            )
-            
-            # Apply damage to enemy
-            self.enemy_hp = max(0, self.enemy_hp - damage)
-            
-            # Format result
-            result = self.battle_cog.format_move_result(
-                self.ctx.author.display_name,
-                self.enemy["name"],
-                damage,
-                self.enemy_hp,
-                self.enemy_max_hp,
-                is_critical,
-                is_effective
-            )
-            
-            # Add to battle log
-            self.battle_log.append(result)
-            
-            # Check if enemy defeated
-            if self.enemy_hp <= 0:
-                await self.end_battle("player")
-                return
-                
-            # Enemy turn
-            await self.enemy_turn()
-            
-            # Update battle status
-            await self.update_battle_message("")
+            await self.play_round(interaction, "attack")
             
         @ui.button(label="Skill", style=ButtonStyle.primary)
         async def skill_button(self, interaction: Interaction, button: ui.Button):
@@ -594,51 +594,11 @@ class BattleSystem(commands.Cog):
                 return
                 
             # Check MP cost
-            skill_cost = self.player_card.get("mp_cost", 20)
-            if self.player_mp < skill_cost:
+            if self.player_mp < self.player["skill_cost"]:
                 await interaction.response.send_message("Not enough MP to use skill!", ephemeral=True)
                 return
                 
-            # Consume MP
-            self.player_mp -= skill_cost
-            
-            # Increment turn counter
-            self.turn_count += 1
-            
-            # Calculate damage
-            damage, is_critical, is_effective = self.battle_cog.calculate_damage(
-                self.player_card, self.enemy, is_skill=True
-            )
-            
-            # Apply damage to enemy
-            self.enemy_hp = max(0, self.enemy_hp - damage)
-            
-            # Format result
-            result = self.battle_cog.format_move_result(
-                self.ctx.author.display_name,
-                self.enemy["name"],
-                damage,
-                self.enemy_hp,
-                self.enemy_max_hp,
-                is_critical,
-                is_effective,
-                is_skill=True,
-                skill_name=self.player_card["skill"]
-            )
-            
-            # Add to battle log
-            self.battle_log.append(result)
-            
-            # Check if enemy defeated
-            if self.enemy_hp <= 0:
-                await self.end_battle("player")
-                return
-                
-            # Enemy turn
-            await self.enemy_turn()
-            
-            # Update battle status
-            await self.update_battle_message("")
+            await self.play_round(interaction, "skill")
             
         @ui.button(label="Flee", style=ButtonStyle.secondary)
         async def flee_button(self, interaction: Interaction, button: ui.Button):
@@ -646,73 +606,10 @@ class BattleSystem(commands.Cog):
             if self.battle_over:
                 return
                 
-            # 60% chance to succeed, increased by player speed compared to enemy
-            speed_factor = self.player_card["adjusted_speed"] / max(1, self.enemy["speed"])
-            flee_chance = min(90, 60 + (speed_factor - 1) * 20)
-            
-            if random.random() * 100 < flee_chance:
-                # Successful flee
-                self.battle_over = True
-                self.update_button_states()
-                
-                # Update message
-                await self.update_battle_message("🏃 You successfully fled from battle!")
-                
-                # Remove player from active battles
-                self.battle_cog.active_battles.pop(self.ctx.author.id, None)
-            else:
-                # Failed flee attempt
-                failed_message = "❌ Failed to flee! Enemy attacks!"
-                
-                # Enemy gets a free attack for failed flee attempt
-                await self.enemy_turn()
-                
-                # Update battle status
-                await self.update_battle_message(failed_message)
+            # A failed attempt gives the enemy a free attack
+            await self.play_round(interaction, "flee")
             
-        async def enemy_turn(self):
-            """Execute the enemy's turn."""
-            if self.battle_over or self.enemy_hp <= 0:
-                return
-                
-            # Decide between basic attack and skill
-            use_skill = False
-            if self.enemy_mp >= self.enemy["skill_cost"] and random.random() < 0.4:  # 40% chance to use skill if MP available
-                use_skill = True
-                
-            # Calculate damage
-            damage, is_critical, is_effective = self.battle_cog.calculate_damage(
-                self.enemy, self.player_card, is_skill=use_skill
-            )
-            
-            # Apply damage to player
-            self.player_hp = max(0, self.player_hp - damage)
-            
-            # Consume MP if skill used
-            if use_skill:
-                self.enemy_mp -= self.enemy["skill_cost"]
-                
-            # Format result
-            result = self.battle_cog.format_move_result(
-                self.enemy["name"],
-                self.ctx.author.display_name,
-                damage,
-                self.player_hp,
-                self.player_max_hp,
-                is_critical,
-                is_effective,
-                is_skill=use_skill,
-                skill_name=self.enemy["skill"] if use_skill else None
-            )
-            
-            # Add to battle log
-            self.battle_log.append(result)
-            
-            # Check if player defeated
-            if self.player_hp <= 0:
-                await self.end_battle("enemy")
-                
-        async def update_battle_message(self, message):
+        async def update_battle_message(self, interaction, message):
             """Update the battle message with current state."""
             # Format battle status
             status = self.battle_cog.format_battle_status(
@@ -726,7 +623,8 @@ class BattleSystem(commands.Cog):
                 self.enemy_hp,
                 self.enemy_max_hp,
                 self.enemy_mp,
-                self.enemy_max_mp
+                self.enemy_max_mp,
+                self.enemy
             )
             
             # Get the most recent battle log entries (last 2)
@@ -754,9 +652,8 @@ class BattleSystem(commands.Cog):
             
             await interaction.response.edit_message(embed=embed, view=self)
             
-        async def end_battle(self, victor):
+        async def end_battle(self, interaction, victor):
             """End the battle and handle rewards."""
-            self.battle_over = True
             self.update_button_states()
             
             # Remove from active battles
@@ -793,14 +690,11 @@ class BattleSystem(commands.Cog):
                 )
                 
                 # Update database with win
-                cursor = self.battle_cog.db.conn.cursor()
-                cursor.execute("""
+                await self.battle_cog.aio.execute("""
                     UPDATE api_players
                     SET wins = wins + 1
                     WHERE discord_id = ?
                 """, (self.ctx.author.id,))
-                self.battle_cog.db.conn.commit()
-                cursor.close()
                 
                 final_message = f"{reward_message}\n\n{stats}"
                 
@@ -812,14 +706,11 @@ class BattleSystem(commands.Cog):
                 )
                 
                 # Update database with loss
-                cursor = self.battle_cog.db.conn.cursor()
-                cursor.execute("""
+                await self.battle_cog.aio.execute("""
                     UPDATE api_players
                     SET losses = losses + 1
                     WHERE discord_id = ?
                 """, (self.ctx.author.id,))
-                self.battle_cog.db.conn.commit()
-                cursor.close()
                 
                 final_message = defeat_message
                 
@@ -835,7 +726,8 @@ class BattleSystem(commands.Cog):
                 self.enemy_hp,
                 self.enemy_max_hp,
                 self.enemy_mp,
-                self.enemy_max_mp
+                self.enemy_max_mp,
+                self.enemy
             )
             
             # Create final embed
@@ -850,18 +742,22 @@ class BattleSystem(commands.Cog):
             # Add image if available
             if self.enemy.get("image_url"):
                 embed.set_thumbnail(url=self.enemy["image_url"])
+            
+            # Record the seed so the battle can be replayed
+            embed.set_footer(text=f"Battle seed: {self.rng.seed_value}")
+            logger.info(f"Battle ended: user={self.ctx.author.id} enemy={self.enemy['name']} victor={victor} turns={self.turn_count} seed={self.rng.seed_value}")
                 
             await interaction.response.edit_message(embed=embed, view=self)
     
     async def battle_command(self, ctx):
         """⚔️ Battle against a random enemy to earn rewards"""
         # Check if player exists
-        player_data = self.get_player_data(ctx.author.id)
+        player_data = await self.get_player_data(ctx.author.id)
         if not player_data:
             return await ctx.send("❌ You don't have a profile yet! Use `!start` to create one.")
             
         # Check if player has equipped card
-        player_card = self.get_player_card(ctx.author.id)
+        player_card = await self.get_player_card(player_data["id"])
         if not player_card:
             return await ctx.send("❌ You don't have a card equipped! Use `!equip` to equip a card.")
             
@@ -873,11 +769,12 @@ class BattleSystem(commands.Cog):
         if player_data["stamina"] < 10:
             return await ctx.send(f"❌ Not enough stamina! You need 10 stamina to battle. (You have {player_data['stamina']}/{player_data['max_stamina']})")
             
-        # Deduct stamina
-        self.update_player_stamina(ctx.author.id, player_data["stamina"] - 10)
+        # Deduct stamina (fails if another command spent it since the check above)
+        if not await self.spend_player_stamina(ctx.author.id, 10):
+            return await ctx.send("❌ Not enough stamina! You need 10 stamina to battle.")
         
         # Generate enemy based on player level
-        enemy = self.generate_enemy(player_data["level"])
+        enemy = await self.generate_enemy(player_data["level"])
         
         # Mark player as in battle
         self.active_battles[ctx.author.id] = True
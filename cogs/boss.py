@@ -1,11 +1,14 @@
 import discord
 from discord.ext import commands
-import random
 import asyncio
 import time
 import logging
-from utils.rewards import get_gold_drop, get_exp_drop
-from utils.probability import calculate_critical, calculate_dodge, calculate_drop_chance
+from utils.rewards import get_gold_drop, get_exp_drop, boosted
+from utils.sampler import DropTable
+from utils.rng import new_stream
+from utils.battle_engine import BattleEngine, DUEL_RULES, make_combatant
+from utils.battle_text import describe_turn
+from utils import regen
 
 logger = logging.getLogger('bot.boss')
 
@@ -14,7 +17,9 @@ class Boss(commands.Cog):
         self.bot = bot
         self.db = bot.db
         self.cursor = self.db.conn.cursor()
+        self.player_state = bot.player_state
         self.active_boss_battles = {}  # {user_id: boss_id}
+        self.drop_tables = {}  # {boss_id: (DropTable, material info)}, compiled on first kill
     
     def get_boss_list(self, player_level):
         """Get list of bosses available to fight based on player level."""
@@ -51,29 +56,30 @@ class Boss(commands.Cog):
         
         return self.cursor.fetchall()
     
+    def get_boss_drop_table(self, boss_id):
+        """Get the compiled drop table of a boss (built once from boss_drops)."""
+        if boss_id not in self.drop_tables:
+            drops = self.get_boss_drops(boss_id)
+            
+            table = DropTable([
+                {"item": material_id, "chance": drop_rate, "quantity": (min_qty, max_qty)}
+                for material_id, _, _, drop_rate, min_qty, max_qty in drops
+            ])
+            materials = {material_id: (name, rarity) for material_id, name, rarity, _, _, _ in drops}
+            
+            self.drop_tables[boss_id] = (table, materials)
+        
+        return self.drop_tables[boss_id]
+    
     def add_material_to_user(self, user_id, material_id, quantity):
         """Add a material to a user's inventory."""
-        # Check if user already has this material
+        # Add to the existing stack or start a new one
         self.cursor.execute("""
-            SELECT id, quantity FROM user_materials
-            WHERE user_id = ? AND material_id = ?
-        """, (user_id, material_id))
-        
-        existing = self.cursor.fetchone()
-        
-        if existing:
-            # Update quantity
-            self.cursor.execute("""
-                UPDATE user_materials
-                SET quantity = quantity + ?
-                WHERE id = ?
-            """, (quantity, existing[0]))
-        else:
-            # Add new entry
-            self.cursor.execute("""
-                INSERT INTO user_materials (user_id, material_id, quantity)
-                VALUES (?, ?, ?)
-            """, (user_id, material_id, quantity))
+            INSERT INTO user_materials (user_id, material_id, quantity)
+            VALUES (?, ?, ?)
+            ON CONFLICT (user_id, material_id)
+            DO UPDATE SET quantity = quantity + excluded.quantity
+        """, (user_id, material_id, quantity))
     
     @commands.cooldown(1, 10, commands.BucketType.user)
     @commands.command(name="boss")
@@ -82,17 +88,18 @@ class Boss(commands.Cog):
         user_id = ctx.author.id
         
         # Check if user exists and get level
-        self.cursor.execute("SELECT stamina, level FROM players WHERE user_id = ?", (user_id,))
+        self.cursor.execute("SELECT level FROM players WHERE user_id = ?", (user_id,))
         player_data = self.cursor.fetchone()
         
         if not player_data:
             await ctx.send(f"{ctx.author.mention}, you need to use `!start` first!")
             return
         
-        stamina, player_level = player_data
+        player_level = player_data[0]
+        state = await self.player_state.get("players", user_id)
         
-        # Check stamina requirement (5 for boss battles)
-        if stamina < 5:
+        # Check stamina requirement (5 for boss battles), regenerated since it was last spent
+        if regen.current(state, "stamina") < 5:
             await ctx.send(f"{ctx.author.mention}, you need at least **5 stamina** to challenge a boss!")
             return
         
@@ -158,389 +165,91 @@ class Boss(commands.Cog):
         # Unpack player card data
         card_id, card_name, attack_stat, defense_stat, speed_stat, card_level, card_element, card_skill, card_skill_desc, skill_mp_cost, crit_rate, dodge_rate, rarity, card_image = player_card
         
-        # Deduct stamina
-        self.cursor.execute("UPDATE players SET stamina = stamina - 5 WHERE user_id = ?", (user_id,))
-        self.db.conn.commit()
+        # Spend stamina; another command may have spent it since the check above
+        state = await self.player_state.get("players", user_id)
+        if not regen.spend(state, "stamina", 5):
+            await ctx.send(f"{ctx.author.mention}, you need at least **5 stamina** to challenge a boss!")
+            return
         
         # Save this battle in active battles
         self.active_boss_battles[user_id] = boss_id
         
-        # Battle setup
-        max_boss_hp = hp
-        boss_hp = hp
-        boss_mp = 100
-        boss_max_mp = 100
-        boss_skill_mp_cost = 30  # Default value
-        boss_crit_rate = 10  # Default value
-        boss_dodge_rate = 8  # Default value
-        
-        # Setup player stats
-        player_hp = 500 + (card_level * 15)
-        player_max_hp = player_hp
-        
-        # Get player MP from database
-        self.cursor.execute("SELECT mp FROM players WHERE user_id = ?", (user_id,))
-        player_mp = self.cursor.fetchone()[0]
-        player_max_mp = 100 + (card_level * 5)  # Scale max MP with level
-        
-        # Element effectiveness
-        element_chart = {
-            "Fire": {"strong": ["Earth", "Ice"], "weak": ["Water"]},
-            "Water": {"strong": ["Fire"], "weak": ["Electric", "Ice"]},
-            "Earth": {"strong": ["Electric"], "weak": ["Fire", "Air"]},
-            "Air": {"strong": ["Earth"], "weak": ["Electric", "Ice"]},
-            "Electric": {"strong": ["Water", "Air"], "weak": ["Earth"]},
-            "Ice": {"strong": ["Water", "Air"], "weak": ["Fire"]},
-            "Light": {"strong": ["Dark"], "weak": []},
-            "Dark": {"strong": ["Light"], "weak": []},
-            "Cute": {"strong": ["Dark"], "weak": ["Light"]},
-            "Sweet": {"strong": ["Cute"], "weak": ["Dark"]},
-            "Star": {"strong": [], "weak": []}
-        }
-        
-        # Calculate element effectiveness
-        element_multiplier = 1.0
-        if card_element in element_chart and element in element_chart[card_element]["strong"]:
-            element_multiplier = 1.5
-        elif card_element in element_chart and element in element_chart[card_element]["weak"]:
-            element_multiplier = 0.75
-        
-        # Battle message
-        battle_message = await ctx.send(f"⚔️ **Boss Battle: {ctx.author.display_name} vs {name}**")
+        # Get player MP from the player state cache
+        player_mp = regen.current(await self.player_state.get("players", user_id), "mp")
         
-        # Battle effects and animations
-        battle_effects = ["Bonked", "Whacked", "Booped", "Thwacked", "Slammed", "Pummeled"]
+        # Set up both sides; the engine runs the battle, this loop only renders it
+        player = make_combatant(
+            ctx.author.display_name, attack_stat, defense_stat, speed_stat,
+            500 + (card_level * 15), mp=player_mp, max_mp=100 + (card_level * 5),  # Scale max MP with level
+            element=card_element, skill=card_skill, skill_cost=skill_mp_cost, skill_description=card_skill_desc,
+            crit_rate=crit_rate, dodge_rate=dodge_rate,
+            skill_chance=0.4, low_hp_skill_chance=0.8, level=card_level  # Boss battles have higher skill chance
+        )
+        boss = make_combatant(
+            name, attack, defense, speed, hp, mp=100, max_mp=100,
+            element=element, skill=skill, skill_cost=30, skill_description=skill_desc,
+            crit_rate=10, dodge_rate=8,
+            skill_chance=0.5, low_hp_skill_chance=0.9, level=level  # Bosses use skills more often
+        )
         
-        # Skill cooldowns
-        player_skill_cooldown = 0
-        boss_skill_cooldown = 0
+        # Every roll in this battle comes from one seeded stream
+        rng = new_stream()
+        engine = BattleEngine(player, boss, rng=rng, rules=DUEL_RULES)
         
-        # Status effects (turns remaining)
-        player_status = {}
-        boss_status = {}
+        # Battle message
+        battle_message = await ctx.send(f"⚔️ **Boss Battle: {ctx.author.display_name} vs {name}**")
         
-        # Determine who goes first based on speed
-        player_first = speed_stat >= speed
-        current_turn = "player" if player_first else "boss"
+        # Generate HP and MP bars
+        def resource_bar(current, max_val, char_filled="█", char_empty="░"):
+            percentage = current / max_val
+            filled = int(percentage * 10)
+            empty = 10 - filled
+            return f"**`{char_filled * filled}{char_empty * empty}`** **`{current}/{max_val}`**"
         
         # Battle loop
-        turn = 0
-        while player_hp > 0 and boss_hp > 0:
-            turn += 1
+        while not engine.finished:
             await asyncio.sleep(2)
             
-            # Generate HP and MP bars
-            def resource_bar(current, max_val, char_filled="█", char_empty="░"):
-                percentage = current / max_val
-                filled = int(percentage * 10)
-                empty = 10 - filled
-                return f"**`{char_filled * filled}{char_empty * empty}`** **`{current}/{max_val}`**"
-            
-            # Handle status effects
-            for status, turns in list(player_status.items()):
-                if status == "burning":
-                    burn_damage = int(player_max_hp * 0.05)  # 5% damage
-                    player_hp = max(0, player_hp - burn_damage)
-                
-                player_status[status] -= 1
-                if player_status[status] <= 0:
-                    del player_status[status]
-            
-            for status, turns in list(boss_status.items()):
-                if status == "burning":
-                    burn_damage = int(max_boss_hp * 0.05)  # 5% damage
-                    boss_hp = max(0, boss_hp - burn_damage)
-                
-                boss_status[status] -= 1
-                if boss_status[status] <= 0:
-                    del boss_status[status]
-            
-            # Handle cooldowns
-            if player_skill_cooldown > 0:
-                player_skill_cooldown -= 1
-            if boss_skill_cooldown > 0:
-                boss_skill_cooldown -= 1
-            
-            # Battle logic
-            if current_turn == "player":
-                # Player's turn
-                # Check if player has enough MP to use skill
-                can_use_skill = player_mp >= skill_mp_cost and player_skill_cooldown == 0
-                
-                # Boss battles have higher skill chance
-                skill_chance = 0.4
-                if player_hp < player_max_hp * 0.4:  # Below 40% HP
-                    skill_chance = 0.8
-                
-                use_skill = can_use_skill and random.random() < skill_chance
-                
-                if use_skill:
-                    # Use skill
-                    player_mp -= skill_mp_cost
-                    player_skill_cooldown = 3  # Set cooldown
-                    
-                    # Apply skill effects based on card's skill
-                    damage_multiplier = 1.5  # Default damage multiplier
-                    healing = False
-                    
-                    # Apply different effects based on skill key words
-                    if "fire" in card_skill.lower() or "flame" in card_skill.lower() or "burn" in card_skill.lower():
-                        boss_status["burning"] = 3  # Burning for 3 turns
-                        damage_multiplier = 1.3
-                    elif "heal" in card_skill.lower() or "cure" in card_skill.lower() or "recover" in card_skill.lower():
-                        heal_amount = int(player_max_hp * 0.25)  # Heal 25% of max HP
-                        player_hp = min(player_max_hp, player_hp + heal_amount)
-                        damage_multiplier = 0.5
-                        healing = True
-                    elif "stun" in card_skill.lower() or "paralyz" in card_skill.lower():
-                        boss_status["stunned"] = 1  # Stunned for 1 turn
-                        damage_multiplier = 1.2
-                    elif "poison" in card_skill.lower() or "toxic" in card_skill.lower():
-                        boss_status["poisoned"] = 3  # Poisoned for 3 turns
-                        damage_multiplier = 1.2
-                    elif "ultimate" in card_skill.lower() or "final" in card_skill.lower():
-                        damage_multiplier = 2.0  # Ultimate skills do double damage
-                    
-                    # Calculate damage with skill boost and element multiplier
-                    base_damage = max(5, attack_stat - (defense // 2))
-                    damage = int(base_damage * damage_multiplier * element_multiplier)
-                    
-                    # Critical hit chance
-                    is_critical = calculate_critical(crit_rate)
-                    if is_critical:
-                        damage = int(damage * 1.5)
-                    
-                    # Apply damage
-                    if not healing:
-                        boss_hp = max(0, boss_hp - damage)
-                    
-                    # Build action text
-                    action_text = f"**{ctx.author.display_name}** used **{card_skill}**!"
-                    
-                    if healing:
-                        damage_text = f"💖 Healed `+{heal_amount}` HP!"
-                    else:
-                        damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"Dealt `-{damage}`!"
-                        
-                        # Add status effect text
-                        if "burning" in boss_status:
-                            damage_text += " 🔥 Boss is burning!"
-                        elif "stunned" in boss_status:
-                            damage_text += " ⚡ Boss is stunned!"
-                        elif "poisoned" in boss_status:
-                            damage_text += " ☠️ Boss is poisoned!"
-                    
-                    # Element effectiveness text
-                    if element_multiplier > 1:
-                        damage_text += " (Element effective! x1.5)"
-                    elif element_multiplier < 1:
-                        damage_text += " (Element ineffective! x0.75)"
-                
-                else:
-                    # Regular attack
-                    base_damage = max(5, attack_stat - (defense // 2))
-                    
-                    # Apply element effectiveness
-                    base_damage = int(base_damage * element_multiplier)
-                    
-                    # Check for dodge
-                    is_dodged = calculate_dodge(boss_dodge_rate)
-                    
-                    if is_dodged:
-                        damage = 0
-                        action_text = f"**{ctx.author.display_name}** attacked!"
-                        damage_text = "😎 Boss dodged the attack!"
-                    else:
-                        # Critical hit chance
-                        is_critical = calculate_critical(crit_rate)
-                        damage = int(base_damage * 1.5) if is_critical else base_damage
-                        
-                        # Apply damage
-                        boss_hp = max(0, boss_hp - damage)
-                        
-                        action_text = f"**{ctx.author.display_name}** attacked!"
-                        damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"{random.choice(battle_effects)} for `-{damage}`!"
-                        
-                        # Element effectiveness text
-                        if element_multiplier > 1:
-                            damage_text += " (Element effective! x1.5)"
-                        elif element_multiplier < 1:
-                            damage_text += " (Element ineffective! x0.75)"
-                
-                current_turn = "boss"
-                
-            else:
-                # Boss's turn
-                if "stunned" in boss_status:
-                    action_text = f"**{name}** is stunned!"
-                    damage_text = "Cannot attack this turn!"
-                    current_turn = "player"
-                    continue
-                
-                # Check if boss has enough MP to use skill
-                can_use_skill = boss_mp >= boss_skill_mp_cost and boss_skill_cooldown == 0
-                
-                # Boss uses skills more often, especially when low on HP
-                skill_chance = 0.5
-                if boss_hp < max_boss_hp * 0.4:  # Below 40% HP
-                    skill_chance = 0.9
-                
-                use_skill = can_use_skill and random.random() < skill_chance
-                
-                if use_skill:
-                    # Use skill
-                    boss_mp -= boss_skill_mp_cost
-                    boss_skill_cooldown = 3  # Set cooldown
-                    
-                    # Apply skill effects based on boss's skill
-                    damage_multiplier = 1.5  # Default damage multiplier
-                    
-                    # Apply different effects based on skill
-                    if "fire" in skill.lower() or "flame" in skill.lower() or "burn" in skill.lower():
-                        player_status["burning"] = 3  # Burning for 3 turns
-                        damage_multiplier = 1.3
-                    elif "stun" in skill.lower() or "paralyz" in skill.lower():
-                        player_status["stunned"] = 1  # Stunned for 1 turn
-                        damage_multiplier = 1.2
-                    elif "poison" in skill.lower() or "toxic" in skill.lower():
-                        player_status["poisoned"] = 3  # Poisoned for 3 turns
-                        damage_multiplier = 1.2
-                    elif "ultimate" in skill.lower() or "final" in skill.lower():
-                        damage_multiplier = 2.0  # Ultimate skills do double damage
-                    
-                    # Calculate damage with skill boost
-                    base_damage = max(5, attack - (defense_stat // 2))
-                    
-                    # Reverse element effectiveness for boss attacks
-                    reverse_element_multiplier = 1.0
-                    if element in element_chart and card_element in element_chart[element]["strong"]:
-                        reverse_element_multiplier = 1.5
-                    elif element in element_chart and card_element in element_chart[element]["weak"]:
-                        reverse_element_multiplier = 0.75
-                    
-                    damage = int(base_damage * damage_multiplier * reverse_element_multiplier)
-                    
-                    # Critical hit chance
-                    is_critical = calculate_critical(boss_crit_rate)
-                    if is_critical:
-                        damage = int(damage * 1.5)
-                    
-                    # Apply damage
-                    player_hp = max(0, player_hp - damage)
-                    
-                    # Build action text
-                    action_text = f"**{name}** used **{skill}**!"
-                    damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"Dealt `-{damage}`!"
-                    
-                    # Add status effect text
-                    if "burning" in player_status:
-                        damage_text += " 🔥 You are burning!"
-                    elif "stunned" in player_status:
-                        damage_text += " ⚡ You are stunned!"
-                    elif "poisoned" in player_status:
-                        damage_text += " ☠️ You are poisoned!"
-                    
-                    # Element effectiveness text
-                    if reverse_element_multiplier > 1:
-                        damage_text += " (Element effective! x1.5)"
-                    elif reverse_element_multiplier < 1:
-                        damage_text += " (Element ineffective! x0.75)"
-                
-                else:
-                    # Regular attack
-                    base_damage = max(5, attack - (defense_stat // 2))
-                    
-                    # Reverse element effectiveness for boss attacks
-                    reverse_element_multiplier = 1.0
-                    if element in element_chart and card_element in element_chart[element]["strong"]:
-                        reverse_element_multiplier = 1.5
-                    elif element in element_chart and card_element in element_chart[element]["weak"]:
-                        reverse_element_multiplier = 0.75
-                    
-                    base_damage = int(base_damage * reverse_element_multiplier)
-                    
-                    # Check for dodge
-                    is_dodged = calculate_dodge(dodge_rate)
-                    
-                    if is_dodged:
-                        damage = 0
-                        action_text = f"**{name}** attacked!"
-                        damage_text = "😎 You dodged the attack!"
-                    else:
-                        # Critical hit chance
-                        is_critical = calculate_critical(boss_crit_rate)
-                        damage = int(base_damage * 1.5) if is_critical else base_damage
-                        
-                        # Apply damage
-                        player_hp = max(0, player_hp - damage)
-                        
-                        action_text = f"**{name}** attacked!"
-                        damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"{random.choice(battle_effects)} for `-{damage}`!"
-                        
-                        # Element effectiveness text
-                        if reverse_element_multiplier > 1:
-                            damage_text += " (Element effective! x1.5)"
-                        elif reverse_element_multiplier < 1:
-                            damage_text += " (Element ineffective! x0.75)"
-                
-                current_turn = "player"
-            
-            # MP regeneration (5% of max MP per turn)
-            player_mp = min(player_max_mp, player_mp + int(player_max_mp * 0.05))
-            boss_mp = min(boss_max_mp, boss_mp + int(boss_max_mp * 0.05))
-            
-            # Apply poison damage if applicable
-            if "poisoned" in player_status:
-                poison_damage = int(player_max_hp * 0.08)  # 8% damage
-                player_hp = max(0, player_hp - poison_damage)
-                damage_text += f" (☠️ -{poison_damage} poison damage)"
-            
-            if "poisoned" in boss_status:
-                poison_damage = int(max_boss_hp * 0.08)  # 8% damage
-                boss_hp = max(0, boss_hp - poison_damage)
-                damage_text += f" (☠️ -{poison_damage} poison damage)"
+            events = engine.step()
+            action_text, damage_text = describe_turn(events, engine, {"a": "Boss is", "b": "You are"})
             
             # Create battle embed
-            title = f"Turn {turn}: {ctx.author.display_name if current_turn == 'player' else name}'s Turn Next"
+            title = f"Turn {engine.turn}: {engine.combatants[engine.next_side]['name']}'s Turn Next"
             embed = discord.Embed(title=title, color=discord.Color.dark_red())
             
-            # Player info
-            player_status_text = ", ".join([f"{status.capitalize()}" for status in player_status]) if player_status else "None"
-            embed.add_field(
-                name=f"{ctx.author.display_name} - {card_name} (Lvl {card_level})",
-                value=f"HP: {resource_bar(player_hp, player_max_hp)}\n"
-                      f"MP: {resource_bar(player_mp, player_max_mp, '🔷', '⬜')}\n"
-                      f"Status: {player_status_text}\n"
-                      f"Skill Ready: {'✅' if player_skill_cooldown == 0 else f'❌ ({player_skill_cooldown} turns)'}",
-                inline=False
-            )
-            
-            # Boss info
-            boss_status_text = ", ".join([f"{status.capitalize()}" for status in boss_status]) if boss_status else "None"
-            embed.add_field(
-                name=f"{name} (Lvl {level})",
-                value=f"HP: {resource_bar(boss_hp, max_boss_hp)}\n"
-                      f"MP: {resource_bar(boss_mp, boss_max_mp, '🔷', '⬜')}\n"
-                      f"Status: {boss_status_text}\n"
-                      f"Skill Ready: {'✅' if boss_skill_cooldown == 0 else f'❌ ({boss_skill_cooldown} turns)'}",
-                inline=False
-            )
+            # Player and boss info
+            for fighter, field_name in ((player, f"{ctx.author.display_name} - {card_name} (Lvl {card_level})"),
+                                        (boss, f"{name} (Lvl {level})")):
+                cooldown = fighter["cooldown"]
+                status_text = ", ".join([f"{status.capitalize()}" for status in fighter["status"]]) if fighter["status"] else "None"
+                embed.add_field(
+                    name=field_name,
+                    value=f"HP: {resource_bar(fighter['hp'], fighter['max_hp'])}\n"
+                          f"MP: {resource_bar(fighter['mp'], fighter['max_mp'], '🔷', '⬜')}\n"
+                          f"Status: {status_text}\n"
+                          f"Skill Ready: {'✅' if cooldown == 0 else f'❌ ({cooldown} turns)'}",
+                    inline=False
+                )
             
             # Last action
             embed.add_field(name="Last Action", value=f"{action_text}\n{damage_text}", inline=False)
             
             # Set card image as thumbnail
-            if card_image and turn == 1:
+            if card_image and engine.turn == 1:
                 embed.set_thumbnail(url=card_image)
             
             # Set boss image
-            if image_url and turn == 1:
+            if image_url and engine.turn == 1:
                 embed.set_image(url=image_url)
             
             await battle_message.edit(embed=embed)
         
+        # Final battle state
+        turn = engine.turn
+        player_hp, player_max_hp, player_mp = player["hp"], player["max_hp"], player["mp"]
+        
         # Battle ended - determine winner
-        player_won = boss_hp <= 0
+        player_won = engine.winner == "a"
         
         # Remove from active battles
         if user_id in self.active_boss_battles:
@@ -560,12 +269,12 @@ class Boss(commands.Cog):
             hp_percent = player_hp / player_max_hp
             reward_multiplier = 1 + (hp_percent * 0.5)  # Up to 50% boost for full HP
             
-            gold_earned = int(gold_earned * reward_multiplier)
-            exp_gained = int(exp_gained * reward_multiplier)
+            gold_earned = boosted(gold_earned * reward_multiplier, user_id, "gold")
+            exp_gained = boosted(exp_gained * reward_multiplier, user_id, "exp")
             
-            # Update player gold and MP in database
-            self.cursor.execute("UPDATE players SET gold = gold + ?, mp = ? WHERE user_id = ?", 
-                             (gold_earned, player_mp, user_id))
+            # Update player gold in database
+            self.cursor.execute("UPDATE players SET gold = gold + ? WHERE user_id = ?", 
+                             (gold_earned, user_id))
             
             # Add card experience
             self.cursor.execute("UPDATE usercards SET xp = xp + ? WHERE id = ?", (exp_gained, card_id))
@@ -588,9 +297,9 @@ class Boss(commands.Cog):
                 new_xp = card_xp - xp_needed
                 
                 # Update card level and stats
-                attack_boost = random.randint(3, 7)
-                defense_boost = random.randint(2, 5)
-                speed_boost = random.randint(1, 3)
+                attack_boost = rng.randint(3, 7)
+                defense_boost = rng.randint(2, 5)
+                speed_boost = rng.randint(1, 3)
                 
                 self.cursor.execute("""
                     UPDATE usercards 
@@ -624,32 +333,33 @@ class Boss(commands.Cog):
                 # Update player level
                 self.cursor.execute("""
                     UPDATE players 
-                    SET level = ?, xp = ?, 
-                        max_stamina = max_stamina + 2,
-                        max_mp = max_mp + 10
+                    SET level = ?, xp = ?
                     WHERE user_id = ?
                 """, (new_player_level, player_xp, user_id))
                 
+                # Raise the stamina and MP caps (settling regeneration up to now first)
+                state = await self.player_state.get("players", user_id)
+                state.update(regen.settle(state, "stamina", maximum=state["max_stamina"] + 2))
+                state.update(regen.settle(state, "mp", maximum=state["max_mp"] + 10))
+                
                 player_leveled_up = True
             
             # Calculate material drops
-            boss_drops = self.get_boss_drops(boss_id)
+            drop_table, drop_materials = self.get_boss_drop_table(boss_id)
             dropped_materials = []
             
-            for material_id, material_name, material_rarity, drop_rate, min_qty, max_qty in boss_drops:
-                # Calculate if drop happens
-                if calculate_drop_chance(drop_rate):
-                    # Determine quantity
-                    quantity = random.randint(min_qty, max_qty)
-                    
-                    # Add to user's inventory
-                    self.add_material_to_user(user_id, material_id, quantity)
-                    
-                    # Track for display
-                    dropped_materials.append((material_name, quantity, material_rarity))
-        else:
-            # Still update MP if player lost
-            self.cursor.execute("UPDATE players SET mp = ? WHERE user_id = ?", (player_mp, user_id))
+            for material_id, quantity in drop_table.roll(rng=rng):
+                material_name, material_rarity = drop_materials[material_id]
+                
+                # Add to user's inventory
+                self.add_material_to_user(user_id, material_id, quantity)
+                
+                # Track for display
+                dropped_materials.append((material_name, quantity, material_rarity))
+        
+        # Update MP whether the player won or lost (written back with the next state flush)
+        state = await self.player_state.get("players", user_id)
+        state.update(regen.settle(state, "mp", value=player_mp))
         
         # Commit changes
         self.db.conn.commit()
@@ -689,7 +399,7 @@ class Boss(commands.Cog):
             result_message = f"**{name}** defeated {card_name} in `{turn}` turns.\n"
                            
             # Add encouraging message
-            encouragement = random.choice([
+            encouragement = rng.choice([
                 "The boss was too powerful this time.",
                 "Try again with a stronger card or different strategy.",
                 "Maybe a card with a different element would be more effective?",
@@ -705,6 +415,10 @@ class Boss(commands.Cog):
         if player_won:
             embed.add_field(name="Boss Lore", value=lore, inline=False)
         
+        # Seed to replay this battle
+        embed.set_footer(text=f"Battle seed: {rng.seed_value}")
+        logger.info(f"Boss battle ended: user={user_id} boss={boss_id} won={player_won} turns={turn} seed={rng.seed_value}")
+        
         # Set card and boss images
         if card_image:
             embed.set_thumbnail(url=card_image)
@@ -2,14 +2,21 @@ import discord
 from discord.ext import commands
 import time
 
+from database import wallet
+from utils import regen
+from utils.boosts import BOOSTS
+from utils.locks import user_locked
+
 class Buy(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
         self.cursor = self.db.conn.cursor()
-        self.active_boosts = {}  # {user_id: {boost_type: expiry_timestamp}}
+        self.player_state = bot.player_state
+        self.boosts = BOOSTS
 
     @commands.command(name="buy")
+    @user_locked
     async def buy_command(self, ctx, *, item_name: str):
         """Purchase an item from the shop"""
         user_id = ctx.author.id
@@ -39,30 +46,30 @@ class Buy(commands.Cog):
 
         item_id, name, desc, item_type, effect, cost = matched_item
 
-        # Check player's balance
-        self.cursor.execute("SELECT gold FROM players WHERE user_id = ?", (user_id,))
-        player = self.cursor.fetchone()
-
-        if not player:
-            await ctx.send(f"{ctx.author.mention}, you need to use `!start` first!")
-            return
+        # Deduct gold, only if the player can afford it
+        if not wallet.try_spend(self.cursor, "gold", user_id, cost):
+            self.cursor.execute("SELECT 1 FROM players WHERE user_id = ?", (user_id,))
+            if not self.cursor.fetchone():
+                await ctx.send(f"{ctx.author.mention}, you need to use `!start` first!")
+                return
 
-        gold = player[0]
-        if gold < cost:
             await ctx.send(f"{ctx.author.mention}, you don't have enough gold! 💰 `{cost}` needed.")
             return
 
-        # Deduct gold
-        self.cursor.execute("UPDATE players SET gold = gold - ? WHERE user_id = ?", (cost, user_id))
-
-        # Handle different item types
+        # Handle different item types; each commits its sync writes before awaiting,
+        # so this connection never holds the write lock across an await
         if item_type == "potion":
+            # The potion itself only changes cached state
+            self.db.conn.commit()
+            
             if effect == "stamina":
-                self.cursor.execute("UPDATE players SET stamina = stamina + 5 WHERE user_id = ?", (user_id,))
+                state = await self.player_state.get("players", user_id)
+                state.update(regen.settle(state, "stamina", delta=5))
                 await ctx.send(f"{ctx.author.mention}, you bought a **{name}**! ⚡ (+5 Stamina)")
             
             elif effect == "mp":
-                self.cursor.execute("UPDATE players SET mp = mp + 50 WHERE user_id = ?", (user_id,))
+                state = await self.player_state.get("players", user_id)
+                state.update(regen.settle(state, "mp", delta=50))
                 await ctx.send(f"{ctx.author.mention}, you bought a **{name}**! 🔷 (+50 MP)")
             
             else:
@@ -71,13 +78,6 @@ class Buy(commands.Cog):
         elif item_type == "boost":
             # Set boost duration (1 hour)
             boost_duration = 3600
-            expiry = int(time.time()) + boost_duration
-            
-            # Store the boost in memory
-            if user_id not in self.active_boosts:
-                self.active_boosts[user_id] = {}
-            
-            self.active_boosts[user_id][effect] = expiry
             
             # Add to user items
             self.cursor.execute("SELECT id FROM user_items WHERE user_id = ? AND item_id = ?", 
@@ -91,6 +91,13 @@ class Buy(commands.Cog):
                 self.cursor.execute("INSERT INTO user_items (user_id, item_id, quantity) VALUES (?, ?, 1)", 
                                   (user_id, item_id))
             
+            # Commit the purchase first: the boost is written by the async writer,
+            # which would wait on the write lock this connection still holds
+            self.db.conn.commit()
+            
+            # Store the boost (persisted, expires on its own)
+            await self.boosts.activate(user_id, effect, boost_duration)
+            
             # Hours and minutes formatting
             hours = boost_duration // 3600
             minutes = (boost_duration % 3600) // 60
@@ -111,6 +118,8 @@ class Buy(commands.Cog):
                 self.cursor.execute("INSERT INTO user_items (user_id, item_id, quantity) VALUES (?, ?, 1)", 
                                   (user_id, item_id))
             
+            self.db.conn.commit()
+            
             await ctx.send(f"{ctx.author.mention}, you bought a **{name}**! 🎴 Use `!gacha {effect}` to pull your card!")
 
         else:
@@ -126,11 +135,12 @@ class Buy(commands.Cog):
                 self.cursor.execute("INSERT INTO user_items (user_id, item_id, quantity) VALUES (?, ?, 1)", 
                                   (user_id, item_id))
             
+            self.db.conn.commit()
+            
             await ctx.send(f"{ctx.author.mention}, you bought a **{name}**!")
 
-        self.db.conn.commit()
-
     @commands.command(name="use")
+    @user_locked
     async def use_command(self, ctx, *, item_name: str):
         """Use an item from your inventory"""
         user_id = ctx.author.id
@@ -167,31 +177,43 @@ class Buy(commands.Cog):
 
         item_id, name, desc, item_type, effect, quantity = matched_item
 
-        # Decrease quantity
-        self.cursor.execute("UPDATE user_items SET quantity = quantity - 1 WHERE user_id = ? AND item_id = ?", 
-                          (user_id, item_id))
+        # Packs stay in the inventory: they're opened with the gacha command
+        if item_type == "pack":
+            await ctx.send(f"{ctx.author.mention}, card packs can only be opened with the `!gacha {effect}` command!")
+            return
+
+        # Decrease quantity (another command may have used the last one since the lookup)
+        if not wallet.try_spend(self.cursor, "item", (user_id, item_id), 1):
+            await ctx.send(f"{ctx.author.mention}, you don't have that item in your inventory!")
+            return
         
         # If quantity becomes 0, remove the entry
         self.cursor.execute("DELETE FROM user_items WHERE user_id = ? AND item_id = ? AND quantity <= 0", 
                           (user_id, item_id))
+        
+        # Commit using up the item before awaiting anything (the boost is stored
+        # by the async writer, which would wait on this connection's write lock)
+        self.db.conn.commit()
 
         # Handle different item types
         if item_type == "potion":
             if effect == "stamina":
-                self.cursor.execute("UPDATE players SET stamina = min(stamina + 5, max_stamina) WHERE user_id = ?", (user_id,))
+                state = await self.player_state.get("players", user_id)
+                stamina = regen.current(state, "stamina")
+                state.update(regen.settle(state, "stamina", value=min(stamina + 5, state["max_stamina"])))
                 
                 # Get new stamina value
-                self.cursor.execute("SELECT stamina, max_stamina FROM players WHERE user_id = ?", (user_id,))
-                stamina, max_stamina = self.cursor.fetchone()
+                stamina, max_stamina = state["stamina"], state["max_stamina"]
                 
                 await ctx.send(f"{ctx.author.mention}, you used a **{name}**! ⚡ Your stamina is now `{stamina}/{max_stamina}`")
             
             elif effect == "mp":
-                self.cursor.execute("UPDATE players SET mp = min(mp + 50, max_mp) WHERE user_id = ?", (user_id,))
+                state = await self.player_state.get("players", user_id)
+                mp = regen.current(state, "mp")
+                state.update(regen.settle(state, "mp", value=min(mp + 50, state["max_mp"])))
                 
                 # Get new MP value
-                self.cursor.execute("SELECT mp, max_mp FROM players WHERE user_id = ?", (user_id,))
-                mp, max_mp = self.cursor.fetchone()
+                mp, max_mp = state["mp"], state["max_mp"]
                 
                 await ctx.send(f"{ctx.author.mention}, you used a **{name}**! 🔷 Your MP is now `{mp}/{max_mp}`")
             
@@ -201,13 +223,9 @@ class Buy(commands.Cog):
         elif item_type == "boost":
             # Set boost duration (1 hour)
             boost_duration = 3600
-            expiry = int(time.time()) + boost_duration
             
-            # Store the boost in memory
-            if user_id not in self.active_boosts:
-                self.active_boosts[user_id] = {}
-            
-            self.active_boosts[user_id][effect] = expiry
+            # Store the boost (persisted, expires on its own)
+            await self.boosts.activate(user_id, effect, boost_duration)
             
             # Hours and minutes formatting
             hours = boost_duration // 3600
@@ -216,18 +234,9 @@ class Buy(commands.Cog):
             
             await ctx.send(f"{ctx.author.mention}, you activated a **{name}**! ⏱️ (Active for {time_str})")
 
-        elif item_type == "pack":
-            # Return the item since it should be opened with gacha command
-            self.cursor.execute("UPDATE user_items SET quantity = quantity + 1 WHERE user_id = ? AND item_id = ?", 
-                              (user_id, item_id))
-            
-            await ctx.send(f"{ctx.author.mention}, card packs can only be opened with the `!gacha {effect}` command!")
-
         else:
             await ctx.send(f"{ctx.author.mention}, you used a **{name}**!")
 
-        self.db.conn.commit()
-
     @commands.command(name="inventory", aliases=["inv"])
     async def inventory_command(self, ctx):
         """View your item inventory"""
@@ -279,17 +288,8 @@ class Buy(commands.Cog):
 
     def is_boost_active(self, user_id, boost_type):
         """Check if a user has an active boost"""
-        if user_id in self.active_boosts and boost_type in self.active_boosts[user_id]:
-            expiry = self.active_boosts[user_id][boost_type]
-            current_time = int(time.time())
-            
-            if current_time < expiry:
-                return True, expiry - current_time
-            else:
-                # Clean up expired boost
-                del self.active_boosts[user_id][boost_type]
-                if not self.active_boosts[user_id]:
-                    del self.active_boosts[user_id]
+        if self.boosts.is_active(user_id, boost_type):
+            return True, self.boosts.remaining(user_id, boost_type)
         
         return False, 0
 
@@ -297,8 +297,9 @@ class Buy(commands.Cog):
     async def boosts_command(self, ctx):
         """View your active boosts"""
         user_id = ctx.author.id
+        active_boosts = self.boosts.user_boosts(user_id)
         
-        if user_id not in self.active_boosts or not self.active_boosts[user_id]:
+        if not active_boosts:
             await ctx.send(f"{ctx.author.mention}, you don't have any active boosts!")
             return
         
@@ -309,30 +310,21 @@ class Buy(commands.Cog):
         
         current_time = int(time.time())
         
-        for boost_type, expiry in list(self.active_boosts[user_id].items()):
-            if current_time < expiry:
-                time_left = expiry - current_time
-                hours = time_left // 3600
-                minutes = (time_left % 3600) // 60
-                seconds = time_left % 60
-                
-                boost_name = boost_type.capitalize()
-                if boost_type == "exp":
-                    boost_name = "EXP"
-                
-                embed.add_field(
-                    name=f"{boost_name} Boost",
-                    value=f"Time remaining: {hours}h {minutes}m {seconds}s",
-                    inline=False
-                )
-            else:
-                # Clean up expired boost
-                del self.active_boosts[user_id][boost_type]
-        
-        if not self.active_boosts[user_id]:
-            del self.active_boosts[user_id]
-            await ctx.send(f"{ctx.author.mention}, you don't have any active boosts!")
-            return
+        for boost_type, expiry in active_boosts.items():
+            time_left = max(0, expiry - current_time)
+            hours = time_left // 3600
+            minutes = (time_left % 3600) // 60
+            seconds = time_left % 60
+            
+            boost_name = boost_type.capitalize()
+            if boost_type == "exp":
+                boost_name = "EXP"
+            
+            embed.add_field(
+                name=f"{boost_name} Boost",
+                value=f"Time remaining: {hours}h {minutes}m {seconds}s",
+                inline=False
+            )
         
         await ctx.send(embed=embed)
 
@@ -496,3 +496,7 @@ async def setup(bot):
     
     # Commit changes
     db.conn.commit()
+    
+    # Seeded card data changed; have the catalog reload on its next refresh
+    if hasattr(bot, "catalog"):
+        bot.catalog.invalidate()
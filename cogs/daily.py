@@ -3,13 +3,18 @@ from discord.ext import commands
 import time
 import random
 
+from utils import regen
+from utils.locks import user_locked
+
 class Daily(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
         self.cursor = self.db.conn.cursor()
+        self.player_state = bot.player_state
     
     @commands.command(name="daily")
+    @user_locked
     async def daily_command(self, ctx):
         """Collect your daily rewards"""
         user_id = ctx.author.id
@@ -55,10 +60,24 @@ class Daily(commands.Cog):
         gold_per_streak = 50
         gold_reward = base_gold + (gold_per_streak * min(streak, 7))  # Cap at 7 days for gold bonus
         
+        # Claim the reward before anything awaits: only one of two overlapping
+        # !daily calls still finds the last_daily it read
+        self.cursor.execute("""
+            UPDATE players
+            SET last_daily = ?, daily_streak = ?,
+                gold = gold + ?
+            WHERE user_id = ? AND last_daily IS ?
+        """, (current_time, streak, gold_reward, user_id, last_daily))
+        claimed = self.cursor.rowcount == 1
+        self.db.conn.commit()
+        
+        if not claimed:
+            await ctx.send(f"{ctx.author.mention}, you've already claimed your daily rewards!")
+            return
+        
         # Stamina refill
-        self.cursor.execute("SELECT stamina, max_stamina FROM players WHERE user_id = ?", (user_id,))
-        stamina_data = self.cursor.fetchone()
-        current_stamina, max_stamina = stamina_data
+        state = await self.player_state.get("players", user_id)
+        max_stamina = state["max_stamina"]
         
         # Additional rewards based on streak
         bonus_rewards = []
@@ -102,48 +121,32 @@ class Daily(commands.Cog):
                 bonus_rewards.append("🎁 1x Premium Card Pack")
         
         elif streak % 3 == 0:  # Every 3 days
-            # Give a random material
-            self.cursor.execute("SELECT id, name FROM materials ORDER BY RANDOM() LIMIT 1")
-            material_data = self.cursor.fetchone()
+            # Give a random material (picking up materials added since startup)
+            await self.bot.catalog.refresh_if_stale()
+            picked = self.bot.catalog.random_material()
+            material_data = (picked["id"], picked["name"]) if picked else None
             
             if material_data:
                 material_id, material_name = material_data
                 
-                # Check if user already has this material
+                # Add to the existing stack or start a new one
                 self.cursor.execute("""
-                    SELECT id, quantity FROM user_materials
-                    WHERE user_id = ? AND material_id = ?
+                    INSERT INTO user_materials (user_id, material_id, quantity)
+                    VALUES (?, ?, 2)
+                    ON CONFLICT (user_id, material_id)
+                    DO UPDATE SET quantity = quantity + excluded.quantity
                 """, (user_id, material_id))
                 
-                existing_material = self.cursor.fetchone()
-                
-                if existing_material:
-                    # Update quantity
-                    self.cursor.execute("""
-                        UPDATE user_materials
-                        SET quantity = quantity + 2
-                        WHERE id = ?
-                    """, (existing_material[0],))
-                else:
-                    # Add new material
-                    self.cursor.execute("""
-                        INSERT INTO user_materials (user_id, material_id, quantity)
-                        VALUES (?, ?, 2)
-                    """, (user_id, material_id))
-                
                 material_reward = material_name
                 bonus_rewards.append(f"🔮 2x {material_name}")
         
-        # Update daily streak and timestamp
-        self.cursor.execute("""
-            UPDATE players
-            SET last_daily = ?, daily_streak = ?,
-                gold = gold + ?, stamina = ?
-            WHERE user_id = ?
-        """, (current_time, streak, gold_reward, max_stamina, user_id))
-        
+        # Save the bonus rewards
         self.db.conn.commit()
         
+        # Refill stamina (written back with the next state flush)
+        state = await self.player_state.get("players", user_id)
+        state.update(regen.settle(state, "stamina", value=max_stamina))
+        
         # Create reward embed
         embed = discord.Embed(
             title="🎁 Daily Rewards Claimed!",
@@ -10,57 +10,61 @@ import random
 import asyncio
 import time
 import math
+import logging
 from discord import ui, ButtonStyle, Interaction
 
+from utils.rng import new_stream
+from utils import regen
+
+logger = logging.getLogger('bot.dungeon_system')
+
 class DungeonSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
-        self.cursor = self.db.conn.cursor()
+        self.aio = self.db.aio
+        self.catalog = bot.catalog
+        self.player_state = bot.player_state
         self.active_dungeons = {}
         
-    def get_player_data(self, user_id):
+    async def get_player_data(self, user_id):
         """Get player's battle-relevant data."""
-        self.cursor.execute("""
-            SELECT id, level, stamina, mp, max_mp
-            FROM api_players
-            WHERE discord_id = ?
-        """, (user_id,))
+        player = await self.player_state.get("api_players", user_id)
         
-        player = self.cursor.fetchone()
         if not player:
             return None
-            
-        player_id, level, stamina, mp, max_mp = player
         
         return {
-            "id": player_id,
-            "level": level,
-            "stamina": stamina,
-            "mp": mp,
-            "max_mp": max_mp
+            "id": player["id"],
+            "level": player["level"],
+            "stamina": regen.current(player, "stamina"),
+            "mp": regen.current(player, "mp"),
+            "max_mp": player["max_mp"]
         }
     
-    def get_player_card(self, user_id):
-        """Get the player's equipped card with detailed stats."""
-        self.cursor.execute("""
+    async def get_player_card(self, player_id):
+        """Get the player's equipped card with detailed stats (player_id is api_players.id)."""
+        card = await self.aio.fetchone("""
             SELECT uc.id, c.name, uc.level, c.rarity, 
                    c.attack, c.defense, c.speed, c.element, 
                    c.skill, c.skill_description, c.image_url, c.mp_cost,
                    uc.xp, uc.evo_stage
             FROM api_user_cards uc
             JOIN api_cards c ON uc.card_id = c.id
-            WHERE uc.player_id = (SELECT id FROM api_players WHERE discord_id = ?)
-            AND uc.equipped = 1
-        """, (user_id,))
+            WHERE uc.player_id = ? AND uc.equipped = 1
+        """, (player_id,))
         
-        card = self.cursor.fetchone()
         if not card:
             return None
             
         # Extract card details
         card_id, name, level, rarity, base_attack, base_defense, base_speed, element, skill, skill_desc, image_url, mp_cost, xp, evo_stage = card
         
+        # Level and XP may have unflushed changes
+        cached = self.player_state.peek("api_user_cards", card_id)
+        if cached:
+            level, xp = cached["level"], cached["xp"]
+        
         # Calculate stats based on level and rarity
         rarity_multiplier = {"Common": 1.0, "Uncommon": 1.2, "Rare": 1.5, "Epic": 2.0, "Legendary": 2.5}
         multiplier = rarity_multiplier.get(rarity, 1.0)
@@ -95,27 +99,25 @@ class DungeonSystem(commands.Cog):
         
         return card_obj
     
-    def get_available_dungeons(self, player_level):
+    async def get_available_dungeons(self, player_level):
         """Get dungeons available to the player based on level."""
-        self.cursor.execute("""
+        dungeons = await self.aio.fetchall("""
             SELECT id, name, description, anime_series, min_level, floor_count, image_url
             FROM dungeons
             WHERE min_level <= ?
             ORDER BY min_level ASC
         """, (player_level,))
         
-        dungeons = self.cursor.fetchall()
         return dungeons
     
-    def get_dungeon_details(self, dungeon_id):
+    async def get_dungeon_details(self, dungeon_id):
         """Get detailed information about a dungeon."""
-        self.cursor.execute("""
+        dungeon = await self.aio.fetchone("""
             SELECT id, name, description, anime_series, min_level, floor_count, image_url
             FROM dungeons
             WHERE id = ?
         """, (dungeon_id,))
         
-        dungeon = self.cursor.fetchone()
         if not dungeon:
             return None
             
@@ -131,20 +133,18 @@ class DungeonSystem(commands.Cog):
             "image_url": image_url
         }
     
-    def get_dungeon_floor(self, dungeon_id, floor_number):
+    async def get_dungeon_floor(self, dungeon_id, floor_number):
         """Get information about a specific dungeon floor."""
-        self.cursor.execute("""
+        floor = await self.aio.fetchone("""
             SELECT id, floor_number, boss_id, description, min_level
             FROM dungeon_floors
             WHERE dungeon_id = ? AND floor_number = ?
         """, (dungeon_id, floor_number))
         
-        floor = self.cursor.fetchone()
-        
         # If floor doesn't exist in database, generate it
         if not floor:
             # Get dungeon details
-            dungeon = self.get_dungeon_details(dungeon_id)
+            dungeon = await self.get_dungeon_details(dungeon_id)
             if not dungeon:
                 return None
                 
@@ -156,27 +156,17 @@ class DungeonSystem(commands.Cog):
             
             if is_boss_floor:
                 # Get a boss card from this anime series
-                self.cursor.execute("""
-                    SELECT id FROM api_cards
-                    WHERE anime_series = ? AND (rarity = 'Epic' OR rarity = 'Legendary')
-                    ORDER BY RANDOM()
-                    LIMIT 1
-                """, (dungeon["anime_series"],))
-                
-                boss_result = self.cursor.fetchone()
-                if boss_result:
-                    boss_id = boss_result[0]
+                await self.catalog.refresh_if_stale()
+                boss = self.catalog.random_card(["Epic", "Legendary"], dungeon["anime_series"])
+                boss_id = boss["id"] if boss else None
                 description = f"Boss Floor {floor_number} of {dungeon['name']}"
             
             # Insert floor into database
-            self.cursor.execute("""
+            floor = await self.aio.transaction(lambda tx: tx.fetchone("""
                 INSERT INTO dungeon_floors (dungeon_id, floor_number, boss_id, description, min_level)
                 VALUES (?, ?, ?, ?, ?)
                 RETURNING id, floor_number, boss_id, description, min_level
-            """, (dungeon_id, floor_number, boss_id, description, min_level))
-            
-            self.db.conn.commit()
-            floor = self.cursor.fetchone()
+            """, (dungeon_id, floor_number, boss_id, description, min_level)))
             
         if not floor:
             return None
@@ -192,55 +182,48 @@ class DungeonSystem(commands.Cog):
             "is_boss": boss_id is not None
         }
     
-    def has_completed_floor(self, player_id, dungeon_id, floor_number):
+    async def has_completed_floor(self, player_id, dungeon_id, floor_number):
         """Check if player has completed this floor."""
-        self.cursor.execute("""
+        result = await self.aio.fetchone("""
             SELECT id FROM completed_floors
             WHERE player_id = ? AND dungeon_id = ? AND floor_number = ?
         """, (player_id, dungeon_id, floor_number))
         
-        return self.cursor.fetchone() is not None
+        return result is not None
     
-    def mark_floor_completed(self, player_id, dungeon_id, floor_number):
+    async def mark_floor_completed(self, player_id, dungeon_id, floor_number):
         """Mark a floor as completed by player."""
-        self.cursor.execute("""
+        await self.aio.execute("""
             INSERT INTO completed_floors (player_id, dungeon_id, floor_number)
             VALUES (?, ?, ?)
         """, (player_id, dungeon_id, floor_number))
-        
-        self.db.conn.commit()
     
-    def get_player_highest_floor(self, player_id, dungeon_id):
+    async def get_player_highest_floor(self, player_id, dungeon_id):
         """Get the highest floor completed by player in this dungeon."""
-        self.cursor.execute("""
+        result = await self.aio.fetchone("""
             SELECT MAX(floor_number) FROM completed_floors
             WHERE player_id = ? AND dungeon_id = ?
         """, (player_id, dungeon_id))
         
-        result = self.cursor.fetchone()
         if not result or result[0] is None:
             return 0
             
         return result[0]
     
-    def update_player_stamina(self, user_id, stamina):
-        """Update player's stamina."""
-        self.cursor.execute("""
-            UPDATE api_players
-            SET stamina = ?
-            WHERE discord_id = ?
-        """, (stamina, user_id))
-        self.db.conn.commit()
+    async def spend_player_stamina(self, user_id, amount):
+        """Spend player's stamina if they have enough; returns whether it was spent."""
+        player = await self.player_state.get("api_players", user_id)
+        return player is not None and regen.spend(player, "stamina", amount)
     
-    def generate_floor_enemies(self, dungeon_id, floor_number, player_level):
+    async def generate_floor_enemies(self, dungeon_id, floor_number, player_level):
         """Generate enemies for this floor."""
         # Get dungeon details
-        dungeon = self.get_dungeon_details(dungeon_id)
+        dungeon = await self.get_dungeon_details(dungeon_id)
         if not dungeon:
             return []
             
         # Get floor details
-        floor = self.get_dungeon_floor(dungeon_id, floor_number)
+        floor = await self.get_dungeon_floor(dungeon_id, floor_number)
         if not floor:
             return []
             
@@ -263,7 +246,7 @@ class DungeonSystem(commands.Cog):
             
         for i in range(enemy_count):
             # Boss or normal enemy
-            enemy = battle_cog.generate_enemy(
+            enemy = await battle_cog.generate_enemy(
                 player_level,
                 dungeon_id=dungeon_id,
                 floor=floor_number,
@@ -275,27 +258,21 @@ class DungeonSystem(commands.Cog):
         return enemies
     
     class DungeonFloorView(ui.View):
-        def __init__(self, dungeon_cog, ctx, dungeon_data, floor_number, player_data):
+        def __init__(self, dungeon_cog, ctx, dungeon_data, floor_number, player_data, player_card, enemies):
             super().__init__(timeout=180)
             self.dungeon_cog = dungeon_cog
             self.ctx = ctx
             self.dungeon_data = dungeon_data
             self.floor_number = floor_number
             self.player_data = player_data
-            self.enemies = []
             self.current_enemy_index = 0
             self.battle_active = False
             self.battle_log = []
             
-            # Generate enemies for this floor
-            self.enemies = dungeon_cog.generate_floor_enemies(
-                dungeon_data["id"],
-                floor_number,
-                player_data["level"]
-            )
-            
-            # Get player's card
-            self.player_card = dungeon_cog.get_player_card(ctx.author.id)
+            # Enemies for this floor and the player's card are loaded by
+            # start_dungeon_floor so the view never touches the database
+            self.enemies = enemies
+            self.player_card = player_card
             
             # Battle stats
             self.player_hp = self.player_card["level"] * 50
@@ -356,7 +333,8 @@ class DungeonSystem(commands.Cog):
                 enemy["hp"],
                 enemy["max_hp"],
                 enemy["mp"],
-                enemy["max_mp"]
+                enemy["max_mp"],
+                enemy
             )
             
             embed.add_field(
@@ -400,7 +378,7 @@ class DungeonSystem(commands.Cog):
             # Mark current floor as completed
             player_id = self.player_data["id"]
             dungeon_id = self.dungeon_data["id"]
-            self.dungeon_cog.mark_floor_completed(player_id, dungeon_id, self.floor_number)
+            await self.dungeon_cog.mark_floor_completed(player_id, dungeon_id, self.floor_number)
             
             # Check if this was the final floor
             if self.floor_number >= self.dungeon_data["floor_count"]:
@@ -480,20 +458,58 @@ class DungeonSystem(commands.Cog):
             self.ctx = ctx
             self.player_card = player_card
             self.enemy = enemy
-            self.player_hp = player_hp
-            self.player_max_hp = player_max_hp
-            self.player_mp = player_mp
-            self.player_max_mp = player_max_mp
             self.parent_view = parent_view
             
-            self.turn = 0
             self.last_move_description = ""
             self.battle_log = []
             self.battle_ended = False
             
+            # Every roll in this battle comes from one seeded stream
+            self.rng = new_stream()
+            
+            # The engine owns the battle state; this view only renders it
+            # Dungeon rules: skills hit 50% harder, 5 MP regen per turn, 70% flee chance
+            battle_cog = self.dungeon_cog.bot.get_cog("BattleSystem")
+            self.engine = battle_cog.make_battle_engine(
+                f"{ctx.author.display_name}'s {player_card['name']}",
+                player_card,
+                player_hp,
+                player_max_hp,
+                player_mp,
+                player_max_mp,
+                enemy,
+                enemy_skill_chance=0.3,
+                rng=self.rng,
+                skill_bonus=1.5,
+                round_mp_regen=5,
+                flee_chance=70
+            )
+            self.player = self.engine.combatants["a"]
+            self.opponent = self.engine.combatants["b"]
+            
             # Update button states
             self.update_button_states()
         
+        @property
+        def player_hp(self):
+            return self.player["hp"]
+        
+        @property
+        def player_max_hp(self):
+            return self.player["max_hp"]
+        
+        @property
+        def player_mp(self):
+            return self.player["mp"]
+        
+        @property
+        def player_max_mp(self):
+            return self.player["max_mp"]
+        
+        @property
+        def turn(self):
+            return self.engine.round
+        
         async def interaction_check(self, interaction):
             """Check if the interaction is from the battle owner."""
             return interaction.user.id == self.ctx.author.id
@@ -509,54 +525,36 @@ class DungeonSystem(commands.Cog):
             # Disable skill button if not enough MP
             skill_button = [item for item in self.children if item.custom_id == "use_skill"]
             if skill_button:
-                skill_button[0].disabled = self.player_mp < self.player_card["mp_cost"]
+                skill_button[0].disabled = self.player_mp < self.player["skill_cost"]
         
-        @ui.button(label="Attack", style=ButtonStyle.primary, emoji="⚔️", custom_id="attack")
-        async def attack_button(self, interaction: Interaction, button: ui.Button):
-            """Execute a basic attack."""
-            if self.battle_ended:
-                return
-                
-            await interaction.response.defer()
-            
-            # Player attacks
+        async def play_round(self, interaction, action):
+            """Run one round through the engine and render it."""
             battle_cog = self.dungeon_cog.bot.get_cog("BattleSystem")
-            damage, is_critical, is_effective = battle_cog.calculate_damage(
-                self.player_card, self.enemy, is_skill=False
-            )
+            events = self.engine.play_round(action)
             
-            # Apply damage
-            self.enemy["hp"] = max(0, self.enemy["hp"] - damage)
+            # Keep the enemy dict in step for the parent view
+            self.enemy["hp"] = self.opponent["hp"]
+            self.enemy["mp"] = self.opponent["mp"]
             
-            # Update battle log
             player_name = self.ctx.author.display_name
-            move_result = battle_cog.format_move_result(
-                f"{player_name}'s {self.player_card['name']}", 
-                self.enemy["name"],
-                damage, 
-                self.enemy["hp"],
-                self.enemy["max_hp"],
-                is_critical,
-                is_effective
-            )
-            
-            self.battle_log.append(move_result)
-            self.last_move_description = move_result
-            
-            # Check if enemy defeated
-            if self.enemy["hp"] <= 0:
-                await self.end_battle(victor="player")
-                return
-                
-            # Enemy turn
-            await self.enemy_turn()
-            
-            # Increment turn counter
-            self.turn += 1
+            for event in events:
+                if event["type"] == "flee":
+                    if event["success"]:
+                        move_result = f"**{player_name} fled from the battle!**"
+                    else:
+                        move_result = f"**{player_name} tried to flee but couldn't escape!**"
+                    self.battle_log.append(move_result)
+                    self.last_move_description = move_result
+                    
+            for move_result in battle_cog.render_battle_events(events, self.engine):
+                self.battle_log.append(move_result)
+                self.last_move_description = move_result
             
-            # Regenerate some MP each turn
-            mp_regen = 5
-            self.player_mp = min(self.player_max_mp, self.player_mp + mp_regen)
+            if self.engine.finished:
+                victor = {"a": "player", "b": "enemy"}.get(self.engine.winner, "flee")
+                await self.end_battle(victor=victor)
+                if victor == "player":
+                    return
             
             # Update button states
             self.update_button_states()
@@ -564,6 +562,15 @@ class DungeonSystem(commands.Cog):
             # Update the battle message
             await self.update_battle_message(interaction.message)
         
+        @ui.button(label="Attack", style=ButtonStyle.primary, emoji="⚔️", custom_id="attack")
+        async def attack_button(self, interaction: Interaction, button: ui.Button):
+            """Execute a basic attack."""
+            if self.battle_ended:
+                return
+                
+            await interaction.response.defer()
+            await self.play_round(interaction, "attack")
+        
         @ui.button(label="Use Skill", style=ButtonStyle.danger, emoji="✨", custom_id="use_skill")
         async def skill_button(self, interaction: Interaction, button: ui.Button):
             """Use the card's special skill."""
@@ -571,67 +578,15 @@ class DungeonSystem(commands.Cog):
                 return
                 
             # Check if enough MP
-            if self.player_mp < self.player_card["mp_cost"]:
+            if self.player_mp < self.player["skill_cost"]:
                 await interaction.response.send_message(
-                    f"Not enough MP! You need {self.player_card['mp_cost']} MP to use {self.player_card['skill']}.",
+                    f"Not enough MP! You need {self.player['skill_cost']} MP to use {self.player_card['skill']}.",
                     ephemeral=True
                 )
                 return
                 
             await interaction.response.defer()
-            
-            # Use MP
-            self.player_mp -= self.player_card["mp_cost"]
-            
-            # Player uses skill
-            battle_cog = self.dungeon_cog.bot.get_cog("BattleSystem")
-            damage, is_critical, is_effective = battle_cog.calculate_damage(
-                self.player_card, self.enemy, is_skill=True
-            )
-            
-            # Skills do more damage
-            damage = int(damage * 1.5)
-            
-            # Apply damage
-            self.enemy["hp"] = max(0, self.enemy["hp"] - damage)
-            
-            # Update battle log
-            player_name = self.ctx.author.display_name
-            move_result = battle_cog.format_move_result(
-                f"{player_name}'s {self.player_card['name']}", 
-                self.enemy["name"],
-                damage, 
-                self.enemy["hp"],
-                self.enemy["max_hp"],
-                is_critical,
-                is_effective,
-                is_skill=True,
-                skill_name=self.player_card['skill']
-            )
-            
-            self.battle_log.append(move_result)
-            self.last_move_description = move_result
-            
-            # Check if enemy defeated
-            if self.enemy["hp"] <= 0:
-                await self.end_battle(victor="player")
-                return
-                
-            # Enemy turn
-            await self.enemy_turn()
-            
-            # Increment turn counter
-            self.turn += 1
-            
-            # Regenerate some MP each turn
-            mp_regen = 5
-            self.player_mp = min(self.player_max_mp, self.player_mp + mp_regen)
-            
-            # Update button states
-            self.update_button_states()
-            
-            # Update the battle message
-            await self.update_battle_message(interaction.message)
+            await self.play_round(interaction, "skill")
         
         @ui.button(label="Flee", style=ButtonStyle.secondary, emoji="🏃", custom_id="flee")
         async def flee_button(self, interaction: Interaction, button: ui.Button):
@@ -641,82 +596,8 @@ class DungeonSystem(commands.Cog):
                 
             await interaction.response.defer()
             
-            # 70% chance to flee successfully
-            if random.randint(1, 100) <= 70:
-                self.battle_log.append(f"**{self.ctx.author.display_name} fled from the battle!**")
-                self.last_move_description = f"**{self.ctx.author.display_name} fled from the battle!**"
-                await self.end_battle(victor="flee")
-            else:
-                self.battle_log.append(f"**{self.ctx.author.display_name} tried to flee but couldn't escape!**")
-                self.last_move_description = f"**{self.ctx.author.display_name} tried to flee but couldn't escape!**"
-                
-                # Enemy gets a free attack if flee fails
-                await self.enemy_turn()
-                
-                # Increment turn counter
-                self.turn += 1
-                
-                # Regenerate some MP each turn
-                mp_regen = 5
-                self.player_mp = min(self.player_max_mp, self.player_mp + mp_regen)
-            
-            # Update button states
-            self.update_button_states()
-            
-            # Update the battle message
-            await self.update_battle_message(interaction.message)
-        
-        async def enemy_turn(self):
-            """Execute the enemy's turn."""
-            battle_cog = self.dungeon_cog.bot.get_cog("BattleSystem")
-            
-            # Decide action: 70% normal attack, 30% skill if enough MP
-            use_skill = random.randint(1, 100) <= 30 and self.enemy["mp"] >= self.enemy["mp_cost"]
-            
-            if use_skill:
-                # Use MP
-                self.enemy["mp"] -= self.enemy["mp_cost"]
-                
-                # Enemy uses skill
-                damage, is_critical, is_effective = battle_cog.calculate_damage(
-                    self.enemy, self.player_card, is_skill=True
-                )
-                
-                # Skills do more damage
-                damage = int(damage * 1.5)
-            else:
-                # Regular attack
-                damage, is_critical, is_effective = battle_cog.calculate_damage(
-                    self.enemy, self.player_card, is_skill=False
-                )
-            
-            # Apply damage
-            self.player_hp = max(0, self.player_hp - damage)
-            
-            # Update battle log
-            player_name = self.ctx.author.display_name
-            move_result = battle_cog.format_move_result(
-                self.enemy["name"],
-                f"{player_name}'s {self.player_card['name']}",
-                damage, 
-                self.player_hp,
-                self.player_max_hp,
-                is_critical,
-                is_effective,
-                is_skill=use_skill,
-                skill_name=self.enemy['skill'] if use_skill else None
-            )
-            
-            self.battle_log.append(move_result)
-            self.last_move_description = move_result
-            
-            # Regenerate some enemy MP
-            mp_regen = 5
-            self.enemy["mp"] = min(self.enemy["max_mp"], self.enemy["mp"] + mp_regen)
-            
-            # Check if player defeated
-            if self.player_hp <= 0:
-                await self.end_battle(victor="enemy")
+            # The enemy gets a free attack if flee fails
+            await self.play_round(interaction, "flee")
         
         async def update_battle_message(self, message):
             """Update the battle message with current state."""
@@ -736,7 +617,8 @@ class DungeonSystem(commands.Cog):
                     self.enemy["hp"],
                     self.enemy["max_hp"],
                     self.enemy["mp"],
-                    self.enemy["max_mp"]
+                    self.enemy["max_mp"],
+                    self.enemy
                 ),
                 color=discord.Color.blue()
             )
@@ -750,7 +632,7 @@ class DungeonSystem(commands.Cog):
                 )
             
             # Add turn counter
-            embed.set_footer(text=f"Turn: {self.turn}")
+            embed.set_footer(text=f"Turn: {self.turn} · Seed: {self.rng.seed_value}")
             
             # Update message
             await message.edit(embed=embed, view=self)
@@ -758,6 +640,7 @@ class DungeonSystem(commands.Cog):
         async def end_battle(self, victor):
             """End the battle and handle rewards."""
             self.battle_ended = True
+            logger.info(f"Dungeon battle ended: user={self.ctx.author.id} enemy={self.enemy['name']} victor={victor} turns={self.turn} seed={self.rng.seed_value}")
             
             if victor == "player":
                 # Player won
@@ -777,7 +660,7 @@ class DungeonSystem(commands.Cog):
                 self.parent_view.player_mp = self.player_mp
                 
                 # Update player's MP in database
-                self.dungeon_cog.bot.get_cog("BattleSystem").update_player_mp(self.ctx.author.id, self.player_mp)
+                await self.dungeon_cog.bot.get_cog("BattleSystem").update_player_mp(self.ctx.author.id, self.player_mp)
                 
                 # Create victory embed
                 embed = discord.Embed(
@@ -843,7 +726,7 @@ class DungeonSystem(commands.Cog):
             elif victor == "enemy":
                 # Player lost
                 # Update player's MP in database
-                self.dungeon_cog.bot.get_cog("BattleSystem").update_player_mp(self.ctx.author.id, self.player_mp)
+                await self.dungeon_cog.bot.get_cog("BattleSystem").update_player_mp(self.ctx.author.id, self.player_mp)
                 
                 # Create defeat embed
                 embed = discord.Embed(
@@ -868,7 +751,7 @@ class DungeonSystem(commands.Cog):
             elif victor == "flee":
                 # Player fled
                 # Update player's MP in database
-                self.dungeon_cog.bot.get_cog("BattleSystem").update_player_mp(self.ctx.author.id, self.player_mp)
+                await self.dungeon_cog.bot.get_cog("BattleSystem").update_player_mp(self.ctx.author.id, self.player_mp)
                 
                 # Create flee embed
                 embed = discord.Embed(
@@ -890,19 +773,19 @@ class DungeonSystem(commands.Cog):
     async def start_dungeon_floor(self, ctx, dungeon_id, floor_number):
         """Start a specific floor of a dungeon."""
         # Get dungeon details
-        dungeon_data = self.get_dungeon_details(dungeon_id)
+        dungeon_data = await self.get_dungeon_details(dungeon_id)
         if not dungeon_data:
             await ctx.send(f"{ctx.author.mention}, that dungeon doesn't exist!")
             return None
         
         # Get floor details
-        floor = self.get_dungeon_floor(dungeon_id, floor_number)
+        floor = await self.get_dungeon_floor(dungeon_id, floor_number)
         if not floor:
             await ctx.send(f"{ctx.author.mention}, that floor doesn't exist!")
             return None
         
         # Get player data
-        player_data = self.get_player_data(ctx.author.id)
+        player_data = await self.get_player_data(ctx.author.id)
         if not player_data:
             await ctx.send(f"{ctx.author.mention}, you need to use `!start` first!")
             return None
@@ -916,7 +799,7 @@ class DungeonSystem(commands.Cog):
             return None
         
         # Check player's equipped card
-        player_card = self.get_player_card(ctx.author.id)
+        player_card = await self.get_player_card(player_data["id"])
         if not player_card:
             await ctx.send(f"{ctx.author.mention}, you need to equip a card first! Use `!equip <card_id>`")
             return None
@@ -954,8 +837,11 @@ class DungeonSystem(commands.Cog):
             inline=False
         )
         
+        # Generate enemies for this floor
+        enemies = await self.generate_floor_enemies(dungeon_id, floor_number, player_data["level"])
+        
         # Create dungeon floor view
-        view = self.DungeonFloorView(self, ctx, dungeon_data, floor_number, player_data)
+        view = self.DungeonFloorView(self, ctx, dungeon_data, floor_number, player_data, player_card, enemies)
         
         # Add enemy info
         enemy_info = "Enemies on this floor:\n"
@@ -987,13 +873,13 @@ class DungeonSystem(commands.Cog):
     async def dungeons_command(self, ctx):
         """🏰 View available dungeons to explore"""
         # Get player data
-        player_data = self.get_player_data(ctx.author.id)
+        player_data = await self.get_player_data(ctx.author.id)
         if not player_data:
             await ctx.send(f"{ctx.author.mention}, you need to use `!start` first!")
             return
         
         # Get available dungeons
-        dungeons = self.get_available_dungeons(player_data["level"])
+        dungeons = await self.get_available_dungeons(player_data["level"])
         
         if not dungeons:
             await ctx.send(f"{ctx.author.mention}, there are no dungeons available for your level!")
@@ -1014,7 +900,7 @@ class DungeonSystem(commands.Cog):
             
             for dungeon_id, name, description, anime_series, min_level, floor_count, image_url in chunk:
                 # Get player's highest floor
-                highest_floor = self.get_player_highest_floor(player_data["id"], dungeon_id)
+                highest_floor = await self.get_player_highest_floor(player_data["id"], dungeon_id)
                 
                 # Format progress
                 progress = f"Progress: {highest_floor}/{floor_count} floors"
@@ -1050,7 +936,7 @@ class DungeonSystem(commands.Cog):
             return
         
         # Get player data
-        player_data = self.get_player_data(ctx.author.id)
+        player_data = await self.get_player_data(ctx.author.id)
         if not player_data:
             await ctx.send(f"{ctx.author.mention}, you need to use `!start` first!")
             return
@@ -1060,12 +946,13 @@ class DungeonSystem(commands.Cog):
             await ctx.send(f"{ctx.author.mention}, you need at least 5 stamina to enter a dungeon!")
             return
         
-        # Use stamina
-        new_stamina = player_data["stamina"] - 5
-        self.update_player_stamina(ctx.author.id, new_stamina)
+        # Use stamina (fails if another command spent it since the check above)
+        if not await self.spend_player_stamina(ctx.author.id, 5):
+            await ctx.send(f"{ctx.author.mention}, you need at least 5 stamina to enter a dungeon!")
+            return
         
         # Get dungeon details
-        dungeon_data = self.get_dungeon_details(dungeon_id)
+        dungeon_data = await self.get_dungeon_details(dungeon_id)
         if not dungeon_data:
             await ctx.send(f"{ctx.author.mention}, that dungeon doesn't exist!")
             return
@@ -1081,7 +968,7 @@ class DungeonSystem(commands.Cog):
         # Determine floor to enter
         if floor is None:
             # Get player's highest floor
-            highest_floor = self.get_player_highest_floor(player_data["id"], dungeon_id)
+            highest_floor = await self.get_player_highest_floor(player_data["id"], dungeon_id)
             
             # Start at the next floor or first floor
             floor = min(highest_floor + 1, dungeon_data["floor_count"])
@@ -1094,7 +981,7 @@ class DungeonSystem(commands.Cog):
             return
         
         # Check if floor is accessible
-        highest_floor = self.get_player_highest_floor(player_data["id"], dungeon_id)
+        highest_floor = await self.get_player_highest_floor(player_data["id"], dungeon_id)
         if floor > highest_floor + 1:
             await ctx.send(
                 f"{ctx.author.mention}, you cannot skip floors! "
@@ -1115,13 +1002,13 @@ class DungeonSystem(commands.Cog):
     async def progress_command(self, ctx):
         """🏰 View your dungeon progress"""
         # Get player data
-        player_data = self.get_player_data(ctx.author.id)
+        player_data = await self.get_player_data(ctx.author.id)
         if not player_data:
             await ctx.send(f"{ctx.author.mention}, you need to use `!start` first!")
             return
         
         # Get completed floors
-        self.cursor.execute("""
+        results = await self.aio.fetchall("""
             SELECT d.id, d.name, d.floor_count, MAX(cf.floor_number) as highest_floor
             FROM dungeons d
             LEFT JOIN completed_floors cf ON d.id = cf.dungeon_id AND cf.player_id = ?
@@ -1129,8 +1016,6 @@ class DungeonSystem(commands.Cog):
             ORDER BY d.min_level ASC
         """, (player_data["id"],))
         
-        results = self.cursor.fetchall()
-        
         if not results:
             await ctx.send(f"{ctx.author.mention}, you haven't unlocked any dungeons yet!")
             return
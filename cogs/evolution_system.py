@@ -7,15 +7,20 @@ import discord
 from discord.ext import commands
 import random
 from discord import ui, ButtonStyle, Interaction
+from utils.locks import INTERACTION_TOKENS, interaction_token
+from utils.identity import IDENTITY
+from database import wallet
 
 class EvolutionSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
         self.cursor = self.db.conn.cursor()
+        self.player_state = bot.player_state
+        self.identity = IDENTITY
     
-    def get_user_card(self, user_id, card_id):
-        """Get detailed information about a user's card."""
+    def get_user_card(self, player_id, card_id):
+        """Get detailed information about a user's card (player_id is api_players.id)."""
         self.cursor.execute("""
             SELECT uc.id, c.id AS base_card_id, c.name, uc.level, c.rarity,
                    c.attack, c.defense, c.speed, c.element, c.skill, c.skill_description,
@@ -23,9 +28,8 @@ class EvolutionSystem(commands.Cog):
                    uc.xp, uc.equipped
             FROM api_user_cards uc
             JOIN api_cards c ON uc.card_id = c.id
-            WHERE uc.player_id = (SELECT id FROM api_players WHERE discord_id = ?)
-            AND uc.id = ?
-        """, (user_id, card_id))
+            WHERE uc.player_id = ? AND uc.id = ?
+        """, (player_id, card_id))
         
         card_data = self.cursor.fetchone()
         if not card_data:
@@ -72,14 +76,14 @@ class EvolutionSystem(commands.Cog):
             "equipped": equipped == 1
         }
     
-    def get_player_materials(self, user_id):
-        """Get all materials owned by a player."""
+    def get_player_materials(self, player_id):
+        """Get all materials owned by a player (player_id is api_players.id)."""
         self.cursor.execute("""
             SELECT m.id, m.name, m.description, m.rarity, um.quantity
             FROM user_materials um
             JOIN materials m ON um.material_id = m.id
-            WHERE um.player_id = (SELECT id FROM api_players WHERE discord_id = ?)
-        """, (user_id,))
+            WHERE um.player_id = ?
+        """, (player_id,))
         
         materials = self.cursor.fetchall()
         
@@ -222,10 +226,10 @@ class EvolutionSystem(commands.Cog):
                 "result_card_id": None
             }
     
-    def can_evolve(self, user_id, card_id):
+    def can_evolve(self, player_id, card_id):
         """Check if a card can be evolved based on player's resources."""
         # Get card details
-        card_data = self.get_user_card(user_id, card_id)
+        card_data = self.get_user_card(player_id, card_id)
         if not card_data:
             return False, "Card not found"
         
@@ -244,8 +248,8 @@ class EvolutionSystem(commands.Cog):
         
         # Get player's gold
         self.cursor.execute("""
-            SELECT gold FROM api_players WHERE discord_id = ?
-        """, (user_id,))
+            SELECT gold FROM api_players WHERE id = ?
+        """, (player_id,))
         
         player_gold = self.cursor.fetchone()
         if not player_gold:
@@ -258,7 +262,7 @@ class EvolutionSystem(commands.Cog):
             return False, f"Not enough gold. You need {requirements['gold_cost']} gold"
         
         # Get player's materials
-        player_materials = self.get_player_materials(user_id)
+        player_materials = self.get_player_materials(player_id)
         
         # Convert to dictionary for easy lookup
         player_materials_dict = {material["id"]: material["quantity"] for material in player_materials}
@@ -285,58 +289,49 @@ class EvolutionSystem(commands.Cog):
         
         return True, "Card can be evolved"
     
-    def evolve_card(self, user_id, card_id):
+    def evolve_card(self, player_id, card_id):
         """Evolve a card to the next stage."""
         # Check if card can be evolved
-        can_evolve_result, message = self.can_evolve(user_id, card_id)
+        can_evolve_result, message = self.can_evolve(player_id, card_id)
         if not can_evolve_result:
             return False, message
         
         # Get card details
-        card_data = self.get_user_card(user_id, card_id)
+        card_data = self.get_user_card(player_id, card_id)
         
         # Get evolution requirements
         requirements = self.get_evolution_requirements(card_data["base_card_id"], card_data["evo_stage"])
         
-        # Deduct gold
-        self.cursor.execute("""
-            UPDATE api_players
-            SET gold = gold - ?
-            WHERE discord_id = ?
-        """, (requirements["gold_cost"], user_id))
-        
-        # Deduct materials
-        for material in requirements["materials"]:
-            material_id = material["id"]
-            quantity = material["quantity"]
-            
-            self.cursor.execute("""
-                UPDATE user_materials
-                SET quantity = quantity - ?
-                WHERE player_id = (SELECT id FROM api_players WHERE discord_id = ?)
-                AND material_id = ?
-            """, (quantity, user_id, material_id))
-        
-        # Update card evolution stage
+        # Next evolution stage
         new_evo_stage = card_data["evo_stage"] + 1
         
-        # If there's a specific result card, change the base card
-        if requirements["result_card_id"]:
-            self.cursor.execute("""
-                UPDATE api_user_cards
-                SET card_id = ?, evo_stage = ?
-                WHERE id = ?
-            """, (requirements["result_card_id"], new_evo_stage, card_id))
-        else:
-            # Just update the evolution stage
-            self.cursor.execute("""
-                UPDATE api_user_cards
-                SET evo_stage = ?
-                WHERE id = ?
-            """, (new_evo_stage, card_id))
-        
-        # Commit changes
-        self.db.conn.commit()
+        # Spend gold and every material and evolve the card in one transaction; if anything
+        # ran short since can_evolve (e.g. spent by another command) nothing is applied
+        try:
+            with wallet.transaction(self.db.conn):
+                wallet.spend(self.cursor, "api_gold", player_id, requirements["gold_cost"])
+                
+                for material in requirements["materials"]:
+                    wallet.spend(self.cursor, "material", (player_id, material["id"]), material["quantity"])
+                
+                # If there's a specific result card, change the base card
+                if requirements["result_card_id"]:
+                    self.cursor.execute("""
+                        UPDATE api_user_cards
+                        SET card_id = ?, evo_stage = ?
+                        WHERE id = ?
+                    """, (requirements["result_card_id"], new_evo_stage, card_id))
+                else:
+                    # Just update the evolution stage
+                    self.cursor.execute("""
+                        UPDATE api_user_cards
+                        SET evo_stage = ?
+                        WHERE id = ?
+                    """, (new_evo_stage, card_id))
+        except wallet.InsufficientFunds as e:
+            if e.resource == "material":
+                return False, "Missing materials for this evolution"
+            return False, f"Not enough gold. You need {requirements['gold_cost']} gold"
         
         return True, f"Successfully evolved {card_data['name']} to evolution stage {new_evo_stage}!"
     
@@ -344,15 +339,19 @@ class EvolutionSystem(commands.Cog):
     async def evolution_list_command(self, ctx):
         """🔄 View cards that can be evolved"""
         user_id = ctx.author.id
+        player_id = await self.identity.player_id(user_id)
+        
+        # Card levels are cached; write them back before reading them here
+        await self.player_state.flush_player(user_id)
         
         # Get player's cards
         self.cursor.execute("""
             SELECT uc.id
             FROM api_user_cards uc
             JOIN api_cards c ON uc.card_id = c.id
-            WHERE uc.player_id = (SELECT id FROM api_players WHERE discord_id = ?)
+            WHERE uc.player_id = ?
             ORDER BY uc.level DESC, c.rarity DESC
-        """, (user_id,))
+        """, (player_id,))
         
         card_ids = self.cursor.fetchall()
         
@@ -364,7 +363,7 @@ class EvolutionSystem(commands.Cog):
         evolvable_cards = []
         
         for (card_id,) in card_ids:
-            card_data = self.get_user_card(user_id, card_id)
+            card_data = self.get_user_card(player_id, card_id)
             
             # Skip if at max evolution
             if card_data["evo_stage"] >= card_data["max_evo"]:
@@ -380,7 +379,7 @@ class EvolutionSystem(commands.Cog):
                 continue
             
             # Check if requirements are met (simplified check)
-            can_evolve_result, _ = self.can_evolve(user_id, card_id)
+            can_evolve_result, _ = self.can_evolve(player_id, card_id)
             
             evolvable_cards.append({
                 "card_data": card_data,
@@ -444,15 +443,19 @@ class EvolutionSystem(commands.Cog):
             return
         
         user_id = ctx.author.id
+        player_id = await self.identity.player_id(user_id)
+        
+        # Card levels are cached; write them back before reading them here
+        await self.player_state.flush_player(user_id)
         
         # Get card details
-        card_data = self.get_user_card(user_id, card_id)
+        card_data = self.get_user_card(player_id, card_id)
         if not card_data:
             await ctx.send(f"{ctx.author.mention}, card with ID {card_id} not found in your collection!")
             return
         
         # Check if card can be evolved
-        can_evolve_result, message = self.can_evolve(user_id, card_id)
+        can_evolve_result, message = self.can_evolve(player_id, card_id)
         
         if not can_evolve_result:
             # Create an embed with evolution requirements
@@ -510,14 +513,21 @@ class EvolutionSystem(commands.Cog):
                     await interaction.response.send_message("This is not your evolution!", ephemeral=True)
                     return
                 
+                # A double click sends two interactions; only the first evolves
+                if not INTERACTION_TOKENS.claim(interaction_token(interaction, "evolve")):
+                    await interaction.response.send_message("This evolution is already being processed!", ephemeral=True)
+                    return
+                
                 await interaction.response.defer()
                 
-                # Evolve the card
-                success, message = self.cog.evolve_card(ctx.author.id, self.card_data["id"])
+                # Evolve the card (spends gold, so cached counters are written back first)
+                await self.cog.player_state.flush_player(ctx.author.id)
+                success, message = self.cog.evolve_card(player_id, self.card_data["id"])
+                self.cog.player_state.evict_player(ctx.author.id)
                 
                 if success:
                     # Get updated card data
-                    updated_card = self.cog.get_user_card(ctx.author.id, self.card_data["id"])
+                    updated_card = self.cog.get_user_card(player_id, self.card_data["id"])
                     
                     # Create success embed
                     embed = discord.Embed(
@@ -574,6 +584,11 @@ class EvolutionSystem(commands.Cog):
                     await interaction.response.send_message("This is not your evolution!", ephemeral=True)
                     return
                 
+                # Evolve and Cancel share the token, so only the first press counts
+                if not INTERACTION_TOKENS.claim(interaction_token(interaction, "evolve")):
+                    await interaction.response.send_message("This evolution is already being processed!", ephemeral=True)
+                    return
+                
                 await interaction.response.defer()
                 
                 embed = discord.Embed(
@@ -646,9 +661,13 @@ class EvolutionSystem(commands.Cog):
             return
         
         user_id = ctx.author.id
+        player_id = await self.identity.player_id(user_id)
+        
+        # Card levels are cached; write them back before reading them here
+        await self.player_state.flush_player(user_id)
         
         # Get card details
-        card_data = self.get_user_card(user_id, card_id)
+        card_data = self.get_user_card(player_id, card_id)
         if not card_data:
             await ctx.send(f"{ctx.author.mention}, card with ID {card_id} not found in your collection!")
             return
@@ -691,7 +710,7 @@ class EvolutionSystem(commands.Cog):
         
         # Add gold cost
         # Get player's gold
-        self.cursor.execute("SELECT gold FROM api_players WHERE discord_id = ?", (user_id,))
+        self.cursor.execute("SELECT gold FROM api_players WHERE id = ?", (player_id,))
         player_gold = self.cursor.fetchone()
         player_gold = player_gold[0] if player_gold else 0
         
@@ -705,7 +724,7 @@ class EvolutionSystem(commands.Cog):
         
         # Add material requirements
         material_text = ""
-        player_materials = self.get_player_materials(user_id)
+        player_materials = self.get_player_materials(player_id)
         player_materials_dict = {material["id"]: material["quantity"] for material in player_materials}
         
         for material in requirements["materials"]:
@@ -736,9 +755,13 @@ class EvolutionSystem(commands.Cog):
             return
         
         user_id = ctx.author.id
+        player_id = await self.identity.player_id(user_id)
+        
+        # Card levels are cached; write them back before reading them here
+        await self.player_state.flush_player(user_id)
         
         # Get card details
-        card_data = self.get_user_card(user_id, card_id)
+        card_data = self.get_user_card(player_id, card_id)
         if not card_data:
             await ctx.send(f"{ctx.author.mention}, card with ID {card_id} not found in your collection!")
             return
@@ -757,7 +780,7 @@ class EvolutionSystem(commands.Cog):
         level_cost = int(base_cost * rarity_multiplier.get(card_data["rarity"], 1.0) * card_data["level"])
         
         # Get player's gold
-        self.cursor.execute("SELECT gold FROM api_players WHERE discord_id = ?", (user_id,))
+        self.cursor.execute("SELECT gold FROM api_players WHERE id = ?", (player_id,))
         player_gold = self.cursor.fetchone()
         
         if not player_gold:
@@ -790,29 +813,41 @@ class EvolutionSystem(commands.Cog):
                     await interaction.response.send_message("This is not your card!", ephemeral=True)
                     return
                 
+                # A double click sends two interactions; only the first levels up
+                if not INTERACTION_TOKENS.claim(interaction_token(interaction, "level_up")):
+                    await interaction.response.send_message("This level up is already being processed!", ephemeral=True)
+                    return
+                
                 await interaction.response.defer()
                 
                 # Level up the card
-                # Deduct gold
-                self.cog.cursor.execute("""
-                    UPDATE api_players
-                    SET gold = gold - ?
-                    WHERE discord_id = ?
-                """, (self.level_cost, ctx.author.id))
-                
-                # Increase level
+                await self.cog.player_state.flush_player(ctx.author.id)
                 new_level = self.card_data["level"] + 1
-                self.cog.cursor.execute("""
-                    UPDATE api_user_cards
-                    SET level = ?
-                    WHERE id = ?
-                """, (new_level, self.card_data["id"]))
                 
-                # Commit changes
-                self.cog.db.conn.commit()
+                try:
+                    with wallet.transaction(self.cog.db.conn):
+                        # Deduct gold, only if the player can still afford it
+                        wallet.spend(self.cog.cursor, "api_gold", player_id, self.level_cost)
+                        
+                        # Increase level
+                        self.cog.cursor.execute("""
+                            UPDATE api_user_cards
+                            SET level = ?
+                            WHERE id = ?
+                        """, (new_level, self.card_data["id"]))
+                except wallet.InsufficientFunds:
+                    error_embed = discord.Embed(
+                        title="Level Up Failed",
+                        description=f"You no longer have the {self.level_cost} gold this level up costs.",
+                        color=discord.Color.red()
+                    )
+                    await interaction.message.edit(embed=error_embed, view=None)
+                    return
+                finally:
+                    self.cog.player_state.evict_player(ctx.author.id)
                 
                 # Get updated card data
-                updated_card = self.cog.get_user_card(ctx.author.id, self.card_data["id"])
+                updated_card = self.cog.get_user_card(player_id, self.card_data["id"])
                 
                 # Calculate stat increases
                 attack_increase = updated_card["attack"] - self.card_data["attack"]
@@ -888,6 +923,11 @@ class EvolutionSystem(commands.Cog):
                     await interaction.response.send_message("This is not your card!", ephemeral=True)
                     return
                 
+                # Level Up and Cancel share the token, so only the first press counts
+                if not INTERACTION_TOKENS.claim(interaction_token(interaction, "level_up")):
+                    await interaction.response.send_message("This level up is already being processed!", ephemeral=True)
+                    return
+                
                 await interaction.response.defer()
                 
                 embed = discord.Embed(
@@ -941,10 +981,10 @@ class EvolutionSystem(commands.Cog):
     @commands.command(name="materials")
     async def materials_command(self, ctx):
         """🧪 View your evolution materials"""
-        user_id = ctx.author.id
+        player_id = await self.identity.player_id(ctx.author.id)
         
         # Get player's materials
-        materials = self.get_player_materials(user_id)
+        materials = self.get_player_materials(player_id)
         
         if not materials:
             await ctx.send(f"{ctx.author.mention}, you don't have any evolution materials!")
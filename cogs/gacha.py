@@ -5,6 +5,8 @@ import time
 import asyncio
 from cogs.colorembed import ColorEmbed
 from utils.probability import calculate_gacha_rarity
+from database import wallet
+from utils.locks import user_locked
 
 class Gacha(commands.Cog):
     def __init__(self, bot):
@@ -24,15 +26,10 @@ class Gacha(commands.Cog):
         result = self.cursor.fetchone()
         return result[0] if result else 0
     
-    def reduce_pack_quantity(self, user_id, pack_type):
-        """Reduces the quantity of a specific pack by 1."""
-        self.cursor.execute("""
-            UPDATE user_items 
-            SET quantity = quantity - 1
-            WHERE user_id = ? AND item_id IN (
-                SELECT id FROM items WHERE effect = ? AND type = 'pack'
-            )
-        """, (user_id, pack_type))
+    def reduce_pack_quantity(self, user_id, pack_type, amount=1):
+        """Reduces the quantity of a specific pack; returns False (reducing nothing) if the user has too few."""
+        if not wallet.try_spend(self.cursor, "pack", (user_id, pack_type), amount):
+            return False
         
         # Clean up if quantity reaches 0
         self.cursor.execute("""
@@ -41,6 +38,7 @@ class Gacha(commands.Cog):
         """, (user_id,))
         
         self.db.conn.commit()
+        return True
     
     def get_card_pool(self, rarity=None):
         """Returns a list of cards filtered by rarity if specified."""
@@ -86,6 +84,7 @@ class Gacha(commands.Cog):
         return self.cursor.lastrowid
     
     @commands.command(name="gacha")
+    @user_locked
     async def gacha_command(self, ctx, pack_type: str = None):
         """Pull a random card from a gacha pack"""
         if not pack_type:
@@ -120,22 +119,17 @@ class Gacha(commands.Cog):
             
             cost = cost_result[0]
             
-            # Check if user has enough gold
-            self.cursor.execute("SELECT gold FROM players WHERE user_id = ?", (user_id,))
-            gold_result = self.cursor.fetchone()
-            
-            if not gold_result or gold_result[0] < cost:
+            # Deduct gold instead, only if the user can afford it
+            if not wallet.try_spend(self.cursor, "gold", user_id, cost):
                 await ctx.send(f"{ctx.author.mention}, you don't own any {pack_type} packs and don't have enough gold to buy one! Use `!shop` to see prices.")
                 return
-            
-            # Deduct gold instead
-            self.cursor.execute("UPDATE players SET gold = gold - ? WHERE user_id = ?", (cost, user_id))
             self.db.conn.commit()
             
             await ctx.send(f"{ctx.author.mention} spent {cost} gold on a {pack_type.capitalize()} Pack!")
-        else:
-            # Use an existing pack
-            self.reduce_pack_quantity(user_id, pack_type)
+        elif not self.reduce_pack_quantity(user_id, pack_type):
+            # Used up by another command since the ownership check
+            await ctx.send(f"{ctx.author.mention}, you don't have any {pack_type} packs left!")
+            return
         
         # Loading message with animation
         loading_msg = await ctx.send("🎴 **Opening pack**...")
@@ -208,6 +202,7 @@ class Gacha(commands.Cog):
         await loading_msg.edit(content=None, embed=embed)
     
     @commands.command(name="multidraw", aliases=["multi"])
+    @user_locked
     async def multi_draw_command(self, ctx, pack_type: str = None, amount: int = 10):
         """Draw multiple cards at once (up to 10)"""
         if not pack_type:
@@ -275,14 +270,16 @@ class Gacha(commands.Cog):
                 packs_to_buy = amount - packs_to_use
                 gold_needed = packs_to_buy * pack_cost
         
-        # Deduct packs and gold
-        if packs_to_use > 0:
-            for _ in range(packs_to_use):
-                self.reduce_pack_quantity(user_id, pack_type)
-        
-        if gold_needed > 0:
-            self.cursor.execute("UPDATE players SET gold = gold - ? WHERE user_id = ?", (gold_needed, user_id))
-            self.db.conn.commit()
+        # Deduct packs and gold together; if either falls short (e.g. spent by another
+        # command since the checks above) neither is deducted
+        try:
+            with wallet.transaction(self.db.conn):
+                wallet.spend(self.cursor, "pack", (user_id, pack_type), packs_to_use)
+                wallet.spend(self.cursor, "gold", user_id, gold_needed)
+                self.cursor.execute("DELETE FROM user_items WHERE user_id = ? AND quantity <= 0", (user_id,))
+        except wallet.InsufficientFunds:
+            await ctx.send(f"{ctx.author.mention}, you don't have enough packs or gold for this draw!")
+            return
         
         # Loading message
         loading_msg = await ctx.send(f"🎴 **Opening {amount} {pack_type.capitalize()} Packs**...")
@@ -9,12 +9,24 @@ import random
 import asyncio
 from discord import ui, ButtonStyle, Interaction
 import time
+import logging
+
+from utils.sampler import AliasSampler
+from utils.rng import new_stream
+from utils.locks import INTERACTION_TOKENS, interaction_token, user_locked
+from utils.identity import IDENTITY
+from database import wallet
+from database.search import search_filter, search_table
+
+logger = logging.getLogger('bot.gacha_system')
 
 class GachaSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
-        self.cursor = self.db.conn.cursor()
+        self.aio = self.db.aio
+        self.catalog = bot.catalog
+        self.identity = IDENTITY
         
         # Chest tiers with their costs and probabilities
         self.chest_tiers = {
@@ -75,91 +87,58 @@ class GachaSystem(commands.Cog):
             "epic": 50,    # 50% chance to get a material
             "legendary": 75  # 75% chance to get a material
         }
+        
+        # Compile the rarity and material drop rolls once
+        self.rarity_samplers = {
+            tier: AliasSampler.from_weights(details["probabilities"])
+            for tier, details in self.chest_tiers.items()
+        }
+        self.material_drop_samplers = {
+            tier: AliasSampler.chance(chance / 100)
+            for tier, chance in self.material_drop_chances.items()
+        }
+        
+        # Multi-pull bundle sizes (10 is the regular multi-pull, larger ones are event bundles)
+        self.bundle_sizes = [10, 50, 100]
     
-    def get_player_gold(self, user_id):
+    async def get_player_gold(self, user_id):
         """Get player's current gold amount."""
-        self.cursor.execute("SELECT gold FROM api_players WHERE discord_id = ?", (user_id,))
-        result = self.cursor.fetchone()
-        
-        if not result:
-            return 0
-            
-        return result[0]
+        return await self.aio.fetchval(
+            "SELECT gold FROM api_players WHERE discord_id = ?", (user_id,), default=0
+        )
     
-    def deduct_gold(self, user_id, amount):
-        """Deduct gold from player."""
-        current_gold = self.get_player_gold(user_id)
-        
-        if current_gold < amount:
-            return False
-            
-        self.cursor.execute("""
-            UPDATE api_players
-            SET gold = gold - ?
-            WHERE discord_id = ?
-        """, (amount, user_id))
-        
-        self.db.conn.commit()
-        return True
+    async def deduct_gold(self, player_id, amount):
+        """Deduct gold from player (by api_players.id); returns False (deducting nothing) if they can't afford it."""
+        return await wallet.try_spend_async(self.aio, "api_gold", player_id, amount)
     
-    def get_random_card_by_rarity(self, rarity, series=None):
+    async def get_random_card_by_rarity(self, rarity, series=None, rng=None):
         """Get a random card of the specified rarity, optionally from a specific series."""
-        if series:
-            # Get a card from specific series
-            self.cursor.execute("""
-                SELECT id, name, attack, defense, speed, rarity, element, skill, skill_description,
-                       image_url, mp_cost, anime_series
-                FROM api_cards
-                WHERE rarity = ? AND anime_series = ?
-                ORDER BY RANDOM()
-                LIMIT 1
-            """, (rarity, series))
-        else:
-            # Get any card of this rarity
-            self.cursor.execute("""
-                SELECT id, name, attack, defense, speed, rarity, element, skill, skill_description,
-                       image_url, mp_cost, anime_series
-                FROM api_cards
-                WHERE rarity = ?
-                ORDER BY RANDOM()
-                LIMIT 1
-            """, (rarity,))
-        
-        card = self.cursor.fetchone()
+        # Picked from the in-memory catalog instead of sorting api_cards
+        card = self.catalog.random_card(rarity, series, rng)
         
         if not card:
             # Fallback to any card if no card of the specified rarity exists
-            self.cursor.execute("""
-                SELECT id, name, attack, defense, speed, rarity, element, skill, skill_description,
-                       image_url, mp_cost, anime_series
-                FROM api_cards
-                ORDER BY RANDOM()
-                LIMIT 1
-            """)
-            card = self.cursor.fetchone()
+            card = self.catalog.random_card(rng=rng)
         
         if not card:
             return None
-            
-        # Extract data
-        card_id, name, attack, defense, speed, rarity, element, skill, skill_desc, image_url, mp_cost, anime_series = card
         
         return {
-            "id": card_id,
-            "name": name,
-            "attack": attack,
-            "defense": defense,
-            "speed": speed,
-            "rarity": rarity,
-            "element": element,
-            "skill": skill,
-            "skill_description": skill_desc,
-            "image_url": image_url,
-            "mp_cost": mp_cost,
-            "anime_series": anime_series
+            "id": card["id"],
+            "name": card["name"],
+            "attack": card["attack"],
+            "defense": card["defense"],
+            "speed": card["speed"],
+            "rarity": card["rarity"],
+            "element": card["element"],
+            "skill": card["skill"],
+            "skill_description": card["skill_description"],
+            "image_url": card["image_url"],
+            "mp_cost": card.get("mp_cost"),
+            "anime_series": card.get("anime_series")
         }
     
-    def get_random_material(self, chest_tier):
+    async def get_random_material(self, chest_tier, rng=None):
         """Get a random material based on chest tier."""
         # Material rarities by chest tier
         material_rarities = {
@@ -173,22 +152,10 @@ class GachaSystem(commands.Cog):
         rarities = material_rarities.get(chest_tier, ["Common"])
         
         # Get a random material of eligible rarity
-        rarity_placeholders = ", ".join(["?"] * len(rarities))
-        
-        self.cursor.execute(f"""
-            SELECT id, name, description, rarity
-            FROM materials
-            WHERE rarity IN ({rarity_placeholders})
-            ORDER BY RANDOM()
-            LIMIT 1
-        """, rarities)
-        
-        material = self.cursor.fetchone()
+        material = self.catalog.random_material(rarities, rng)
         
         if not material:
             return None
-            
-        material_id, name, description, rarity = material
         
         # Determine quantity based on rarity
         rarity_quantities = {
@@ -198,161 +165,151 @@ class GachaSystem(commands.Cog):
             "Epic": (1, 1)
         }
         
-        min_qty, max_qty = rarity_quantities.get(rarity, (1, 1))
-        quantity = random.randint(min_qty, max_qty)
+        min_qty, max_qty = rarity_quantities.get(material["rarity"], (1, 1))
+        material["quantity"] = (rng or random).randint(min_qty, max_qty)
         
-        return {
-            "id": material_id,
-            "name": name,
-            "description": description,
-            "rarity": rarity,
-            "quantity": quantity
-        }
+        return material
     
-    def add_card_to_player(self, user_id, card_id):
-        """Add a card to player's collection."""
-        # Get player ID
-        self.cursor.execute("SELECT id FROM api_players WHERE discord_id = ?", (user_id,))
-        player_result = self.cursor.fetchone()
-        
-        if not player_result:
-            return False
-            
-        player_id = player_result[0]
-        
+    async def add_card_to_player(self, player_id, card_id):
+        """Add a card to player's collection (player_id is api_players.id)."""
         # Add card to player's collection
-        self.cursor.execute("""
+        cursor = await self.aio.execute("""
             INSERT INTO api_user_cards (player_id, card_id, level, xp, equipped, evo_stage)
             VALUES (?, ?, 1, 0, 0, 1)
         """, (player_id, card_id))
         
-        self.db.conn.commit()
-        
-        # Get the ID of the newly inserted card
-        self.cursor.execute("SELECT last_insert_rowid()")
-        user_card_id = self.cursor.fetchone()[0]
-        
-        return user_card_id
+        # ID of the newly inserted card
+        return cursor.lastrowid
     
-    def add_material_to_player(self, user_id, material_id, quantity):
-        """Add materials to player's inventory."""
-        # Get player ID
-        self.cursor.execute("SELECT id FROM api_players WHERE discord_id = ?", (user_id,))
-        player_result = self.cursor.fetchone()
-        
-        if not player_result:
-            return False
-            
-        player_id = player_result[0]
-        
-        # Check if player already has this material
-        self.cursor.execute("""
-            SELECT id, quantity FROM user_materials
-            WHERE player_id = ? AND material_id = ?
-        """, (player_id, material_id))
+    async def add_material_to_player(self, player_id, material_id, quantity):
+        """Add materials to player's inventory (player_id is api_players.id)."""
+        # Add to the existing stack or start a new one
+        await self.aio.execute("""
+            INSERT INTO user_materials (player_id, material_id, quantity)
+            VALUES (?, ?, ?)
+            ON CONFLICT (player_id, material_id)
+            DO UPDATE SET quantity = quantity + excluded.quantity
+        """, (player_id, material_id, quantity))
         
-        existing_material = self.cursor.fetchone()
-        
-        if existing_material:
-            # Update quantity
-            material_id, current_quantity = existing_material
-            new_quantity = current_quantity + quantity
-            
-            self.cursor.execute("""
-                UPDATE user_materials
-                SET quantity = ?
-                WHERE id = ?
-            """, (new_quantity, material_id))
-        else:
-            # Insert new material
-            self.cursor.execute("""
-                INSERT INTO user_materials (player_id, material_id, quantity)
-                VALUES (?, ?, ?)
-            """, (player_id, material_id, quantity))
-        
-        self.db.conn.commit()
         return True
     
-    def open_chest(self, user_id, chest_tier, multi_pull=False):
-        """Open a gacha chest and get cards/materials."""
+    async def open_chest(self, user_id, chest_tier, multi_pull=False, num_pulls=None, seed=None):
+        """Open a gacha chest and get cards/materials.
+        
+        Every pull is rolled in memory first and then written in a single
+        transaction (gold, cards and materials together), so an N-pull costs
+        one commit no matter how large N is and never half-applies.
+        
+        All rolls come from one seeded stream; the seed is returned with the
+        result (and logged) so the chest can be replayed with seed=.
+        """
         # Validate chest tier
         if chest_tier not in self.chest_tiers:
             return {"success": False, "message": f"Invalid chest tier: {chest_tier}"}
         
-        # Get chest details
-        chest = self.chest_tiers[chest_tier]
+        # Number of pulls: explicit bundle size, a 10-pull, or a single pull
+        if num_pulls is None:
+            num_pulls = 10 if multi_pull else 1
+        if num_pulls < 1:
+            return {"success": False, "message": "You need to pull at least once."}
         
-        # Determine cost (discount for multi-pull)
-        num_pulls = 10 if multi_pull else 1
-        total_cost = chest["cost"] * num_pulls
-        if multi_pull:
-            # 10% discount for multi-pull
-            total_cost = int(total_cost * 0.9)
+        # Determine cost (discount for multi-pulls)
+        total_cost = self.get_chest_cost(chest_tier, num_pulls)
         
-        # Check if player has enough gold
-        if not self.deduct_gold(user_id, total_cost):
+        # Resolve the player once for the whole chest
+        player_id = await self.identity.player_id(user_id)
+        if not player_id:
             return {"success": False, "message": f"Not enough gold! You need {total_cost} gold."}
         
-        # Perform pulls
+        # Pick up catalog changes once per chest, not once per pull
+        await self.catalog.refresh_if_stale()
+        
+        # Roll every pull in memory: rarities and material drops in bulk
+        rng = new_stream(seed)
         pulls = []
         materials = []
+        rarities = self.rarity_samplers[chest_tier].sample(num_pulls, rng)
+        material_drops = self.material_drop_samplers[chest_tier].sample(num_pulls, rng)
         
-        for _ in range(num_pulls):
-            # Determine pull rarity
-            rarity = self.determine_pull_rarity(chest_tier)
-            
+        for rarity, material_drop in zip(rarities, material_drops):
             # Get a random card of this rarity
-            card = self.get_random_card_by_rarity(rarity)
+            card = await self.get_random_card_by_rarity(rarity, rng=rng)
             
             if not card:
                 continue
-                
-            # Add card to player
-            user_card_id = self.add_card_to_player(user_id, card["id"])
             
-            if not user_card_id:
-                continue
-                
-            card["user_card_id"] = user_card_id
             pulls.append(card)
             
             # Check for material drop
-            material_chance = self.material_drop_chances.get(chest_tier, 0)
-            if random.randint(1, 100) <= material_chance:
-                material = self.get_random_material(chest_tier)
+            if material_drop:
+                material = await self.get_random_material(chest_tier, rng)
                 
                 if material:
-                    self.add_material_to_player(user_id, material["id"], material["quantity"])
                     materials.append(material)
         
+        # Merge material drops into one stack update per material
+        material_totals = {}
+        for material in materials:
+            material_totals[material["id"]] = material_totals.get(material["id"], 0) + material["quantity"]
+        
+        # Write gold, cards and materials atomically; the guarded gold spend keeps two chests from overdrawing
+        def write_chest(tx):
+            if not wallet.try_spend(tx.cursor, "api_gold", player_id, total_cost):
+                return False
+            
+            if pulls:
+                tx.executemany("""
+                    INSERT INTO api_user_cards (player_id, card_id, level, xp, equipped, evo_stage)
+                    VALUES (?, ?, 1, 0, 0, 1)
+                """, [(player_id, card["id"]) for card in pulls])
+                
+                # We hold the only writer, so the newest rows are exactly ours
+                rows = tx.fetchall("""
+                    SELECT id FROM api_user_cards
+                    WHERE player_id = ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                """, (player_id, len(pulls)))
+                
+                for card, (user_card_id,) in zip(pulls, reversed(rows)):
+                    card["user_card_id"] = user_card_id
+            
+            if material_totals:
+                tx.executemany("""
+                    INSERT INTO user_materials (player_id, material_id, quantity)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (player_id, material_id)
+                    DO UPDATE SET quantity = quantity + excluded.quantity
+                """, [(player_id, material_id, quantity) for material_id, quantity in material_totals.items()])
+            return True
+        
+        if not await self.aio.transaction(write_chest):
+            return {"success": False, "message": f"Not enough gold! You need {total_cost} gold."}
+        
+        logger.info(f"Chest opened: user={user_id} tier={chest_tier} pulls={num_pulls} seed={rng.seed_value}")
+        
         return {
             "success": True,
             "cost": total_cost,
             "pulls": pulls,
-            "materials": materials
+            "materials": materials,
+            "seed": rng.seed_value
         }
     
-    def determine_pull_rarity(self, chest_tier):
+    def get_chest_cost(self, chest_tier, num_pulls=1):
+        """Get the gold cost of opening a chest num_pulls times."""
+        total_cost = self.chest_tiers[chest_tier]["cost"] * num_pulls
+        if num_pulls >= 10:
+            # 10% discount for multi-pull
+            total_cost = int(total_cost * 0.9)
+        return total_cost
+    
+    def determine_pull_rarity(self, chest_tier, rng=None):
         """Determine the rarity of a pull based on chest tier probabilities."""
-        probabilities = self.chest_tiers[chest_tier]["probabilities"]
-        
-        # Sum probabilities to ensure they add up to 100
-        total_prob = sum(probabilities.values())
-        
-        # Generate a random number between 1 and total_prob
-        rand = random.randint(1, total_prob)
-        
-        # Determine which rarity was rolled
-        cumulative = 0
-        for rarity, prob in probabilities.items():
-            cumulative += prob
-            if rand <= cumulative:
-                return rarity
-        
-        # Fallback to common
-        return "Common"
+        return self.rarity_samplers[chest_tier].draw(rng)
     
     @commands.command(name="gacha", aliases=["pull"])
+    @user_locked
     async def gacha_command(self, ctx, chest_tier: str = None):
         """🎮 Pull a random card from the gacha system"""
         if chest_tier is None:
@@ -364,7 +321,7 @@ class GachaSystem(commands.Cog):
             )
             
             # Get player's gold
-            gold = self.get_player_gold(ctx.author.id)
+            gold = await self.get_player_gold(ctx.author.id)
             
             embed.add_field(
                 name="Your Gold",
@@ -418,7 +375,7 @@ class GachaSystem(commands.Cog):
         await asyncio.sleep(1)
         
         # Open the chest
-        result = self.open_chest(ctx.author.id, chest_tier)
+        result = await self.open_chest(ctx.author.id, chest_tier)
         
         if not result["success"]:
             # Failed to open chest
@@ -509,18 +466,24 @@ class GachaSystem(commands.Cog):
         await message.edit(embed=result_embed)
     
     @commands.command(name="multi_gacha", aliases=["multipull"])
-    async def multi_gacha_command(self, ctx, chest_tier: str = None):
-        """🎮 Pull 10 random cards from the gacha system with a discount"""
+    async def multi_gacha_command(self, ctx, chest_tier: str = None, num_pulls: int = 10):
+        """🎮 Pull 10 (or 50/100) random cards from the gacha system with a discount"""
+        # Check bundle size
+        if num_pulls not in self.bundle_sizes:
+            sizes = ", ".join(str(size) for size in self.bundle_sizes)
+            await ctx.send(f"{ctx.author.mention}, invalid number of pulls! Available bundles are: {sizes}")
+            return
+        
         if chest_tier is None:
             # Show available chest tiers
             embed = discord.Embed(
-                title="Multi-Gacha (10 Pulls)",
-                description="Choose a chest tier for 10 pulls (10% discount):",
+                title=f"Multi-Gacha ({num_pulls} Pulls)",
+                description=f"Choose a chest tier for {num_pulls} pulls (10% discount):",
                 color=discord.Color.gold()
             )
             
             # Get player's gold
-            gold = self.get_player_gold(ctx.author.id)
+            gold = await self.get_player_gold(ctx.author.id)
             
             embed.add_field(
                 name="Your Gold",
@@ -531,14 +494,14 @@ class GachaSystem(commands.Cog):
             # Add chest tiers
             for tier, details in self.chest_tiers.items():
                 # Calculate discounted cost
-                discounted_cost = int(details["cost"] * 10 * 0.9)
+                discounted_cost = self.get_chest_cost(tier, num_pulls)
                 
                 # Format probabilities
                 probs = "\n".join([f"{rarity}: {prob}%" for rarity, prob in details["probabilities"].items() if prob > 0])
                 
                 embed.add_field(
                     name=f"{details['icon']} {tier.capitalize()} Chest - {discounted_cost} Gold",
-                    value=f"{details['description']}\n**Probabilities:**\n{probs}\nUse `!multi_gacha {tier}` to pull",
+                    value=f"{details['description']}\n**Probabilities:**\n{probs}\nUse `!multi_gacha {tier} {num_pulls}` to pull",
                     inline=False
                 )
             
@@ -555,11 +518,10 @@ class GachaSystem(commands.Cog):
             return
         
         # Calculate cost
-        chest_cost = self.chest_tiers[chest_tier]["cost"]
-        discounted_cost = int(chest_cost * 10 * 0.9)
+        discounted_cost = self.get_chest_cost(chest_tier, num_pulls)
         
         # Check if player has enough gold
-        current_gold = self.get_player_gold(ctx.author.id)
+        current_gold = await self.get_player_gold(ctx.author.id)
         if current_gold < discounted_cost:
             await ctx.send(f"{ctx.author.mention}, you don't have enough gold! You need {discounted_cost} gold but only have {current_gold}.")
             return
@@ -567,7 +529,7 @@ class GachaSystem(commands.Cog):
         # Confirm multi-pull
         confirm_embed = discord.Embed(
             title="Multi-Gacha Confirmation",
-            description=f"Are you sure you want to spend **{discounted_cost} gold** for 10 pulls from {chest_tier.capitalize()} chest?",
+            description=f"Are you sure you want to spend **{discounted_cost} gold** for {num_pulls} pulls from {chest_tier.capitalize()} chest?",
             color=discord.Color.blue()
         )
         
@@ -596,12 +558,17 @@ class GachaSystem(commands.Cog):
                     await interaction.response.send_message("This is not your gacha pull!", ephemeral=True)
                     return
                 
+                # A double click sends two interactions; only the first opens the chests
+                if not INTERACTION_TOKENS.claim(interaction_token(interaction, "multi_gacha")):
+                    await interaction.response.send_message("These chests are already being opened!", ephemeral=True)
+                    return
+                
                 await interaction.response.defer()
                 
                 # Create "chest opening" animation
                 opening_embed = discord.Embed(
                     title="🎮 Opening Multiple Chests...",
-                    description=f"Opening 10 {chest_tier.capitalize()} chests...",
+                    description=f"Opening {num_pulls} {chest_tier.capitalize()} chests...",
                     color=discord.Color.blue()
                 )
                 
@@ -610,18 +577,18 @@ class GachaSystem(commands.Cog):
                 # Simulate opening animation
                 await asyncio.sleep(1)
                 
-                opening_embed.description = f"Opening 10 {chest_tier.capitalize()} chests...\n⚡ Gathering energy..."
+                opening_embed.description = f"Opening {num_pulls} {chest_tier.capitalize()} chests...\n⚡ Gathering energy..."
                 await interaction.message.edit(embed=opening_embed)
                 
                 await asyncio.sleep(1)
                 
-                opening_embed.description = f"Opening 10 {chest_tier.capitalize()} chests...\n⚡ Gathering energy...\n✨ Summoning cards..."
+                opening_embed.description = f"Opening {num_pulls} {chest_tier.capitalize()} chests...\n⚡ Gathering energy...\n✨ Summoning cards..."
                 await interaction.message.edit(embed=opening_embed)
                 
                 await asyncio.sleep(1)
                 
                 # Open the chests
-                result = self.cog.open_chest(ctx.author.id, chest_tier, multi_pull=True)
+                result = await self.cog.open_chest(ctx.author.id, chest_tier, num_pulls=num_pulls)
                 
                 if not result["success"]:
                     # Failed to open chest
@@ -649,13 +616,13 @@ class GachaSystem(commands.Cog):
                     await interaction.message.edit(embed=error_embed)
                     return
                 
-                # Create embeds for each card (maximum 10)
+                # Create embeds for each card
                 embeds = []
                 
                 # Add summary embed
                 summary_embed = discord.Embed(
                     title="🎮 Multi-Gacha Results",
-                    description=f"You spent **{result['cost']} gold** on 10 {chest_tier.capitalize()} chests!",
+                    description=f"You spent **{result['cost']} gold** on {num_pulls} {chest_tier.capitalize()} chests!",
                     color=discord.Color.gold()
                 )
                 
@@ -753,6 +720,11 @@ class GachaSystem(commands.Cog):
                     await interaction.response.send_message("This is not your gacha pull!", ephemeral=True)
                     return
                 
+                # Confirm and Cancel share the token, so only the first press counts
+                if not INTERACTION_TOKENS.claim(interaction_token(interaction, "multi_gacha")):
+                    await interaction.response.send_message("These chests are already being opened!", ephemeral=True)
+                    return
+                
                 await interaction.response.defer()
                 
                 cancel_embed = discord.Embed(
@@ -769,38 +741,41 @@ class GachaSystem(commands.Cog):
     
     @commands.command(name="cardlist")
     async def cardlist_command(self, ctx, anime_series: str = None, rarity: str = None):
-        """📋 View all available cards in the database"""
+        """📋 View all available cards in the database (the series filter also searches names, skills and elements)"""
         # Normalize parameters
-        if anime_series:
-            anime_series = anime_series.title()
-        
         if rarity:
             rarity = rarity.capitalize()
         
         # Build query based on filters
         query = """
-            SELECT id, name, rarity, element, anime_series
-            FROM api_cards
+            SELECT c.id, c.name, c.rarity, c.element, c.anime_series
+            FROM api_cards c
         """
         
         params = []
         where_clauses = []
+        order = "c.anime_series, c.rarity, c.name"
         
         if anime_series:
-            where_clauses.append("anime_series = ?")
-            params.append(anime_series)
+            # Ranked trigram search instead of an exact series match
+            where, search_params, rank, rank_params = search_filter("api_card_search", anime_series, alias="s")
+            query += f" JOIN {search_table('api_card_search')} s ON s.rowid = c.id"
+            where_clauses.append(where)
+            params.extend(search_params)
+            order = rank
         
         if rarity:
-            where_clauses.append("rarity = ?")
+            where_clauses.append("c.rarity = ?")
             params.append(rarity)
         
         if where_clauses:
             query += " WHERE " + " AND ".join(where_clauses)
         
-        query += " ORDER BY anime_series, rarity, name"
+        query += f" ORDER BY {order}"
+        if anime_series:
+            params.extend(rank_params)
         
-        self.cursor.execute(query, params)
-        cards = self.cursor.fetchall()
+        cards = await self.aio.fetchall(query, params)
         
         if not cards:
             await ctx.send(f"{ctx.author.mention}, no cards found with the specified filters!")
@@ -877,7 +852,7 @@ class GachaSystem(commands.Cog):
         )
         
         # Get player's gold
-        gold = self.get_player_gold(ctx.author.id)
+        gold = await self.get_player_gold(ctx.author.id)
         
         embed.add_field(
             name="Your Gold",
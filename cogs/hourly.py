@@ -8,6 +8,9 @@ from discord.ext import commands
 import time
 import random
 
+from utils import regen
+from utils.locks import user_locked
+
 class Hourly(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -39,29 +42,30 @@ class Hourly(commands.Cog):
             return f"{secs}s"
     
     @commands.command(name="hourly")
+    @user_locked
     async def hourly_command(self, ctx):
         """⏱️ Claim hourly stamina reward (30 stamina every hour)"""
         user_id = ctx.author.id
         
         # Check if player has a profile
-        self.cursor.execute("SELECT id, stamina, max_stamina, last_hourly FROM api_players WHERE discord_id = ?", (user_id,))
+        self.cursor.execute("SELECT id, last_hourly FROM api_players WHERE discord_id = ?", (user_id,))
         player = self.cursor.fetchone()
         
         if not player:
             await ctx.send(f"{ctx.author.mention}, you need to use `!start` first!")
             return
             
-        player_id, stamina, max_stamina, last_hourly = player
-        
-        # Default last_hourly to 0 if NULL
-        last_hourly = last_hourly or 0
+        player_id, last_hourly = player
         
-        # Check if on cooldown
-        time_remaining = self.get_time_remaining(last_hourly)
+        # Check if on cooldown (NULL counts as never claimed)
+        time_remaining = self.get_time_remaining(last_hourly or 0)
         
         if time_remaining > 0:
             formatted_time = self.format_time(time_remaining)
             
+            # Stamina regenerates over time; read it from the player state cache
+            state = await self.bot.player_state.get("api_players", user_id)
+            
             embed = discord.Embed(
                 title="Hourly Cooldown",
                 description=f"You need to wait **{formatted_time}** to claim your hourly reward!",
@@ -71,13 +75,29 @@ class Hourly(commands.Cog):
             # Add current stamina
             embed.add_field(
                 name="Current Stamina",
-                value=f"{stamina}/{max_stamina}",
+                value=f"{regen.current(state, 'stamina')}/{state['max_stamina']}",
                 inline=False
             )
             
             await ctx.send(embed=embed)
             return
         
+        # Claim the reward before anything awaits: only one of two overlapping
+        # !hourly calls still finds the last_hourly it read
+        now = int(time.time())
+        self.cursor.execute("UPDATE api_players SET last_hourly = ? WHERE discord_id = ? AND last_hourly IS ?",
+                            (now, user_id, last_hourly))
+        claimed = self.cursor.rowcount == 1
+        self.db.conn.commit()
+        
+        if not claimed:
+            await ctx.send(f"{ctx.author.mention}, you've already claimed your hourly reward!")
+            return
+        
+        # Stamina regenerates over time; read it from the player state cache
+        state = await self.bot.player_state.get("api_players", user_id)
+        stamina, max_stamina = regen.current(state, "stamina", now=now), state["max_stamina"]
+        
         # Give reward (30 stamina)
         reward_stamina = 30
         
@@ -85,13 +105,8 @@ class Hourly(commands.Cog):
         new_stamina = min(max_stamina, stamina + reward_stamina)
         wasted_stamina = (stamina + reward_stamina) - new_stamina if stamina + reward_stamina > max_stamina else 0
         
-        # Update stamina and last_hourly
-        now = int(time.time())
-        self.cursor.execute(
-            "UPDATE api_players SET stamina = ?, last_hourly = ? WHERE discord_id = ?",
-            (new_stamina, now, user_id)
-        )
-        self.db.conn.commit()
+        # Update stamina (written back with the next state flush)
+        state.update(regen.settle(state, "stamina", value=new_stamina, now=now))
         
         # Create reward embed
         embed = discord.Embed(
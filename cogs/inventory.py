@@ -2,6 +2,8 @@ import discord
 from discord.ext import commands
 import math
 
+from database.search import search_filter, search_table
+
 class Inventory(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -182,17 +184,19 @@ class Inventory(commands.Cog):
 
     @commands.command(name="search")
     async def search_command(self, ctx, *, search_term: str):
-        """Search for cards in your collection by name or rarity"""
+        """Search for cards in your collection by name, skill, element or rarity"""
         user_id = ctx.author.id
         search_term = search_term.lower()
 
-        # Search for cards matching the term
-        self.cursor.execute("""
-            SELECT id, name, rarity, level, attack, defense, speed, element, equipped
-            FROM usercards
-            WHERE user_id = ? AND (LOWER(name) LIKE ? OR LOWER(rarity) LIKE ? OR LOWER(element) LIKE ?)
-            ORDER BY level DESC, rarity DESC, id ASC
-        """, (user_id, f"%{search_term}%", f"%{search_term}%", f"%{search_term}%"))
+        # Search for cards matching the term (trigram index, best matches first)
+        where, params, rank, rank_params = search_filter("usercard_search", search_term, alias="s")
+        self.cursor.execute(f"""
+            SELECT uc.id, uc.name, uc.rarity, uc.level, uc.attack, uc.defense, uc.speed, uc.element, uc.equipped
+            FROM {search_table('usercard_search')} s
+            JOIN usercards uc ON uc.id = s.rowid
+            WHERE uc.user_id = ? AND {where}
+            ORDER BY {rank}, uc.level DESC, uc.id ASC
+        """, [user_id, *params, *rank_params])
         
         cards = self.cursor.fetchall()
 
@@ -3,11 +3,15 @@ from discord.ext import commands
 import time
 import math
 
+from utils import regen
+from utils.identity import IDENTITY
+
 class Player(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
         self.cursor = self.db.conn.cursor()
+        self.identity = IDENTITY
 
     @commands.command(name="profile")
     async def profile_command(self, ctx, member: discord.Member = None):
@@ -33,6 +37,11 @@ class Player(commands.Cog):
 
         gold, diamonds, level, xp, stamina, max_stamina, mp, max_mp, about, wins, losses, pvp_wins, pvp_losses, boss_wins = player
         
+        # Stamina and MP regenerate over time and may not be flushed yet
+        state = await self.bot.player_state.get("players", user_id)
+        stamina, max_stamina = regen.current(state, "stamina"), state["max_stamina"]
+        mp, max_mp = regen.current(state, "mp"), state["max_mp"]
+        
         # Default values for null columns
         gold = gold or 0
         diamonds = diamonds or 0
@@ -165,6 +174,9 @@ class Player(commands.Cog):
             ) VALUES (?, 1000, 0, 1, 0, 10, 10, 100, 100, 'No description set.', 0, 0)
         """, (user_id,))
         
+        # The card, material and dungeon cogs know players by their api_players row
+        self.identity.register(self.cursor, user_id, ctx.author.name)
+        
         self.db.conn.commit()
         
         # Give the player a starter pack
@@ -243,64 +255,36 @@ class Player(commands.Cog):
             await ctx.send(f"{ctx.author.mention}, valid categories are: {', '.join(valid_categories)}")
             return
             
-        # Create embeds for each category
+        # Create embeds for each category (served from the in-memory leaderboards)
+        leaderboards = self.bot.leaderboards
+        await leaderboards.sync()
         embeds = []
         
         for current_category in valid_categories:
-            # Define query based on category
+            # Define title and value format based on category
             if current_category == "level":
-                query = """
-                    SELECT user_id, level, xp
-                    FROM players
-                    ORDER BY level DESC, xp DESC
-                    LIMIT 10
-                """
                 title = "Top Players by Level"
-                format_str = lambda row: f"Level {row[1]} · XP: {row[2]}"
+                format_str = lambda row: f"Level {row['level']} · XP: {row['xp']}"
                 
             elif current_category == "gold":
-                query = """
-                    SELECT user_id, gold
-                    FROM players
-                    ORDER BY gold DESC
-                    LIMIT 10
-                """
                 title = "Richest Players"
-                format_str = lambda row: f"{row[1]} Gold"
+                format_str = lambda row: f"{row['gold']} Gold"
                 
             elif current_category == "wins":
-                query = """
-                    SELECT user_id, wins, losses
-                    FROM players
-                    ORDER BY wins DESC
-                    LIMIT 10
-                """
                 title = "Top PvE Battle Winners"
-                format_str = lambda row: f"{row[1]} Wins · {row[2]} Losses"
+                format_str = lambda row: f"{row['wins']} Wins · {row['losses']} Losses"
                 
             elif current_category == "pvp":
-                query = """
-                    SELECT user_id, pvp_wins, pvp_losses
-                    FROM players
-                    ORDER BY pvp_wins DESC
-                    LIMIT 10
-                """
                 title = "Top PvP Battle Winners"
-                format_str = lambda row: f"{row[1]} Wins · {row[2]} Losses"
+                format_str = lambda row: f"{row['pvp_wins']} Wins · {row['pvp_losses']} Losses"
                 
             else:  # boss
-                query = """
-                    SELECT user_id, boss_wins
-                    FROM players
-                    ORDER BY boss_wins DESC
-                    LIMIT 10
-                """
                 title = "Top Boss Slayers"
-                format_str = lambda row: f"{row[1]} Boss Wins"
+                format_str = lambda row: f"{row['boss_wins']} Boss Wins"
             
-            # Execute query
-            self.cursor.execute(query)
-            results = self.cursor.fetchall()
+            # Top 10 and the caller's own rank
+            results = leaderboards.top(current_category, 10)
+            rank, ranked = leaderboards.rank(current_category, ctx.author.id)
             
             # Create embed
             embed = discord.Embed(
@@ -310,9 +294,7 @@ class Player(commands.Cog):
             
             if results:
                 # Fetch and add user data
-                for i, row in enumerate(results, 1):
-                    user_id = row[0]
-                    
+                for i, (user_id, row) in enumerate(results, 1):
                     # Try to get user from guild
                     user = ctx.guild.get_member(user_id)
                     name = user.display_name if user else f"User {user_id}"
@@ -342,7 +324,10 @@ class Player(commands.Cog):
                 )
             
             # Add footer
-            embed.set_footer(text=f"Use the buttons below to view different rankings")
+            if rank:
+                embed.set_footer(text=f"Your rank: #{rank} of {ranked} · Use the buttons below to view different rankings")
+            else:
+                embed.set_footer(text=f"Use the buttons below to view different rankings")
             embeds.append(embed)
         
         # Reorder embeds so the requested category is first
@@ -363,21 +348,21 @@ class Player(commands.Cog):
         user_id = ctx.author.id
         
         # Get stamina data
-        self.cursor.execute("SELECT stamina, max_stamina FROM players WHERE user_id = ?", (user_id,))
-        result = self.cursor.fetchone()
+        state = await self.bot.player_state.get("players", user_id)
         
-        if not result:
+        if not state:
             await ctx.send(f"{ctx.author.mention}, you need to use `!start` first!")
             return
         
-        stamina, max_stamina = result
+        stamina, max_stamina = regen.current(state, "stamina"), state["max_stamina"]
         
         # Calculate time until full stamina
-        minutes_per_stamina = 10  # One stamina every 10 minutes
-        minutes_to_full = (max_stamina - stamina) * minutes_per_stamina
+        seconds_per_stamina = regen.REGEN_INTERVALS["stamina"]
+        seconds_to_full = regen.seconds_to_full(state, "stamina")
+        seconds_to_next = seconds_to_full - max(0, max_stamina - stamina - 1) * seconds_per_stamina
         
-        hours = minutes_to_full // 60
-        minutes = minutes_to_full % 60
+        hours = seconds_to_full // 3600
+        minutes = (seconds_to_full % 3600) // 60
         
         # Create embed
         embed = discord.Embed(
@@ -405,7 +390,7 @@ class Player(commands.Cog):
             
             embed.add_field(
                 name="Next Stamina",
-                value=f"{minutes_per_stamina} minutes",
+                value=f"{seconds_to_next // 60}m {seconds_to_next % 60}s",
                 inline=False
             )
         else:
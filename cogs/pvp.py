@@ -1,15 +1,20 @@
 import discord
 from discord.ext import commands
-import random
 import asyncio
 import time
-from utils.probability import calculate_critical, calculate_dodge
+from utils.rng import new_stream
+from utils.rewards import boosted
+from utils.battle_engine import BattleEngine, DUEL_RULES, make_combatant
+from utils.battle_text import describe_turn
+from utils import regen
+from utils.locks import USER_LOCKS
 
 class PvP(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
         self.cursor = self.db.conn.cursor()
+        self.player_state = bot.player_state
         self.pvp_cooldowns = {}  # {user_id: timestamp}
         self.pvp_challenges = {}  # {challenger_id: {target_id, expiry_time}}
     
@@ -48,18 +53,15 @@ class PvP(commands.Cog):
         target_id = opponent.id
         
         # Check if both users have profiles
-        self.cursor.execute("SELECT stamina FROM players WHERE user_id = ?", (challenger_id,))
-        challenger = self.cursor.fetchone()
-        
-        self.cursor.execute("SELECT stamina FROM players WHERE user_id = ?", (target_id,))
-        target = self.cursor.fetchone()
+        challenger = await self.player_state.get("players", challenger_id)
+        target = await self.player_state.get("players", target_id)
         
         if not challenger or not target:
             await ctx.send(f"{ctx.author.mention}, both players need to have created a profile with `!start`!")
             return
         
-        # Check stamina
-        if challenger[0] < 3:
+        # Check stamina (regenerated since it was last spent)
+        if regen.current(challenger, "stamina") < 3:
             await ctx.send(f"{ctx.author.mention}, you need at least **3 stamina** to initiate a PvP battle!")
             return
         
@@ -158,21 +160,32 @@ class PvP(commands.Cog):
             del self.pvp_challenges[challenger_id]
             return
         
-        # Check defender stamina
-        self.cursor.execute("SELECT stamina FROM players WHERE user_id = ?", (defender_id,))
-        defender = self.cursor.fetchone()
-        
-        if not defender or defender[0] < 3:
-            await ctx.send(f"{ctx.author.mention}, you need at least **3 stamina** to accept a PvP battle!")
-            return
-        
-        # Remove the challenge
-        del self.pvp_challenges[challenger_id]
-        
-        # Deduct stamina from both players
-        self.cursor.execute("UPDATE players SET stamina = stamina - 3 WHERE user_id = ?", (challenger_id,))
-        self.cursor.execute("UPDATE players SET stamina = stamina - 3 WHERE user_id = ?", (defender_id,))
-        self.db.conn.commit()
+        # Hold both players' locks from loading them to spending their stamina, so a
+        # double !accept or another accept involving either player can't interleave
+        async with USER_LOCKS.many(challenger_id, defender_id):
+            defender = await self.player_state.get("players", defender_id)
+            challenger_state = await self.player_state.get("players", challenger_id)
+            
+            if self.pvp_challenges.get(challenger_id) is not challenge_data:
+                await ctx.send(f"{ctx.author.mention}, that challenge was already accepted!")
+                return
+            
+            # Both sides need the stamina; check both before spending either
+            if not defender or regen.current(defender, "stamina") < 3:
+                await ctx.send(f"{ctx.author.mention}, you need at least **3 stamina** to accept a PvP battle!")
+                return
+            
+            if not challenger_state or regen.current(challenger_state, "stamina") < 3:
+                del self.pvp_challenges[challenger_id]
+                await ctx.send(f"{ctx.author.mention}, {challenger.display_name} no longer has enough stamina, so the challenge was cancelled!")
+                return
+            
+            # Nothing awaited since the checks, so both spends go through
+            regen.spend(defender, "stamina", 3)
+            regen.spend(challenger_state, "stamina", 3)
+            
+            # Remove the challenge
+            del self.pvp_challenges[challenger_id]
         
         # Get current channel
         channel = ctx.channel
@@ -197,268 +210,82 @@ class PvP(commands.Cog):
         
         p2_card_id, p2_name, p2_rarity, p2_level, p2_attack, p2_defense, p2_speed, p2_element, p2_skill, p2_skill_desc, p2_skill_mp, p2_crit, p2_dodge, p2_image = p2_card
         
-        # Set up battle variables
-        p1_hp = 500 + (p1_level * 15)
-        p1_max_hp = p1_hp
-        
-        p2_hp = 500 + (p2_level * 15)
-        p2_max_hp = p2_hp
-        
-        # Get MP from database
-        self.cursor.execute("SELECT mp FROM players WHERE user_id = ?", (p1_id,))
-        p1_mp = self.cursor.fetchone()[0]
-        p1_max_mp = 100 + (p1_level * 5)
-        
-        self.cursor.execute("SELECT mp FROM players WHERE user_id = ?", (p2_id,))
-        p2_mp = self.cursor.fetchone()[0]
-        p2_max_mp = 100 + (p2_level * 5)
+        # Get MP from the player state cache
+        p1_mp = regen.current(await self.player_state.get("players", p1_id), "mp")
+        p2_mp = regen.current(await self.player_state.get("players", p2_id), "mp")
+        
+        # Set up both sides; the engine runs the battle, this loop only renders it
+        p1 = make_combatant(
+            player1.display_name, p1_attack, p1_defense, p1_speed,
+            500 + (p1_level * 15), mp=p1_mp, max_mp=100 + (p1_level * 5),
+            element=p1_element, skill=p1_skill, skill_cost=p1_skill_mp, skill_description=p1_skill_desc,
+            crit_rate=p1_crit, dodge_rate=p1_dodge,
+            skill_chance=0.3, low_hp_skill_chance=0.7, level=p1_level
+        )
+        p2 = make_combatant(
+            player2.display_name, p2_attack, p2_defense, p2_speed,
+            500 + (p2_level * 15), mp=p2_mp, max_mp=100 + (p2_level * 5),
+            element=p2_element, skill=p2_skill, skill_cost=p2_skill_mp, skill_description=p2_skill_desc,
+            crit_rate=p2_crit, dodge_rate=p2_dodge,
+            skill_chance=0.3, low_hp_skill_chance=0.7, level=p2_level
+        )
         
-        # Determine who goes first based on speed
-        player1_first = p1_speed >= p2_speed
-        current_turn = "p1" if player1_first else "p2"
+        # Every roll in this battle comes from one seeded stream
+        rng = new_stream()
+        engine = BattleEngine(p1, p2, rng=rng, rules=DUEL_RULES)
         
         # Battle message
         battle_message = await channel.send("⚔️ **PvP Battle Start!**")
         
-        # Battle effects and animations
-        battle_effects = ["Bonked", "Whacked", "Booped", "Thwacked", "Slammed", "Pummeled"]
-        
-        # Skill cooldowns
-        p1_skill_cooldown = 0
-        p2_skill_cooldown = 0
-        
-        # Status effects (turns remaining)
-        p1_status = {}
-        p2_status = {}
+        # Generate resource bars
+        def resource_bar(current, max_val, char_filled="█", char_empty="░"):
+            percentage = current / max_val
+            filled = int(percentage * 10)
+            empty = 10 - filled
+            return f"**`{char_filled * filled}{char_empty * empty}`** **`{current}/{max_val}`**"
         
         # Battle loop
-        turn = 0
-        while p1_hp > 0 and p2_hp > 0:
-            turn += 1
+        while not engine.finished:
             await asyncio.sleep(2)
             
-            # Generate resource bars
-            def resource_bar(current, max_val, char_filled="█", char_empty="░"):
-                percentage = current / max_val
-                filled = int(percentage * 10)
-                empty = 10 - filled
-                return f"**`{char_filled * filled}{char_empty * empty}`** **`{current}/{max_val}`**"
-            
-            # Handle status effects
-            for status, turns in list(p1_status.items()):
-                if status == "burning":
-                    burn_damage = int(p1_max_hp * 0.05)  # 5% damage
-                    p1_hp = max(0, p1_hp - burn_damage)
-                    
-                p1_status[status] -= 1
-                if p1_status[status] <= 0:
-                    del p1_status[status]
-            
-            for status, turns in list(p2_status.items()):
-                if status == "burning":
-                    burn_damage = int(p2_max_hp * 0.05)  # 5% damage
-                    p2_hp = max(0, p2_hp - burn_damage)
-                    
-                p2_status[status] -= 1
-                if p2_status[status] <= 0:
-                    del p2_status[status]
-            
-            # Handle cooldowns
-            if p1_skill_cooldown > 0:
-                p1_skill_cooldown -= 1
-            if p2_skill_cooldown > 0:
-                p2_skill_cooldown -= 1
-            
-            # Battle logic
-            if current_turn == "p1":
-                # Player 1's turn
-                # Check if player has enough MP to use skill
-                can_use_skill = p1_mp >= p1_skill_mp and p1_skill_cooldown == 0
-                
-                # Randomly decide to use skill (more likely if HP is low)
-                skill_chance = 0.3
-                if p1_hp < p1_max_hp * 0.4:  # Below 40% HP
-                    skill_chance = 0.7
-                
-                use_skill = can_use_skill and random.random() < skill_chance
-                
-                if use_skill:
-                    # Use skill
-                    p1_mp -= p1_skill_mp
-                    p1_skill_cooldown = 3  # Set cooldown
-                    
-                    # Apply skill effects
-                    if "fire" in p1_skill.lower() or "flame" in p1_skill.lower():
-                        p2_status["burning"] = 3  # Burning for 3 turns
-                        damage_multiplier = 1.3
-                    elif "heal" in p1_skill.lower():
-                        heal_amount = int(p1_max_hp * 0.2)  # Heal 20% of max HP
-                        p1_hp = min(p1_max_hp, p1_hp + heal_amount)
-                        damage_multiplier = 0.5
-                    else:
-                        damage_multiplier = 1.5  # Generic damage boost
-                    
-                    # Calculate damage with skill boost
-                    base_damage = max(5, p1_attack - (p2_defense // 2))
-                    damage = int(base_damage * damage_multiplier)
-                    
-                    # Critical hit chance
-                    is_critical = calculate_critical(p1_crit)
-                    if is_critical:
-                        damage = int(damage * 1.5)
-                    
-                    # Apply damage
-                    p2_hp = max(0, p2_hp - damage)
-                    
-                    # Build action text
-                    action_text = f"**{player1.display_name}** used **{p1_skill}**!"
-                    damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"Dealt `-{damage}`!"
-                    
-                    if "burning" in p2_status:
-                        damage_text += " 🔥 Enemy is burning!"
-                    elif "heal" in p1_skill.lower():
-                        damage_text = f"💖 Healed `+{heal_amount}`!"
-                    
-                else:
-                    # Regular attack
-                    base_damage = max(5, p1_attack - (p2_defense // 2))
-                    
-                    # Check for dodge
-                    is_dodged = calculate_dodge(p2_dodge)
-                    
-                    if is_dodged:
-                        damage = 0
-                        action_text = f"**{player1.display_name}** attacked!"
-                        damage_text = "😎 Enemy dodged the attack!"
-                    else:
-                        # Critical hit chance
-                        is_critical = calculate_critical(p1_crit)
-                        damage = base_damage * 1.5 if is_critical else base_damage
-                        
-                        # Apply damage
-                        p2_hp = max(0, p2_hp - damage)
-                        
-                        action_text = f"**{player1.display_name}** attacked!"
-                        damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"Dealt `-{damage}`!"
-                
-                current_turn = "p2"
-                
-            else:
-                # Player 2's turn
-                # Check if player has enough MP to use skill
-                can_use_skill = p2_mp >= p2_skill_mp and p2_skill_cooldown == 0
-                
-                # Randomly decide to use skill (more likely if HP is low)
-                skill_chance = 0.3
-                if p2_hp < p2_max_hp * 0.4:  # Below 40% HP
-                    skill_chance = 0.7
-                
-                use_skill = can_use_skill and random.random() < skill_chance
-                
-                if use_skill:
-                    # Use skill
-                    p2_mp -= p2_skill_mp
-                    p2_skill_cooldown = 3  # Set cooldown
-                    
-                    # Apply skill effects
-                    if "fire" in p2_skill.lower() or "flame" in p2_skill.lower():
-                        p1_status["burning"] = 3  # Burning for 3 turns
-                        damage_multiplier = 1.3
-                    elif "heal" in p2_skill.lower():
-                        heal_amount = int(p2_max_hp * 0.2)  # Heal 20% of max HP
-                        p2_hp = min(p2_max_hp, p2_hp + heal_amount)
-                        damage_multiplier = 0.5
-                    else:
-                        damage_multiplier = 1.5  # Generic damage boost
-                    
-                    # Calculate damage with skill boost
-                    base_damage = max(5, p2_attack - (p1_defense // 2))
-                    damage = int(base_damage * damage_multiplier)
-                    
-                    # Critical hit chance
-                    is_critical = calculate_critical(p2_crit)
-                    if is_critical:
-                        damage = int(damage * 1.5)
-                    
-                    # Apply damage
-                    p1_hp = max(0, p1_hp - damage)
-                    
-                    # Build action text
-                    action_text = f"**{player2.display_name}** used **{p2_skill}**!"
-                    damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"Dealt `-{damage}`!"
-                    
-                    if "burning" in p1_status:
-                        damage_text += " 🔥 Enemy is burning!"
-                    elif "heal" in p2_skill.lower():
-                        damage_text = f"💖 Healed `+{heal_amount}`!"
-                    
-                else:
-                    # Regular attack
-                    base_damage = max(5, p2_attack - (p1_defense // 2))
-                    
-                    # Check for dodge
-                    is_dodged = calculate_dodge(p1_dodge)
-                    
-                    if is_dodged:
-                        damage = 0
-                        action_text = f"**{player2.display_name}** attacked!"
-                        damage_text = "😎 Enemy dodged the attack!"
-                    else:
-                        # Critical hit chance
-                        is_critical = calculate_critical(p2_crit)
-                        damage = base_damage * 1.5 if is_critical else base_damage
-                        
-                        # Apply damage
-                        p1_hp = max(0, p1_hp - damage)
-                        
-                        action_text = f"**{player2.display_name}** attacked!"
-                        damage_text = f"💥 Critical Hit! `-{damage}`!" if is_critical else f"{random.choice(battle_effects)} for `-{damage}`!"
-                
-                current_turn = "p1"
-            
-            # MP regeneration (5% of max MP per turn)
-            p1_mp = min(p1_max_mp, p1_mp + int(p1_max_mp * 0.05))
-            p2_mp = min(p2_max_mp, p2_mp + int(p2_max_mp * 0.05))
+            events = engine.step()
+            action_text, damage_text = describe_turn(events, engine)
             
             # Create battle embed
-            title = f"Turn {turn}: {player1.display_name if current_turn == 'p1' else player2.display_name}'s Turn Next"
+            title = f"Turn {engine.turn}: {engine.combatants[engine.next_side]['name']}'s Turn Next"
             embed = discord.Embed(title=title, color=discord.Color.purple())
             
-            # Player 1 info
-            p1_status_text = ", ".join([f"{status.capitalize()}" for status in p1_status]) if p1_status else "None"
-            embed.add_field(
-                name=f"{player1.display_name} - {p1_name} (Lvl {p1_level})",
-                value=f"HP: {resource_bar(p1_hp, p1_max_hp)}\n"
-                      f"MP: {resource_bar(p1_mp, p1_max_mp, '🔷', '⬜')}\n"
-                      f"Status: {p1_status_text}\n"
-                      f"Skill Ready: {'✅' if p1_skill_cooldown == 0 else f'❌ ({p1_skill_cooldown} turns)'}",
-                inline=False
-            )
-            
-            # Player 2 info
-            p2_status_text = ", ".join([f"{status.capitalize()}" for status in p2_status]) if p2_status else "None"
-            embed.add_field(
-                name=f"{player2.display_name} - {p2_name} (Lvl {p2_level})",
-                value=f"HP: {resource_bar(p2_hp, p2_max_hp)}\n"
-                      f"MP: {resource_bar(p2_mp, p2_max_mp, '🔷', '⬜')}\n"
-                      f"Status: {p2_status_text}\n"
-                      f"Skill Ready: {'✅' if p2_skill_cooldown == 0 else f'❌ ({p2_skill_cooldown} turns)'}",
-                inline=False
-            )
+            # Player info
+            for fighter, card_name in ((p1, p1_name), (p2, p2_name)):
+                cooldown = fighter["cooldown"]
+                status_text = ", ".join([f"{status.capitalize()}" for status in fighter["status"]]) if fighter["status"] else "None"
+                embed.add_field(
+                    name=f"{fighter['name']} - {card_name} (Lvl {fighter['level']})",
+                    value=f"HP: {resource_bar(fighter['hp'], fighter['max_hp'])}\n"
+                          f"MP: {resource_bar(fighter['mp'], fighter['max_mp'], '🔷', '⬜')}\n"
+                          f"Status: {status_text}\n"
+                          f"Skill Ready: {'✅' if cooldown == 0 else f'❌ ({cooldown} turns)'}",
+                    inline=False
+                )
             
             # Last action
             embed.add_field(name="Last Action", value=f"{action_text}\n{damage_text}", inline=False)
             
             # Set card images as thumbnails (alternating)
-            if turn % 2 == 1 and p1_image:
+            if engine.turn % 2 == 1 and p1_image:
                 embed.set_thumbnail(url=p1_image)
-            elif turn % 2 == 0 and p2_image:
+            elif engine.turn % 2 == 0 and p2_image:
                 embed.set_thumbnail(url=p2_image)
             
             await battle_message.edit(embed=embed)
         
+        # Final battle state
+        turn = engine.turn
+        p1_hp, p1_max_hp, p1_mp = p1["hp"], p1["max_hp"], p1["mp"]
+        p2_hp, p2_max_hp, p2_mp = p2["hp"], p2["max_hp"], p2["mp"]
+        
         # Battle ended - determine winner
-        p1_won = p2_hp <= 0
+        p1_won = engine.winner == "a"
         winner_id = p1_id if p1_won else p2_id
         loser_id = p2_id if p1_won else p1_id
         winner = player1 if p1_won else player2
@@ -466,9 +293,9 @@ class PvP(commands.Cog):
         
         # Save PvP battle record
         self.cursor.execute("""
-            INSERT INTO pvp_battles (player1_id, player2_id, player1_card, player2_card, winner_id, turns)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (p1_id, p2_id, p1_card_id, p2_card_id, winner_id, turn))
+            INSERT INTO pvp_battles (player1_id, player2_id, player1_card, player2_card, winner_id, turns, seed)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (p1_id, p2_id, p1_card_id, p2_card_id, winner_id, turn, rng.seed_value))
         
         # Update player stats
         if p1_won:
@@ -479,7 +306,7 @@ class PvP(commands.Cog):
             self.cursor.execute("UPDATE players SET pvp_losses = pvp_losses + 1 WHERE user_id = ?", (p1_id,))
         
         # Calculate rewards
-        gold_earned = 200 + (turn * 10)  # Base gold + extra for longer battles
+        gold_earned = boosted(200 + (turn * 10), winner_id, "gold")  # Base gold + extra for longer battles
         self.cursor.execute("UPDATE players SET gold = gold + ? WHERE user_id = ?", (gold_earned, winner_id))
         
         # Add card experience
@@ -496,9 +323,10 @@ class PvP(commands.Cog):
         else:
             self.cursor.execute("UPDATE usercards SET xp = xp + ? WHERE id = ?", (20, p1_card_id))
         
-        # Update MP in database
-        self.cursor.execute("UPDATE players SET mp = ? WHERE user_id = ?", (p1_mp, p1_id))
-        self.cursor.execute("UPDATE players SET mp = ? WHERE user_id = ?", (p2_mp, p2_id))
+        # Update MP (written back with the next state flush)
+        for player_id, mp in ((p1_id, p1_mp), (p2_id, p2_mp)):
+            state = await self.player_state.get("players", player_id)
+            state.update(regen.settle(state, "mp", value=mp))
         
         # Commit changes
         self.db.conn.commit()
@@ -539,6 +367,9 @@ class PvP(commands.Cog):
             inline=False
         )
         
+        # Seed to replay this battle
+        embed.set_footer(text=f"Battle seed: {rng.seed_value}")
+        
         # Set winner's card image
         if p1_won and p1_image:
             embed.set_image(url=p1_image)
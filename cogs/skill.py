@@ -3,6 +3,8 @@ from discord.ext import commands
 import random
 import logging
 from collections import defaultdict
+from utils.elements import ELEMENTS
+from utils.skills import SKILLS, SKILL_KINDS, compile_skill, describe
 
 logger = logging.getLogger('bot.skill')
 
@@ -11,50 +13,6 @@ class Skill(commands.Cog):
         self.bot = bot
         self.db = bot.db
         self.cursor = self.db.conn.cursor()
-        
-        # Define skill types for reference
-        self.skill_types = {
-            "damage": "Deals damage to the opponent",
-            "healing": "Restores HP to the user",
-            "buff": "Increases user's stats temporarily",
-            "debuff": "Decreases opponent's stats temporarily",
-            "dot": "Deals damage over time (DoT)",
-            "status": "Applies a status effect",
-            "ultimate": "Powerful special attack"
-        }
-        
-        # Map keywords to effects for skills
-        self.skill_effects = {
-            "fire": {"type": "dot", "effect": "burning", "duration": 3, "multiplier": 1.3},
-            "flame": {"type": "dot", "effect": "burning", "duration": 3, "multiplier": 1.3},
-            "burn": {"type": "dot", "effect": "burning", "duration": 3, "multiplier": 1.3},
-            
-            "heal": {"type": "healing", "multiplier": 0.25},
-            "cure": {"type": "healing", "multiplier": 0.25},
-            "recover": {"type": "healing", "multiplier": 0.25},
-            
-            "stun": {"type": "status", "effect": "stunned", "duration": 1, "multiplier": 1.2},
-            "paralyze": {"type": "status", "effect": "stunned", "duration": 1, "multiplier": 1.2},
-            
-            "poison": {"type": "dot", "effect": "poisoned", "duration": 3, "multiplier": 1.2},
-            "toxic": {"type": "dot", "effect": "poisoned", "duration": 3, "multiplier": 1.2},
-            
-            "ice": {"type": "status", "effect": "frozen", "duration": 2, "multiplier": 1.25},
-            "freeze": {"type": "status", "effect": "frozen", "duration": 2, "multiplier": 1.25},
-            
-            "ultimate": {"type": "damage", "multiplier": 2.0},
-            "final": {"type": "damage", "multiplier": 2.0},
-            
-            "buff": {"type": "buff", "stats": ["attack", "defense"], "multiplier": 1.3},
-            "power": {"type": "buff", "stats": ["attack"], "multiplier": 1.5},
-            "shield": {"type": "buff", "stats": ["defense"], "multiplier": 1.5},
-            "speed": {"type": "buff", "stats": ["speed"], "multiplier": 1.5},
-            
-            "debuff": {"type": "debuff", "stats": ["attack", "defense"], "multiplier": 0.7},
-            "weaken": {"type": "debuff", "stats": ["attack"], "multiplier": 0.5},
-            "break": {"type": "debuff", "stats": ["defense"], "multiplier": 0.5},
-            "slow": {"type": "debuff", "stats": ["speed"], "multiplier": 0.5}
-        }
     
     def get_card_skill_info(self, card_id):
         """Get skill information for a specific card."""
@@ -66,73 +24,10 @@ class Skill(commands.Cog):
         
         return self.cursor.fetchone()
     
-    def generate_skill_description(self, skill_name):
-        """Generate a description based on skill name keywords."""
-        skill_name_lower = skill_name.lower()
-        
-        # Identify skill type and effects based on keywords
-        primary_effect = None
-        secondary_effects = []
-        
-        for keyword, effect in self.skill_effects.items():
-            if keyword in skill_name_lower:
-                if primary_effect is None:
-                    primary_effect = (keyword, effect)
-                else:
-                    secondary_effects.append((keyword, effect))
-        
-        # If no effects found, default to damage
-        if primary_effect is None:
-            return "Deals significant damage to the opponent.", 20, 3
-        
-        # Generate description
-        effect_desc = []
-        mp_cost = 20  # Default
-        cooldown = 3  # Default
-        
-        primary_keyword, primary_data = primary_effect
-        
-        if primary_data["type"] == "damage":
-            effect_desc.append(f"Deals {primary_keyword} damage to the opponent")
-            mp_cost = 20
-        elif primary_data["type"] == "dot":
-            effect_desc.append(f"Inflicts {primary_data['effect']} status for {primary_data['duration']} turns")
-            mp_cost = 25
-        elif primary_data["type"] == "healing":
-            effect_desc.append(f"Restores {int(primary_data['multiplier']*100)}% of max HP")
-            mp_cost = 30
-        elif primary_data["type"] == "status":
-            effect_desc.append(f"Applies {primary_data['effect']} status for {primary_data['duration']} turns")
-            mp_cost = 25
-        elif primary_data["type"] == "buff":
-            stats = ", ".join(primary_data['stats'])
-            effect_desc.append(f"Increases {stats} by {int((primary_data['multiplier']-1)*100)}%")
-            mp_cost = 30
-        elif primary_data["type"] == "debuff":
-            stats = ", ".join(primary_data['stats'])
-            effect_desc.append(f"Decreases opponent's {stats} by {int((1-primary_data['multiplier'])*100)}%")
-            mp_cost = 30
-        
-        # Add secondary effects
-        for keyword, effect in secondary_effects:
-            if effect["type"] == "dot":
-                effect_desc.append(f"Also inflicts {effect['effect']} status")
-                mp_cost += 5
-            elif effect["type"] == "status":
-                effect_desc.append(f"Also applies {effect['effect']} status")
-                mp_cost += 5
-            elif effect["type"] == "buff" or effect["type"] == "debuff":
-                effect_desc.append(f"Also affects {', '.join(effect['stats'])}")
-                mp_cost += 5
-        
-        # If it's an ultimate skill, increase cost and cooldown
-        if "ultimate" in skill_name_lower or "final" in skill_name_lower:
-            mp_cost = 40
-            cooldown = 5
-            if len(effect_desc) == 1:  # If only the basic effect
-                effect_desc[0] = "Unleashes a devastating attack on the opponent"
-        
-        return " and ".join(effect_desc) + ".", mp_cost, cooldown
+    def generate_skill_description(self, skill_name, skill_desc=None):
+        """Generate a description, MP cost and cooldown from the skill's compiled effects."""
+        program = compile_skill(skill_name, skill_desc)
+        return describe(program), program["mp_cost"], program["cooldown"]
     
     @commands.command(name="skill")
     async def skill_command(self, ctx, card_id: int = None):
@@ -195,36 +90,14 @@ class Skill(commands.Cog):
         embed.add_field(name="Cooldown", value=f"{cooldown} turns", inline=True)
         embed.add_field(name="Element", value=element, inline=True)
         
-        # Generate skill type based on name and description
-        skill_type = "Unknown"
-        for keyword, desc in self.skill_types.items():
-            if keyword in skill_name.lower() or keyword in skill_desc.lower():
-                skill_type = keyword.capitalize()
-                break
-        
-        embed.add_field(name="Skill Type", value=skill_type, inline=True)
+        # Skill type and effects come from the compiled skill
+        program = SKILLS.program(skill_name, skill_desc, mp_cost, cooldown)
+        embed.add_field(name="Skill Type", value=SKILL_KINDS[program["kind"]][0], inline=True)
+        embed.add_field(name="Effect", value=describe(program), inline=False)
         
         # Determine effectiveness
-        effective_against = []
-        weak_against = []
-        
-        element_chart = {
-            "Fire": {"strong": ["Earth", "Ice"], "weak": ["Water"]},
-            "Water": {"strong": ["Fire"], "weak": ["Electric", "Ice"]},
-            "Earth": {"strong": ["Electric"], "weak": ["Fire", "Air"]},
-            "Air": {"strong": ["Earth"], "weak": ["Electric", "Ice"]},
-            "Electric": {"strong": ["Water", "Air"], "weak": ["Earth"]},
-            "Ice": {"strong": ["Water", "Air"], "weak": ["Fire"]},
-            "Light": {"strong": ["Dark"], "weak": []},
-            "Dark": {"strong": ["Light"], "weak": []},
-            "Cute": {"strong": ["Dark"], "weak": ["Light"]},
-            "Sweet": {"strong": ["Cute"], "weak": ["Dark"]},
-            "Star": {"strong": [], "weak": []}
-        }
-        
-        if element in element_chart:
-            effective_against = element_chart[element]["strong"]
-            weak_against = element_chart[element]["weak"]
+        effective_against = ELEMENTS.strong_against(element)
+        weak_against = ELEMENTS.weak_against(element)
         
         if effective_against:
             embed.add_field(
@@ -242,19 +115,23 @@ class Skill(commands.Cog):
         
         # Battle tips
         tips = []
-        if "healing" in skill_type.lower() or "heal" in skill_name.lower():
+        status = program["status"][0] if program["status"] else None
+        if program["heal"]:
             tips.append("Best used when HP is below 50%")
         
-        if "fire" in skill_name.lower() or "burn" in skill_name.lower():
+        if status == "burning":
             tips.append("Burning deals damage over time, great for longer battles")
         
-        if "stun" in skill_name.lower() or "paralyze" in skill_name.lower():
+        if status == "stunned":
             tips.append("Stun prevents the enemy from attacking for 1 turn")
         
-        if "poison" in skill_name.lower() or "toxic" in skill_name.lower():
+        if status == "poisoned":
             tips.append("Poison deals significant damage over time")
         
-        if "ultimate" in skill_name.lower() or "final" in skill_name.lower():
+        if program["modifiers"]:
+            tips.append("Stat changes last for a set number of the affected card's turns")
+        
+        if program["kind"] == "ultimate":
             tips.append("Ultimate skills are best saved for crucial moments")
         
         if tips:
@@ -283,8 +160,8 @@ class Skill(commands.Cog):
         
         # Skill types section
         types_text = ""
-        for skill_type, description in self.skill_types.items():
-            types_text += f"**{skill_type.capitalize()}**: {description}\n"
+        for label, description in SKILL_KINDS.values():
+            types_text += f"**{label}**: {description}\n"
         
         embed.add_field(
             name="Skill Types",
@@ -297,10 +174,8 @@ class Skill(commands.Cog):
             "**Burning**: Deals 5% max HP damage per turn\n"
             "**Poisoned**: Deals 8% max HP damage per turn\n"
             "**Stunned**: Cannot attack for 1 turn\n"
-            "**Frozen**: Cannot attack for 2 turns\n"
-            "**Weakened**: Attack reduced by 30%\n"
-            "**Broken**: Defense reduced by 30%\n"
-            "**Slowed**: Speed reduced by 30%"
+            "**Buffs**: Attack, defense, speed, crit or dodge raised for a few turns\n"
+            "**Debuffs**: The opponent's stats lowered for a few turns"
         )
         
         embed.add_field(
@@ -310,19 +185,18 @@ class Skill(commands.Cog):
         )
         
         # Element effectiveness
-        element_text = (
-            "**Fire**: Strong vs Earth, Ice • Weak vs Water\n"
-            "**Water**: Strong vs Fire • Weak vs Electric, Ice\n"
-            "**Earth**: Strong vs Electric • Weak vs Fire, Air\n"
-            "**Air**: Strong vs Earth • Weak vs Electric, Ice\n"
-            "**Electric**: Strong vs Water, Air • Weak vs Earth\n"
-            "**Ice**: Strong vs Water, Air • Weak vs Fire\n"
-            "**Light**: Strong vs Dark\n"
-            "**Dark**: Strong vs Light\n"
-            "**Cute**: Strong vs Dark • Weak vs Light\n"
-            "**Sweet**: Strong vs Cute • Weak vs Dark\n"
-            "**Star**: Neutral to all elements"
-        )
+        # Built from the shared element chart so the guide can't drift from battles
+        element_lines = []
+        for element_name in ELEMENTS.names[1:]:
+            strong = ELEMENTS.strong_against(element_name)
+            weak = ELEMENTS.weak_against(element_name)
+            line = f"**{element_name}**: "
+            line += " • ".join(part for part in (
+                f"Strong vs {', '.join(strong)}" if strong else "",
+                f"Weak vs {', '.join(weak)}" if weak else ""
+            ) if part) or "Neutral to all elements"
+            element_lines.append(line)
+        element_text = "\n".join(element_lines)
         
         embed.add_field(
             name="Element Effectiveness",
@@ -332,7 +206,7 @@ class Skill(commands.Cog):
         
         # Battle tips
         battle_tips = (
-            "• Element advantage gives a 50% damage boost\n"
+            "• Element advantage gives up to double damage\n"
             "• MP regenerates at 5% per turn\n"
             "• Status effects can stack (e.g., burning + poisoned)\n"
             "• Higher level skills cost more MP but deal more damage\n"
@@ -356,7 +230,7 @@ class Skill(commands.Cog):
         
         # Get all user's cards with their skills
         self.cursor.execute("""
-            SELECT id, name, rarity, level, skill, skill_description
+            SELECT id, name, rarity, level, skill, skill_description, skill_mp_cost, skill_cooldown
             FROM usercards
             WHERE user_id = ?
             ORDER BY rarity DESC, level DESC
@@ -371,22 +245,9 @@ class Skill(commands.Cog):
         # Group skills by type
         skill_types = defaultdict(list)
         
-        for card_id, name, rarity, level, skill, desc in cards:
-            # Determine skill type
-            skill_type = "Damage"  # Default
-            
-            if "heal" in skill.lower() or "cure" in skill.lower() or "recover" in skill.lower():
-                skill_type = "Healing"
-            elif "stun" in skill.lower() or "paralyze" in skill.lower():
-                skill_type = "Status"
-            elif "fire" in skill.lower() or "burn" in skill.lower() or "poison" in skill.lower():
-                skill_type = "DoT"
-            elif "buff" in skill.lower() or "power" in skill.lower() or "shield" in skill.lower():
-                skill_type = "Buff"
-            elif "debuff" in skill.lower() or "weaken" in skill.lower() or "break" in skill.lower():
-                skill_type = "Debuff"
-            elif "ultimate" in skill.lower() or "final" in skill.lower():
-                skill_type = "Ultimate"
+        for card_id, name, rarity, level, skill, desc, mp_cost, cooldown in cards:
+            # Skill type from the compiled skill
+            skill_type = SKILL_KINDS[SKILLS.program(skill, desc, mp_cost, cooldown)["kind"]][0]
             
             skill_types[skill_type].append((card_id, name, rarity, level, skill, desc))
         
@@ -439,7 +300,7 @@ class Skill(commands.Cog):
         card_name, skill_name, old_desc = card
         
         # Generate new description
-        new_desc, mp_cost, cooldown = self.generate_skill_description(skill_name)
+        new_desc, mp_cost, cooldown = self.generate_skill_description(skill_name, old_desc)
         
         # Update card skill
         self.cursor.execute("""
@@ -8,6 +8,8 @@ from discord.ext import commands
 import time
 import random
 
+from utils import regen
+
 class Vote(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -43,6 +45,9 @@ class Vote(commands.Cog):
         """🗳️ Vote for the bot and earn rewards (every 12 hours)"""
         user_id = ctx.author.id
         
+        # Stamina and level are cached; write them back before reading them here
+        await self.bot.player_state.flush_player(user_id)
+        
         # Check if player has a profile
         self.cursor.execute("""
             SELECT id, level, gold, stamina, last_vote, vote_streak 
@@ -122,14 +127,22 @@ class Vote(commands.Cog):
         # Update player
         self.cursor.execute("""
             UPDATE api_players 
-            SET gold = gold + ?, last_vote = ?, vote_streak = ?, stamina = stamina + ?
+            SET gold = gold + ?, last_vote = ?, vote_streak = ?
             WHERE discord_id = ?
-        """, (gold_reward, now, vote_streak, stamina_reward, user_id))
+        """, (gold_reward, now, vote_streak, user_id))
+        
+        # Commit before handing off to the async layer, which writes on its own connection
+        self.db.conn.commit()
+        self.bot.player_state.evict_player(user_id)
+        
+        # Add stamina (on top of what has regenerated; may go past the cap)
+        state = await self.bot.player_state.get("api_players", user_id)
+        state.update(regen.settle(state, "stamina", delta=stamina_reward, now=now))
         
         # Add experience
         battle_cog = self.bot.get_cog("BattleSystem")
         if battle_cog:
-            player_level_up, new_level = battle_cog.add_player_exp(user_id, exp_reward)
+            player_level_up, new_level, _ = await battle_cog.add_player_exp(user_id, exp_reward)
         else:
             player_level_up, new_level = False, None
         
@@ -139,9 +152,10 @@ class Vote(commands.Cog):
         if special_bonus:
             # 1 in 4 chance to get a random material
             if random.randint(1, 4) == 1:
-                # Get a random material
-                self.cursor.execute("SELECT id, name FROM materials ORDER BY RANDOM() LIMIT 1")
-                material = self.cursor.fetchone()
+                # Get a random material (picking up materials added since startup)
+                await self.bot.catalog.refresh_if_stale()
+                picked = self.bot.catalog.random_material()
+                material = (picked["id"], picked["name"]) if picked else None
                 
                 if material:
                     material_id, material_name = material
@@ -0,0 +1,325 @@
+"""
+Async data access layer for the bot.
+Wraps the database connections so cogs can await queries instead of
+blocking the event loop with sqlite3 calls.
+
+Reads go through a dedicated aiosqlite reader connection. Every write goes
+through a single writer task that group-commits: it collects the write
+queue for up to flush_interval seconds or max_batch jobs, then runs the
+whole batch in the writer thread in one go - BEGIN IMMEDIATE, each job in
+its own savepoint, COMMIT - so one fsync covers many cog writes.
+
+The write lock is only taken once the batch is complete and is released
+before the writer awaits anything again. Cogs still writing through the
+sync Database connection on the event loop thread therefore only ever wait
+for a batch that is already running, never for one that needs the loop to
+finish (which would stall the bot for the whole busy_timeout).
+"""
+
+import asyncio
+import sqlite3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import aiosqlite
+
+from database.storage import get_storage_mode, pragma_statements
+
+logger = logging.getLogger('bot.async_database')
+
+def _row_to_dict(cursor, row):
+    """Convert a row to a dictionary keyed by column name."""
+    columns = [col[0] for col in cursor.description]
+    return {columns[i]: row[i] for i in range(len(columns))}
+
+class Transaction:
+    """Statements run by a write job, in the writer thread, inside the open batch."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        # For helpers written against a cursor, e.g. wallet.try_spend(tx.cursor, ...)
+        self.cursor = conn.cursor()
+
+    def execute(self, query, params=()):
+        """Execute a statement and return its cursor."""
+        return self.conn.execute(query, params)
+
+    def executemany(self, query, params_seq):
+        """Execute a statement once per parameter set."""
+        return self.conn.executemany(query, params_seq)
+
+    def fetchone(self, query, params=(), as_dict=False):
+        """Fetch a single row (also the row an INSERT ... RETURNING wrote)."""
+        cursor = self.conn.execute(query, params)
+        # Read to the end so the statement is finished before the savepoint is released
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+        return _row_to_dict(cursor, rows[0]) if as_dict else rows[0]
+
+    def fetchall(self, query, params=(), as_dict=False):
+        """Fetch all rows."""
+        cursor = self.conn.execute(query, params)
+        rows = cursor.fetchall()
+        if not as_dict:
+            return rows
+        return [_row_to_dict(cursor, row) for row in rows]
+
+class _WriteJob:
+    """A unit of work waiting in the writer queue."""
+
+    def __init__(self, work, future):
+        self.work = work
+        self.future = future
+        self.result = None
+        self.error = None
+
+class AsyncDatabase:
+    def __init__(self, db_path="database/sparks.db", storage_mode=None,
+                 flush_interval=0.01, max_batch=500):
+        self.db_path = db_path
+        self.storage_mode = get_storage_mode(storage_mode)
+
+        # Group commit tuning: the longest a write waits for company before
+        # its batch is committed, and the most jobs sharing one commit
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        self.reader = None
+        self.writer = None
+        self._executor = None
+        self._queue = None
+        self._writer_task = None
+
+    async def connect(self):
+        """Open the connections and start the writer. Safe to call more than once."""
+        if self.writer is not None:
+            return self
+
+        # The writer connection lives in its own thread, where whole batches run
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sparks-writer")
+        self.writer = await self._in_writer(self._open_writer)
+
+        # Autocommit mode - the writer opens and commits transactions itself
+        self.reader = await aiosqlite.connect(self.db_path, isolation_level=None)
+        for statement in pragma_statements(self.storage_mode):
+            await self.reader.execute(statement)
+
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop())
+
+        logger.info(f"Async database connected: {self.db_path} (storage mode: {self.storage_mode})")
+        return self
+
+    def _open_writer(self):
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        for statement in pragma_statements(self.storage_mode):
+            conn.execute(statement)
+        return conn
+
+    async def close(self):
+        """Flush pending writes, stop the writer and close the connections."""
+        if self.writer is None:
+            return
+
+        # The sentinel lets the writer commit whatever is already queued
+        await self._queue.put(None)
+        await self._writer_task
+
+        await self.reader.close()
+        await self._in_writer(self.writer.close)
+        self._executor.shutdown()
+        self.reader = None
+        self.writer = None
+        self._executor = None
+        self._writer_task = None
+        logger.info("Async database connection closed")
+
+    async def fetchone(self, query, params=(), as_dict=False):
+        """Fetch a single row.
+
+        Args:
+            query (str): SQL query
+            params (tuple): Query parameters
+            as_dict (bool): Return the row as a dict keyed by column name
+
+        Returns:
+            tuple or dict: The row, or None if nothing matched
+        """
+        async with self.reader.execute(query, params) as cursor:
+            row = await cursor.fetchone()
+            if row is None or not as_dict:
+                return row
+            return _row_to_dict(cursor, row)
+
+    async def fetchall(self, query, params=(), as_dict=False):
+        """Fetch all rows.
+
+        Args:
+            query (str): SQL query
+            params (tuple): Query parameters
+            as_dict (bool): Return rows as dicts keyed by column name
+
+        Returns:
+            list: The rows
+        """
+        async with self.reader.execute(query, params) as cursor:
+            rows = await cursor.fetchall()
+            if not as_dict:
+                return rows
+            return [_row_to_dict(cursor, row) for row in rows]
+
+    async def fetchval(self, query, params=(), default=None):
+        """Fetch the first column of the first row.
+
+        Args:
+            query (str): SQL query
+            params (tuple): Query parameters
+            default: Value returned when nothing matched
+
+        Returns:
+            The value, or default
+        """
+        row = await self.fetchone(query, params)
+        return row[0] if row else default
+
+    async def execute(self, query, params=()):
+        """Execute a single write statement and wait until it is committed.
+
+        Args:
+            query (str): SQL statement
+            params (tuple): Statement parameters
+
+        Returns:
+            Cursor: Cursor exposing rowcount and lastrowid
+        """
+        return await self._submit(lambda tx: tx.execute(query, params))
+
+    async def executemany(self, query, params_seq):
+        """Execute a statement for every parameter set atomically.
+
+        Args:
+            query (str): SQL statement
+            params_seq (iterable): Parameter sets
+
+        Returns:
+            Cursor: Cursor exposing rowcount
+        """
+        params_seq = list(params_seq)
+        return await self._submit(lambda tx: tx.executemany(query, params_seq))
+
+    async def transaction(self, work):
+        """Run several statements atomically.
+
+        Usage:
+            def work(tx):
+                if not wallet.try_spend(tx.cursor, "api_gold", player_id, cost):
+                    return False
+                tx.execute(...)
+                return True
+
+            ok = await db.transaction(work)
+
+        work runs in the writer thread as one job of a batch, so it must be
+        plain synchronous code (no awaits, no Discord calls) - that is what
+        keeps the write lock from being held across an await. Its statements
+        see the writes made before them, and if it raises, only its own
+        writes are rolled back.
+
+        Args:
+            work (callable): Function taking a Transaction
+
+        Returns:
+            Whatever work returned, once the batch is committed
+        """
+        return await self._submit(work)
+
+    def _enqueue(self, work):
+        """Queue a job for the writer and return the future of its commit."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_WriteJob(work, future))
+        return future
+
+    async def _submit(self, work):
+        """Queue a job and wait until it has been committed."""
+        return await self._enqueue(work)
+
+    async def _in_writer(self, fn, *args):
+        """Run a function in the writer thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _run_job(self, job, tx):
+        """Run one job inside its own savepoint of the open batch."""
+        self.writer.execute("SAVEPOINT job")
+
+        try:
+            job.result = job.work(tx)
+        except BaseException as e:
+            # Only this job is undone; the rest of the batch still commits
+            self.writer.execute("ROLLBACK TO job")
+            job.error = e
+
+        self.writer.execute("RELEASE job")
+
+    def _commit_batch(self, batch):
+        """Run a complete batch as one transaction (in the writer thread)."""
+        tx = Transaction(self.writer)
+        self.writer.execute("BEGIN IMMEDIATE")
+
+        try:
+            for job in batch:
+                self._run_job(job, tx)
+            self.writer.execute("COMMIT")
+        except BaseException:
+            if self.writer.in_transaction:
+                self.writer.execute("ROLLBACK")
+            raise
+
+    async def _writer_loop(self):
+        """Drain the write queue, committing jobs in batches."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            job = await self._queue.get()
+            if job is None:
+                break
+
+            batch = [job]
+            deadline = loop.time() + self.flush_interval
+
+            # Collect the batch before taking the write lock, so the lock is
+            # never held while we wait for company
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        job = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+
+            try:
+                await self._in_writer(self._commit_batch, batch)
+            except Exception as e:
+                logger.error(f"Group commit of {len(batch)} write(s) failed: {e}")
+                for job in batch:
+                    if job.error is None:
+                        job.error = e
+
+            # Acknowledge every job in the batch now that it is durable
+            for job in batch:
+                if job.future.done():
+                    continue
+                if job.error is not None:
+                    job.future.set_exception(job.error)
+                else:
+                    job.future.set_result(job.result)
@@ -2,26 +2,69 @@ import sqlite3
 import os
 import logging
 
+from database.async_database import AsyncDatabase
+from database.storage import get_storage_mode, pragma_statements
+from database.indexes import audit_query_plans
+from database.search import load_search_columns
+from database.migrations import run_migrations
+
 logger = logging.getLogger('bot.database')
 
+# Tables mirrored in memory by utils.card_catalog
+CATALOG_TABLES = ["api_cards", "materials"]
+
+# players columns mirrored in memory by utils.leaderboard
+LEADERBOARD_COLUMNS = ["level", "xp", "gold", "wins", "losses", "pvp_wins", "pvp_losses", "boss_wins"]
+
+# Columns a player's players and api_players rows share, with the value for a missing one.
+# Gold and diamonds aren't copied: the two tables hold separate wallets.
+MIRRORED_COLUMNS = {"level": 1, "xp": 0, "wins": 0, "losses": 0, "pvp_wins": 0, "pvp_losses": 0}
+
 class Database:
-    def __init__(self):
+    def __init__(self, storage_mode=None, migrate=True):
         # Ensure database directory exists
         if not os.path.exists("database"):
             os.makedirs("database")
             
         self.db_path = "database/sparks.db"
+        self.storage_mode = get_storage_mode(storage_mode)
         self.conn = sqlite3.connect(self.db_path)
         self.cursor = self.conn.cursor()
         
-        # Enable foreign keys
-        self.cursor.execute("PRAGMA foreign_keys = ON")
+        # Journaling, durability and cache pragmas (also enables foreign keys)
+        self.apply_pragmas()
+        
+        # Apply the schema migrations this database hasn't had yet (tables, columns,
+        # indexes, catalog/leaderboard triggers, search indexes); the migration
+        # script passes migrate=False to run them itself
+        if migrate:
+            run_migrations(self)
+            
+            # Check the hot query plans against the indexes
+            audit_query_plans(self.conn)
+            
+            # Every player gets both a players and an api_players row
+            self.reconcile_players()
+        
+        # Columns of the trigram full-text indexes the card searches run against
+        load_search_columns(self.conn)
+        logger.info(f"Database initialized: {self.db_path} (storage mode: {self.storage_mode})")
         
-        self.create_tables()
-        logger.info(f"Database initialized: {self.db_path}")
+        # Async layer used by cogs that must not block the event loop.
+        # Opened by the bot's setup_hook once a loop is running.
+        self.aio = AsyncDatabase(self.db_path, storage_mode=self.storage_mode)
+    
+    def apply_pragmas(self):
+        """Applies the storage mode pragmas to the sync connection."""
+        for statement in pragma_statements(self.storage_mode):
+            self.cursor.execute(statement)
 
     def create_tables(self):
-        """Creates all necessary tables for the bot's functionality."""
+        """Creates all necessary tables for the bot's functionality.
+        
+        Migration 1 of database.migrations; later schema changes are new
+        migrations, not edits here.
+        """
         
         # Player table
         self.cursor.execute("""
@@ -257,6 +300,16 @@ class Database:
             )
         """)
         
+        # Active item boosts (see utils/boosts.py)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS active_boosts (
+                user_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,  -- exp, gold (the boost item's effect)
+                expires_at INTEGER NOT NULL,
+                PRIMARY KEY (user_id, kind)
+            )
+        """)
+        
         # Complete the transaction
         self.conn.commit()
         logger.info("All database tables created or verified")
@@ -264,6 +317,131 @@ class Database:
         # Initialize basic data if database is new
         self.initialize_data()
     
+    def reconcile_players(self):
+        """Gives every player both identity rows and keys old material stacks by api_players.id.
+        
+        Profiles made with !start only had a players row and profiles made
+        through the web API only an api_players row, so half the cogs didn't
+        know the other half's players. Missing rows are created with the
+        shared columns copied and the defaults a new profile gets otherwise.
+        
+        Returns:
+            int: Number of rows created or rekeyed
+        """
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'api_players'")
+        if self.cursor.fetchone() is None:
+            return 0
+        
+        columns = ", ".join(MIRRORED_COLUMNS)
+        changed = 0
+        
+        self.cursor.execute(f"""
+            INSERT OR IGNORE INTO api_players (discord_id, username, gold, diamonds, {columns})
+            SELECT p.user_id, CAST(p.user_id AS TEXT), 1000, 0,
+                   {", ".join(f"COALESCE(p.{column}, {default})" for column, default in MIRRORED_COLUMNS.items())}
+            FROM players p
+            WHERE NOT EXISTS (SELECT 1 FROM api_players a WHERE a.discord_id = p.user_id)
+        """)
+        changed += self.cursor.rowcount
+        
+        self.cursor.execute(f"""
+            INSERT OR IGNORE INTO players (user_id, gold, diamonds, stamina, max_stamina, mp, max_mp,
+                                           about, last_daily, last_vote, {columns})
+            SELECT a.discord_id, 1000, 0, 10, 10, 100, 100, 'No description set.', 0, 0,
+                   {", ".join(f"COALESCE(a.{column}, {default})" for column, default in MIRRORED_COLUMNS.items())}
+            FROM api_players a
+            WHERE NOT EXISTS (SELECT 1 FROM players p WHERE p.user_id = a.discord_id)
+        """)
+        changed += self.cursor.rowcount
+        
+        # Stacks from before user_materials had player_id, unless the player already has a keyed stack
+        self.cursor.execute("""
+            UPDATE OR IGNORE user_materials
+            SET player_id = (SELECT a.id FROM api_players a WHERE a.discord_id = user_materials.user_id)
+            WHERE player_id IS NULL
+            AND EXISTS (SELECT 1 FROM api_players a WHERE a.discord_id = user_materials.user_id)
+            AND NOT EXISTS (
+                SELECT 1 FROM user_materials m
+                JOIN api_players a ON m.player_id = a.id
+                WHERE a.discord_id = user_materials.user_id AND m.material_id = user_materials.material_id
+            )
+        """)
+        changed += self.cursor.rowcount
+        
+        self.conn.commit()
+        if changed:
+            logger.info(f"Reconciled player identities ({changed} rows created or rekeyed)")
+        return changed
+    
+    def ensure_catalog_triggers(self):
+        """Keeps catalog_versions bumped whenever a catalog table is written.
+        
+        Triggers fire for every connection, so seed scripts running outside
+        the bot still invalidate the in-memory card catalog.
+        """
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS catalog_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        
+        for table in CATALOG_TABLES:
+            self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+            if self.cursor.fetchone() is None:
+                continue
+            
+            self.cursor.execute("INSERT OR IGNORE INTO catalog_versions (name, version) VALUES (?, 0)", (table,))
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                self.cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_catalog_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE catalog_versions SET version = version + 1 WHERE name = '{table}';
+                    END
+                """)
+        
+        self.conn.commit()
+    
+    def ensure_leaderboard_triggers(self):
+        """Logs every player whose leaderboard values change.
+        
+        utils.leaderboard drains leaderboard_changes to update its sorted
+        boards incrementally, whichever cog or script wrote the row.
+        """
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS leaderboard_changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL
+            )
+        """)
+        
+        changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in LEADERBOARD_COLUMNS)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_players_leaderboard_insert
+            AFTER INSERT ON players
+            BEGIN
+                INSERT INTO leaderboard_changes (user_id) VALUES (NEW.user_id);
+            END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_players_leaderboard_update
+            AFTER UPDATE OF {", ".join(LEADERBOARD_COLUMNS)} ON players
+            WHEN {changed}
+            BEGIN
+                INSERT INTO leaderboard_changes (user_id) VALUES (NEW.user_id);
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_players_leaderboard_delete
+            AFTER DELETE ON players
+            BEGIN
+                INSERT INTO leaderboard_changes (user_id) VALUES (OLD.user_id);
+            END
+        """)
+        
+        self.conn.commit()
+    
     def initialize_data(self):
         """Initialize basic data if not already present."""
         # Check if items table has data
@@ -374,7 +552,6 @@ class Database:
 
     def backup_database(self):
         """Creates a backup copy of the database."""
-        import shutil
         from datetime import datetime
         
         backup_dir = "database/backups"
@@ -387,15 +564,13 @@ class Database:
         # Ensure all changes are committed
         self.conn.commit()
         
-        # Close connection temporarily
-        self.conn.close()
-        
-        # Copy the database file
-        shutil.copy2(self.db_path, backup_path)
-        
-        # Reopen connection
-        self.conn = sqlite3.connect(self.db_path)
-        self.cursor = self.conn.cursor()
+        # Use SQLite's online backup so pages still in the WAL are included
+        # (copying the main file alone would miss them)
+        backup_conn = sqlite3.connect(backup_path)
+        try:
+            self.conn.backup(backup_conn)
+        finally:
+            backup_conn.close()
         
         logger.info(f"Database backed up to {backup_path}")
         return backup_path
@@ -0,0 +1,289 @@
+"""
+Managed secondary indexes for sparks.db.
+Indexes are declared once here and migrated at startup, and the hot queries
+the cogs run are checked with EXPLAIN QUERY PLAN so a full-table scan shows
+up in the logs instead of in command latency.
+"""
+
+import re
+import logging
+
+logger = logging.getLogger('bot.indexes')
+
+# Columns some cogs expect on tables created before they existed
+REQUIRED_COLUMNS = [
+    # gacha_system, evolution_system and vote key materials by api_players.id.
+    # No REFERENCES clause: api_players is the web app's table, and with
+    # foreign_keys on every write to user_materials would fail until it exists
+    ("user_materials", "player_id", "INTEGER"),
+    # RNG stream seed each battle was played with, for exact replays
+    ("battles", "seed", "INTEGER"),
+    ("pvp_battles", "seed", "INTEGER"),
+    # Stamina and MP the battle and dungeon cogs keep on api_players
+    ("api_players", "stamina", "INTEGER DEFAULT 100"),
+    ("api_players", "max_stamina", "INTEGER DEFAULT 100"),
+    ("api_players", "mp", "INTEGER DEFAULT 100"),
+    ("api_players", "max_mp", "INTEGER DEFAULT 100"),
+    # When stamina/MP last changed, for lazy regeneration (0 = long ago, so existing rows start full)
+    ("players", "stamina_regen_ts", "INTEGER DEFAULT 0"),
+    ("players", "mp_regen_ts", "INTEGER DEFAULT 0"),
+    ("api_players", "stamina_regen_ts", "INTEGER DEFAULT 0"),
+    ("api_players", "mp_regen_ts", "INTEGER DEFAULT 0")
+]
+
+# Each index: name, table, columns (optionally with ASC/DESC) and uniqueness.
+# Unique indexes double as ON CONFLICT targets for upserts.
+INDEXES = [
+    # Inventory listing, card counts and equipped-card lookups
+    {"name": "idx_usercards_user_level", "table": "usercards",
+     "columns": ["user_id", "level DESC", "rarity DESC", "id"], "unique": False},
+    {"name": "idx_usercards_user_equipped", "table": "usercards",
+     "columns": ["user_id", "equipped"], "unique": False},
+    {"name": "idx_api_user_cards_player_equipped", "table": "api_user_cards",
+     "columns": ["player_id", "equipped"], "unique": False},
+
+    # One stack per owner and material/item
+    {"name": "uq_user_materials_user_material", "table": "user_materials",
+     "columns": ["user_id", "material_id"], "unique": True},
+    {"name": "uq_user_materials_player_material", "table": "user_materials",
+     "columns": ["player_id", "material_id"], "unique": True},
+    {"name": "uq_user_items_user_item", "table": "user_items",
+     "columns": ["user_id", "item_id"], "unique": True},
+
+    # Identity lookup (skipped when the table already has its UNIQUE index)
+    {"name": "uq_api_players_discord_id", "table": "api_players",
+     "columns": ["discord_id"], "unique": True},
+
+    # Dungeon progress
+    {"name": "idx_dungeon_floors_dungeon_floor", "table": "dungeon_floors",
+     "columns": ["dungeon_id", "floor_number"], "unique": False},
+    {"name": "idx_completed_floors_player_dungeon", "table": "completed_floors",
+     "columns": ["player_id", "dungeon_id", "floor_number"], "unique": False},
+
+    # Leaderboards
+    {"name": "idx_players_level", "table": "players",
+     "columns": ["level DESC", "xp DESC"], "unique": False},
+    {"name": "idx_players_gold", "table": "players",
+     "columns": ["gold DESC"], "unique": False},
+    {"name": "idx_players_wins", "table": "players",
+     "columns": ["wins DESC"], "unique": False},
+    {"name": "idx_players_pvp_wins", "table": "players",
+     "columns": ["pvp_wins DESC"], "unique": False},
+    {"name": "idx_players_boss_wins", "table": "players",
+     "columns": ["boss_wins DESC"], "unique": False},
+
+    # Card pools, drops and evolution lookups
+    {"name": "idx_api_cards_rarity_series", "table": "api_cards",
+     "columns": ["rarity", "anime_series"], "unique": False},
+    {"name": "idx_boss_drops_boss", "table": "boss_drops",
+     "columns": ["boss_id"], "unique": False},
+    {"name": "idx_evolution_requirements_card_stage", "table": "evolution_requirements",
+     "columns": ["base_card_id", "evolution_stage"], "unique": False},
+
+    # Battle history
+    {"name": "idx_pvp_battles_player1", "table": "pvp_battles",
+     "columns": ["player1_id", "timestamp"], "unique": False},
+    {"name": "idx_pvp_battles_player2", "table": "pvp_battles",
+     "columns": ["player2_id", "timestamp"], "unique": False},
+    {"name": "idx_battles_user_time", "table": "battles",
+     "columns": ["user_id", "timestamp"], "unique": False}
+]
+
+# Queries on the hot path, audited with EXPLAIN QUERY PLAN at startup
+HOT_QUERIES = {
+    "inventory page": """
+        SELECT id FROM usercards WHERE user_id = ?
+        ORDER BY level DESC, rarity DESC, id ASC LIMIT 10
+    """,
+    "inventory count": "SELECT COUNT(*) FROM usercards WHERE user_id = ?",
+    "equipped card": "SELECT id FROM usercards WHERE user_id = ? AND equipped = 1",
+    "equipped api card": "SELECT id FROM api_user_cards WHERE player_id = ? AND equipped = 1",
+    "material stack (player)": "SELECT id, quantity FROM user_materials WHERE player_id = ? AND material_id = ?",
+    "material stack (user)": "SELECT id, quantity FROM user_materials WHERE user_id = ? AND material_id = ?",
+    "item stack": "SELECT id FROM user_items WHERE user_id = ? AND item_id = ?",
+    "player by discord id": "SELECT id FROM api_players WHERE discord_id = ?",
+    "dungeon floor": "SELECT id FROM dungeon_floors WHERE dungeon_id = ? AND floor_number = ?",
+    "leaderboard level": "SELECT user_id, level, xp FROM players ORDER BY level DESC, xp DESC LIMIT 10",
+    "leaderboard gold": "SELECT user_id, gold FROM players ORDER BY gold DESC LIMIT 10",
+    "leaderboard wins": "SELECT user_id, wins, losses FROM players ORDER BY wins DESC LIMIT 10",
+    "leaderboard pvp": "SELECT user_id, pvp_wins, pvp_losses FROM players ORDER BY pvp_wins DESC LIMIT 10",
+    "leaderboard boss": "SELECT user_id, boss_wins FROM players ORDER BY boss_wins DESC LIMIT 10",
+    "boss drops": "SELECT material_id FROM boss_drops WHERE boss_id = ?"
+}
+
+# "SCAN players" is a full table scan; "SCAN players USING INDEX ..." is not
+_FULL_SCAN = re.compile(r"^SCAN \S+(?: AS \S+)?$")
+
+def _table_columns(cursor, table):
+    """Return the column names of a table (empty if it doesn't exist)."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+def _index_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+def _covered_by_unique(cursor, table, columns):
+    """Check whether a unique index on exactly these columns already exists."""
+    cursor.execute(f"PRAGMA index_list({table})")
+    for row in cursor.fetchall():
+        index_name, unique = row[1], row[2]
+        if not unique:
+            continue
+        cursor.execute(f"PRAGMA index_info({index_name})")
+        if [info[2] for info in cursor.fetchall()] == columns:
+            return True
+    return False
+
+def missing_references(cursor, table):
+    """Return the tables a table's foreign keys point at that don't exist yet.
+
+    With foreign_keys on, SQLite refuses every UPDATE or DELETE on such a table.
+    """
+    cursor.execute(f"PRAGMA foreign_key_list({table})")
+    parents = sorted({row[2] for row in cursor.fetchall()})
+    return [parent for parent in parents if not _table_columns(cursor, parent)]
+
+def _merge_duplicates(cursor, table, key_columns, sum_column):
+    """Fold duplicate rows into the oldest one so a unique index can be built.
+
+    Rows with a NULL key are left alone, since SQLite treats NULLs as distinct.
+    """
+    keys = ", ".join(key_columns)
+    not_null = " AND ".join(f"{col} IS NOT NULL" for col in key_columns)
+    match = " AND ".join(f"dup.{col} = {table}.{col}" for col in key_columns)
+
+    cursor.execute(f"""
+        UPDATE {table}
+        SET {sum_column} = (SELECT SUM(dup.{sum_column}) FROM {table} dup WHERE {match})
+        WHERE id IN (
+            SELECT MIN(id) FROM {table}
+            WHERE {not_null}
+            GROUP BY {keys}
+            HAVING COUNT(*) > 1
+        )
+    """)
+    cursor.execute(f"""
+        DELETE FROM {table}
+        WHERE {not_null}
+        AND id NOT IN (SELECT MIN(id) FROM {table} WHERE {not_null} GROUP BY {keys})
+    """)
+
+    if cursor.rowcount > 0:
+        logger.warning(f"Merged {cursor.rowcount} duplicate row(s) in {table} on ({keys})")
+
+def ensure_columns(conn, columns=None):
+    """Add any REQUIRED_COLUMNS (or the given columns) missing from existing tables.
+
+    Args:
+        conn (sqlite3.Connection): Open connection
+        columns (list): (table, column, declaration) entries, defaults to REQUIRED_COLUMNS
+
+    Returns:
+        int: Number of columns added
+    """
+    cursor = conn.cursor()
+    added = 0
+
+    for table, column, declaration in REQUIRED_COLUMNS if columns is None else columns:
+        table_columns = _table_columns(cursor, table)
+        if not table_columns or column in table_columns:
+            continue
+
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+        logger.info(f"Added column {table}.{column}")
+        added += 1
+
+    conn.commit()
+    cursor.close()
+    return added
+
+def ensure_indexes(conn):
+    """Create any managed indexes that are missing.
+
+    Tables that don't exist yet (or lack a column, or reference a table that
+    doesn't exist yet) are skipped and picked up on a later startup once they do.
+
+    Args:
+        conn (sqlite3.Connection): Open connection
+
+    Returns:
+        int: Number of indexes created
+    """
+    cursor = conn.cursor()
+    created = 0
+
+    for index in INDEXES:
+        if _index_exists(cursor, index["name"]):
+            continue
+
+        table = index["table"]
+        table_columns = _table_columns(cursor, table)
+        if not table_columns:
+            logger.debug(f"Skipping index {index['name']}: table {table} does not exist")
+            continue
+
+        key_columns = [col.split()[0] for col in index["columns"]]
+        missing = [col for col in key_columns if col not in table_columns]
+        if missing:
+            logger.warning(f"Skipping index {index['name']}: {table} has no column(s) {', '.join(missing)}")
+            continue
+
+        if index["unique"]:
+            if _covered_by_unique(cursor, table, key_columns):
+                continue
+
+            # Existing duplicate stacks would make the CREATE fail, and they
+            # can't be merged while a table the stacks reference is missing
+            if "quantity" in table_columns:
+                missing = missing_references(cursor, table)
+                if missing:
+                    logger.debug(f"Skipping index {index['name']}: {table} references missing {', '.join(missing)}")
+                    continue
+                _merge_duplicates(cursor, table, key_columns, "quantity")
+
+        unique = "UNIQUE " if index["unique"] else ""
+        cursor.execute(
+            f"CREATE {unique}INDEX IF NOT EXISTS {index['name']} "
+            f"ON {table} ({', '.join(index['columns'])})"
+        )
+        logger.info(f"Created index {index['name']} on {table}")
+        created += 1
+
+    conn.commit()
+    cursor.close()
+    return created
+
+def audit_query_plans(conn):
+    """Run EXPLAIN QUERY PLAN over HOT_QUERIES and warn about full scans.
+
+    Args:
+        conn (sqlite3.Connection): Open connection
+
+    Returns:
+        dict: Query name -> list of plan details that scan a whole table
+    """
+    cursor = conn.cursor()
+    problems = {}
+
+    for name, query in HOT_QUERIES.items():
+        params = (None,) * query.count("?")
+
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        except Exception as e:
+            # Usually a table that hasn't been created yet
+            logger.debug(f"Skipping plan audit for '{name}': {e}")
+            continue
+
+        scans = [row[3] for row in cursor.fetchall() if _FULL_SCAN.match(row[3])]
+        if scans:
+            problems[name] = scans
+            logger.warning(f"Hot query '{name}' does a full table scan: {'; '.join(scans)}")
+
+    cursor.close()
+
+    if not problems:
+        logger.info(f"Query plan audit passed for {len(HOT_QUERIES)} hot queries")
+
+    return problems
@@ -0,0 +1,310 @@
+"""
+Versioned schema migrations for sparks.db.
+Every schema change is an ordered, numbered step in MIGRATIONS, and the
+schema_version table records which steps a database has applied. Startup
+runs only the pending ones, so an up-to-date database costs one SELECT
+instead of re-running every CREATE/ALTER.
+
+To change the schema, append a step with the next version number; never
+edit or renumber a step that has shipped. Steps are idempotent (they check
+before they create), so databases made before schema_version existed simply
+apply them all once. A step that finds some of its tables missing (e.g. the
+api_* tables the web app creates) does what it can, raises Deferred and
+stays pending, so a later startup finishes it once they exist.
+
+Data rewrites go through rewrite_in_chunks(), which commits every
+REWRITE_CHUNK rows so the write lock is never held for long.
+
+    python -m database.migrations             apply pending steps
+    python -m database.migrations --dry-run   list them without applying
+"""
+
+import sys
+import time
+import logging
+
+from database.indexes import REQUIRED_COLUMNS, INDEXES, ensure_columns, ensure_indexes, missing_references
+from database.search import SEARCH_INDEXES, ensure_search_indexes
+
+logger = logging.getLogger('bot.migrations')
+
+# Rows updated per statement (and commit) by rewrite_in_chunks
+REWRITE_CHUNK = 1000
+
+# Columns the cogs read that no table definition here creates
+ASSUMED_COLUMNS = [
+    # Card series, skill cost and evolution cap (init_anime_cards creates them, the web app doesn't)
+    ("api_cards", "anime_series", "TEXT"),
+    ("api_cards", "mp_cost", "INTEGER DEFAULT 10"),
+    ("api_cards", "max_evo", "INTEGER DEFAULT 5"),
+    ("api_user_cards", "evo_stage", "INTEGER DEFAULT 1"),
+    # Reward cooldowns and streaks
+    ("players", "daily_streak", "INTEGER DEFAULT 0"),
+    ("api_players", "last_hourly", "INTEGER DEFAULT 0"),
+    ("api_players", "last_vote", "INTEGER DEFAULT 0"),
+    ("api_players", "vote_streak", "INTEGER DEFAULT 0")
+]
+
+# Counters that cogs add to directly, so a NULL breaks the command; value for NULL
+COUNTER_DEFAULTS = {
+    "players": {"level": 1, "xp": 0, "wins": 0, "losses": 0, "pvp_wins": 0, "pvp_losses": 0, "boss_wins": 0},
+    "api_players": {"level": 1, "xp": 0, "wins": 0, "losses": 0, "pvp_wins": 0, "pvp_losses": 0}
+}
+
+class Deferred(Exception):
+    """Raised by a step that couldn't finish yet; it stays pending for the next startup."""
+
+def _table_columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+def _missing_tables(conn, tables, references=False):
+    """
+    Checks a step's table dependencies before it runs
+
+    Args:
+        conn (sqlite3.Connection): Open connection
+        tables (iterable): Tables the step works on
+        references (bool): Also require the tables their foreign keys point at
+
+    Returns:
+        list: The tables that don't exist yet
+    """
+    cursor = conn.cursor()
+    missing = {table for table in tables if not _table_columns(cursor, table)}
+    if references:
+        for table in set(tables) - missing:
+            missing.update(missing_references(cursor, table))
+    cursor.close()
+    return sorted(missing)
+
+def _defer_if_missing(missing):
+    """Raise Deferred if a step found tables missing (call after doing what's possible)."""
+    if missing:
+        raise Deferred(f"missing table(s) {', '.join(missing)}")
+
+def rewrite_in_chunks(conn, table, assignments, where, params=(), chunk_size=None):
+    """
+    Updates the rows matching a condition a chunk at a time
+
+    Each chunk is its own transaction, so other writers get the lock between
+    chunks. The assignments must make the condition false for the rows they
+    update, or the same rows would be picked again.
+
+    Args:
+        conn (sqlite3.Connection): Open connection
+        table (str): Table to update
+        assignments (str): SET clause, e.g. "xp = 0"
+        where (str): Condition selecting the rows still to update, e.g. "xp IS NULL"
+        params (tuple): Parameters of the condition
+        chunk_size (int): Rows per chunk, defaults to REWRITE_CHUNK
+
+    Returns:
+        int: Number of rows updated
+    """
+    chunk_size = chunk_size or REWRITE_CHUNK
+    cursor = conn.cursor()
+    updated = 0
+
+    while True:
+        cursor.execute(f"""
+            UPDATE {table} SET {assignments}
+            WHERE rowid IN (SELECT rowid FROM {table} WHERE {where} LIMIT ?)
+        """, (*params, chunk_size))
+        conn.commit()
+        updated += cursor.rowcount
+        if cursor.rowcount < chunk_size:
+            break
+
+    cursor.close()
+    return updated
+
+def _base_tables(db):
+    """Create the bot's own tables and seed the shop items and materials."""
+    db.create_tables()
+
+def _required_columns(db):
+    """Add the columns the cogs key and regenerate by (player_id, seeds, stamina/MP timestamps)."""
+    missing = _missing_tables(db.conn, [table for table, _, _ in REQUIRED_COLUMNS])
+    ensure_columns(db.conn)
+    _defer_if_missing(missing)
+
+def _assumed_columns(db):
+    """Add the card, evolution and reward-streak columns the cogs assumed exist."""
+    missing = _missing_tables(db.conn, [table for table, _, _ in ASSUMED_COLUMNS])
+    ensure_columns(db.conn, ASSUMED_COLUMNS)
+    _defer_if_missing(missing)
+
+def _dungeon_tables(db):
+    """Create the dungeon, floor and floor-completion tables."""
+    cursor = db.conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dungeons (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            anime_series TEXT,
+            min_level INTEGER DEFAULT 1,
+            floor_count INTEGER DEFAULT 10,
+            image_url TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dungeon_floors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dungeon_id INTEGER NOT NULL REFERENCES dungeons(id),
+            floor_number INTEGER NOT NULL,
+            boss_id INTEGER,
+            description TEXT,
+            min_level INTEGER DEFAULT 1
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS completed_floors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_id INTEGER NOT NULL,
+            dungeon_id INTEGER NOT NULL REFERENCES dungeons(id),
+            floor_number INTEGER NOT NULL,
+            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db.conn.commit()
+    cursor.close()
+
+def _indexes(db):
+    """Create the managed secondary indexes (merging duplicate stacks first)."""
+    # Stacks referencing a missing table can't be merged, so their unique index waits too
+    missing = _missing_tables(db.conn, [index["table"] for index in INDEXES], references=True)
+    ensure_indexes(db.conn)
+    _defer_if_missing(missing)
+
+def _catalog_triggers(db):
+    """Add the catalog_versions triggers the card catalog polls."""
+    # database.database imports this module, so its table list is imported here
+    from database.database import CATALOG_TABLES
+
+    missing = _missing_tables(db.conn, CATALOG_TABLES)
+    db.ensure_catalog_triggers()
+    _defer_if_missing(missing)
+
+def _leaderboard_triggers(db):
+    """Add the leaderboard_changes triggers the leaderboards drain."""
+    db.ensure_leaderboard_triggers()
+
+def _search_indexes(db):
+    """Build the trigram FTS tables and their sync triggers."""
+    missing = _missing_tables(db.conn, [spec["table"] for spec in SEARCH_INDEXES.values()])
+    ensure_search_indexes(db.conn)
+    _defer_if_missing(missing)
+
+def _fill_null_counters(db):
+    """Replace NULL player counters with their starting values, in chunks."""
+    missing = _missing_tables(db.conn, COUNTER_DEFAULTS)
+    cursor = db.conn.cursor()
+
+    for table, defaults in COUNTER_DEFAULTS.items():
+        columns = [column for column in defaults if column in _table_columns(cursor, table)]
+        if not columns:
+            continue
+
+        assignments = ", ".join(f"{column} = COALESCE({column}, {defaults[column]})" for column in columns)
+        where = " OR ".join(f"{column} IS NULL" for column in columns)
+        updated = rewrite_in_chunks(db.conn, table, assignments, where)
+        if updated:
+            logger.info(f"Filled NULL counters in {updated} {table} row(s)")
+
+    cursor.close()
+    _defer_if_missing(missing)
+
+# (version, name, step) in the order they apply; append only
+MIGRATIONS = [
+    (1, "base tables", _base_tables),
+    (2, "required columns", _required_columns),
+    (3, "assumed columns", _assumed_columns),
+    (4, "dungeon tables", _dungeon_tables),
+    (5, "secondary indexes", _indexes),
+    (6, "catalog triggers", _catalog_triggers),
+    (7, "leaderboard triggers", _leaderboard_triggers),
+    (8, "search indexes", _search_indexes),
+    (9, "fill null counters", _fill_null_counters)
+]
+
+def applied_versions(conn):
+    """
+    Reads which migrations a database has applied
+
+    Args:
+        conn (sqlite3.Connection): Open connection
+
+    Returns:
+        set: Applied version numbers
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at INTEGER NOT NULL
+        )
+    """)
+    conn.commit()
+    return {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+
+def pending_migrations(conn):
+    """Returns the (version, name, step) entries of MIGRATIONS not applied yet."""
+    applied = applied_versions(conn)
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+def run_migrations(db, dry_run=False):
+    """
+    Applies the pending migrations in order
+
+    Args:
+        db (Database): Database whose sync connection is migrated
+        dry_run (bool): Only log and return what would run
+
+    Returns:
+        list: (version, name) of the steps applied (or, in a dry run, pending)
+    """
+    pending = pending_migrations(db.conn)
+    if not pending:
+        logger.debug("Schema is up to date")
+        return []
+
+    if dry_run:
+        for version, name, step in pending:
+            logger.info(f"Pending migration {version}: {name} - {step.__doc__}")
+        return [(version, name) for version, name, _ in pending]
+
+    applied = []
+    for version, name, step in pending:
+        started = time.perf_counter()
+        try:
+            step(db)
+        except Deferred as e:
+            logger.info(f"Migration {version} ({name}) deferred: {e}")
+            continue
+        except Exception:
+            db.conn.rollback()
+            logger.exception(f"Migration {version} ({name}) failed")
+            raise
+
+        db.conn.execute(
+            "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+            (version, name, int(time.time()))
+        )
+        db.conn.commit()
+        applied.append((version, name))
+        logger.info(f"Applied migration {version}: {name} ({time.perf_counter() - started:.2f}s)")
+
+    return applied
+
+if __name__ == "__main__":
+    from database.database import Database
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    dry_run = "--dry-run" in sys.argv[1:]
+
+    db = Database(migrate=False)
+    steps = run_migrations(db, dry_run=dry_run)
+    print(f"{len(steps)} migration(s) {'pending' if dry_run else 'applied'}")
+    db.close()
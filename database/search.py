@@ -0,0 +1,191 @@
+"""
+Full-text card search for sparks.db.
+Each searchable card table gets an FTS5 shadow table with the trigram
+tokenizer, so any substring of three or more characters (including the
+start of a name) is an index lookup instead of a LIKE '%term%' scan. The
+shadow tables are kept in sync by triggers on the source tables and
+rebuilt at startup if they drift or their columns change.
+
+When an FTS table doesn't exist (its migration is still deferred, or SQLite
+was built without the trigram tokenizer), searches fall back to LIKE on
+the source table, so they get slower but keep working.
+"""
+
+import logging
+
+logger = logging.getLogger('bot.search')
+
+# FTS table -> source table and the columns searched, most important first.
+# Columns the source table doesn't have are left out.
+SEARCH_INDEXES = {
+    "usercard_search": {"table": "usercards", "columns": ["name", "anime_series", "skill", "element", "rarity"]},
+    "api_card_search": {"table": "api_cards", "columns": ["name", "anime_series", "skill", "element", "rarity"]}
+}
+
+# bm25 weight per column; matches in a name count far more than in a rarity
+COLUMN_WEIGHTS = {"name": 10.0, "anime_series": 5.0, "skill": 2.0, "element": 1.0, "rarity": 1.0}
+
+# FTS table -> columns it was built with, filled in by ensure_search_indexes
+# (or load_search_columns when the tables are already up to date)
+INDEXED_COLUMNS = {}
+
+# FTS table -> source columns searched with LIKE while the FTS table is missing,
+# filled in by load_search_columns
+FALLBACK_COLUMNS = {}
+
+# Shortest term the trigram index can look up; shorter ones fall back to LIKE
+MIN_TRIGRAM = 3
+
+def _table_columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+def search_columns(cursor, name):
+    """Return the columns an FTS table indexes in this database (empty if its source is missing)."""
+    spec = SEARCH_INDEXES[name]
+    source_columns = _table_columns(cursor, spec["table"])
+    return [column for column in spec["columns"] if column in source_columns]
+
+def _create_triggers(cursor, name, table, columns):
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"NEW.{column}" for column in columns)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{name}_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {name} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{name}_update
+        AFTER UPDATE OF {column_list} ON {table}
+        BEGIN
+            DELETE FROM {name} WHERE rowid = OLD.id;
+            INSERT INTO {name} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{name}_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM {name} WHERE rowid = OLD.id;
+        END
+    """)
+
+def _drop(cursor, name):
+    for event in ("insert", "update", "delete"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_{name}_{event}")
+    cursor.execute(f"DROP TABLE IF EXISTS {name}")
+
+def ensure_search_indexes(conn):
+    """Create, migrate and backfill the FTS tables in SEARCH_INDEXES.
+
+    Args:
+        conn (sqlite3.Connection): Open connection
+
+    Returns:
+        int: Number of FTS tables rebuilt
+    """
+    cursor = conn.cursor()
+    rebuilt = 0
+
+    for name, spec in SEARCH_INDEXES.items():
+        table = spec["table"]
+        columns = search_columns(cursor, name)
+        if not columns:
+            logger.debug(f"Skipping search index {name}: table {table} does not exist")
+            continue
+
+        # A source table that gained a column (e.g. anime_series) needs a new FTS table
+        if _table_columns(cursor, name) not in ([], columns):
+            _drop(cursor, name)
+            logger.info(f"Search index {name} columns changed, recreating")
+
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {name}
+            USING fts5({", ".join(columns)}, tokenize = 'trigram')
+        """)
+        _create_triggers(cursor, name, table, columns)
+        INDEXED_COLUMNS[name] = columns
+
+        # Backfill rows written before the triggers existed (or while they were missing)
+        cursor.execute(f"SELECT (SELECT COUNT(*) FROM {table}), (SELECT COUNT(*) FROM {name})")
+        source_rows, indexed_rows = cursor.fetchone()
+        if source_rows != indexed_rows:
+            column_list = ", ".join(columns)
+            cursor.execute(f"DELETE FROM {name}")
+            cursor.execute(f"INSERT INTO {name} (rowid, {column_list}) SELECT id, {column_list} FROM {table}")
+            logger.info(f"Rebuilt search index {name} ({source_rows} rows)")
+            rebuilt += 1
+
+    conn.commit()
+    cursor.close()
+    return rebuilt
+
+def load_search_columns(conn):
+    """Read the columns of the existing FTS tables into INDEXED_COLUMNS.
+
+    Searches of FTS tables that don't exist get their source columns in
+    FALLBACK_COLUMNS instead.
+
+    Args:
+        conn (sqlite3.Connection): Open connection
+
+    Returns:
+        int: Number of FTS tables found
+    """
+    cursor = conn.cursor()
+    for name in SEARCH_INDEXES:
+        columns = _table_columns(cursor, name)
+        if columns:
+            INDEXED_COLUMNS[name] = columns
+        else:
+            INDEXED_COLUMNS.pop(name, None)
+            FALLBACK_COLUMNS[name] = search_columns(cursor, name)
+            logger.warning(f"Search index {name} is missing, searches fall back to LIKE")
+    cursor.close()
+    return len(INDEXED_COLUMNS)
+
+def search_table(name):
+    """Return the table to join for a search: the FTS table, or its source table while it's missing.
+
+    Either way its rowid is the card's id.
+    """
+    return name if name in INDEXED_COLUMNS else SEARCH_INDEXES[name]["table"]
+
+def _like_pattern(term):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def search_filter(name, term, alias="s"):
+    """Build the WHERE and ORDER BY for a ranked search of an FTS table.
+
+    The whole term must appear in one of the card's columns, as with the
+    LIKE '%term%' filters this replaced. Terms of three or more characters
+    are matched as a phrase through the trigram index; shorter ones (and
+    every term while the FTS table is missing) are checked with LIKE. Cards
+    whose name starts with the term rank first, then by bm25 relevance.
+
+    Args:
+        name (str): One of SEARCH_INDEXES
+        term (str): What the player typed
+        alias (str): Alias of the table joined from search_table(name)
+
+    Returns:
+        tuple: (where SQL, where params, order by SQL, order by params)
+    """
+    term = term.strip()
+    indexed = name in INDEXED_COLUMNS
+    columns = INDEXED_COLUMNS[name] if indexed else FALLBACK_COLUMNS.get(name) or SEARCH_INDEXES[name]["columns"]
+
+    order = f"({alias}.name LIKE ? ESCAPE '\\') DESC"
+    order_params = [_like_pattern(term)[1:]]
+
+    if indexed and len(term) >= MIN_TRIGRAM:
+        weights = ", ".join(str(COLUMN_WEIGHTS.get(column, 1.0)) for column in columns)
+        order += f", bm25({alias}.{name}, {weights})"
+        return f"{alias}.{name} MATCH ?", ['"' + term.replace('"', '""') + '"'], order, order_params
+
+    where = "(" + " OR ".join(f"{alias}.{column} LIKE ? ESCAPE '\\'" for column in columns) + ")"
+    return where, [_like_pattern(term)] * len(columns), order, order_params
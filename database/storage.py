@@ -0,0 +1,61 @@
+"""
+Storage modes for sparks.db.
+Each mode is the set of pragmas applied to every connection the bot opens,
+sync or async, so all of them agree on journaling and durability.
+"""
+
+import os
+import logging
+
+logger = logging.getLogger('bot.storage')
+
+STORAGE_MODES = {
+    # Write-ahead log: readers never block the writer, and with
+    # synchronous=NORMAL a commit only fsyncs when the WAL is checkpointed
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,  # 256 MiB
+        "cache_size": -32768,            # Negative means KiB, so 32 MiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "foreign_keys": "ON"
+    },
+    # SQLite defaults: rollback journal and an fsync on every commit
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "foreign_keys": "ON"
+    }
+}
+
+DEFAULT_STORAGE_MODE = "wal"
+
+def get_storage_mode(name=None):
+    """Resolve the storage mode to use.
+
+    Args:
+        name (str): Requested mode, or None to read SPARKS_DB_STORAGE_MODE
+
+    Returns:
+        str: A key of STORAGE_MODES
+    """
+    name = (name or os.getenv("SPARKS_DB_STORAGE_MODE") or DEFAULT_STORAGE_MODE).lower()
+
+    if name not in STORAGE_MODES:
+        logger.warning(f"Unknown storage mode '{name}', falling back to '{DEFAULT_STORAGE_MODE}'")
+        name = DEFAULT_STORAGE_MODE
+
+    return name
+
+def pragma_statements(mode):
+    """Build the PRAGMA statements for a storage mode.
+
+    Args:
+        mode (str): A key of STORAGE_MODES
+
+    Returns:
+        list: PRAGMA statements in the order they should run
+    """
+    return [f"PRAGMA {name} = {value}" for name, value in STORAGE_MODES[mode].items()]
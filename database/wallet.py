@@ -0,0 +1,121 @@
+"""
+Guarded spends of gold, items and materials.
+Every spend is a single UPDATE that only matches while the player can
+afford it (`SET gold = gold - ? WHERE ... AND gold >= ?`), and its rowcount
+says whether it went through. The check and the write can't be separated
+by another command, so spending needs no SELECT first and no lock.
+
+Spends of several resources (e.g. an evolution's gold plus materials) run
+inside transaction() (or, on the async layer, a job passed to
+aio.transaction() spending through tx.cursor) and either all apply or none do.
+"""
+
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger('bot.wallet')
+
+# Resource -> (table, amount column, WHERE clause identifying the row).
+# The keys passed to a spend fill the WHERE clause's placeholders in order;
+# players tables are keyed by Discord ID, api_* tables by api_players.id.
+SPENDS = {
+    "gold": ("players", "gold", "user_id = ?"),
+    "api_gold": ("api_players", "gold", "id = ?"),
+    "item": ("user_items", "quantity", "user_id = ? AND item_id = ?"),
+    "pack": ("user_items", "quantity",
+             "user_id = ? AND item_id = (SELECT id FROM items WHERE type = 'pack' AND effect = ?)"),
+    "material": ("user_materials", "quantity", "player_id = ? AND material_id = ?")
+}
+
+class InsufficientFunds(Exception):
+    """A spend the player couldn't afford; nothing was deducted."""
+
+    def __init__(self, resource, keys, amount):
+        self.resource = resource
+        self.keys = keys
+        self.amount = amount
+        super().__init__(f"Not enough {resource} for {keys}: needs {amount}")
+
+def _spend_statement(resource, keys, amount):
+    table, column, where = SPENDS[resource]
+    query = f"UPDATE {table} SET {column} = {column} - ? WHERE {where} AND {column} >= ?"
+    return query, (amount, *keys, amount)
+
+def _keys(keys):
+    return keys if isinstance(keys, (tuple, list)) else (keys,)
+
+def try_spend(cursor, resource, keys, amount):
+    """
+    Spends a resource if the player has enough
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the sync connection
+        resource (str): One of SPENDS
+        keys: Player key (Discord ID or api_players.id), or a tuple of the resource's keys (e.g. (user_id, item_id))
+        amount (int): Amount to deduct
+
+    Returns:
+        bool: True if it was deducted, False if the player couldn't afford it
+    """
+    if amount <= 0:
+        return True
+    cursor.execute(*_spend_statement(resource, _keys(keys), amount))
+    return cursor.rowcount == 1
+
+def spend(cursor, resource, keys, amount):
+    """Like try_spend(), but raises InsufficientFunds (use inside transaction())."""
+    keys = _keys(keys)
+    if not try_spend(cursor, resource, keys, amount):
+        logger.debug(f"Spend of {amount} {resource} for {keys} refused")
+        raise InsufficientFunds(resource, keys, amount)
+
+async def try_spend_async(aio, resource, keys, amount):
+    """
+    Spends a resource through the async layer if the player has enough
+
+    Args:
+        aio (AsyncDatabase): Async layer (inside aio.transaction() jobs use try_spend(tx.cursor, ...))
+        resource (str): One of SPENDS
+        keys: Player key, or a tuple of the resource's keys
+        amount (int): Amount to deduct
+
+    Returns:
+        bool: True if it was deducted, False if the player couldn't afford it
+    """
+    if amount <= 0:
+        return True
+    cursor = await aio.execute(*_spend_statement(resource, _keys(keys), amount))
+    return cursor.rowcount == 1
+
+async def spend_async(aio, resource, keys, amount):
+    """Like try_spend_async(), but raises InsufficientFunds."""
+    keys = _keys(keys)
+    if not await try_spend_async(aio, resource, keys, amount):
+        logger.debug(f"Spend of {amount} {resource} for {keys} refused")
+        raise InsufficientFunds(resource, keys, amount)
+
+@contextmanager
+def transaction(conn):
+    """
+    Applies every spend and write in the block or none of them
+
+    Usage:
+        with wallet.transaction(self.db.conn):
+            wallet.spend(self.cursor, "api_gold", player_id, cost)
+            wallet.spend(self.cursor, "material", (player_id, material_id), 3)
+
+    Runs in a savepoint, so only the block is undone on an error (other
+    uncommitted writes on the connection survive), and commits on success.
+
+    Args:
+        conn (sqlite3.Connection): The sync connection
+    """
+    conn.execute("SAVEPOINT wallet")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK TO wallet")
+        conn.execute("RELEASE wallet")
+        raise
+    conn.execute("RELEASE wallet")
+    conn.commit()
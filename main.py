@@ -28,6 +28,15 @@ if __name__ == "__main__":
         from discord.ext import commands
         from dotenv import load_dotenv
         from database.database import Database
+        from utils.card_catalog import CardCatalog
+        from utils.leaderboard import LeaderboardService
+        from utils.player_state import PlayerStateCache
+        from utils.boosts import BOOSTS
+        from utils.skills import SKILLS
+        from utils.identity import IDENTITY
+        from utils.render_service import RenderService
+        from utils.assets import ASSETS
+        from utils.artwork_cache import ArtworkCache
         import asyncio
         
         logger = logging.getLogger('bot')
@@ -88,6 +97,46 @@ if __name__ == "__main__":
         async def setup_hook():
             bot.remove_command("help")  # 🚀 Prevent conflicts with built-in help
         
+            # Load fonts, frames and icons once (fails fast if an asset is missing);
+            # the render workers forked next inherit them
+            ASSETS.load()
+        
+            # Fork the image render workers before any other threads exist
+            bot.artwork = ArtworkCache()
+            bot.renderer = RenderService(artwork=bot.artwork)
+            await bot.renderer.start()
+        
+            # One pooled HTTP session for all card artwork downloads
+            await bot.artwork.start()
+        
+            # Open the async database layer before any cog touches it
+            await bot.db.aio.connect()
+        
+            # Load the card and material pools once; cogs pick from memory
+            bot.catalog = CardCatalog(bot.db)
+            await bot.catalog.load()
+        
+            # Compile every card and boss skill into its effect program
+            await SKILLS.load(bot.db)
+        
+            # Discord ID -> api_players.id, resolved once per command
+            bot.identity = IDENTITY
+            bot.identity.load(bot.db)
+        
+            # Hot player counters, written back in batches
+            bot.player_state = PlayerStateCache(bot.db)
+            bot.player_state.start()
+        
+            # Sorted leaderboards, kept current from the players change log
+            bot.leaderboards = LeaderboardService(bot.db)
+            await bot.leaderboards.load()
+            bot.leaderboards.start()
+        
+            # Item boosts, restored from the database and expired in the background
+            bot.boosts = BOOSTS
+            await bot.boosts.load(bot.db)
+            bot.boosts.start()
+        
             cogs_loaded = 0
             cogs_failed = 0
         
@@ -122,6 +171,20 @@ if __name__ == "__main__":
         
         bot.setup_hook = setup_hook
         
+        # ✅ Flush player state and close the leaderboards, boost expiry, async database layer, render pool and artwork session on shutdown
+        _bot_close = bot.close
+        
+        async def close():
+            await _bot_close()
+            await bot.leaderboards.close()
+            await bot.boosts.close()
+            await bot.player_state.close()
+            await bot.db.aio.close()
+            await bot.renderer.close()
+            await bot.artwork.close()
+        
+        bot.close = close
+        
         # Event: Bot is ready
         @bot.event
         async def on_ready():
@@ -143,6 +206,10 @@ if __name__ == "__main__":
                 
                 if result:
                     logger.info("✅ Anime card database initialized successfully.")
+                    
+                    # Pick up the freshly seeded cards
+                    bot.catalog.invalidate()
+                    await bot.catalog.refresh_if_stale()
                 else:
                     logger.warning("⚠️ Failed to initialize anime card database.")
             except Exception as e:
@@ -0,0 +1,73 @@
+import os
+import sys
+import contextlib
+from types import SimpleNamespace
+
+import pytest
+
+# Run the tests against the working tree, whichever directory pytest starts in
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Runs a test in an empty directory, so Database() creates a fresh database/sparks.db there."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+class FakeMessage:
+    """Message returned by FakeContext.send; records the edits a command makes to it."""
+
+    def __init__(self, content=None, **kwargs):
+        self.content = content
+        self.kwargs = kwargs
+        self.edits = []
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs)
+
+class FakeContext:
+    """Just enough of commands.Context to call a command callback directly."""
+
+    def __init__(self, user_id, name="Tester"):
+        self.author = SimpleNamespace(id=user_id, display_name=name, name=name, mention=f"<@{user_id}>")
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        message = FakeMessage(content, **kwargs)
+        self.sent.append(message)
+        return message
+
+    def text(self):
+        """Returns everything sent so far as one string (content and embed text)."""
+        parts = []
+        for message in self.sent:
+            parts.append(message.content or "")
+            embed = message.kwargs.get("embed")
+            if embed is not None:
+                parts.append(f"{embed.title} {embed.description}")
+        return "\n".join(parts)
+
+@pytest.fixture
+def cog_bot(workdir):
+    """
+    Returns an async context manager yielding a stand-in bot for cog tests
+
+    The bot has a fresh Database with its async layer connected and a
+    PlayerStateCache (flushed on exit), which is what the cogs take from it.
+    """
+    from database.database import Database
+    from utils.player_state import PlayerStateCache
+
+    @contextlib.asynccontextmanager
+    async def running():
+        db = Database()
+        await db.aio.connect()
+        bot = SimpleNamespace(db=db, player_state=PlayerStateCache(db))
+        try:
+            yield bot
+        finally:
+            await bot.player_state.close()
+            await db.aio.close()
+            db.close()
+
+    return running
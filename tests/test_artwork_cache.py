@@ -0,0 +1,97 @@
+import io
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from PIL import Image
+
+from utils.artwork_cache import ArtworkCache
+
+def png(color, size=(600, 300)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+ART = {"red": png("red"), "green": png("green"), "blue": png("blue")}
+
+def run_with_server(scenario, delay=0.0, **kwargs):
+    """
+    Runs a scenario against a local artwork server
+
+    The cache is pointed at the server through its origin, so the card
+    URLs keep their real hosts. The scenario gets the cache and the number
+    of requests served per path.
+    """
+    requests = {}
+
+    async def art(request):
+        name = request.match_info["name"]
+        requests[name] = requests.get(name, 0) + 1
+        await asyncio.sleep(delay)
+        if name not in ART:
+            raise web.HTTPNotFound()
+        return web.Response(body=ART[name], content_type="image/png")
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/art/{name}.png", art)
+        async with TestServer(app) as server:
+            cache = ArtworkCache(origin=str(server.make_url("/")), **kwargs)
+            await cache.start()
+            try:
+                return await scenario(cache, requests)
+            finally:
+                await cache.close()
+
+    return asyncio.run(main())
+
+def test_concurrent_misses_share_one_download(tmp_path):
+    async def scenario(cache, requests):
+        results = await asyncio.gather(*(cache.thumbnail("https://cdn.example.com/art/red.png") for _ in range(10)))
+        return results, requests
+
+    results, requests = run_with_server(scenario, delay=0.05, disk_dir=str(tmp_path))
+    assert requests == {"red": 1}
+    assert all(data == results[0] for data in results)
+    with Image.open(io.BytesIO(results[0])) as img:
+        assert img.size == (290, 145)
+
+def test_disk_evicts_least_recently_used_at_the_byte_cap(tmp_path):
+    async def scenario(cache, requests):
+        await cache.thumbnail("https://cdn.example.com/art/red.png")
+        size = cache.disk_bytes
+        # Room for two thumbnails: the third evicts the first
+        cache.max_bytes = size * 2 + size // 2
+        await cache.thumbnail("https://cdn.example.com/art/green.png")
+        await cache.thumbnail("https://cdn.example.com/art/blue.png")
+        paths = [cache._path(cache.key(f"https://cdn.example.com/art/{name}.png")) for name in ART]
+        return cache, paths
+
+    cache, (red, green, blue) = run_with_server(scenario, disk_dir=str(tmp_path), max_memory_items=1)
+    assert cache.disk_bytes <= cache.max_bytes
+    assert list(cache.disk) == [green, blue]
+    assert not (tmp_path / red).exists() and red not in cache.disk
+
+def test_failed_url_is_not_retried_until_its_ttl_passes(tmp_path):
+    async def scenario(cache, requests):
+        url = "https://cdn.example.com/art/missing.png"
+        assert await cache.thumbnail(url) is None
+        assert await cache.thumbnail(url) is None
+        retried_early = requests["missing"]
+
+        cache.failure_ttl = 0
+        assert await cache.thumbnail(url) is None
+        return retried_early, requests["missing"]
+
+    retried_early, total = run_with_server(scenario, disk_dir=str(tmp_path))
+    assert retried_early == 1
+    assert total == 2
+
+def test_failures_are_bounded(tmp_path):
+    async def scenario(cache, requests):
+        for i in range(5):
+            await cache.thumbnail(f"https://cdn.example.com/art/missing{i}.png")
+        return list(cache.failures)
+
+    failures = run_with_server(scenario, disk_dir=str(tmp_path), max_failures=3)
+    assert failures == [f"https://cdn.example.com/art/missing{i}.png" for i in (2, 3, 4)]
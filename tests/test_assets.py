@@ -0,0 +1,41 @@
+import pytest
+
+from utils.assets import CARD_SIZE, DEFAULT_RARITY_COLOR, ELEMENT_COLORS, RARITY_COLORS, AssetRegistry
+
+def test_missing_font_file_is_reported_before_loading(tmp_path):
+    registry = AssetRegistry(font_path=str(tmp_path / "missing.ttf"))
+    assert registry.validate() == [f"Font file not found: {tmp_path / 'missing.ttf'}"]
+    with pytest.raises(RuntimeError):
+        registry.load()
+    assert not registry.loaded
+
+def test_everything_is_loaded_once():
+    registry = AssetRegistry(font_path="")
+    assert registry.validate() == []
+    registry.load()
+    fonts, frames = registry.fonts, registry.frames
+
+    registry.load()
+    assert registry.fonts is fonts and registry.frames is frames
+    assert set(registry.icons) == set(ELEMENT_COLORS)
+
+def test_frames_by_rarity():
+    registry = AssetRegistry(font_path="")
+    frame = registry.frame("Legendary")
+
+    assert frame.size == CARD_SIZE
+    assert frame.getpixel((CARD_SIZE[0] // 2, 20))[:3] == RARITY_COLORS["Legendary"]
+    assert registry.frame("Mythic") is registry.frame(None)
+    assert registry.frame(None).getpixel((CARD_SIZE[0] // 2, 20))[:3] == DEFAULT_RARITY_COLOR
+
+def test_icons_are_shared_and_unknown_elements_get_one_off_icons():
+    registry = AssetRegistry(font_path="")
+    assert registry.icon("Fire") is registry.icon("Fire")
+    assert registry.icon("Plasma") is not registry.icon("Plasma")
+    assert "Plasma" not in registry.icons
+
+def test_registry_is_read_only():
+    registry = AssetRegistry(font_path="")
+    registry.load()
+    with pytest.raises(TypeError):
+        registry.frames["Common"] = None
@@ -0,0 +1,103 @@
+import time
+import asyncio
+import sqlite3
+
+import pytest
+
+from database import wallet
+from database.async_database import AsyncDatabase
+from database.storage import pragma_statements
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE api_players (id INTEGER PRIMARY KEY, gold INTEGER)")
+    conn.execute("CREATE TABLE log (id INTEGER PRIMARY KEY, note TEXT)")
+    conn.execute("INSERT INTO api_players (id, gold) VALUES (1, 50)")
+    conn.commit()
+    conn.close()
+
+def sync_connection(path):
+    conn = sqlite3.connect(path)
+    for statement in pragma_statements("wal"):
+        conn.execute(statement)
+    return conn
+
+def run(path, coro_fn, **kwargs):
+    async def main():
+        aio = await AsyncDatabase(str(path), **kwargs).connect()
+        try:
+            return await coro_fn(aio)
+        finally:
+            await aio.close()
+    return asyncio.run(main())
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "sparks.db"
+    make_db(path)
+    return path
+
+def test_writes_are_committed_and_readable(db_path):
+    async def scenario(aio):
+        await asyncio.gather(*(aio.execute("INSERT INTO log (note) VALUES (?)", (str(i),)) for i in range(20)))
+        return await aio.fetchval("SELECT COUNT(*) FROM log")
+
+    assert run(db_path, scenario) == 20
+
+def test_failed_job_does_not_undo_the_rest_of_its_batch(db_path):
+    async def scenario(aio):
+        results = await asyncio.gather(
+            aio.execute("INSERT INTO log (note) VALUES ('a')"),
+            aio.execute("INSERT INTO missing (note) VALUES ('b')"),
+            aio.execute("INSERT INTO log (note) VALUES ('c')"),
+            return_exceptions=True
+        )
+        return results, await aio.fetchall("SELECT note FROM log ORDER BY id")
+
+    results, rows = run(db_path, scenario, flush_interval=0.05)
+    assert isinstance(results[1], sqlite3.OperationalError)
+    assert rows == [("a",), ("c",)]
+
+def test_transaction_rolls_back_only_its_own_writes(db_path):
+    def overspend(tx):
+        wallet.spend(tx.cursor, "api_gold", 1, 30)
+        tx.execute("INSERT INTO log (note) VALUES ('spent')")
+        wallet.spend(tx.cursor, "api_gold", 1, 30)
+
+    async def scenario(aio):
+        with pytest.raises(wallet.InsufficientFunds):
+            await aio.transaction(overspend)
+        return await aio.fetchval("SELECT gold FROM api_players WHERE id = 1"), await aio.fetchval("SELECT COUNT(*) FROM log")
+
+    assert run(db_path, scenario) == (50, 0)
+
+def test_concurrent_guarded_spends_never_overdraw(db_path):
+    async def scenario(aio):
+        spent = await asyncio.gather(*(wallet.try_spend_async(aio, "api_gold", 1, 20) for _ in range(5)))
+        return spent, await aio.fetchval("SELECT gold FROM api_players WHERE id = 1")
+
+    spent, gold = run(db_path, scenario)
+    assert spent.count(True) == 2
+    assert gold == 10
+
+def test_sync_write_during_a_batch_does_not_stall_the_loop(db_path):
+    sync = sync_connection(db_path)
+
+    async def scenario(aio):
+        # Open a long batch window, then write through the sync connection on the loop thread
+        pending = asyncio.ensure_future(aio.execute("INSERT INTO log (note) VALUES ('async')"))
+        await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        sync.execute("INSERT INTO log (note) VALUES ('sync')")
+        sync.commit()
+        elapsed = time.perf_counter() - started
+
+        await pending
+        return elapsed, await aio.fetchval("SELECT COUNT(*) FROM log")
+
+    elapsed, count = run(db_path, scenario, flush_interval=0.5)
+    sync.close()
+    assert elapsed < 1
+    assert count == 2
@@ -0,0 +1,69 @@
+import time
+import asyncio
+
+import pytest
+
+import cogs.battle
+from cogs.battle import Battle
+from conftest import FakeContext
+
+@pytest.fixture(autouse=True)
+def no_pacing(monkeypatch):
+    """Skips the delay between rendered turns."""
+    async def sleep(delay):
+        pass
+    monkeypatch.setattr(cogs.battle.asyncio, "sleep", sleep)
+
+def add_player(db, user_id, level=4, stamina=10, equipped=True):
+    # A fresh regeneration timestamp, so the stamina given is what's available
+    db.conn.execute("INSERT INTO players (user_id, level, stamina, stamina_regen_ts) VALUES (?, ?, ?, ?)",
+                    (user_id, level, stamina, int(time.time())))
+    if equipped:
+        db.conn.execute("""
+            INSERT INTO usercards (user_id, name, rarity, attack, defense, speed, level, element,
+                                   skill, skill_description, skill_mp_cost, equipped)
+            VALUES (?, 'Naruto', 'Rare', 80, 60, 70, 3, 'Wind', 'Rasengan', 'A spinning sphere', 20, 1)
+        """, (user_id,))
+    db.conn.commit()
+
+def test_battle_command_runs_to_a_recorded_result(cog_bot):
+    async def scenario():
+        async with cog_bot() as bot:
+            add_player(bot.db, 1)
+            ctx = FakeContext(1)
+            await Battle.battle_command.callback(Battle(bot), ctx)
+
+            state = await bot.player_state.get("players", 1)
+            battles = bot.db.conn.execute("SELECT result, seed FROM battles WHERE user_id = 1").fetchall()
+            return ctx, state["stamina"], battles
+
+    ctx, stamina, battles = asyncio.run(scenario())
+    assert len(battles) == 1 and battles[0][0] in ("Win", "Loss") and battles[0][1] is not None
+    assert stamina == 7
+    # The opening message is edited once per turn and once more with the result
+    assert ctx.sent[0].content == "⚔️ **Battle Start!**"
+    assert ctx.sent[0].edits[-1]["embed"].title in ("**You Won!** 🎉", "**You Lost!** 💔")
+
+def test_battle_without_equipped_card_keeps_stamina(cog_bot):
+    async def scenario():
+        async with cog_bot() as bot:
+            add_player(bot.db, 2, equipped=False)
+            ctx = FakeContext(2)
+            await Battle.battle_command.callback(Battle(bot), ctx)
+            return ctx, (await bot.player_state.get("players", 2))["stamina"]
+
+    ctx, stamina = asyncio.run(scenario())
+    assert "equip a card" in ctx.text()
+    assert stamina == 10
+
+def test_battle_refused_without_stamina(cog_bot):
+    async def scenario():
+        async with cog_bot() as bot:
+            add_player(bot.db, 3, stamina=2)
+            ctx = FakeContext(3)
+            await Battle.battle_command.callback(Battle(bot), ctx)
+            return ctx, bot.db.conn.execute("SELECT COUNT(*) FROM battles").fetchone()[0]
+
+    ctx, battles = asyncio.run(scenario())
+    assert "at least **3 stamina**" in ctx.text()
+    assert battles == 0
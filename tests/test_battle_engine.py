@@ -0,0 +1,81 @@
+import pytest
+
+from utils.battle_engine import DUEL_RULES, SCALED_RULES, BattleEngine, flat_damage, make_combatant, scaled_damage
+from utils.rng import new_stream
+
+def fighter(name, attack=40, defense=10, speed=10, hp=100, **kwargs):
+    kwargs.setdefault("crit_rate", 0)
+    return make_combatant(name, attack, defense, speed, hp, **kwargs)
+
+def no_elements(rules):
+    return dict(rules, elements=None)
+
+def test_faster_side_moves_first():
+    assert BattleEngine(fighter("a", speed=5), fighter("b", speed=9)).next_side == "b"
+    assert BattleEngine(fighter("a", speed=9), fighter("b", speed=9)).next_side == "a"
+
+def test_flat_damage_has_a_floor():
+    assert flat_damage(40, 10) == 35
+    assert flat_damage(10, 100) == 5
+    assert flat_damage(40, 10, 2.0) == 70
+
+def test_scaled_damage_is_reduced_by_defense():
+    damage, critical = scaled_damage(100, 100, crit_rate=0, rng=new_stream(1))
+    assert not critical
+    assert 45 <= damage <= 55
+
+def test_attack_lands_and_knocks_out():
+    engine = BattleEngine(fighter("a", attack=200), fighter("b", hp=50), rng=new_stream(3), rules=no_elements(DUEL_RULES))
+    events = engine.play_turn("a", "attack")
+
+    hit = next(event for event in events if event["type"] == "attack")
+    assert hit["damage"] == flat_damage(200, 10)
+    assert events[-1] == {"type": "end", "winner": "a", "reason": "ko"}
+    assert engine.finished and engine.winner == "a"
+    assert engine.play_turn("b") == []
+
+def test_guaranteed_dodge():
+    engine = BattleEngine(fighter("a"), fighter("b", dodge_rate=100), rng=new_stream(4), rules=no_elements(DUEL_RULES))
+    hit = next(event for event in engine.play_turn("a", "attack") if event["type"] == "attack")
+    assert hit["dodged"] and hit["damage"] == 0
+
+def test_skill_spends_mp_and_applies_its_program():
+    a = fighter("a", mp=50, skill="Fireball", skill_cost=10, skill_description="Deals heavy fire damage")
+    rules = dict(no_elements(DUEL_RULES), turn_mp_regen=0)
+    engine = BattleEngine(a, fighter("b", hp=1000), rng=new_stream(5), rules=rules)
+    event = next(event for event in engine.play_turn("a", "skill") if event["type"] == "skill")
+
+    assert a["mp"] == 40
+    assert a["cooldown"] == a["skill_program"]["cooldown"]
+    assert event["status"] == "burning"
+    assert not engine.can_use_skill("a")
+
+def test_skill_without_mp_is_refused():
+    engine = BattleEngine(fighter("a", mp=0, skill="Fireball", skill_cost=10), fighter("b"), rules=no_elements(DUEL_RULES))
+    with pytest.raises(ValueError):
+        engine.play_turn("a", "skill")
+
+def test_flee_always_fails_in_duels():
+    engine = BattleEngine(fighter("a"), fighter("b", hp=1000), rng=new_stream(6), rules=no_elements(DUEL_RULES))
+    flee = next(event for event in engine.play_turn("a", "flee") if event["type"] == "flee")
+    assert not flee["success"] and not engine.finished
+
+def test_run_ends_in_a_timeout_draw():
+    engine = BattleEngine(fighter("a", hp=10 ** 6), fighter("b", hp=10 ** 6), rng=new_stream(7), rules=no_elements(DUEL_RULES))
+    events = engine.run(max_turns=10)
+    assert engine.turn == 10
+    assert events[-1] == {"type": "end", "winner": None, "reason": "timeout"}
+
+def test_same_seed_replays_the_same_battle():
+    def battle(seed):
+        a = fighter("a", crit_rate=20, dodge_rate=10, mp=30, skill="Fireball", skill_cost=10)
+        b = fighter("b", attack=35, crit_rate=20, dodge_rate=10)
+        return BattleEngine(a, b, rng=new_stream(seed)).run()
+
+    assert battle(99) == battle(99)
+
+def test_button_round_lets_both_sides_act():
+    engine = BattleEngine(fighter("a", hp=1000), fighter("b", hp=1000), rng=new_stream(8), rules=no_elements(SCALED_RULES))
+    events = engine.play_round("attack")
+    assert [event["side"] for event in events if event["type"] == "attack"] == ["a", "b"]
+    assert engine.round == 1
@@ -0,0 +1,46 @@
+import io
+
+from PIL import Image, ImageChops
+
+from utils.image_generator import BattleScene, ImageGenerator
+
+NARUTO = {"name": "Naruto", "level": 5, "rarity": "Rare", "attack": 60, "defense": 40, "speed": 50,
+          "skill": "Rasengan", "mp_cost": 20}
+SASUKE = dict(NARUTO, name="Sasuke", skill="Chidori")
+
+def test_turns_of_a_matchup_share_one_scene():
+    generator = ImageGenerator()
+    scene = generator.battle_scene(NARUTO, SASUKE)
+
+    assert generator.battle_scene(dict(NARUTO), dict(SASUKE)) is scene
+    assert generator.battle_scene(dict(NARUTO, level=6), SASUKE) is not scene
+
+def test_scenes_are_bounded():
+    generator = ImageGenerator()
+    generator.max_scenes = 2
+    first = generator.battle_scene(NARUTO, SASUKE)
+    generator.battle_scene(NARUTO, dict(SASUKE, level=2))
+    generator.battle_scene(NARUTO, dict(SASUKE, level=3))
+
+    assert len(generator.scenes) == 2
+    assert generator.battle_scene(NARUTO, SASUKE) is not first
+
+def test_turns_only_redraw_the_bars():
+    generator = ImageGenerator()
+    scene = generator.battle_scene(NARUTO, SASUKE)
+    base = scene.base.tobytes()
+
+    full = scene.render(500, 500, 100, 100, 500, 500, 100, 100)
+    hurt = scene.render(500, 500, 100, 100, 120, 500, 40, 100)
+    assert scene.base.tobytes() == base
+
+    # Every changed pixel is on the enemy's side, below the static text
+    left, top, right, bottom = ImageChops.difference(full, hurt).getbbox()
+    assert left >= BattleScene.width // 2
+    assert top >= BattleScene.area_top + 90
+
+def test_png_is_the_full_canvas():
+    generator = ImageGenerator()
+    data = generator.render_battle_scene_png(NARUTO, SASUKE, 300, 500, 50, 100, 500, 500, 100, 100)
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.size == (BattleScene.width, BattleScene.height)
@@ -0,0 +1,53 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.battle_engine import SCALED_RULES, BattleEngine
+from utils.battle_simulator import card_combatant, simulate, simulate_all_pairs
+from utils.rng import new_stream
+
+NARUTO = {"name": "Naruto", "attack": 60, "defense": 40, "speed": 50, "element": "Wind", "skill": "Rasengan"}
+SASUKE = {"name": "Sasuke", "attack": 62, "defense": 40, "speed": 45, "element": "Wind", "skill": "Chidori"}
+GOKU = {"name": "Goku", "attack": 75, "defense": 50, "speed": 60, "element": "Fire", "skill": "Kamehameha"}
+WEAK = {"name": "Slime", "attack": 15, "defense": 5, "speed": 5, "element": "Water", "skill": None}
+
+def test_same_seed_replays_the_same_results():
+    a, b = card_combatant(NARUTO, 5), card_combatant(GOKU, 5)
+    first = simulate(a, b, n=500, seed=42)
+    assert simulate(a, b, n=500, seed=42) == first
+    assert first["seed"] == 42
+    assert first["win_rate"] + first["loss_rate"] + first["draw_rate"] == pytest.approx(1.0)
+
+def test_stronger_card_wins_more():
+    result = simulate(card_combatant(GOKU, 10), card_combatant(WEAK, 1), n=500, seed=1)
+    assert result["win_rate"] > 0.95
+    assert result["damage"]["a"]["per_battle"]["min"] > 0
+
+def test_win_rate_agrees_with_the_engine():
+    # A close matchup, so the comparison says something
+    a, b = card_combatant(NARUTO, 5), card_combatant(SASUKE, 5)
+    simulated = simulate(a, b, n=4000, seed=7)["win_rate"]
+
+    wins = 0
+    battles = 1500
+    for seed in range(battles):
+        engine = BattleEngine(dict(a, status={}, modifiers={}), dict(b, status={}, modifiers={}),
+                              rng=new_stream(seed), rules=SCALED_RULES)
+        while not engine.finished and engine.turn < 200:
+            engine.step()
+        wins += engine.winner == "a"
+
+    assert 0.2 < simulated < 0.8
+    assert abs(wins / battles - simulated) < 0.06
+
+def test_all_pairs_matrix():
+    rates, seed = simulate_all_pairs([NARUTO, GOKU, WEAK], n=200, level=3, seed=3)
+    assert rates.shape == (3, 3)
+    assert np.diag(rates).tolist() == [0.5, 0.5, 0.5]
+    assert rates[1, 2] > rates[2, 1]
+    assert simulate_all_pairs([NARUTO, GOKU, WEAK], n=200, level=3, seed=seed)[0].tolist() == rates.tolist()
+
+def test_other_rule_sets_are_refused():
+    from utils.battle_engine import DUEL_RULES
+    with pytest.raises(ValueError):
+        simulate(card_combatant(NARUTO), card_combatant(GOKU), n=10, rules=DUEL_RULES)
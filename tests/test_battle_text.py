@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from utils.battle_text import describe_turn
+
+ENGINE = SimpleNamespace(combatants={"a": {"name": "Naruto"}, "b": {"name": "Sasuke"}})
+
+def hit(kind="attack", damage=10, critical=False, dodged=False, multiplier=1.0, **extra):
+    event = {"type": kind, "side": "a", "damage": damage, "critical": critical,
+             "dodged": dodged, "element_multiplier": multiplier}
+    event.update(extra)
+    return event
+
+def test_critical_hit_with_element_and_status():
+    action, damage = describe_turn([hit(critical=True, multiplier=1.5, status="burning")], ENGINE)
+    assert action == "**Naruto** attacked!"
+    assert damage == "💥 Critical Hit! `-10`! 🔥 Enemy is burning! (Element effective! x1.5)"
+
+def test_dodge_uses_the_target_name():
+    _, damage = describe_turn([hit(dodged=True)], ENGINE, targets={"a": "Boss is", "b": "You are"})
+    assert damage == "😎 Boss dodged the attack!"
+
+def test_skill_heal_and_stat_changes():
+    event = hit("skill", damage=0, skill="Rasengan", heal=25, modifiers=[("b", "defense", 0.7)])
+    action, damage = describe_turn([event], ENGINE)
+    assert action == "**Naruto** used **Rasengan**!"
+    assert damage == "💖 Healed `+25` HP! 📉 Sasuke DEF x0.7"
+
+def test_stun_and_poison_tick():
+    action, damage = describe_turn([{"type": "stunned", "side": "b"}], ENGINE)
+    assert (action, damage) == ("**Sasuke** is stunned!", "Cannot attack this turn!")
+
+    events = [hit("skill", skill="Chidori", heal=0), {"type": "status_tick", "side": "a", "status": "poisoned", "damage": 3}]
+    _, damage = describe_turn(events, ENGINE)
+    assert damage == "Dealt `-10`! (☠️ -3 poison damage)"
@@ -0,0 +1,49 @@
+import time
+import asyncio
+import sqlite3
+
+from database import wallet
+from database.database import Database
+from utils.boosts import BoostRegistry
+
+def test_boost_bought_on_the_sync_connection_is_stored(workdir):
+    db = Database()
+    db.conn.execute("INSERT INTO players (user_id, gold) VALUES (1, 500)")
+    db.conn.commit()
+
+    async def scenario():
+        await db.aio.connect()
+        try:
+            boosts = BoostRegistry()
+            await boosts.load(db)
+
+            # What !buy does: spend on the sync connection, commit, then activate
+            assert wallet.try_spend(db.cursor, "gold", 1, 200)
+            db.conn.commit()
+            started = time.perf_counter()
+            await asyncio.wait_for(boosts.activate(1, "exp", 3600), 2)
+            return time.perf_counter() - started, boosts.multiplier(1, "exp")
+        finally:
+            await db.aio.close()
+
+    elapsed, multiplier = asyncio.run(scenario())
+    assert elapsed < 1
+    assert multiplier == 1.5
+
+    conn = sqlite3.connect("database/sparks.db")
+    assert conn.execute("SELECT kind FROM active_boosts WHERE user_id = 1").fetchall() == [("exp",)]
+    assert conn.execute("SELECT gold FROM players WHERE user_id = 1").fetchone() == (300,)
+    conn.close()
+    db.close()
+
+def test_expired_boosts_are_popped_once():
+    boosts = BoostRegistry()
+    now = int(time.time())
+    boosts.active = {1: {"exp": now - 1, "gold": now + 100}}
+    boosts.heap = [(now - 1, 1, "exp"), (now + 100, 1, "gold")]
+
+    assert boosts._pop_expired(now) == [(1, "exp", now - 1)]
+    assert boosts._pop_expired(now) == []
+    assert boosts.user_boosts(1) == {"gold": now + 100}
+    assert boosts.multiplier(1, "exp") == 1.0
+    assert boosts.multiplier(None, "gold") == 1.0
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from cogs.buy import Buy
+from conftest import FakeContext
+
+class CheckingContext(FakeContext):
+    """Records whether the bot's connection held an open transaction at each send."""
+
+    def __init__(self, user_id, conn):
+        super().__init__(user_id)
+        self.conn = conn
+        self.open_at_send = []
+
+    async def send(self, content=None, **kwargs):
+        self.open_at_send.append(self.conn.in_transaction)
+        return await super().send(content, **kwargs)
+
+@pytest.mark.parametrize("item, gold_left", [("Stamina Potion", 900), ("Card Pack: Basic", 900)])
+def test_buy_commits_before_awaiting(cog_bot, item, gold_left):
+    async def scenario():
+        async with cog_bot() as bot:
+            bot.db.conn.execute("INSERT INTO players (user_id) VALUES (1)")
+            bot.db.conn.commit()
+            ctx = CheckingContext(1, bot.db.conn)
+            await Buy.buy_command.callback(Buy(bot), ctx, item_name=item)
+            gold = bot.db.conn.execute("SELECT gold FROM players WHERE user_id = 1").fetchone()[0]
+            return ctx, gold
+
+    ctx, gold = asyncio.run(scenario())
+    assert "you bought a" in ctx.text()
+    assert ctx.open_at_send == [False]
+    assert gold == gold_left
+
+def test_using_a_pack_keeps_it(cog_bot):
+    async def scenario():
+        async with cog_bot() as bot:
+            bot.db.conn.execute("INSERT INTO players (user_id) VALUES (1)")
+            bot.db.conn.execute("INSERT INTO user_items (user_id, item_id, quantity) VALUES (1, 5, 1)")
+            bot.db.conn.commit()
+            ctx = CheckingContext(1, bot.db.conn)
+            await Buy.use_command.callback(Buy(bot), ctx, item_name="Card Pack: Basic")
+            return ctx, bot.db.conn.execute("SELECT quantity FROM user_items WHERE user_id = 1").fetchall()
+
+    ctx, rows = asyncio.run(scenario())
+    assert "can only be opened" in ctx.text()
+    assert rows == [(1,)]
+    assert ctx.open_at_send == [False]
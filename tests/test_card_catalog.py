@@ -0,0 +1,31 @@
+import asyncio
+import sqlite3
+
+from database.database import Database
+from utils.card_catalog import CardCatalog
+
+def test_materials_added_after_load_are_picked_up(workdir):
+    db = Database()
+
+    async def scenario():
+        await db.aio.connect()
+        try:
+            catalog = CardCatalog(db, check_interval=0)
+            await catalog.load()
+            before = len(catalog.materials)
+
+            # A seed script adding a material through its own connection
+            conn = sqlite3.connect("database/sparks.db")
+            conn.execute("INSERT INTO materials (name, description, rarity) VALUES ('Moonstone', 'New', 'Rare')")
+            conn.commit()
+            conn.close()
+
+            await catalog.refresh_if_stale()
+            return before, [material["name"] for material in catalog.materials]
+        finally:
+            await db.aio.close()
+
+    before, names = asyncio.run(scenario())
+    db.close()
+    assert len(names) == before + 1
+    assert "Moonstone" in names
@@ -0,0 +1,40 @@
+import sqlite3
+
+from database.database import Database
+
+def test_fresh_database_starts_without_web_app_tables(workdir):
+    db = Database()
+
+    tables = {row[0] for row in db.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"players", "user_materials", "schema_version"} <= tables
+    assert "api_players" not in tables
+
+    # Writes to user_materials must work before the web app has created api_players
+    db.conn.execute("INSERT INTO players (user_id) VALUES (1)")
+    db.conn.execute("INSERT INTO user_materials (user_id, material_id, quantity) VALUES (1, 1, 2)")
+    db.conn.execute("UPDATE user_materials SET quantity = quantity + 1 WHERE user_id = 1")
+    db.conn.commit()
+    db.close()
+
+def test_second_startup_reuses_the_schema(workdir):
+    Database().close()
+    db = Database()
+    assert db.conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] > 0
+    db.close()
+
+def test_startup_finishes_once_web_app_tables_exist(workdir):
+    Database().close()
+
+    conn = sqlite3.connect("database/sparks.db")
+    conn.execute("CREATE TABLE api_players (id INTEGER PRIMARY KEY, discord_id INTEGER UNIQUE, username TEXT, "
+                 "gold INTEGER, diamonds INTEGER, level INTEGER, xp INTEGER, wins INTEGER, losses INTEGER, "
+                 "pvp_wins INTEGER, pvp_losses INTEGER)")
+    conn.commit()
+    conn.close()
+
+    db = Database()
+    columns = [row[1] for row in db.conn.execute("PRAGMA table_info(api_players)")]
+    assert "stamina_regen_ts" in columns
+    indexes = {row[0] for row in db.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "uq_user_materials_player_material" in indexes
+    db.close()
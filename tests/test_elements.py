@@ -0,0 +1,41 @@
+import pytest
+
+from utils.elements import ELEMENT_CHART, ELEMENTS, NEUTRAL, ElementRegistry, element_multiplier
+
+def test_matrix_matches_the_chart():
+    for attacker, row in ELEMENT_CHART.items():
+        for defender, multiplier in row.items():
+            assert element_multiplier(attacker, defender) == multiplier
+
+def test_unlisted_and_unknown_pairs_are_neutral():
+    assert element_multiplier("Fire", "Light") == 1.0
+    assert element_multiplier("Fire", "Fire") == 1.0
+    assert element_multiplier("Plasma", "Water") == 1.0
+    assert element_multiplier(None, "Water") == 1.0
+    assert ELEMENTS.intern("Plasma") == NEUTRAL
+
+def test_aliases_and_case_share_an_id():
+    assert ELEMENTS.intern("Wind") == ELEMENTS.intern("Air") == ELEMENTS.intern(" air ")
+    assert element_multiplier("Lightning", "Water") == element_multiplier("Electric", "Water") == 2.0
+
+def test_ids_index_the_same_matrix():
+    fire, ice = ELEMENTS.intern("Fire"), ELEMENTS.intern("Ice")
+    assert ELEMENTS.multiplier_by_id(fire, ice) == 2.0
+
+def test_strengths_and_weaknesses():
+    assert set(ELEMENTS.strong_against("Fire")) == {"Ice", "Air"}
+    assert set(ELEMENTS.weak_against("Fire")) == {"Water", "Earth"}
+
+def test_small_registry():
+    registry = ElementRegistry({"Rock": {"Scissors": 2.0}, "Paper": {"Rock": 2.0}}, {"Stone": "Rock"})
+    assert registry.names == ["Normal", "Rock", "Scissors", "Paper"]
+    assert registry.multiplier("Stone", "Scissors") == 2.0
+    assert registry.multiplier("Scissors", "Rock") == 1.0
+
+def test_array_lookup_matches_the_scalar_one():
+    np = pytest.importorskip("numpy")
+    names = list(ELEMENT_CHART)
+    attackers = np.array([ELEMENTS.intern(a) for a in names for _ in names])
+    defenders = np.array([ELEMENTS.intern(d) for _ in names for d in names])
+    expected = [element_multiplier(a, d) for a in names for d in names]
+    assert ELEMENTS.multipliers(attackers, defenders).tolist() == expected
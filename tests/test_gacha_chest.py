@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import asyncio
+
+import pytest
+
+from cogs.gacha_system import GachaSystem
+from utils.card_catalog import CardCatalog
+from utils.identity import PlayerIdentity
+
+RARITIES = ["Common", "Uncommon", "Rare", "Epic", "Legendary"]
+
+@pytest.fixture
+def api_tables(workdir):
+    """Creates the web app's tables before the bot's first startup, with a card of every rarity."""
+    os.makedirs("database", exist_ok=True)
+    conn = sqlite3.connect("database/sparks.db")
+    conn.executescript("""
+        CREATE TABLE api_players (id INTEGER PRIMARY KEY, discord_id INTEGER UNIQUE, username TEXT,
+                                  gold INTEGER, diamonds INTEGER, level INTEGER, xp INTEGER, wins INTEGER,
+                                  losses INTEGER, pvp_wins INTEGER, pvp_losses INTEGER);
+        CREATE TABLE api_cards (id INTEGER PRIMARY KEY, name TEXT, rarity TEXT, attack INTEGER, defense INTEGER,
+                                speed INTEGER, element TEXT, skill TEXT, skill_description TEXT, image_url TEXT);
+        CREATE TABLE api_user_cards (id INTEGER PRIMARY KEY AUTOINCREMENT, player_id INTEGER, card_id INTEGER,
+                                     level INTEGER, xp INTEGER, equipped INTEGER);
+    """)
+    conn.executemany(
+        "INSERT INTO api_cards (name, rarity, attack, defense, speed, element, skill, skill_description) "
+        "VALUES (?, ?, 50, 40, 30, 'Fire', 'Blast', 'Deals damage')",
+        [(f"{rarity} Hero", rarity) for rarity in RARITIES]
+    )
+    conn.execute("INSERT INTO api_players (id, discord_id, username, gold) VALUES (7, 1, 'Tester', 100000)")
+    conn.commit()
+    conn.close()
+
+def run(cog_bot, scenario):
+    async def main():
+        async with cog_bot() as bot:
+            bot.catalog = CardCatalog(bot.db)
+            await bot.catalog.load()
+            cog = GachaSystem(bot)
+            cog.identity = PlayerIdentity()
+            cog.identity.load(bot.db)
+            return await scenario(bot, cog)
+    return asyncio.run(main())
+
+def test_multi_pull_is_written_in_one_transaction(api_tables, cog_bot):
+    async def scenario(bot, cog):
+        transactions = []
+        transaction = bot.db.aio.transaction
+
+        async def counted(work):
+            transactions.append(work)
+            return await transaction(work)
+
+        bot.db.aio.transaction = counted
+        result = await cog.open_chest(1, "epic", num_pulls=10, seed=11)
+        cards = await bot.db.aio.fetchall("SELECT id, card_id FROM api_user_cards WHERE player_id = 7 ORDER BY id")
+        materials = await bot.db.aio.fetchval("SELECT COALESCE(SUM(quantity), 0) FROM user_materials WHERE player_id = 7")
+        gold = await bot.db.aio.fetchval("SELECT gold FROM api_players WHERE id = 7")
+        return result, len(transactions), cards, materials, gold
+
+    result, transactions, cards, materials, gold = run(cog_bot, scenario)
+    assert result["success"] and result["cost"] == 45000
+    assert transactions == 1
+    assert gold == 100000 - 45000
+    assert [(pull["user_card_id"], pull["id"]) for pull in result["pulls"]] == [tuple(row) for row in cards]
+    assert len(cards) == 10
+    assert materials == sum(material["quantity"] for material in result["materials"])
+
+def test_unaffordable_chest_writes_nothing(api_tables, cog_bot):
+    async def scenario(bot, cog):
+        result = await cog.open_chest(1, "legendary", num_pulls=10)
+        cards = await bot.db.aio.fetchval("SELECT COUNT(*) FROM api_user_cards")
+        gold = await bot.db.aio.fetchval("SELECT gold FROM api_players WHERE id = 7")
+        return result, cards, gold
+
+    result, cards, gold = run(cog_bot, scenario)
+    assert not result["success"]
+    assert (cards, gold) == (0, 100000)
+
+def test_same_seed_replays_the_same_pulls(api_tables, cog_bot):
+    async def scenario(bot, cog):
+        first = await cog.open_chest(1, "rare", num_pulls=10, seed=5)
+        second = await cog.open_chest(1, "rare", num_pulls=10, seed=5)
+        return first, second
+
+    first, second = run(cog_bot, scenario)
+    assert [pull["id"] for pull in first["pulls"]] == [pull["id"] for pull in second["pulls"]]
+    assert [m["id"] for m in first["materials"]] == [m["id"] for m in second["materials"]]
+    assert first["seed"] == second["seed"] == 5
@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from utils.identity import PlayerIdentity
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE players (user_id INTEGER PRIMARY KEY, level INTEGER, xp INTEGER, wins INTEGER,
+                              losses INTEGER, pvp_wins INTEGER, pvp_losses INTEGER);
+        CREATE TABLE api_players (id INTEGER PRIMARY KEY, discord_id INTEGER UNIQUE, username TEXT,
+                                  gold INTEGER, diamonds INTEGER, level INTEGER, xp INTEGER, wins INTEGER,
+                                  losses INTEGER, pvp_wins INTEGER, pvp_losses INTEGER);
+        INSERT INTO players (user_id, level, xp) VALUES (10, 4, 250);
+    """)
+    return conn.cursor()
+
+def test_least_recently_used_players_are_dropped():
+    identity = PlayerIdentity(max_items=2)
+    identity.remember(1, 101)
+    identity.remember(2, 102)
+    assert identity.cached(1) == 101
+
+    identity.remember(3, 103)
+    assert identity.cached(2) is None
+    assert identity.cached(1) == 101 and identity.cached(3) == 103
+
+def test_unknown_players_are_not_remembered():
+    identity = PlayerIdentity()
+    identity.remember(1, None)
+    assert identity.stats()["players"] == 0
+
+def test_lookup_misses_once_then_hits(cursor):
+    identity = PlayerIdentity()
+    identity.cursor = cursor
+    cursor.execute("INSERT INTO api_players (id, discord_id) VALUES (5, 20)")
+
+    assert identity.player_id_sync(20) == 5
+    assert identity.player_id_sync(20) == 5
+    assert identity.player_id_sync(21) is None
+    assert identity.stats() == {"players": 1, "hits": 1, "misses": 2}
+
+def test_register_copies_the_players_row_once(cursor):
+    identity = PlayerIdentity()
+    player_id = identity.register(cursor, 10, "sparky")
+
+    assert identity.cached(10) == player_id
+    assert identity.register(cursor, 10, "sparky") == player_id
+    cursor.execute("SELECT username, gold, level, xp, wins FROM api_players WHERE discord_id = 10")
+    assert cursor.fetchall() == [("sparky", 1000, 4, 250, 0)]
+
+def test_forget(cursor):
+    identity = PlayerIdentity()
+    identity.remember(1, 101)
+    identity.forget(1)
+    identity.forget(2)
+    assert identity.cached(1) is None
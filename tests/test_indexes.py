@@ -0,0 +1,48 @@
+import sqlite3
+
+from database.database import Database
+from database.indexes import audit_query_plans, ensure_indexes
+
+def test_fresh_database_has_no_full_scans(workdir):
+    db = Database()
+    assert audit_query_plans(db.conn) == {}
+    db.close()
+
+def test_audit_reports_a_missing_index(workdir):
+    db = Database()
+    db.conn.execute("DROP INDEX idx_players_gold")
+    db.conn.commit()
+    db.close()
+
+    db = Database(migrate=False)
+    assert audit_query_plans(db.conn) == {"leaderboard gold": ["SCAN players"]}
+
+    # The next startup puts it back
+    assert ensure_indexes(db.conn) == 1
+    assert audit_query_plans(db.conn) == {}
+    db.close()
+
+def test_duplicate_stacks_are_merged_before_the_unique_index():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE user_materials (id INTEGER PRIMARY KEY, user_id INTEGER, "
+                 "player_id INTEGER, material_id INTEGER, quantity INTEGER)")
+    conn.executemany("INSERT INTO user_materials (user_id, material_id, quantity) VALUES (?, ?, ?)",
+                     [(1, 5, 2), (1, 5, 3), (1, 6, 1), (2, 5, 4)])
+
+    ensure_indexes(conn)
+
+    rows = conn.execute("SELECT id, user_id, material_id, quantity FROM user_materials ORDER BY id").fetchall()
+    assert rows == [(1, 1, 5, 5), (3, 1, 6, 1), (4, 2, 5, 4)]
+
+    # Rows without a player_id aren't duplicates of each other
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(user_materials)")}
+    assert {"uq_user_materials_user_material", "uq_user_materials_player_material"} <= indexes
+    conn.close()
+
+def test_missing_tables_and_columns_are_skipped():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE players (user_id INTEGER PRIMARY KEY, gold INTEGER)")
+
+    assert ensure_indexes(conn) == 1
+    assert {row[1] for row in conn.execute("PRAGMA index_list(players)")} == {"idx_players_gold"}
+    conn.close()
@@ -0,0 +1,36 @@
+from utils.leaderboard import Leaderboard
+
+def board(rows):
+    leaderboard = Leaderboard(("level", "xp"))
+    for user_id, level, xp in rows:
+        leaderboard.update(user_id, {"level": level, "xp": xp})
+    return leaderboard
+
+def test_top_is_ordered_by_every_column():
+    leaderboard = board([(1, 5, 10), (2, 7, 0), (3, 5, 30)])
+    assert leaderboard.top() == [2, 3, 1]
+    assert leaderboard.top(1) == [2]
+
+def test_update_moves_a_player():
+    leaderboard = board([(1, 5, 10), (2, 7, 0), (3, 5, 30)])
+    leaderboard.update(1, {"level": 9, "xp": 0})
+    assert leaderboard.top() == [1, 2, 3]
+    assert len(leaderboard) == 3
+
+def test_ties_share_the_better_rank():
+    leaderboard = board([(1, 5, 10), (2, 5, 10), (3, 1, 0)])
+    assert leaderboard.rank(1) == leaderboard.rank(2) == 1
+    assert leaderboard.rank(3) == 3
+
+def test_missing_values_count_as_zero():
+    leaderboard = Leaderboard(("gold",))
+    leaderboard.update(1, {"gold": None})
+    leaderboard.update(2, {"gold": 5})
+    assert leaderboard.top() == [2, 1]
+
+def test_remove():
+    leaderboard = board([(1, 5, 10), (2, 7, 0)])
+    leaderboard.remove(2)
+    leaderboard.remove(42)
+    assert leaderboard.top() == [1]
+    assert leaderboard.rank(2) is None
@@ -0,0 +1,75 @@
+import gc
+import asyncio
+from types import SimpleNamespace
+
+from utils.locks import IdempotencyTokens, KeyedLocks, user_locked
+
+def test_same_key_shares_a_lock_until_released():
+    locks = KeyedLocks()
+    lock = locks(1)
+    assert locks(1) is lock
+    assert locks(2) is not lock
+
+    del lock
+    gc.collect()
+    assert len(locks) == 0
+
+def test_many_serializes_overlapping_players_without_deadlock():
+    locks = KeyedLocks()
+    order = []
+
+    async def duel(first, second, name):
+        async with locks.many(first, second):
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    async def scenario():
+        # Opposite argument order would deadlock without the sorted acquisition
+        await asyncio.wait_for(asyncio.gather(duel(1, 2, "a"), duel(2, 1, "b")), 1)
+
+    asyncio.run(scenario())
+    assert order in (["a start", "a end", "b start", "b end"], ["b start", "b end", "a start", "a end"])
+
+def test_tokens_are_claimed_once_until_released():
+    tokens = IdempotencyTokens()
+    assert tokens.claim("msg:evolve")
+    assert not tokens.claim("msg:evolve")
+
+    tokens.release("msg:evolve")
+    assert tokens.claim("msg:evolve")
+
+def test_old_tokens_expire():
+    tokens = IdempotencyTokens(ttl=0)
+    assert tokens.claim("a")
+    assert tokens.claim("a")
+    assert len(tokens) == 1
+
+class Cog:
+    def __init__(self):
+        self.order = []
+
+    @user_locked
+    async def command(self, ctx, label):
+        self.order.append(f"{label} start")
+        await asyncio.sleep(0.01)
+        self.order.append(f"{label} end")
+
+def test_user_locked_runs_one_invocation_per_author_at_a_time():
+    cog = Cog()
+    same, other = SimpleNamespace(author=SimpleNamespace(id=1)), SimpleNamespace(author=SimpleNamespace(id=2))
+
+    async def scenario():
+        await asyncio.gather(cog.command(same, "a"), cog.command(same, "b"), cog.command(other, "c"))
+
+    asyncio.run(scenario())
+    # The second call of user 1 waits for the first; user 2 doesn't wait for either
+    assert cog.order.index("a end") < cog.order.index("b start")
+    assert cog.order.index("c start") < cog.order.index("a end")
+
+def test_locked_commands_keep_their_parameters():
+    from cogs.buy import Buy
+    from cogs.gacha import Gacha
+
+    assert list(Buy.buy_command.clean_params) == ["item_name"]
+    assert list(Gacha.multi_draw_command.clean_params) == ["pack_type", "amount"]
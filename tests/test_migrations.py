@@ -0,0 +1,103 @@
+import os
+import sys
+import sqlite3
+import subprocess
+
+import pytest
+
+from database import migrations
+from database.database import Database
+from database.migrations import MIGRATIONS, Deferred, pending_migrations, rewrite_in_chunks, run_migrations
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class FakeDb:
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+
+def test_versions_are_unique_and_ascending():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert versions[0] == 1
+
+def test_steps_apply_in_order_and_only_once(monkeypatch):
+    ran = []
+    steps = [(version, f"step {version}", lambda db, v=version: ran.append(v)) for version in (1, 2, 3)]
+    monkeypatch.setattr(migrations, "MIGRATIONS", steps)
+    db = FakeDb()
+
+    assert run_migrations(db) == [(1, "step 1"), (2, "step 2"), (3, "step 3")]
+    assert run_migrations(db) == []
+    assert ran == [1, 2, 3]
+
+def test_deferred_step_stays_pending_until_it_finishes(monkeypatch):
+    ready = {"value": False}
+
+    def waits(db):
+        if not ready["value"]:
+            raise Deferred("missing table(s) api_players")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", [(1, "first", lambda db: None), (2, "waits", waits),
+                                                   (3, "last", lambda db: None)])
+    db = FakeDb()
+
+    assert run_migrations(db) == [(1, "first"), (3, "last")]
+    assert [version for version, _, _ in pending_migrations(db.conn)] == [2]
+
+    ready["value"] = True
+    assert run_migrations(db) == [(2, "waits")]
+    assert pending_migrations(db.conn) == []
+
+def test_failing_step_aborts(monkeypatch):
+    def fails(db):
+        raise sqlite3.OperationalError("boom")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", [(1, "fails", fails), (2, "after", lambda db: None)])
+    db = FakeDb()
+
+    with pytest.raises(sqlite3.OperationalError):
+        run_migrations(db)
+    assert len(pending_migrations(db.conn)) == 2
+
+def test_dry_run_applies_nothing(workdir):
+    db = Database(migrate=False)
+    assert run_migrations(db, dry_run=True) == [(version, name) for version, name, _ in MIGRATIONS]
+    assert len(pending_migrations(db.conn)) == len(MIGRATIONS)
+    db.close()
+
+def test_rewrite_in_chunks_updates_every_row():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE players (xp INTEGER)")
+    conn.executemany("INSERT INTO players VALUES (?)", [(None,)] * 25 + [(5,)] * 5)
+
+    assert rewrite_in_chunks(conn, "players", "xp = 0", "xp IS NULL", chunk_size=10) == 25
+    assert conn.execute("SELECT COUNT(*) FROM players WHERE xp IS NULL").fetchone()[0] == 0
+
+def test_cli_migrates_an_empty_database(workdir):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    for args in (["--dry-run"], [], []):
+        result = subprocess.run([sys.executable, "-m", "database.migrations", *args], cwd=workdir, env=env,
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+    assert "0 migration(s) applied" in result.stdout
+
+def test_catalog_triggers_wait_for_the_card_table(workdir):
+    db = Database()
+    assert 6 in [version for version, _, _ in pending_migrations(db.conn)]
+    db.close()
+
+    # The web app creates api_cards after the bot's first startup
+    conn = sqlite3.connect("database/sparks.db")
+    conn.execute("CREATE TABLE api_cards (id INTEGER PRIMARY KEY, name TEXT, rarity TEXT)")
+    conn.commit()
+    conn.close()
+
+    db = Database()
+    assert 6 not in [version for version, _, _ in pending_migrations(db.conn)]
+    triggers = {row[0] for row in db.conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert {f"trg_api_cards_catalog_{event}" for event in ("insert", "update", "delete")} <= triggers
+
+    db.conn.execute("INSERT INTO api_cards (name, rarity) VALUES ('Goku', 'Legendary')")
+    assert db.conn.execute("SELECT version FROM catalog_versions WHERE name = 'api_cards'").fetchone()[0] == 1
+    db.close()
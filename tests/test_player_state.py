@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from utils.player_state import PlayerStateCache
+
+def run(cog_bot, scenario, **kwargs):
+    async def main():
+        async with cog_bot() as bot:
+            bot.db.conn.executemany("INSERT INTO players (user_id, stamina) VALUES (?, 10)", [(1,), (2,), (3,)])
+            bot.db.conn.commit()
+            return await scenario(bot.db, PlayerStateCache(bot.db, **kwargs))
+    return asyncio.run(main())
+
+def stamina(db, user_id):
+    return db.conn.execute("SELECT stamina FROM players WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+def test_changes_stay_in_memory_until_flushed(cog_bot):
+    async def scenario(db, cache):
+        state = await cache.get("players", 1)
+        assert await cache.get("players", 1) is state
+        state.add("stamina", -3)
+        before = stamina(db, 1)
+
+        assert await cache.flush() == 1
+        return before, stamina(db, 1), cache.dirty
+
+    before, after, dirty = run(cog_bot, scenario)
+    assert (before, after) == (10, 7)
+    assert dirty == set()
+
+def test_unchanged_values_and_unknown_columns(cog_bot):
+    async def scenario(db, cache):
+        state = await cache.get("players", 1)
+        state.set("stamina", 10)
+        assert not cache.dirty
+        with pytest.raises(KeyError):
+            state.set("gold", 5)
+        return await cache.get("players", 99)
+
+    assert run(cog_bot, scenario) is None
+
+def test_flush_player_writes_only_that_player(cog_bot):
+    async def scenario(db, cache):
+        (await cache.get("players", 1)).set("stamina", 1)
+        (await cache.get("players", 2)).set("stamina", 2)
+
+        assert await cache.flush_player(1) == 1
+        return stamina(db, 1), stamina(db, 2), cache.dirty
+
+    first, second, dirty = run(cog_bot, scenario)
+    assert (first, second) == (1, 10)
+    assert dirty == {("players", 2)}
+
+def test_overlay_and_evict(cog_bot):
+    async def scenario(db, cache):
+        (await cache.get("players", 1)).set("stamina", 4)
+        row = cache.overlay("players", 1, {"stamina": 10, "gold": 1000})
+
+        await cache.flush_player(1)
+        cache.evict_player(1)
+        db.conn.execute("UPDATE players SET stamina = 9 WHERE user_id = 1")
+        db.conn.commit()
+        return row, (await cache.get("players", 1))["stamina"]
+
+    row, reread = run(cog_bot, scenario)
+    assert row == {"stamina": 4, "gold": 1000}
+    assert reread == 9
+
+def test_only_clean_rows_are_trimmed(cog_bot):
+    async def scenario(db, cache):
+        (await cache.get("players", 1)).set("stamina", 5)
+        await cache.get("players", 2)
+        await cache.get("players", 3)
+        return set(cache.states)
+
+    states = run(cog_bot, scenario, max_items=1)
+    # Clean rows go first; the dirty one stays past the limit until it's flushed
+    assert states == {("players", 1)}
+
+def test_interval_flush(cog_bot):
+    async def scenario(db, cache):
+        cache.start()
+        (await cache.get("players", 3)).set("stamina", 3)
+        await asyncio.sleep(0.1)
+        written = stamina(db, 3)
+        await cache.close()
+        return written
+
+    assert run(cog_bot, scenario, flush_interval=0.02) == 3
@@ -0,0 +1,53 @@
+import pytest
+
+from utils import regen
+from utils.regen import REGEN_INTERVALS
+
+STAMINA = REGEN_INTERVALS["stamina"]
+
+class State(dict):
+    """Stand-in for a cached PlayerState: a dict rows can be settled into."""
+
+def row(value, maximum=10, since=0):
+    return State(stamina=value, max_stamina=maximum, stamina_regen_ts=since)
+
+def test_regenerates_whole_points_and_keeps_the_remainder():
+    assert regen.regenerate(2, 10, 1000, 600, 1000 + 3 * 600 + 100) == (5, 1000 + 3 * 600)
+
+def test_regeneration_stops_at_the_maximum():
+    assert regen.regenerate(8, 10, 0, 600, 10 ** 6) == (10, 10 ** 6)
+
+def test_overfilled_values_are_kept():
+    assert regen.regenerate(12, 10, 0, 600, 5000) == (12, 5000)
+
+def test_current_reads_without_writing():
+    state = row(3, since=1000)
+    assert regen.current(state, "stamina", now=1000 + 2 * STAMINA) == 5
+    assert state["stamina"] == 3
+
+def test_settle_carries_progress_towards_the_next_point():
+    state = row(3, since=1000)
+    changes = regen.settle(state, "stamina", delta=-2, now=1000 + 2 * STAMINA + 50)
+    assert changes == {"stamina": 3, "max_stamina": 10, "stamina_regen_ts": 1000 + 2 * STAMINA}
+
+def test_settle_never_goes_below_zero():
+    assert regen.settle(row(1, since=1000), "stamina", delta=-5, now=1000)["stamina"] == 0
+
+def test_settle_idles_the_clock_when_full():
+    assert regen.settle(row(9, since=1000), "stamina", delta=5, now=2000)["stamina_regen_ts"] == 2000
+
+def test_spend_only_when_covered():
+    state = row(2, since=1000)
+    assert not regen.spend(state, "stamina", 3, now=1000)
+    assert state["stamina"] == 2
+
+    assert regen.spend(state, "stamina", 3, now=1000 + STAMINA)
+    assert state["stamina"] == 0
+
+def test_seconds_to_full():
+    assert regen.seconds_to_full(row(10), "stamina", now=5000) == 0
+    assert regen.seconds_to_full(row(8, since=1000), "stamina", now=1100) == 2 * STAMINA - 100
+
+@pytest.mark.parametrize("resource", sorted(REGEN_INTERVALS))
+def test_columns(resource):
+    assert regen.columns(resource) == (resource, f"max_{resource}", f"{resource}_regen_ts")
@@ -0,0 +1,68 @@
+import os
+import asyncio
+
+from utils.render_cache import RenderCache
+
+def test_same_fields_share_a_key_and_any_change_makes_a_new_one():
+    cache = RenderCache(None)
+    key = cache.key("card", {"name": "Goku", "level": 5})
+    assert cache.key("card", {"level": 5, "name": "Goku"}) == key
+    assert cache.key("card", {"name": "Goku", "level": 6}) != key
+    assert RenderCache(None, version=2).key("card", {"name": "Goku", "level": 5}) != key
+
+def test_get_or_render_draws_once(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    calls = []
+
+    def render():
+        calls.append(1)
+        return b"png"
+
+    assert cache.get_or_render("card", {"id": 1}, render) == b"png"
+    assert cache.get_or_render("card", {"id": 1}, render) == b"png"
+    assert len(calls) == 1
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    RenderCache(str(tmp_path)).put("ab" * 32, b"x" * 10)
+
+    cache = RenderCache(str(tmp_path))
+    assert cache.get("ab" * 32) == b"x" * 10
+    assert cache.stats()["disk_hits"] == 1
+
+def test_disk_tier_evicts_least_recently_used_past_the_byte_cap(tmp_path):
+    cache = RenderCache(str(tmp_path), max_items=1, max_bytes=25)
+    keys = [f"{i:02d}" * 32 for i in range(3)]
+
+    async def scenario():
+        await cache.aput(keys[0], b"a" * 10)
+        await cache.aput(keys[1], b"b" * 10)
+        # Reading the first one makes the second the least recently used
+        cache.clear()
+        assert await cache.aget(keys[0]) == b"a" * 10
+        await cache.aput(keys[2], b"c" * 10)
+
+    asyncio.run(scenario())
+    assert cache.disk_bytes == 20
+    assert os.path.exists(cache._path(keys[0]))
+    assert not os.path.exists(cache._path(keys[1]))
+    assert os.path.exists(cache._path(keys[2]))
+
+def test_restart_trims_an_oversized_directory(tmp_path):
+    big = RenderCache(str(tmp_path))
+    for i in range(4):
+        big.put(f"{i:02d}" * 32, b"z" * 10)
+        os.utime(big._path(f"{i:02d}" * 32), (1000 + i, 1000 + i))
+
+    cache = RenderCache(str(tmp_path), max_bytes=20)
+    assert cache.get("00" * 32) is None
+    assert cache.disk_bytes == 20
+    assert cache.get("03" * 32) == b"z" * 10
+
+def test_file_deleted_behind_the_cache_is_a_miss(tmp_path):
+    cache = RenderCache(str(tmp_path), max_items=1)
+    cache.put("aa" * 32, b"1")
+    cache.put("bb" * 32, b"2")
+    os.remove(cache._path("aa" * 32))
+
+    assert asyncio.run(cache.aget("aa" * 32)) is None
+    assert cache.disk_bytes == 1
@@ -0,0 +1,82 @@
+import time
+import asyncio
+
+import pytest
+
+from utils import render_service
+from utils.render_service import RenderService
+
+def slow_render(job, args, kwargs):
+    """Stands in for the renderer in the worker processes."""
+    time.sleep(0.1)
+    return job.encode()
+
+def run(scenario, **kwargs):
+    async def main():
+        service = RenderService(**kwargs)
+        await service.start()
+        try:
+            return await scenario(service)
+        finally:
+            await service.close()
+    return asyncio.run(main())
+
+def test_in_flight_jobs_never_exceed_max_pending(monkeypatch):
+    monkeypatch.setattr(render_service, "_render", slow_render)
+
+    async def scenario(service):
+        peak = 0
+
+        async def watch():
+            nonlocal peak
+            while True:
+                peak = max(peak, service.pending)
+                await asyncio.sleep(0.01)
+
+        watcher = asyncio.create_task(watch())
+        results = await asyncio.gather(*(service.render("render_card_png", i) for i in range(6)))
+        watcher.cancel()
+        return results, peak, service.pending
+
+    results, peak, pending = run(scenario, workers=2, max_pending=2)
+    assert results == [b"render_card_png"] * 6
+    assert peak == 2
+    assert pending == 0
+
+def test_unknown_jobs_are_refused():
+    async def scenario(service):
+        with pytest.raises(ValueError):
+            await service.render("os.system", "true")
+
+    run(scenario, workers=1)
+
+def test_render_needs_a_started_service():
+    with pytest.raises(RuntimeError):
+        asyncio.run(RenderService(workers=1).render("render_card_png"))
+
+def test_resource_bar_is_rendered_in_a_worker():
+    async def scenario(service):
+        image = await service.resource_bar(30, 100)
+        return image.filename, image.fp.read()
+
+    filename, data = run(scenario, workers=1)
+    assert filename == "hp_bar.png"
+    assert data.startswith(b"\x89PNG")
+
+def test_card_image_is_served_from_the_render_cache(monkeypatch, tmp_path):
+    from utils.image_generator import image_generator
+    from utils.render_cache import RenderCache
+
+    monkeypatch.setattr(render_service, "_render", slow_render)
+    monkeypatch.setattr(image_generator, "render_cache", RenderCache(str(tmp_path)))
+    card = {"id": 7, "name": "Naruto", "rarity": "Rare", "attack": 60, "defense": 40, "speed": 50, "level": 3}
+
+    async def scenario(service):
+        first = await service.card_image(card)
+        second = await service.card_image(card)
+        return first.fp.read(), second.fp.read()
+
+    first, second = run(scenario, workers=1)
+    assert first == second == b"render_card_png"
+    assert image_generator.render_cache.stats()["misses"] == 1
+    assert image_generator.render_cache.stats()["hits"] == 1
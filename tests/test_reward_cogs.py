@@ -0,0 +1,54 @@
+import os
+import time
+import sqlite3
+import asyncio
+
+from cogs.daily import Daily
+from cogs.hourly import Hourly
+from conftest import FakeContext
+
+def create_api_players():
+    """Creates the web app's player table before the bot's first startup."""
+    os.makedirs("database", exist_ok=True)
+    conn = sqlite3.connect("database/sparks.db")
+    conn.execute("CREATE TABLE api_players (id INTEGER PRIMARY KEY, discord_id INTEGER UNIQUE, username TEXT, "
+                 "gold INTEGER, diamonds INTEGER, level INTEGER, xp INTEGER, wins INTEGER, losses INTEGER, "
+                 "pvp_wins INTEGER, pvp_losses INTEGER, stamina INTEGER DEFAULT 10, max_stamina INTEGER DEFAULT 100)")
+    conn.commit()
+    conn.close()
+
+def test_overlapping_daily_claims_pay_once(cog_bot):
+    async def scenario():
+        async with cog_bot() as bot:
+            bot.db.conn.execute("INSERT INTO players (user_id, gold) VALUES (1, 0)")
+            bot.db.conn.commit()
+            cog = Daily(bot)
+            first, second = FakeContext(1), FakeContext(1)
+            await asyncio.gather(Daily.daily_command.callback(cog, first),
+                                 Daily.daily_command.callback(cog, second))
+            gold, streak = bot.db.conn.execute("SELECT gold, daily_streak FROM players WHERE user_id = 1").fetchone()
+            return gold, streak, first.text() + second.text()
+
+    gold, streak, text = asyncio.run(scenario())
+    assert (gold, streak) == (150, 1)
+    assert text.count("Daily Rewards Claimed") == 1
+    assert "already claimed" in text
+
+def test_overlapping_hourly_claims_pay_once(cog_bot):
+    create_api_players()
+
+    async def scenario():
+        async with cog_bot() as bot:
+            bot.db.conn.execute("INSERT INTO api_players (discord_id, username, stamina, max_stamina, stamina_regen_ts) "
+                                "VALUES (1, 'Tester', 0, 100, ?)", (int(time.time()),))
+            bot.db.conn.commit()
+            cog = Hourly(bot)
+            first, second = FakeContext(1), FakeContext(1)
+            await asyncio.gather(Hourly.hourly_command.callback(cog, first),
+                                 Hourly.hourly_command.callback(cog, second))
+            state = await bot.player_state.get("api_players", 1)
+            return state["stamina"], first.text() + second.text()
+
+    stamina, text = asyncio.run(scenario())
+    assert stamina == 30
+    assert text.count("Hourly Reward Claimed") == 1
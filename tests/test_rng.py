@@ -0,0 +1,39 @@
+import pytest
+
+from utils import rng
+from utils.rng import SEED_BITS, RNGProvider, new_stream
+
+def test_stream_replays_from_its_seed():
+    stream = new_stream()
+    rolls = [stream.random() for _ in range(10)]
+    replay = new_stream(stream.seed_value)
+    assert [replay.random() for _ in range(10)] == rolls
+
+def test_seeds_fit_a_sqlite_integer():
+    provider = RNGProvider()
+    assert all(0 <= provider.new_seed() < 2 ** SEED_BITS for _ in range(100))
+
+def test_master_seed_makes_a_run_deterministic():
+    first = [RNGProvider(99).new_seed() for _ in range(3)]
+    assert first == [RNGProvider(99).new_seed() for _ in range(3)]
+
+def test_spawn_replays_with_or_without_numpy(monkeypatch):
+    streams, seed = RNGProvider().spawn(4)
+    seeds = [stream.seed_value for stream in streams]
+    assert len(set(seeds)) == 4
+
+    monkeypatch.setattr(rng, "np", None)
+    replay, _ = RNGProvider().spawn(4, seed)
+    assert [stream.seed_value for stream in replay] == seeds
+
+def test_set_provider_swaps_the_active_provider():
+    previous = rng.set_provider(RNGProvider(5))
+    try:
+        assert new_stream().seed_value == RNGProvider(5).new_seed()
+    finally:
+        rng.set_provider(previous)
+
+def test_numpy_stream_needs_numpy(monkeypatch):
+    monkeypatch.setattr(rng, "np", None)
+    with pytest.raises(RuntimeError):
+        RNGProvider().numpy_stream()
@@ -0,0 +1,56 @@
+from collections import Counter
+
+import pytest
+
+from utils import sampler
+from utils.rng import new_stream
+from utils.sampler import AliasSampler, DropTable
+
+WEIGHTS = {"Common": 60, "Uncommon": 25, "Rare": 10, "Epic": 4, "Legendary": 1}
+
+def test_zero_weights_are_never_drawn():
+    table = AliasSampler.from_weights({"a": 1, "b": 0})
+    assert table.outcomes == ["a"]
+    assert set(table.sample(100, new_stream(1))) == {"a"}
+
+def test_needs_a_positive_weight():
+    with pytest.raises(ValueError):
+        AliasSampler(["a"], [0])
+
+def test_frequencies_match_the_weights():
+    table = AliasSampler.from_weights(WEIGHTS)
+    counts = Counter(table.sample(100000, new_stream(7)))
+    for outcome, weight in WEIGHTS.items():
+        assert counts[outcome] / 100000 == pytest.approx(weight / 100, abs=0.01)
+
+def test_sample_matches_repeated_draws():
+    table = AliasSampler.from_weights(WEIGHTS)
+    stream = new_stream(42)
+    assert table.sample(50, new_stream(42)) == [table.draw(stream) for _ in range(50)]
+
+def test_seeded_pulls_replay_with_or_without_numpy(monkeypatch):
+    table = AliasSampler.from_weights(WEIGHTS)
+    with_numpy = table.sample(200, new_stream(1234))
+
+    monkeypatch.setattr(sampler, "np", None)
+    assert AliasSampler.from_weights(WEIGHTS).sample(200, new_stream(1234)) == with_numpy
+
+def test_numpy_generator_is_vectorized():
+    np = pytest.importorskip("numpy")
+    table = AliasSampler.from_weights(WEIGHTS)
+    first = table.sample(100, np.random.default_rng(5))
+    assert first == table.sample(100, np.random.default_rng(5))
+    assert set(first) <= set(WEIGHTS)
+
+def test_chance_is_clamped():
+    assert set(AliasSampler.chance(1.5).sample(20, new_stream(3))) == {True}
+    assert set(AliasSampler.chance(-1).sample(20, new_stream(3))) == {False}
+
+def test_drop_table_respects_guarantees_and_levels():
+    table = DropTable([
+        {"item": 1, "guaranteed": True, "quantity": (2, 2)},
+        {"item": 2, "chance": 0.0},
+        {"item": 3, "chance": 1.0, "min_level": 10}
+    ])
+    assert table.roll(level=1, rng=new_stream(9)) == [(1, 2)]
+    assert table.roll(level=10, rng=new_stream(9)) == [(1, 2), (3, 1)]
@@ -0,0 +1,57 @@
+import sqlite3
+
+import pytest
+
+from database import search
+from database.search import ensure_search_indexes, load_search_columns, search_filter, search_table
+
+CARDS = [
+    (1, "Ice Dragon", "Frost Saga", "Blizzard Breath", "Water", "Epic"),
+    (2, "Dragon of Ice", "Frost Saga", "Cold Bite", "Water", "Rare"),
+    (3, "Fire Imp", "Ember Tales", "Ice Melt", "Fire", "Common")
+]
+
+@pytest.fixture
+def conn(monkeypatch):
+    monkeypatch.setattr(search, "INDEXED_COLUMNS", {})
+    monkeypatch.setattr(search, "FALLBACK_COLUMNS", {})
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE api_cards (id INTEGER PRIMARY KEY, name TEXT, anime_series TEXT, "
+                 "skill TEXT, element TEXT, rarity TEXT)")
+    conn.executemany("INSERT INTO api_cards VALUES (?, ?, ?, ?, ?, ?)", CARDS)
+    conn.commit()
+    return conn
+
+def find(conn, term):
+    where, params, order, order_params = search_filter("api_card_search", term)
+    rows = conn.execute(f"""
+        SELECT c.id FROM {search_table('api_card_search')} s JOIN api_cards c ON c.id = s.rowid
+        WHERE {where} ORDER BY {order}, c.id
+    """, [*params, *order_params]).fetchall()
+    return [row[0] for row in rows]
+
+def test_phrase_must_appear_as_typed(conn):
+    ensure_search_indexes(conn)
+    assert find(conn, "ice dragon") == [1]
+    assert find(conn, "dragon") == [2, 1]  # name starts with the term
+
+def test_name_prefix_ranks_first(conn):
+    ensure_search_indexes(conn)
+    assert find(conn, "ice")[0] == 1
+    assert set(find(conn, "ice")) == {1, 2, 3}
+
+def test_short_terms_use_like(conn):
+    ensure_search_indexes(conn)
+    assert find(conn, "im") == [3]
+
+def test_falls_back_to_like_without_the_fts_table(conn):
+    load_search_columns(conn)
+    assert search_table("api_card_search") == "api_cards"
+    assert find(conn, "ice dragon") == [1]
+    assert find(conn, "frost") == [1, 2]
+
+def test_fallback_and_index_agree(conn):
+    load_search_columns(conn)
+    expected = {term: sorted(find(conn, term)) for term in ("ice", "saga", "water", "bite", "ep")}
+    ensure_search_indexes(conn)
+    assert {term: sorted(find(conn, term)) for term in expected} == expected
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from utils.battle_engine import DUEL_RULES, BattleEngine, make_combatant
+from utils.skills import SkillRegistry, compile_skill, describe
+
+def test_damage_skill_with_a_status_chance():
+    program = compile_skill("Thunder Palm", "Deals damage with a 40% chance to stun the opponent for 1 turn.")
+    assert program["kind"] == "status"
+    assert program["status"] == ("stunned", 1, 0.4)
+    assert program["multiplier"] == 1.2
+
+def test_heal_and_self_buff_deal_no_damage():
+    program = compile_skill("Mending Light", "Heals 25% of max HP and increases defense by 20% for 2 turns.")
+    assert program["kind"] == "healing"
+    assert program["heal"] == 0.25
+    assert program["multiplier"] == 0
+    assert program["modifiers"] == (("self", "defense", 1.2, 2, 1.0),)
+
+def test_debuff_without_chance_always_applies():
+    program = compile_skill("Charm", "Charms opponents, reducing their attack by 30% for 2 turns.")
+    assert program["kind"] == "debuff"
+    assert program["modifiers"] == (("target", "attack", 0.7, 2, 1.0),)
+
+def test_debuff_chance_is_kept():
+    program = compile_skill("Armor Crush", "30% chance to break their defense")
+    assert program["modifiers"] == (("target", "defense", 0.7, 2, 0.3),)
+    assert "has a 30% chance to lower the opponent's defense by 30%" in describe(program)
+
+def test_name_backs_up_a_vague_description():
+    assert compile_skill("Ruby Flame", "A signature technique.")["status"][0] == "burning"
+
+def test_card_costs_override_the_estimates():
+    program = compile_skill("Slash", "Deals damage", mp_cost=12, cooldown=1)
+    assert (program["mp_cost"], program["cooldown"]) == (12, 1)
+    assert compile_skill("Slash", "Deals damage")["mp_cost"] == 20
+
+def test_registry_compiles_a_skill_once():
+    registry = SkillRegistry()
+    first = registry.program("Test Strike", "Deals damage")
+    assert registry.program("Test Strike", "Heals 50% of max HP") is first
+    assert registry.get("Test Strike") is first
+    assert registry.program(None) is None
+
+class FixedRolls(random.Random):
+    """Random stream whose random() always returns the same value."""
+
+    def __init__(self, value):
+        super().__init__(0)
+        self.value = value
+
+    def random(self):
+        return self.value
+
+@pytest.mark.parametrize("roll, applied", [(0.1, True), (0.5, False)])
+def test_engine_rolls_the_debuff_chance(roll, applied):
+    a = make_combatant("a", 40, 10, 20, 100, mp=50, skill="Test Armor Crush", skill_cost=10,
+                       skill_description="30% chance to break their defense", crit_rate=0)
+    b = make_combatant("b", 40, 10, 10, 1000, crit_rate=0)
+    engine = BattleEngine(a, b, rng=FixedRolls(roll), rules=dict(DUEL_RULES, elements=None))
+    event = next(event for event in engine.play_turn("a", "skill") if event["type"] == "skill")
+
+    assert bool(event["modifiers"]) is applied
+    assert ("defense" in b["modifiers"]) is applied
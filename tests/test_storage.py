@@ -0,0 +1,31 @@
+from database.database import Database
+from database.storage import STORAGE_MODES, get_storage_mode, pragma_statements
+
+def test_unknown_mode_falls_back_to_wal(monkeypatch):
+    monkeypatch.delenv("SPARKS_DB_STORAGE_MODE", raising=False)
+    assert get_storage_mode() == "wal"
+    assert get_storage_mode("nonsense") == "wal"
+    assert get_storage_mode("LEGACY") == "legacy"
+
+def test_mode_is_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("SPARKS_DB_STORAGE_MODE", "legacy")
+    assert get_storage_mode() == "legacy"
+    # An explicit mode wins over the environment
+    assert get_storage_mode("wal") == "wal"
+
+def test_pragma_statements_cover_the_mode():
+    statements = pragma_statements("wal")
+    assert "PRAGMA journal_mode = WAL" in statements
+    assert "PRAGMA synchronous = NORMAL" in statements
+    assert len(statements) == len(STORAGE_MODES["wal"])
+
+def test_database_applies_its_storage_mode(workdir):
+    db = Database(storage_mode="wal")
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db.conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    db.close()
+
+    db = Database(storage_mode="legacy")
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert db.conn.execute("PRAGMA synchronous").fetchone()[0] == 2  # FULL
+    db.close()
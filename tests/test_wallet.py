@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from database import wallet
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE players (user_id INTEGER PRIMARY KEY, gold INTEGER);
+        CREATE TABLE user_materials (id INTEGER PRIMARY KEY, user_id INTEGER, player_id INTEGER,
+                                     material_id INTEGER, quantity INTEGER);
+        INSERT INTO players VALUES (1, 100);
+        INSERT INTO user_materials (player_id, material_id, quantity) VALUES (7, 3, 5);
+    """)
+    return conn
+
+def gold(conn):
+    return conn.execute("SELECT gold FROM players WHERE user_id = 1").fetchone()[0]
+
+def test_spend_only_what_the_player_has(conn):
+    cursor = conn.cursor()
+    assert wallet.try_spend(cursor, "gold", 1, 60)
+    assert not wallet.try_spend(cursor, "gold", 1, 60)
+    assert gold(conn) == 40
+
+def test_unknown_player_spends_nothing(conn):
+    assert not wallet.try_spend(conn.cursor(), "gold", 2, 1)
+
+def test_zero_cost_always_succeeds(conn):
+    assert wallet.try_spend(conn.cursor(), "gold", 2, 0)
+
+def test_spend_raises_when_refused(conn):
+    with pytest.raises(wallet.InsufficientFunds) as error:
+        wallet.spend(conn.cursor(), "material", (7, 3), 6)
+    assert error.value.resource == "material"
+    assert error.value.keys == (7, 3)
+
+def test_transaction_applies_all_or_nothing(conn):
+    cursor = conn.cursor()
+    with pytest.raises(wallet.InsufficientFunds):
+        with wallet.transaction(conn):
+            wallet.spend(cursor, "gold", 1, 50)
+            wallet.spend(cursor, "material", (7, 3), 10)
+    assert gold(conn) == 100
+
+    with wallet.transaction(conn):
+        wallet.spend(cursor, "gold", 1, 50)
+        wallet.spend(cursor, "material", (7, 3), 5)
+    assert gold(conn) == 50
+    assert conn.execute("SELECT quantity FROM user_materials").fetchone() == (0,)
+
+def test_failed_transaction_keeps_earlier_uncommitted_writes(conn):
+    conn.execute("UPDATE players SET gold = gold + 1 WHERE user_id = 1")
+    with pytest.raises(wallet.InsufficientFunds):
+        with wallet.transaction(conn):
+            wallet.spend(conn.cursor(), "gold", 1, 1000)
+    assert gold(conn) == 101
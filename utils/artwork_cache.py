@@ -0,0 +1,336 @@
+"""
+Async cache for card artwork.
+Card art lives at remote image_urls (cogs/card_images.py, the card data
+modules and api_cards.image_url). Artwork is downloaded over one shared
+aiohttp session with a pooled connector, concurrent misses for the same URL
+share a single download, and each image is decoded and shrunk to the card's
+art area once and kept as a small PNG thumbnail in a size-bounded on-disk LRU
+(with the hottest thumbnails also held in memory). Renders then never touch
+the network or decode a full-size image.
+"""
+
+import os
+import io
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+from PIL import Image
+
+logger = logging.getLogger('bot.artwork_cache')
+
+# Art area of a card image (see ImageGenerator.render_card_png)
+THUMBNAIL_SIZE = (290, 150)
+
+# Scheme and host to fetch every URL from instead (e.g. a local stand-in server)
+ARTWORK_ORIGIN = os.getenv("ARTWORK_ORIGIN")
+
+# Largest download accepted, in bytes
+MAX_DOWNLOAD = 8 * 1024 * 1024
+
+# How long a failed URL is not retried, in seconds
+FAILURE_TTL = 300
+
+# Failed URLs remembered at most (the oldest are forgotten first)
+MAX_FAILURES = 1024
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    """
+    Decodes an image and shrinks it to fit a box
+
+    Args:
+        data (bytes): The downloaded image
+        size (tuple): (width, height) to fit in, keeping the aspect ratio
+
+    Returns:
+        bytes: The thumbnail as PNG
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert('RGBA')
+        img.thumbnail(size)
+
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+class ArtworkCache:
+    """Pooled, coalescing artwork fetcher with a disk LRU of thumbnails."""
+
+    def __init__(self, disk_dir="static/images/artwork", max_bytes=256 * 1024 * 1024,
+                 max_memory_items=256, thumbnail_size=THUMBNAIL_SIZE, origin=None,
+                 connections=20, timeout=10, failure_ttl=FAILURE_TTL, max_failures=MAX_FAILURES):
+        """
+        Configures the cache
+
+        Args:
+            disk_dir (str): Directory for thumbnails
+            max_bytes (int): Disk budget; least recently used thumbnails are evicted past it
+            max_memory_items (int): Thumbnails also kept in memory
+            thumbnail_size (tuple): (width, height) thumbnails are fit into
+            origin (str): Fetch from this scheme://host instead, defaults to $ARTWORK_ORIGIN
+            connections (int): Connection pool size of the shared session
+            timeout (int): Total seconds allowed per download
+            failure_ttl (float): Seconds a failed URL is not retried
+            max_failures (int): Failed URLs remembered at most
+        """
+        self.disk_dir = disk_dir
+        self.max_bytes = max_bytes
+        self.max_memory_items = max_memory_items
+        self.thumbnail_size = tuple(thumbnail_size)
+        self.origin = origin if origin is not None else ARTWORK_ORIGIN
+        self.connections = connections
+        self.timeout = timeout
+        self.failure_ttl = failure_ttl
+        self.max_failures = max_failures
+
+        self.session = None
+        self.memory = OrderedDict()
+        self.disk = OrderedDict()  # path -> size, least recently used first
+        self.disk_bytes = 0
+        self.inflight = {}
+        self.failures = OrderedDict()  # url -> monotonic time it failed, oldest first
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    async def start(self):
+        """Opens the shared session and indexes the thumbnails already on disk."""
+        if self.session is not None:
+            return
+
+        connector = aiohttp.TCPConnector(limit=self.connections, limit_per_host=self.connections, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+        await asyncio.get_running_loop().run_in_executor(None, self._index_disk)
+        logger.info(f"Artwork cache started with {len(self.disk)} thumbnails ({self.disk_bytes // 1024} KiB) on disk")
+
+    async def close(self):
+        """Closes the shared session."""
+        if self.session is None:
+            return
+
+        session, self.session = self.session, None
+        await session.close()
+
+    def key(self, url):
+        """
+        Hashes a URL together with the thumbnail size
+
+        Args:
+            url (str): Artwork URL
+
+        Returns:
+            str: Hex digest used as the cache key
+        """
+        payload = f"{self.thumbnail_size[0]}x{self.thumbnail_size[1]}:{url}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.png")
+
+    def _index_disk(self):
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(".png"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+
+        # Oldest first, so eviction order survives restarts
+        for _, path, size in sorted(entries):
+            self.disk[path] = size
+            self.disk_bytes += size
+        self._evict_disk()
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.max_bytes and self.disk:
+            path, size = self.disk.popitem(last=False)
+            self.disk_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remember(self, key, data):
+        self.memory[key] = data
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_items:
+            self.memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        if path not in self.disk:
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            self.disk_bytes -= self.disk.pop(path)
+            return None
+
+        self.disk.move_to_end(path)
+        return data
+
+    def _write_file(self, path, data):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so readers never see a half-written file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write artwork {path} to disk: {e}")
+            return False
+        return True
+
+    async def _write_disk(self, key, data):
+        path = self._path(key)
+        written = await asyncio.get_running_loop().run_in_executor(None, self._write_file, path, data)
+        if not written:
+            return
+
+        # The index is only touched on the event loop
+        self.disk_bytes += len(data) - self.disk.pop(path, 0)
+        self.disk[path] = len(data)
+        self._evict_disk()
+
+    def source_url(self, url):
+        """
+        Maps an artwork URL to the URL actually fetched
+
+        Args:
+            url (str): Artwork URL
+
+        Returns:
+            str: The URL, moved to the configured origin if there is one
+        """
+        if not self.origin:
+            return url
+
+        origin = urlsplit(self.origin)
+        parts = urlsplit(url)
+        return urlunsplit((origin.scheme, origin.netloc, parts.path, parts.query, ""))
+
+    async def thumbnail(self, url):
+        """
+        Gets the thumbnail for an artwork URL, downloading it on a miss
+
+        Args:
+            url (str): Artwork URL
+
+        Returns:
+            bytes: The thumbnail as PNG, or None if there's no usable artwork
+        """
+        if not url:
+            return None
+
+        key = self.key(url)
+
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return data
+
+        data = self._read_disk(key)
+        if data is not None:
+            self._remember(key, data)
+            self.disk_hits += 1
+            return data
+
+        # Don't hammer URLs that just failed
+        failed_at = self.failures.get(url)
+        if failed_at is not None and time.monotonic() - failed_at < self.failure_ttl:
+            return None
+
+        # Concurrent misses for the same URL share one download
+        task = self.inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(url, key))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url, key):
+        if self.session is None:
+            raise RuntimeError("Artwork cache is not started")
+
+        source = self.source_url(url)
+        try:
+            async with self.session.get(source) as response:
+                if response.status != 200:
+                    raise ValueError(f"HTTP {response.status}")
+                if (response.content_length or 0) > MAX_DOWNLOAD:
+                    raise ValueError(f"{response.content_length} bytes is too large")
+
+                data = await response.content.read(MAX_DOWNLOAD + 1)
+                if len(data) > MAX_DOWNLOAD:
+                    raise ValueError("Response is too large")
+
+            # Decoding and resizing are CPU work, keep them off the event loop
+            loop = asyncio.get_running_loop()
+            thumbnail = await loop.run_in_executor(None, make_thumbnail, data, self.thumbnail_size)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, OSError) as e:
+            logger.warning(f"Could not fetch artwork {source}: {e}")
+            self._remember_failure(url)
+            return None
+
+        self.failures.pop(url, None)
+        self._remember(key, thumbnail)
+        await self._write_disk(key, thumbnail)
+        return thumbnail
+
+    def _remember_failure(self, url):
+        now = time.monotonic()
+        self.failures.pop(url, None)
+        self.failures[url] = now
+
+        # Forget expired failures, and the oldest ones past the cap
+        while self.failures:
+            oldest, failed_at = next(iter(self.failures.items()))
+            if now - failed_at < self.failure_ttl and len(self.failures) <= self.max_failures:
+                break
+            del self.failures[oldest]
+
+    async def prefetch(self, urls):
+        """
+        Warms the cache for a batch of URLs (duplicates are fetched once)
+
+        Args:
+            urls (iterable): Artwork URLs
+
+        Returns:
+            int: How many of them have a thumbnail now
+        """
+        results = await asyncio.gather(*(self.thumbnail(url) for url in set(urls) if url))
+        return sum(1 for data in results if data is not None)
+
+    def stats(self):
+        """Returns cache counters for monitoring."""
+        return {
+            "memory_items": len(self.memory),
+            "disk_items": len(self.disk),
+            "disk_bytes": self.disk_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "failures": len(self.failures),
+            "inflight": len(self.inflight)
+        }
@@ -0,0 +1,199 @@
+"""
+Preloaded render assets.
+Fonts (at every size the renderer uses), rarity card frames and element
+icons are loaded once at startup into a registry of shared, read-only
+objects. Render workers are forked after loading and inherit the registry
+as-is, so no render ever opens a font file or redraws a frame.
+"""
+
+import os
+import logging
+from types import MappingProxyType
+
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger('bot.assets')
+
+# Font file to use instead of Pillow's bundled font; must exist when set
+FONT_PATH = os.getenv("RENDER_FONT")
+
+# Every font size the renderer draws with
+FONT_SIZES = {
+    "text": 10
+}
+
+# Card layout the frames and icons are drawn for
+CARD_SIZE = (300, 420)
+CARD_BORDER = 5
+CARD_HEADER_HEIGHT = 50
+ELEMENT_ICON_SIZE = 40
+
+# Rarity colors
+RARITY_COLORS = {
+    "Common": (150, 150, 150),      # Gray
+    "Uncommon": (0, 200, 0),        # Green
+    "Rare": (0, 112, 221),          # Blue
+    "Epic": (163, 53, 238),         # Purple
+    "Legendary": (255, 215, 0)      # Gold
+}
+DEFAULT_RARITY_COLOR = (150, 150, 150)
+
+# Element colors
+ELEMENT_COLORS = {
+    "Fire": (255, 50, 50),
+    "Water": (50, 150, 255),
+    "Earth": (139, 69, 19),
+    "Air": (200, 200, 200),
+    "Electric": (255, 255, 0),
+    "Ice": (173, 216, 230),
+    "Light": (255, 255, 200),
+    "Dark": (75, 0, 130),
+    "Cute": (255, 182, 193),
+    "Sweet": (255, 105, 180),
+    "Star": (255, 223, 0)
+}
+DEFAULT_ELEMENT_COLOR = (139, 69, 19)
+
+def load_font(size, path=None):
+    """
+    Loads a font at a size
+
+    Args:
+        size (int): Font size in pixels
+        path (str): TrueType/OpenType file, or None for Pillow's bundled font
+
+    Returns:
+        ImageFont: The font
+    """
+    if path:
+        return ImageFont.truetype(path, size)
+
+    try:
+        return ImageFont.load_default(size=size)
+    except (TypeError, ImportError, OSError):
+        # Older Pillow or no FreeType: the fixed-size bitmap font
+        return ImageFont.load_default()
+
+class AssetRegistry:
+    """Fonts, rarity frames and element icons, loaded once."""
+
+    def __init__(self, font_path=None):
+        """
+        Sets up an empty registry
+
+        Args:
+            font_path (str): Font file, defaults to $RENDER_FONT or Pillow's bundled font
+        """
+        self.font_path = font_path if font_path is not None else FONT_PATH
+        self.fonts = MappingProxyType({})
+        self.frames = MappingProxyType({})
+        self.icons = MappingProxyType({})
+        self.loaded = False
+
+    def validate(self):
+        """
+        Checks that every asset file the registry needs is present
+
+        Returns:
+            list: Problems found, empty when everything is in place
+        """
+        problems = []
+        if self.font_path and not os.path.isfile(self.font_path):
+            problems.append(f"Font file not found: {self.font_path}")
+        return problems
+
+    def load(self):
+        """
+        Loads every asset; safe to call again
+
+        Raises:
+            RuntimeError: If an asset is missing or can't be loaded
+        """
+        if self.loaded:
+            return
+
+        problems = self.validate()
+        if problems:
+            raise RuntimeError("Missing render assets: " + "; ".join(problems))
+
+        try:
+            self.fonts = MappingProxyType({
+                name: load_font(size, self.font_path) for name, size in FONT_SIZES.items()
+            })
+        except OSError as e:
+            raise RuntimeError(f"Could not load font {self.font_path}: {e}")
+
+        frames = {name: self.draw_frame(color) for name, color in RARITY_COLORS.items()}
+        frames[None] = self.draw_frame(DEFAULT_RARITY_COLOR)
+        self.frames = MappingProxyType(frames)
+
+        icons = {name: self.draw_icon(name, color) for name, color in ELEMENT_COLORS.items()}
+        self.icons = MappingProxyType(icons)
+
+        self.loaded = True
+        logger.info(
+            f"Loaded {len(self.fonts)} fonts, {len(RARITY_COLORS)} rarity frames "
+            f"and {len(self.icons)} element icons"
+        )
+
+    def font(self, name="text"):
+        """Returns a preloaded font by its FONT_SIZES name."""
+        if not self.loaded:
+            self.load()
+        return self.fonts[name]
+
+    def frame(self, rarity):
+        """
+        Returns the card frame for a rarity (shared, copy before drawing on it)
+
+        Args:
+            rarity (str): Card rarity; unknown rarities get the Common frame color
+
+        Returns:
+            PIL.Image: Card-sized frame with border and header
+        """
+        if not self.loaded:
+            self.load()
+        return self.frames.get(rarity, self.frames[None])
+
+    def icon(self, element):
+        """
+        Returns the icon for an element (shared, don't draw on it)
+
+        Args:
+            element (str): Element name
+
+        Returns:
+            PIL.Image: Square icon with the element's color and initial
+        """
+        if not self.loaded:
+            self.load()
+        icon = self.icons.get(element)
+        if icon is None:
+            # Elements without a color of their own get a one-off icon
+            icon = self.draw_icon(element, DEFAULT_ELEMENT_COLOR)
+        return icon
+
+    def draw_frame(self, color):
+        """Draws the card border and header in a rarity color."""
+        width, height = CARD_SIZE
+        img = Image.new('RGBA', CARD_SIZE, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+
+        # Draw card border with rarity color
+        draw.rectangle([(0, 0), (width, height)], fill=(30, 30, 30), outline=color, width=CARD_BORDER)
+
+        # Draw card header
+        draw.rectangle([(CARD_BORDER, CARD_BORDER), (width - CARD_BORDER, CARD_HEADER_HEIGHT)], fill=color)
+        return img
+
+    def draw_icon(self, element, color):
+        """Draws an element's colored square with its initial."""
+        img = Image.new('RGBA', (ELEMENT_ICON_SIZE + 1, ELEMENT_ICON_SIZE + 1), color)
+        draw = ImageDraw.Draw(img)
+        if element:
+            draw.text((5, 5), element[0], fill=(255, 255, 255), font=self.fonts["text"])
+        return img
+
+# The registry every renderer shares
+ASSETS = AssetRegistry()
@@ -0,0 +1,498 @@
+"""
+Headless battle engine.
+All combat rules (turn order, damage, crits, dodges, skills, status effects,
+MP) live here, with no Discord code. Callers hand the engine two combatants
+and an action, and get back a list of event dicts describing what happened.
+The cogs only render those events, and because the engine is pure it can be
+driven in a tight loop for balance simulations.
+
+Event types:
+    turn: a combatant's turn begins (side, turn)
+    status_tick: burn/poison damage (side, status, damage)
+    status_end: a status wore off (side, status)
+    modifier_end: a stat change wore off (side, stat)
+    stunned: the acting combatant lost its turn (side)
+    attack / skill: an action landed (side, target, damage, critical,
+        dodged, effective, element_multiplier, target_hp, target_max_hp;
+        skills also carry skill, heal, status and modifiers)
+    flee: a flee attempt (side, success)
+    end: the battle is over (winner, reason)
+"""
+
+import random
+
+try:
+    import numpy as np
+except ImportError:  # Only scaled_damage_array needs NumPy
+    np = None
+
+from utils.elements import ELEMENTS
+from utils.skills import SKILLS
+
+# Damage over time, as a fraction of max HP
+BURN_DAMAGE = 0.05
+POISON_DAMAGE = 0.08
+
+# Auto-battles (PvP, bosses): flat damage, dodgeable attacks, compiled skill
+# effects, each skill's own cooldown (None)
+DUEL_RULES = {
+    "damage": "flat",
+    "skill_cooldown": None,
+    "skill_bonus": 1.0,
+    "turn_mp_regen": 0.05,
+    "round_mp_regen": 0,
+    "elements": ELEMENTS,
+    "flee_chance": 0
+}
+
+# Button battles (battles, dungeons): BattleSystem's scaled damage formula
+SCALED_RULES = {
+    "damage": "scaled",
+    "skill_cooldown": 0,
+    "skill_bonus": 1.0,
+    "turn_mp_regen": 0,
+    "round_mp_regen": 0,
+    "elements": ELEMENTS,
+    "flee_chance": 60
+}
+
+def make_combatant(name, attack, defense, speed, hp, max_hp=None, mp=0, max_mp=None,
+                   element=None, skill=None, skill_cost=0, crit_rate=5, dodge_rate=0,
+                   skill_chance=0.3, low_hp_skill_chance=None, level=1,
+                   skill_description=None, skill_cooldown=None):
+    """
+    Builds the combatant state the engine works on
+
+    Args:
+        name (str): Display name, carried through for renderers
+        attack (int): Attack stat
+        defense (int): Defense stat
+        speed (int): Speed stat (the faster side moves first)
+        hp (int): Current HP
+        max_hp (int): Max HP, defaults to hp
+        mp (int): Current MP
+        max_mp (int): Max MP, defaults to mp
+        element (str): Element name
+        skill (str): Skill name
+        skill_cost (int): MP cost of the skill
+        crit_rate (float): Critical hit chance (0-100)
+        dodge_rate (float): Dodge chance (0-100)
+        skill_chance (float): Chance the AI picks the skill when it can (0.0-1.0)
+        low_hp_skill_chance (float): Skill chance below 40% HP, defaults to skill_chance
+        level (int): Level, carried through for renderers
+        skill_description (str): The skill's description, compiled if the skill is new
+        skill_cooldown (int): The skill's cooldown, used if the skill is new
+
+    Returns:
+        dict: Combatant state
+    """
+    return {
+        "name": name,
+        "level": level,
+        "attack": attack,
+        "defense": defense,
+        "speed": speed,
+        "element": element,
+        "element_id": ELEMENTS.intern(element),
+        "skill": skill,
+        "skill_cost": skill_cost,
+        "skill_program": SKILLS.program(skill, skill_description, skill_cost, skill_cooldown),
+        "crit_rate": crit_rate,
+        "dodge_rate": dodge_rate,
+        "skill_chance": skill_chance,
+        "low_hp_skill_chance": skill_chance if low_hp_skill_chance is None else low_hp_skill_chance,
+        "hp": hp,
+        "max_hp": hp if max_hp is None else max_hp,
+        "mp": mp,
+        "max_mp": mp if max_mp is None else max_mp,
+        "status": {},
+        "modifiers": {},  # stat -> (multiplier, turns left)
+        "cooldown": 0
+    }
+
+def scaled_damage(attack, defense, crit_rate=5, element_multiplier=1.0, is_skill=False, rng=None):
+    """
+    BattleSystem's damage formula: ATK ±10%, crits x1.8, reduced by DEF
+
+    Args:
+        attack (int): Attacker's attack stat
+        defense (int): Defender's defense stat
+        crit_rate (float): Critical hit chance (0-100)
+        element_multiplier (float): Element effectiveness
+        is_skill (bool): Skills do 50% more damage
+        rng: Random source, defaults to the random module
+
+    Returns:
+        tuple: (damage, is_critical)
+    """
+    rng = rng or random
+
+    base_damage = attack
+    if is_skill:
+        base_damage = int(base_damage * 1.5)
+
+    damage = int(base_damage * rng.uniform(0.9, 1.1))
+
+    is_critical = rng.random() * 100 < crit_rate
+    if is_critical:
+        damage = int(damage * 1.8)
+
+    damage = int(damage * (100 / (100 + defense)))
+    damage = int(damage * element_multiplier)
+
+    return max(1, damage), is_critical
+
+def scaled_damage_array(attack, defense, crit_rate, element_multiplier, is_skill, rng):
+    """
+    scaled_damage for a whole array of hits at once (for simulations)
+
+    Args:
+        attack (int): Attacker's attack stat
+        defense (int): Defender's defense stat
+        crit_rate (float): Critical hit chance (0-100)
+        element_multiplier (float): Element effectiveness
+        is_skill (numpy.ndarray): Boolean array, one entry per hit
+        rng (numpy.random.Generator): Random source
+
+    Returns:
+        tuple: (damage array, is_critical array)
+    """
+    n = len(is_skill)
+    base_damage = np.where(is_skill, int(attack * 1.5), attack)
+
+    # Same steps and truncation as scaled_damage (stats and damage are never negative)
+    damage = np.floor(base_damage * rng.uniform(0.9, 1.1, n))
+
+    is_critical = rng.random(n) * 100 < crit_rate
+    damage = np.where(is_critical, np.floor(damage * 1.8), damage)
+
+    damage = np.floor(damage * (100 / (100 + defense)))
+    damage = np.floor(damage * element_multiplier)
+
+    return np.maximum(1, damage).astype(np.int64), is_critical
+
+def flat_damage(attack, defense, multiplier=1.0):
+    """
+    The auto-battle damage formula: ATK - DEF/2, at least 5
+
+    Args:
+        attack (int): Attacker's attack stat
+        defense (int): Defender's defense stat
+        multiplier (float): Skill and element multiplier
+
+    Returns:
+        int: Damage before crits
+    """
+    return int(max(5, attack - defense // 2) * multiplier)
+
+class BattleEngine:
+    """Runs a battle between side "a" and side "b" and reports it as events."""
+
+    def __init__(self, a, b, rng=None, rules=None):
+        """
+        Sets up a battle
+
+        Args:
+            a (dict): The first combatant (the player in button battles)
+            b (dict): The second combatant
+            rng: Random source for every roll, defaults to the random module
+            rules (dict): A rule set such as DUEL_RULES, optionally with overrides
+        """
+        self.combatants = {"a": a, "b": b}
+        self.rng = rng or random
+        self.rules = dict(DUEL_RULES if rules is None else rules)
+        self.turn = 0
+        self.round = 0
+        self.next_side = "a" if a["speed"] >= b["speed"] else "b"
+        self.finished = False
+        self.winner = None
+        self.reason = None
+
+    @staticmethod
+    def other(side):
+        """Returns the opposing side."""
+        return "b" if side == "a" else "a"
+
+    def element_multiplier(self, attacker, defender):
+        """Returns the element multiplier of attacker against defender."""
+        elements = self.rules["elements"]
+        if elements is None:
+            return 1.0
+        return elements.multiplier_by_id(attacker["element_id"], defender["element_id"])
+
+    @staticmethod
+    def stat(combatant, name):
+        """Returns a combatant's stat with any skill modifier applied."""
+        modifier = combatant["modifiers"].get(name)
+        return combatant[name] * modifier[0] if modifier else combatant[name]
+
+    def can_use_skill(self, side):
+        """Checks MP and cooldown for side's skill."""
+        actor = self.combatants[side]
+        return bool(actor["skill"]) and actor["mp"] >= actor["skill_cost"] and actor["cooldown"] == 0
+
+    def choose_action(self, side):
+        """
+        The battle AI: uses the skill when able, more eagerly at low HP
+
+        Args:
+            side (str): "a" or "b"
+
+        Returns:
+            str: "attack" or "skill"
+        """
+        actor = self.combatants[side]
+        if not self.can_use_skill(side):
+            return "attack"
+
+        chance = actor["skill_chance"]
+        if actor["hp"] < actor["max_hp"] * 0.4:
+            chance = actor["low_hp_skill_chance"]
+
+        return "skill" if self.rng.random() < chance else "attack"
+
+    def play_turn(self, side, action=None):
+        """
+        Plays one combatant's turn
+
+        Args:
+            side (str): "a" or "b"
+            action (str): "attack", "skill" or "flee", or None to let the AI choose
+
+        Returns:
+            list: Events for the turn
+        """
+        if self.finished:
+            return []
+
+        self.turn += 1
+        self.next_side = self.other(side)
+        actor = self.combatants[side]
+        events = [{"type": "turn", "side": side, "turn": self.turn}]
+
+        # A stun applied last turn costs this one, even though it wears off now
+        stunned = bool(actor["status"].get("stunned"))
+
+        # Burns and durations tick at the start of every turn, stat changes on their bearer's
+        self._tick_statuses(events)
+        self._tick_modifiers(side, events)
+        if self._check_knockout(events):
+            return events
+
+        if stunned:
+            events.append({"type": "stunned", "side": side})
+        else:
+            if action is None:
+                action = self.choose_action(side)
+
+            if action == "flee":
+                self._flee(side, events)
+            elif action == "skill":
+                self._skill(side, events)
+            else:
+                self._attack(side, events)
+
+        if self.finished:
+            return events
+
+        # MP regen, then poison, at the end of every turn
+        regen = self.rules["turn_mp_regen"]
+        for combatant in self.combatants.values():
+            if regen:
+                combatant["mp"] = min(combatant["max_mp"], combatant["mp"] + int(combatant["max_mp"] * regen))
+            if combatant["status"].get("poisoned"):
+                damage = int(combatant["max_hp"] * POISON_DAMAGE)
+                combatant["hp"] = max(0, combatant["hp"] - damage)
+                events.append({"type": "status_tick", "side": self._side_of(combatant), "status": "poisoned", "damage": damage})
+
+        self._check_knockout(events)
+        return events
+
+    def play_round(self, action):
+        """
+        Button battles: side "a" acts, then side "b" answers if the battle goes on
+
+        Args:
+            action (str): "attack", "skill" or "flee"
+
+        Returns:
+            list: Events for the round
+        """
+        self.round += 1
+        events = self.play_turn("a", action)
+        events += self.play_turn("b")
+
+        regen = self.rules["round_mp_regen"]
+        if regen and not self.finished:
+            for combatant in self.combatants.values():
+                combatant["mp"] = min(combatant["max_mp"], combatant["mp"] + regen)
+
+        return events
+
+    def step(self):
+        """
+        Auto-battles: plays the next turn with both sides on AI
+
+        Returns:
+            list: Events for the turn
+        """
+        return self.play_turn(self.next_side)
+
+    def run(self, max_turns=200):
+        """
+        Plays an auto-battle to the end
+
+        Args:
+            max_turns (int): Turn limit, after which the battle ends as a draw
+
+        Returns:
+            list: Every event of the battle
+        """
+        events = []
+        while not self.finished and self.turn < max_turns:
+            events += self.step()
+
+        if not self.finished:
+            self._finish(None, "timeout", events)
+
+        return events
+
+    def _side_of(self, combatant):
+        return "a" if combatant is self.combatants["a"] else "b"
+
+    def _tick_statuses(self, events):
+        for side, combatant in self.combatants.items():
+            if combatant["cooldown"] > 0:
+                combatant["cooldown"] -= 1
+
+            for status in list(combatant["status"]):
+                if status == "burning":
+                    damage = int(combatant["max_hp"] * BURN_DAMAGE)
+                    combatant["hp"] = max(0, combatant["hp"] - damage)
+                    events.append({"type": "status_tick", "side": side, "status": status, "damage": damage})
+
+                combatant["status"][status] -= 1
+                if combatant["status"][status] <= 0:
+                    del combatant["status"][status]
+                    events.append({"type": "status_end", "side": side, "status": status})
+
+    def _tick_modifiers(self, side, events):
+        modifiers = self.combatants[side]["modifiers"]
+        for stat, (multiplier, turns) in list(modifiers.items()):
+            if turns <= 0:
+                del modifiers[stat]
+                events.append({"type": "modifier_end", "side": side, "stat": stat})
+            else:
+                modifiers[stat] = (multiplier, turns - 1)
+
+    def _check_knockout(self, events):
+        if self.combatants["b"]["hp"] <= 0:
+            self._finish("a", "ko", events)
+        elif self.combatants["a"]["hp"] <= 0:
+            self._finish("b", "ko", events)
+        return self.finished
+
+    def _finish(self, winner, reason, events):
+        self.finished = True
+        self.winner = winner
+        self.reason = reason
+        events.append({"type": "end", "winner": winner, "reason": reason})
+
+    def _hit(self, side, kind, damage, critical, dodged, multiplier):
+        target = self.combatants[self.other(side)]
+        target["hp"] = max(0, target["hp"] - damage)
+        return {
+            "type": kind,
+            "side": side,
+            "target": self.other(side),
+            "damage": damage,
+            "critical": critical,
+            "dodged": dodged,
+            "element_multiplier": multiplier,
+            "effective": multiplier > 1.0,
+            "target_hp": target["hp"],
+            "target_max_hp": target["max_hp"]
+        }
+
+    def _attack(self, side, events):
+        actor = self.combatants[side]
+        target = self.combatants[self.other(side)]
+        multiplier = self.element_multiplier(actor, target)
+
+        attack, defense = self.stat(actor, "attack"), self.stat(target, "defense")
+
+        if self.rules["damage"] == "scaled":
+            damage, critical = scaled_damage(attack, defense, self.stat(actor, "crit_rate"),
+                                             multiplier, rng=self.rng)
+            events.append(self._hit(side, "attack", damage, critical, False, multiplier))
+        else:
+            damage = flat_damage(attack, defense, multiplier)
+            if self.rng.random() * 100 < self.stat(target, "dodge_rate"):
+                events.append(self._hit(side, "attack", 0, False, True, multiplier))
+            else:
+                critical = self.rng.random() * 100 < self.stat(actor, "crit_rate")
+                if critical:
+                    damage = int(damage * 1.5)
+                events.append(self._hit(side, "attack", damage, critical, False, multiplier))
+
+        self._check_knockout(events)
+
+    def _skill(self, side, events):
+        actor = self.combatants[side]
+        target = self.combatants[self.other(side)]
+        if actor["mp"] < actor["skill_cost"]:
+            raise ValueError(f"{actor['name']} does not have enough MP for {actor['skill']}")
+
+        program = actor["skill_program"]
+        actor["mp"] -= actor["skill_cost"]
+        cooldown = self.rules["skill_cooldown"]
+        actor["cooldown"] = program["cooldown"] if cooldown is None else cooldown
+        multiplier = self.element_multiplier(actor, target)
+        heal = 0
+        status = None
+        modifiers = []
+
+        if self.rules["damage"] == "scaled":
+            damage, critical = scaled_damage(self.stat(actor, "attack"), self.stat(target, "defense"),
+                                             self.stat(actor, "crit_rate"), multiplier, is_skill=True, rng=self.rng)
+            damage = int(damage * self.rules["skill_bonus"])
+        else:
+            # The skill's compiled program says everything it does
+            if program["heal"]:
+                heal = min(int(actor["max_hp"] * program["heal"]), actor["max_hp"] - actor["hp"])
+                actor["hp"] += heal
+
+            if program["status"]:
+                name, duration, chance = program["status"]
+                if chance >= 1 or self.rng.random() < chance:
+                    status = name
+                    target["status"][status] = duration
+
+            for who, stat, change, duration, chance in program["modifiers"]:
+                if chance < 1 and self.rng.random() >= chance:
+                    continue
+                bearer = side if who == "self" else self.other(side)
+                self.combatants[bearer]["modifiers"][stat] = (change, duration)
+                modifiers.append((bearer, stat, change))
+
+            damage = flat_damage(self.stat(actor, "attack"), self.stat(target, "defense"),
+                                 program["multiplier"] * multiplier)
+            critical = self.rng.random() * 100 < self.stat(actor, "crit_rate")
+            if critical:
+                damage = int(damage * 1.5)
+
+        event = self._hit(side, "skill", damage, critical, False, multiplier)
+        event.update({"skill": actor["skill"], "heal": heal, "status": status, "modifiers": modifiers})
+        events.append(event)
+
+        self._check_knockout(events)
+
+    def _flee(self, side, events):
+        chance = self.rules["flee_chance"]
+        if callable(chance):
+            chance = chance(self.combatants[side], self.combatants[self.other(side)])
+
+        success = self.rng.random() * 100 < chance
+        events.append({"type": "flee", "side": side, "success": success})
+        if success:
+            self._finish(None, "flee", events)
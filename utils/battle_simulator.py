@@ -0,0 +1,236 @@
+"""
+Vectorized Monte Carlo battle simulator for balance analysis.
+Runs N copies of the same matchup in lockstep NumPy arrays, one round at a
+time, using the button-battle rules of utils.battle_engine (the formula
+behind BattleSystem.calculate_damage). Both sides use the engine's battle
+AI. Reports win rate, battle length and damage distributions, so a card can
+be checked against another card or against generated enemies without
+playing it by hand.
+"""
+
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # The simulator needs NumPy; the bot itself does not
+    np = None
+
+from utils.battle_engine import SCALED_RULES, make_combatant, scaled_damage_array
+from utils.rng import get_provider
+
+logger = logging.getLogger('bot.battle_simulator')
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+def card_combatant(card, level=1, name=None):
+    """
+    Builds a combatant from a card the way BattleSystem.get_player_card does
+
+    Args:
+        card (dict): Card with attack, defense, speed, element and skill
+        level (int): Card level
+        name (str): Display name, defaults to the card name
+
+    Returns:
+        dict: Combatant state for the engine or the simulator
+    """
+    level_bonus = (level - 1) * 0.1  # 10% per level
+    max_mp = 50 + (level * 5)
+
+    return make_combatant(
+        name or card["name"],
+        card["attack"],
+        card["defense"],
+        int(card.get("speed", 0) * (1 + level_bonus)),
+        int(card["attack"] * (1 + level_bonus)) * 2,
+        mp=max_mp,
+        element=card.get("element", "Normal"),
+        skill=card.get("skill"),
+        skill_cost=card.get("mp_cost", 20),
+        crit_rate=5 + (level * 0.5),
+        level=level
+    )
+
+def _summary(values):
+    if len(values) == 0:
+        return {"mean": 0.0, "std": 0.0, "min": 0, "max": 0, "percentiles": {p: 0 for p in PERCENTILES}}
+
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "min": int(values.min()),
+        "max": int(values.max()),
+        "percentiles": dict(zip(PERCENTILES, (float(v) for v in np.percentile(values, PERCENTILES))))
+    }
+
+def simulate(a, b, n=10000, rules=None, seed=None, max_rounds=100):
+    """
+    Simulates n battles of a against b
+
+    Args:
+        a (dict): Side "a" combatant (the player in button battles)
+        b (dict): Side "b" combatant
+        n (int): Number of battles
+        rules (dict): Scaled rule set, defaults to SCALED_RULES
+        seed (int): Seed to replay, or None for a fresh one
+        max_rounds (int): Rounds after which a battle counts as a draw
+
+    Returns:
+        dict: Win/loss/draw rates, turn stats, damage stats and the seed
+    """
+    if np is None:
+        raise RuntimeError("The battle simulator needs NumPy")
+
+    rules = dict(SCALED_RULES if rules is None else rules)
+    if rules["damage"] != "scaled":
+        raise ValueError("The simulator only supports the scaled (button battle) rules")
+
+    rng, seed = get_provider().numpy_stream(seed)
+    sides = {"a": a, "b": b}
+
+    # The matchup is fixed, so the element multipliers are too
+    elements = rules["elements"]
+    multipliers = {
+        "a": elements.multiplier_by_id(a["element_id"], b["element_id"]) if elements else 1.0,
+        "b": elements.multiplier_by_id(b["element_id"], a["element_id"]) if elements else 1.0
+    }
+
+    hp = {side: np.full(n, combatant["hp"], dtype=np.int64) for side, combatant in sides.items()}
+    mp = {side: np.full(n, combatant["mp"], dtype=np.int64) for side, combatant in sides.items()}
+    dealt = {side: np.zeros(n, dtype=np.int64) for side in sides}
+    hits = {side: [] for side in sides}
+    turns = np.zeros(n, dtype=np.int64)
+    active = np.ones(n, dtype=bool)
+
+    for _ in range(max_rounds):
+        if not active.any():
+            break
+        turns[active] += 1
+
+        for side, other in (("a", "b"), ("b", "a")):
+            actor = sides[side]
+            target = sides[other]
+
+            # Only battles where both sides are still standing act
+            acting = np.flatnonzero(active)
+            if len(acting) == 0:
+                break
+
+            # The engine's battle AI: skill when affordable, with skill_chance (more below 40% HP)
+            chance = np.where(hp[side][acting] < actor["max_hp"] * 0.4, actor["low_hp_skill_chance"], actor["skill_chance"])
+            can_skill = mp[side][acting] >= actor["skill_cost"] if actor["skill"] else np.zeros(len(acting), dtype=bool)
+            use_skill = can_skill & (rng.random(len(acting)) < chance)
+
+            damage, _ = scaled_damage_array(
+                actor["attack"], target["defense"], actor["crit_rate"], multipliers[side], use_skill, rng
+            )
+            if rules["skill_bonus"] != 1.0:
+                damage = np.where(use_skill, np.floor(damage * rules["skill_bonus"]).astype(np.int64), damage)
+
+            mp[side][acting] -= np.where(use_skill, actor["skill_cost"], 0)
+            landed = np.minimum(damage, hp[other][acting])
+            hp[other][acting] -= landed
+            dealt[side][acting] += landed
+            hits[side].append(damage)
+
+            active[acting[hp[other][acting] <= 0]] = False
+
+        # Per-round MP regen (dungeon rules)
+        if rules["round_mp_regen"]:
+            for side, combatant in sides.items():
+                mp[side][active] = np.minimum(combatant["max_mp"], mp[side][active] + rules["round_mp_regen"])
+
+    a_wins = int((hp["b"] <= 0).sum())
+    b_wins = int((hp["a"] <= 0).sum())
+    draws = n - a_wins - b_wins
+
+    result = {
+        "battles": n,
+        "seed": seed,
+        "win_rate": a_wins / n,
+        "loss_rate": b_wins / n,
+        "draw_rate": draws / n,
+        "turns": _summary(turns),
+        "damage": {
+            side: {
+                "per_hit": _summary(np.concatenate(hits[side]) if hits[side] else np.zeros(0, dtype=np.int64)),
+                "per_battle": _summary(dealt[side])
+            }
+            for side in sides
+        }
+    }
+
+    logger.debug(f"Simulated {n} battles {a['name']} vs {b['name']}: win rate {result['win_rate']:.3f} seed={seed}")
+    return result
+
+def simulate_all_pairs(cards, n=1000, level=1, rules=None, seed=None):
+    """
+    Simulates every ordered pair of cards
+
+    Args:
+        cards (list): Card dicts
+        n (int): Battles per pair
+        level (int): Level every card is played at
+        rules (dict): Scaled rule set, defaults to SCALED_RULES
+        seed (int): Root seed to replay, or None for a fresh one
+
+    Returns:
+        tuple: (win rate matrix where [i][j] is card i's win rate against card j, root seed)
+    """
+    if np is None:
+        raise RuntimeError("The battle simulator needs NumPy")
+
+    combatants = [card_combatant(card, level) for card in cards]
+    streams, seed = get_provider().spawn(len(cards) * len(cards), seed)
+    win_rates = np.zeros((len(cards), len(cards)))
+
+    for i, a in enumerate(combatants):
+        for j, b in enumerate(combatants):
+            if i == j:
+                win_rates[i, j] = 0.5
+                continue
+            result = simulate(dict(a), dict(b), n, rules, seed=streams[i * len(cards) + j].seed_value)
+            win_rates[i, j] = result["win_rate"]
+
+    return win_rates, seed
+
+async def simulate_vs_level(battle_cog, card, enemy_level, n=10000, card_level=None, enemy_samples=20, seed=None):
+    """
+    Simulates a card against BattleSystem.generate_enemy output
+
+    Args:
+        battle_cog (BattleSystem): The battle cog (for enemies and their stats)
+        card (dict): The player's card
+        enemy_level (int): Level passed to generate_enemy
+        n (int): Total number of battles, split across the sampled enemies
+        card_level (int): Card level, defaults to enemy_level
+        enemy_samples (int): How many enemies to generate
+        seed (int): Root seed to replay, or None for a fresh one
+
+    Returns:
+        dict: Aggregate win/loss/draw rates and turns, plus per-enemy results
+    """
+    player = card_combatant(card, card_level or enemy_level)
+    streams, seed = get_provider().spawn(enemy_samples, seed)
+    per_battle = max(1, n // enemy_samples)
+    results = []
+
+    for stream in streams:
+        enemy = await battle_cog.generate_enemy(enemy_level)
+        engine = battle_cog.make_battle_engine(
+            player["name"], card, player["hp"], player["max_hp"], player["mp"], player["max_mp"], enemy
+        )
+        result = simulate(player, engine.combatants["b"], per_battle, engine.rules, seed=stream.seed_value)
+        result["enemy"] = enemy["name"]
+        results.append(result)
+
+    total = per_battle * len(results)
+    return {
+        "battles": total,
+        "seed": seed,
+        "win_rate": sum(r["win_rate"] * r["battles"] for r in results) / total,
+        "loss_rate": sum(r["loss_rate"] * r["battles"] for r in results) / total,
+        "draw_rate": sum(r["draw_rate"] * r["battles"] for r in results) / total,
+        "mean_turns": sum(r["turns"]["mean"] * r["battles"] for r in results) / total,
+        "enemies": results
+    }
@@ -0,0 +1,86 @@
+"""
+Text for auto-battle turns (battles, PvP, bosses).
+Turns the events from utils.battle_engine into the "Last Action" lines the
+battle embeds show. Nothing here affects the outcome of a battle.
+"""
+
+import random
+
+BATTLE_EFFECTS = ["Bonked", "Whacked", "Booped", "Thwacked", "Slammed", "Pummeled"]
+
+STATUS_TEXT = {
+    "burning": "🔥 {} burning!",
+    "stunned": "⚡ {} stunned!",
+    "poisoned": "☠️ {} poisoned!"
+}
+
+STAT_NAMES = {
+    "attack": "ATK",
+    "defense": "DEF",
+    "speed": "SPD",
+    "crit_rate": "Crit",
+    "dodge_rate": "Dodge"
+}
+
+def describe_turn(events, engine, targets=None):
+    """
+    Builds the "Last Action" text for one turn
+
+    Args:
+        events (list): Events from BattleEngine.step()
+        engine (BattleEngine): The engine, for combatant names
+        targets (dict): How each side's target is called, e.g. {"a": "Boss is", "b": "You are"}
+
+    Returns:
+        tuple: (action_text, damage_text)
+    """
+    targets = targets or {"a": "Enemy is", "b": "Enemy is"}
+    action_text = ""
+    damage_text = ""
+
+    for event in events:
+        side = event.get("side")
+
+        if event["type"] == "stunned":
+            action_text = f"**{engine.combatants[side]['name']}** is stunned!"
+            damage_text = "Cannot attack this turn!"
+
+        elif event["type"] in ("attack", "skill"):
+            target = targets[side]
+            if event["type"] == "skill":
+                action_text = f"**{engine.combatants[side]['name']}** used **{event['skill']}**!"
+            else:
+                action_text = f"**{engine.combatants[side]['name']}** attacked!"
+
+            if event["dodged"]:
+                damage_text = f"😎 {target.rsplit(' ', 1)[0]} dodged the attack!"
+                continue
+            elif event["type"] == "skill" and event["heal"]:
+                damage_text = f"💖 Healed `+{event['heal']}` HP!"
+            elif event["type"] == "skill" and not event["damage"]:
+                damage_text = "✨ Support skill!"
+            elif event["critical"]:
+                damage_text = f"💥 Critical Hit! `-{event['damage']}`!"
+            elif event["type"] == "skill":
+                damage_text = f"Dealt `-{event['damage']}`!"
+            else:
+                damage_text = f"{random.choice(BATTLE_EFFECTS)} for `-{event['damage']}`!"
+
+            # Status effect text
+            if event.get("status"):
+                damage_text += " " + STATUS_TEXT[event["status"]].format(target)
+
+            # Stat changes, e.g. "📈 ATK x1.3"
+            for bearer, stat, change in event.get("modifiers", ()):
+                damage_text += f" {'📈' if change > 1 else '📉'} {engine.combatants[bearer]['name']} {STAT_NAMES[stat]} x{change:g}"
+
+            # Element effectiveness text
+            if event["element_multiplier"] > 1:
+                damage_text += f" (Element effective! x{event['element_multiplier']})"
+            elif event["element_multiplier"] < 1:
+                damage_text += f" (Element ineffective! x{event['element_multiplier']})"
+
+        elif event["type"] == "status_tick" and event["status"] == "poisoned":
+            damage_text += f" (☠️ -{event['damage']} poison damage)"
+
+    return action_text, damage_text
@@ -0,0 +1,186 @@
+"""
+Persistent item boosts.
+Active boosts are stored in the active_boosts table so they survive
+restarts, and mirrored in memory: a per-player dict answers is_active() and
+multiplier() in O(1) on every reward, and a min-heap of expiry times lets a
+single background task remove each boost (from memory and the table) right
+when it runs out instead of whenever someone happens to look at it.
+"""
+
+import time
+import heapq
+import asyncio
+import logging
+
+logger = logging.getLogger('bot.boosts')
+
+# Boost kind (the boost item's effect) -> reward multiplier while active
+BOOST_MULTIPLIERS = {
+    "exp": 1.5,  # +50% EXP
+    "gold": 1.5  # +50% gold
+}
+
+class BoostRegistry:
+    """Active boosts by player, with an expiry heap drained in the background."""
+
+    def __init__(self):
+        self.aio = None
+        self.active = {}  # user_id -> {kind: expires_at}
+        self.heap = []  # (expires_at, user_id, kind); stale entries are skipped when popped
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    async def load(self, db):
+        """
+        Loads the unexpired boosts from the database
+
+        Args:
+            db (Database): Database with its async layer
+        """
+        self.aio = db.aio
+        now = int(time.time())
+
+        await self.aio.execute("DELETE FROM active_boosts WHERE expires_at <= ?", (now,))
+        rows = await self.aio.fetchall("SELECT user_id, kind, expires_at FROM active_boosts")
+
+        self.active = {}
+        for user_id, kind, expires_at in rows:
+            self.active.setdefault(user_id, {})[kind] = expires_at
+        self.heap = [(expires_at, user_id, kind) for user_id, kind, expires_at in rows]
+        heapq.heapify(self.heap)
+
+        logger.info(f"Loaded {len(rows)} active boosts")
+
+    async def activate(self, user_id, kind, duration):
+        """
+        Starts (or restarts) a boost
+
+        Args:
+            user_id (int): Discord user ID
+            kind (str): Boost kind, e.g. "exp" or "gold"
+            duration (int): Seconds the boost lasts
+
+        Returns:
+            int: Unix time the boost expires at
+        """
+        expires_at = int(time.time()) + duration
+
+        await self.aio.execute("""
+            INSERT INTO active_boosts (user_id, kind, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT (user_id, kind) DO UPDATE SET expires_at = excluded.expires_at
+        """, (user_id, kind, expires_at))
+
+        self.active.setdefault(user_id, {})[kind] = expires_at
+        heapq.heappush(self.heap, (expires_at, user_id, kind))
+
+        # Let the expiry task re-plan if this is now the first boost to run out
+        if self.heap[0][0] == expires_at:
+            self._wakeup.set()
+        return expires_at
+
+    def expires_at(self, user_id, kind):
+        """Returns when a player's boost expires, or None if it isn't active."""
+        expires_at = self.active.get(user_id, {}).get(kind)
+        if expires_at is None or expires_at <= time.time():
+            # Expired but not drained yet counts as inactive
+            return None
+        return expires_at
+
+    def is_active(self, user_id, kind):
+        """
+        Checks for an active boost in O(1)
+
+        Args:
+            user_id (int): Discord user ID
+            kind (str): Boost kind
+
+        Returns:
+            bool: True if the boost is active
+        """
+        return self.expires_at(user_id, kind) is not None
+
+    def remaining(self, user_id, kind):
+        """Returns the seconds left on a player's boost, 0 if it isn't active."""
+        expires_at = self.expires_at(user_id, kind)
+        return max(0, int(expires_at - time.time())) if expires_at is not None else 0
+
+    def multiplier(self, user_id, kind):
+        """
+        Gets the reward multiplier a player's boosts give
+
+        Args:
+            user_id (int): Discord user ID
+            kind (str): Boost kind
+
+        Returns:
+            float: The boost's multiplier, 1.0 without one
+        """
+        if user_id is None or not self.is_active(user_id, kind):
+            return 1.0
+        return BOOST_MULTIPLIERS.get(kind, 1.0)
+
+    def user_boosts(self, user_id):
+        """Returns a player's active boosts as {kind: expires_at}."""
+        now = time.time()
+        return {kind: expires_at for kind, expires_at in self.active.get(user_id, {}).items() if expires_at > now}
+
+    def _pop_expired(self, now):
+        expired = []
+        while self.heap and self.heap[0][0] <= now:
+            expires_at, user_id, kind = heapq.heappop(self.heap)
+
+            # Skip entries for boosts that were restarted since
+            boosts = self.active.get(user_id)
+            if not boosts or boosts.get(kind) != expires_at:
+                continue
+
+            del boosts[kind]
+            if not boosts:
+                del self.active[user_id]
+            expired.append((user_id, kind, expires_at))
+        return expired
+
+    def start(self):
+        """Starts the expiry task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._expiry_loop())
+
+    async def close(self):
+        """Stops the expiry task."""
+        if self._task is None:
+            return
+
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _expiry_loop(self):
+        while True:
+            self._wakeup.clear()
+            timeout = self.heap[0][0] - time.time() if self.heap else None
+
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            expired = self._pop_expired(time.time())
+            if not expired:
+                continue
+
+            try:
+                # Only delete rows that weren't restarted in the meantime
+                await self.aio.executemany(
+                    "DELETE FROM active_boosts WHERE user_id = ? AND kind = ? AND expires_at = ?", expired
+                )
+                logger.debug(f"Expired {len(expired)} boosts")
+            except Exception as e:
+                logger.error(f"Could not delete expired boosts: {e}")
+
+# The registry every cog and reward path shares
+BOOSTS = BoostRegistry()
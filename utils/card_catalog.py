@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import random
+import time
+
+from database.database import CATALOG_TABLES
+
+logger = logging.getLogger('bot.card_catalog')
+
+class CardCatalog:
+    """In-memory index of the card and material pools.
+
+    The catalog is effectively static, so it is loaded once and bucketed by
+    rarity, by series and by (rarity, series). Random picks are then O(1)
+    lookups into those buckets instead of ORDER BY RANDOM() table sorts.
+
+    Writers bump the catalog_versions table (through triggers, see
+    Database.ensure_catalog_triggers), which refresh_if_stale() polls so the
+    catalog reloads even when a separate init script changes the table.
+    In-process seeders can call invalidate() to force the next refresh.
+    """
+
+    def __init__(self, db, check_interval=30):
+        self.aio = db.aio
+        self.check_interval = check_interval
+
+        self.cards = []
+        self.cards_by_id = {}
+        self.by_rarity = {}
+        self.by_series = {}
+        self.by_rarity_series = {}
+        self.materials = []
+        self.materials_by_rarity = {}
+
+        self.versions = None
+        self._checked_at = 0
+        self._stale = True
+        self._reload_lock = asyncio.Lock()
+
+    async def load(self):
+        """(Re)load every pool from the database."""
+        versions = await self._read_versions()
+
+        try:
+            cards = await self.aio.fetchall("SELECT * FROM api_cards ORDER BY id", as_dict=True)
+        except Exception as e:
+            # Table is created by the web app / init scripts and may not exist yet
+            logger.warning(f"Could not load api_cards into the catalog: {e}")
+            cards = []
+
+        materials = await self.aio.fetchall("""
+            SELECT id, name, description, rarity
+            FROM materials
+            ORDER BY id
+        """, as_dict=True)
+
+        # Build the buckets off to the side, then swap them in at once
+        by_rarity = {}
+        by_series = {}
+        by_rarity_series = {}
+
+        for card in cards:
+            rarity = card.get("rarity")
+            series = card.get("anime_series")
+            by_rarity.setdefault(rarity, []).append(card)
+            by_series.setdefault(series, []).append(card)
+            by_rarity_series.setdefault((rarity, series), []).append(card)
+
+        materials_by_rarity = {}
+        for material in materials:
+            materials_by_rarity.setdefault(material["rarity"], []).append(material)
+
+        self.cards = cards
+        self.cards_by_id = {card["id"]: card for card in cards}
+        self.by_rarity = by_rarity
+        self.by_series = by_series
+        self.by_rarity_series = by_rarity_series
+        self.materials = materials
+        self.materials_by_rarity = materials_by_rarity
+
+        self.versions = versions
+        self._checked_at = time.monotonic()
+        self._stale = False
+
+        logger.info(f"Card catalog loaded: {len(cards)} cards in {len(by_series)} series, {len(materials)} materials")
+
+    def invalidate(self):
+        """Mark the catalog stale so the next refresh_if_stale() reloads it."""
+        self._stale = True
+
+    async def refresh_if_stale(self):
+        """Reload if invalidated or if the stored catalog versions moved.
+
+        The version check is a handful of primary key lookups and runs at most
+        once every check_interval seconds.
+        """
+        if not self._stale:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return
+
+            self._checked_at = time.monotonic()
+            if await self._read_versions() == self.versions:
+                return
+
+        async with self._reload_lock:
+            # Someone else may have reloaded while we waited
+            if self._stale or await self._read_versions() != self.versions:
+                await self.load()
+
+    async def _read_versions(self):
+        try:
+            # Only the tables the catalog loads (older databases also track cards)
+            placeholders = ", ".join("?" * len(CATALOG_TABLES))
+            rows = await self.aio.fetchall(
+                f"SELECT name, version FROM catalog_versions WHERE name IN ({placeholders})", tuple(CATALOG_TABLES)
+            )
+        except Exception:
+            return None
+        return dict(rows)
+
+    def random_card(self, rarities=None, series=None, rng=None):
+        """Pick a random card.
+
+        Args:
+            rarities (str or list): Rarity or rarities to pick from, None for any
+            series (str): Anime series to restrict to, None for any
+            rng: Random source with randrange(), defaults to the random module
+
+        Returns:
+            dict: A copy of the card row, or None if no card matches
+        """
+        if isinstance(rarities, str):
+            rarities = [rarities]
+
+        if rarities is None and series is None:
+            buckets = [self.cards]
+        elif rarities is None:
+            buckets = [self.by_series.get(series, [])]
+        elif series is None:
+            buckets = [self.by_rarity.get(rarity, []) for rarity in rarities]
+        else:
+            buckets = [self.by_rarity_series.get((rarity, series), []) for rarity in rarities]
+
+        card = _pick(buckets, rng or random)
+        return dict(card) if card else None
+
+    def random_material(self, rarities=None, rng=None):
+        """Pick a random material.
+
+        Args:
+            rarities (str or list): Rarity or rarities to pick from, None for any
+            rng: Random source with randrange(), defaults to the random module
+
+        Returns:
+            dict: A copy of the material row, or None if no material matches
+        """
+        if isinstance(rarities, str):
+            rarities = [rarities]
+
+        if rarities is None:
+            buckets = [self.materials]
+        else:
+            buckets = [self.materials_by_rarity.get(rarity, []) for rarity in rarities]
+
+        material = _pick(buckets, rng or random)
+        return dict(material) if material else None
+
+    def get_card(self, card_id):
+        """Look up a card by ID (returns a copy, or None)."""
+        card = self.cards_by_id.get(card_id)
+        return dict(card) if card else None
+
+def _pick(buckets, rng):
+    """Uniform pick over the union of several buckets."""
+    total = sum(len(bucket) for bucket in buckets)
+    if total == 0:
+        return None
+
+    index = rng.randrange(total)
+    for bucket in buckets:
+        if index < len(bucket):
+            return bucket[index]
+        index -= len(bucket)
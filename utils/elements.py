@@ -0,0 +1,144 @@
+"""
+Element registry shared by all combat code.
+Element names are interned to small ints once, and the effectiveness chart
+is compiled into a dense multiplier matrix, so a damage roll looks up its
+multiplier with two list indexes instead of building and searching a chart.
+A NumPy copy of the matrix serves the vectorized simulation paths.
+"""
+
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # Only the array lookups need NumPy
+    np = None
+
+logger = logging.getLogger('bot.elements')
+
+# Damage multiplier of an attacking element (outer key) against a defending one;
+# unlisted pairs are neutral
+ELEMENT_CHART = {
+    "Fire": {"Water": 0.5, "Ice": 2.0, "Earth": 0.7, "Air": 1.2},
+    "Water": {"Fire": 2.0, "Electric": 0.5, "Earth": 1.2, "Ice": 0.7},
+    "Earth": {"Air": 0.5, "Fire": 1.2, "Electric": 2.0, "Water": 0.7},
+    "Air": {"Earth": 2.0, "Electric": 0.7, "Ice": 0.5, "Fire": 0.7},
+    "Electric": {"Water": 2.0, "Air": 1.2, "Earth": 0.5, "Ice": 0.7},
+    "Ice": {"Fire": 0.5, "Water": 1.2, "Air": 2.0, "Earth": 0.7},
+    "Light": {"Dark": 2.0, "Cute": 0.7, "Star": 0.5},
+    "Dark": {"Light": 0.5, "Sweet": 0.7, "Star": 2.0},
+    "Cute": {"Light": 1.2, "Dark": 0.7, "Sweet": 2.0},
+    "Sweet": {"Cute": 0.5, "Dark": 1.2, "Light": 0.7},
+    "Star": {"Light": 1.5, "Dark": 0.5, "Cute": 1.2, "Sweet": 1.2}
+}
+
+# Alternative names some card sets use for the same element
+ELEMENT_ALIASES = {
+    "Wind": "Air",  # For Naruto characters
+    "Lightning": "Electric"  # For Naruto characters
+}
+
+# Unknown elements (and "Normal") share the neutral ID
+NEUTRAL = 0
+
+class ElementRegistry:
+    """Interned element IDs and their precomputed multiplier matrix."""
+
+    def __init__(self, chart, aliases=None):
+        """
+        Compiles the chart
+
+        Args:
+            chart (dict): {attacker: {defender: multiplier}}
+            aliases (dict): {alternative name: element name}
+        """
+        names = ["Normal"]
+        for attacker, row in chart.items():
+            for name in [attacker, *row]:
+                if name not in names:
+                    names.append(name)
+
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        for alias, name in (aliases or {}).items():
+            self.ids[alias] = self.ids[name]
+
+        size = len(names)
+        self.matrix = [[1.0] * size for _ in range(size)]
+        for attacker, row in chart.items():
+            for defender, multiplier in row.items():
+                self.matrix[self.ids[attacker]][self.ids[defender]] = multiplier
+
+        self.array = np.array(self.matrix) if np is not None else None
+
+    def intern(self, name):
+        """
+        Looks up an element's ID
+
+        Args:
+            name (str): Element name (any case), alias or None
+
+        Returns:
+            int: The element ID, NEUTRAL if unknown
+        """
+        element_id = self.ids.get(name)
+        if element_id is None and name:
+            element_id = self.ids.get(name.strip().capitalize())
+        return NEUTRAL if element_id is None else element_id
+
+    def multiplier(self, attacker_element, defender_element):
+        """
+        Looks up the multiplier for two element names
+
+        Args:
+            attacker_element (str): The element of the attacker
+            defender_element (str): The element of the defender
+
+        Returns:
+            float: Damage multiplier
+        """
+        return self.matrix[self.intern(attacker_element)][self.intern(defender_element)]
+
+    def multiplier_by_id(self, attacker_id, defender_id):
+        """Looks up the multiplier for two interned element IDs."""
+        return self.matrix[attacker_id][defender_id]
+
+    def multipliers(self, attacker_ids, defender_ids):
+        """
+        Looks up multipliers for whole arrays of element IDs
+
+        Args:
+            attacker_ids (numpy.ndarray): Attacker element IDs
+            defender_ids (numpy.ndarray): Defender element IDs
+
+        Returns:
+            numpy.ndarray: Damage multipliers
+        """
+        if self.array is None:
+            raise RuntimeError("NumPy is not installed")
+        return self.array[attacker_ids, defender_ids]
+
+    def strong_against(self, element):
+        """Returns the elements this element deals extra damage to."""
+        row = self.matrix[self.intern(element)]
+        return [name for i, name in enumerate(self.names) if row[i] > 1.0]
+
+    def weak_against(self, element):
+        """Returns the elements this element deals reduced damage to."""
+        row = self.matrix[self.intern(element)]
+        return [name for i, name in enumerate(self.names) if row[i] < 1.0]
+
+# The registry every combat path uses
+ELEMENTS = ElementRegistry(ELEMENT_CHART, ELEMENT_ALIASES)
+
+def element_multiplier(attacker_element, defender_element):
+    """
+    Calculates the element effectiveness multiplier
+
+    Args:
+        attacker_element (str): The element of the attacker
+        defender_element (str): The element of the defender
+
+    Returns:
+        float: Damage multiplier based on element effectiveness
+    """
+    return ELEMENTS.multiplier(attacker_element, defender_element)
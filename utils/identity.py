@@ -0,0 +1,132 @@
+"""
+Player identity.
+Cogs written against players key a player by Discord ID (players.user_id),
+while the card, material and dungeon tables key them by api_players.id.
+This maps one to the other through an in-process LRU, so a command
+resolves its player once (usually from memory) and passes the internal ID
+to its helpers instead of each helper repeating
+`SELECT id FROM api_players WHERE discord_id = ?`.
+
+The two tables are kept in step by Database.reconcile_players at startup
+and by register() whenever a profile is created. A player's internal ID
+never changes once assigned, so cached entries never go stale.
+"""
+
+import logging
+from collections import OrderedDict
+
+from database.database import MIRRORED_COLUMNS
+
+logger = logging.getLogger('bot.identity')
+
+# New api_players row for a Discord ID, copying the shared columns from its players row if there is one
+REGISTER_SQL = f"""
+    INSERT OR IGNORE INTO api_players (discord_id, username, gold, diamonds, {", ".join(MIRRORED_COLUMNS)})
+    SELECT ?, ?, 1000, 0, {", ".join(f"COALESCE(p.{column}, {default})" for column, default in MIRRORED_COLUMNS.items())}
+    FROM (SELECT 1) LEFT JOIN players p ON p.user_id = ?
+"""
+
+class PlayerIdentity:
+    """Discord ID -> api_players.id, least recently used entries dropped first."""
+
+    def __init__(self, max_items=10000):
+        """
+        Sets up an empty map
+
+        Args:
+            max_items (int): Players remembered before the least recently used are dropped
+        """
+        self.max_items = max_items
+        self.ids = OrderedDict()  # discord_id -> api_players.id
+        self.aio = None
+        self.cursor = None
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, db):
+        """
+        Attaches the map to the database
+
+        Args:
+            db (Database): Database with its async layer
+        """
+        self.aio = db.aio
+        self.cursor = db.conn.cursor()
+
+    def cached(self, discord_id):
+        """Returns a player's internal ID if it's in memory, else None."""
+        player_id = self.ids.get(discord_id)
+        if player_id is not None:
+            self.ids.move_to_end(discord_id)
+            self.hits += 1
+        return player_id
+
+    def remember(self, discord_id, player_id):
+        """Adds a known mapping (e.g. read along with other columns)."""
+        if player_id is None:
+            return
+        self.ids[discord_id] = player_id
+        self.ids.move_to_end(discord_id)
+        while len(self.ids) > self.max_items:
+            self.ids.popitem(last=False)
+
+    async def player_id(self, discord_id):
+        """
+        Resolves a player's internal ID
+
+        Args:
+            discord_id (int): Discord user ID
+
+        Returns:
+            int: api_players.id, or None if the player has no profile
+        """
+        player_id = self.cached(discord_id)
+        if player_id is None:
+            self.misses += 1
+            player_id = await self.aio.fetchval("SELECT id FROM api_players WHERE discord_id = ?", (discord_id,))
+            self.remember(discord_id, player_id)
+        return player_id
+
+    def player_id_sync(self, discord_id):
+        """Like player_id(), for cogs on the sync connection."""
+        player_id = self.cached(discord_id)
+        if player_id is None:
+            self.misses += 1
+            self.cursor.execute("SELECT id FROM api_players WHERE discord_id = ?", (discord_id,))
+            row = self.cursor.fetchone()
+            player_id = row[0] if row else None
+            self.remember(discord_id, player_id)
+        return player_id
+
+    def register(self, cursor, discord_id, username):
+        """
+        Creates a player's api_players row if it's missing (call when a profile is created)
+
+        Runs on the caller's cursor so it commits together with the players row.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the sync connection
+            discord_id (int): Discord user ID
+            username (str): Display name stored with the row
+
+        Returns:
+            int: The player's api_players.id
+        """
+        cursor.execute(REGISTER_SQL, (discord_id, username, discord_id))
+        if cursor.rowcount:
+            logger.info(f"Created api_players row for {discord_id}")
+        cursor.execute("SELECT id FROM api_players WHERE discord_id = ?", (discord_id,))
+        player_id = cursor.fetchone()[0]
+        self.remember(discord_id, player_id)
+        return player_id
+
+    def forget(self, discord_id):
+        """Drops a player from memory (e.g. after their profile was deleted)."""
+        self.ids.pop(discord_id, None)
+
+    def stats(self):
+        """Returns map counters for monitoring."""
+        return {"players": len(self.ids), "hits": self.hits, "misses": self.misses}
+
+# The map every cog shares
+IDENTITY = PlayerIdentity()
@@ -3,21 +3,27 @@ Image generator for battle visuals and card images.
 Creates dynamic HP/MP bars and card battle animations.
 """
 
-from PIL import Image, ImageDraw, ImageFont
-import os
+from PIL import Image, ImageDraw
 import io
 import base64
 import discord
 import asyncio
+from collections import OrderedDict
+
+from utils.assets import ASSETS, CARD_BORDER, CARD_HEADER_HEIGHT, CARD_SIZE, ELEMENT_ICON_SIZE
+from utils.render_cache import RenderCache
 
 class ImageGenerator:
     def __init__(self):
-        # Create static directory if it doesn't exist
-        os.makedirs('static/images/battle', exist_ok=True)
+        # Fonts, frames and icons are shared, loaded once by warm_up
+        self.assets = ASSETS
+        
+        # Rendered cards, keyed by the fields that are drawn
+        self.render_cache = RenderCache('static/images/cards')
         
-        # Initialize fonts
-        self.font_dir = "static/fonts"
-        os.makedirs(self.font_dir, exist_ok=True)
+        # Static battle layers, one per matchup in progress
+        self.scenes = OrderedDict()
+        self.max_scenes = 64
         
         # Default sizes
         self.bar_width = 300
@@ -31,6 +37,15 @@ class ImageGenerator:
         self.mp_bg_color = (40, 40, 40)  # Dark gray
         self.text_color = (255, 255, 255)  # White
         
+        # Bar fills for every percentage step, keyed by (is_hp, percent)
+        self.bar_sprites = {}
+        
+    def warm_up(self):
+        """Load assets, PIL codecs and bar sprites up front, so the first real render isn't slow."""
+        self.assets.load()
+        self.build_bar_sprites()
+        self.render_resource_bar_png(1, 1)
+        
     def generate_resource_bar(self, current, maximum, is_hp=True, save_path=None):
         """
         Generate an HP or MP bar image
@@ -44,72 +59,34 @@ class ImageGenerator:
         Returns:
             discord.File: Discord file object containing the image
         """
-        # Create a new image
-        img = Image.new('RGBA', (self.bar_width, self.bar_height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
-        
-        # Calculate fill width
-        fill_ratio = max(0, min(1, current / maximum))
-        fill_width = int((self.bar_width - 2 * self.padding) * fill_ratio)
+        data = self.render_resource_bar_png(current, maximum, is_hp)
         
-        # Colors based on bar type
-        if is_hp:
-            fill_color = self.hp_color
-            bg_color = self.hp_bg_color
-            label = "HP"
-        else:
-            fill_color = self.mp_color
-            bg_color = self.mp_bg_color
-            label = "MP"
-        
-        # Draw background
-        draw.rectangle(
-            [(self.padding, self.padding), 
-             (self.bar_width - self.padding, self.bar_height - self.padding)],
-            fill=bg_color,
-            outline=(255, 255, 255)
-        )
+        # Save the image if path provided
+        if save_path:
+            with open(save_path, "wb") as f:
+                f.write(data)
         
-        # Draw filled portion
-        if fill_width > 0:
-            draw.rectangle(
-                [(self.padding + 2, self.padding + 2), 
-                 (self.padding + fill_width, self.bar_height - self.padding - 2)],
-                fill=fill_color
-            )
+        # Create a Discord file
+        label = "hp" if is_hp else "mp"
+        return discord.File(io.BytesIO(data), filename=f"{label}_bar.png")
+    
+    def render_resource_bar_png(self, current, maximum, is_hp=True):
+        """
+        Draw an HP or MP bar and encode it as PNG
         
-        # Try to add text using a basic font
-        try:
-            # Create a default font
-            font = ImageFont.load_default()
-            
-            # Draw text
-            text = f"{label}: {current}/{maximum}"
-            
-            # Calculate text size and position
-            text_width = draw.textlength(text, font)
-            text_x = (self.bar_width - text_width) // 2
-            text_y = (self.bar_height - font.size) // 2
-            
-            # Draw text with outline
-            for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-                draw.text((text_x + dx, text_y + dy), text, fill=(0, 0, 0), font=font)
-            draw.text((text_x, text_y), text, fill=self.text_color, font=font)
+        Args:
+            current (int): Current value
+            maximum (int): Maximum value
+            is_hp (bool): True for HP bar, False for MP bar
             
-        except Exception as e:
-            print(f"Error adding text to bar: {e}")
-        
-        # Save the image if path provided
-        if save_path:
-            img.save(save_path, format="PNG")
+        Returns:
+            bytes: The PNG image
+        """
+        img = self.generate_resource_bar_image(current, maximum, is_hp)
         
-        # Convert to bytes for Discord
         buffer = io.BytesIO()
         img.save(buffer, format="PNG")
-        buffer.seek(0)
-        
-        # Create a Discord file
-        return discord.File(buffer, filename=f"{label.lower()}_bar.png")
+        return buffer.getvalue()
     
     def generate_battle_scene(self, player_card, enemy_card, player_hp, player_max_hp, 
                              player_mp, player_max_mp, enemy_hp, enemy_max_hp, 
@@ -129,103 +106,89 @@ class ImageGenerator:
         Returns:
             discord.File: Discord file object containing the scene
         """
-        # Create a new image (landscape orientation)
-        width, height = 800, 400
-        img = Image.new('RGBA', (width, height), (20, 20, 30, 255))
-        draw = ImageDraw.Draw(img)
-        
-        # Draw background (simple gradient)
-        for y in range(height):
-            # Create a simple gradient background
-            color = (20, 20, 30 + int(y * 40 / height))
-            draw.line([(0, y), (width, y)], fill=color)
-        
-        # Draw dividing line
-        draw.line([(width // 2, 0), (width // 2, height)], fill=(100, 100, 100), width=2)
-        
-        # Generate HP/MP bars for player
-        player_hp_bar = self.generate_resource_bar_image(player_hp, player_max_hp, True)
-        player_mp_bar = self.generate_resource_bar_image(player_mp, player_max_mp, False)
-        
-        # Generate HP/MP bars for enemy
-        enemy_hp_bar = self.generate_resource_bar_image(enemy_hp, enemy_max_hp, True)
-        enemy_mp_bar = self.generate_resource_bar_image(enemy_mp, enemy_max_mp, False)
-        
-        # Calculate positions (player on left, enemy on right)
-        player_section_width = width // 2
-        enemy_section_width = width // 2
+        data = self.render_battle_scene_png(player_card, enemy_card, player_hp, player_max_hp,
+                                            player_mp, player_max_mp, enemy_hp, enemy_max_hp,
+                                            enemy_mp, enemy_max_mp)
         
-        # Player area (left side)
-        player_area_top = 50  # Leave space for labels
-        player_area_left = 50
+        # Save the image if path provided
+        if save_path:
+            with open(save_path, "wb") as f:
+                f.write(data)
         
-        # Enemy area (right side)
-        enemy_area_top = 50
-        enemy_area_left = width // 2 + 50
+        # Create a Discord file
+        return discord.File(io.BytesIO(data), filename="battle_scene.png")
+    
+    def render_battle_scene_png(self, player_card, enemy_card, player_hp, player_max_hp,
+                                player_mp, player_max_mp, enemy_hp, enemy_max_hp,
+                                enemy_mp, enemy_max_mp):
+        """
+        Draw a battle scene and encode it as PNG
         
-        # Add player information
-        try:
-            font = ImageFont.load_default()
-            
-            # Player name and card
-            player_text = f"{player_card['name']} (Lv.{player_card['level']} {player_card['rarity']})"
-            draw.text((player_area_left, 20), player_text, fill=(255, 255, 255), font=font)
-            
-            # Enemy name and level
-            enemy_text = f"{enemy_card['name']} (Lv.{enemy_card['level']} {enemy_card['rarity']})"
-            draw.text((enemy_area_left, 20), enemy_text, fill=(255, 255, 255), font=font)
-            
-            # Player stats
-            stats_text = f"ATK: {player_card['attack']} | DEF: {player_card['defense']} | SPD: {player_card['speed']}"
-            draw.text((player_area_left, player_area_top + 30), stats_text, fill=(220, 220, 220), font=font)
-            
-            # Enemy stats
-            enemy_stats_text = f"ATK: {enemy_card['attack']} | DEF: {enemy_card['defense']} | SPD: {enemy_card['speed']}"
-            draw.text((enemy_area_left, enemy_area_top + 30), enemy_stats_text, fill=(220, 220, 220), font=font)
-            
-            # Add skill info
-            player_skill_text = f"Skill: {player_card['skill']} (MP: {player_card['mp_cost']})"
-            draw.text((player_area_left, player_area_top + 60), player_skill_text, fill=(180, 180, 255), font=font)
-            
-            enemy_skill_text = f"Skill: {enemy_card['skill']} (MP: {enemy_card['mp_cost']})"
-            draw.text((enemy_area_left, enemy_area_top + 60), enemy_skill_text, fill=(180, 180, 255), font=font)
+        Args:
+            Same as generate_battle_scene, without save_path
             
-        except Exception as e:
-            print(f"Error adding text to battle scene: {e}")
-        
-        # Paste player bars
-        img.paste(player_hp_bar, (player_area_left, player_area_top + 90), player_hp_bar)
-        img.paste(player_mp_bar, (player_area_left, player_area_top + 130), player_mp_bar)
-        
-        # Paste enemy bars
-        img.paste(enemy_hp_bar, (enemy_area_left, enemy_area_top + 90), enemy_hp_bar)
-        img.paste(enemy_mp_bar, (enemy_area_left, enemy_area_top + 130), enemy_mp_bar)
-        
-        # Draw character placeholder if no images
-        player_image_area = (player_area_left, player_area_top + 170, 
-                            player_area_left + 200, player_area_top + 370)
-        enemy_image_area = (enemy_area_left, enemy_area_top + 170,
-                           enemy_area_left + 200, enemy_area_top + 370)
+        Returns:
+            bytes: The PNG image
+        """
+        scene = self.battle_scene(player_card, enemy_card)
+        return scene.render_png(player_hp, player_max_hp, player_mp, player_max_mp,
+                                enemy_hp, enemy_max_hp, enemy_mp, enemy_max_mp)
+    
+    def battle_scene(self, player_card, enemy_card):
+        """
+        Get the static layers of a battle, composing them on first use
         
-        # Draw character placeholders
-        draw.rectangle(player_image_area, outline=(200, 200, 200), width=2)
-        draw.rectangle(enemy_image_area, outline=(200, 200, 200), width=2)
+        The background, names, stats, skills and placeholders don't change
+        during a battle, so every turn of the same matchup reuses one scene.
         
-        # Save the image if path provided
-        if save_path:
-            img.save(save_path, format="PNG")
+        Args:
+            player_card (dict): Player card data
+            enemy_card (dict): Enemy card data
+            
+        Returns:
+            BattleScene: The scene for this matchup
+        """
+        fields = {
+            "player": self.battle_scene_fields(player_card),
+            "enemy": self.battle_scene_fields(enemy_card)
+        }
+        key = self.render_cache.key("battle_scene", fields)
+        
+        scene = self.scenes.get(key)
+        if scene is None:
+            scene = BattleScene(self, fields["player"], fields["enemy"])
+            self.scenes[key] = scene
+            while len(self.scenes) > self.max_scenes:
+                self.scenes.popitem(last=False)
+        else:
+            self.scenes.move_to_end(key)
         
-        # Convert to bytes for Discord
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        buffer.seek(0)
+        return scene
+    
+    def battle_scene_fields(self, card):
+        """
+        Pick out the card fields a battle scene draws
         
-        # Create a Discord file
-        return discord.File(buffer, filename="battle_scene.png")
+        Args:
+            card (dict): Card data
+            
+        Returns:
+            dict: Drawn values
+        """
+        return {
+            "name": card['name'],
+            "level": card['level'],
+            "rarity": card['rarity'],
+            "attack": card['attack'],
+            "defense": card['defense'],
+            "speed": card['speed'],
+            "skill": card['skill'],
+            "mp_cost": card['mp_cost']
+        }
     
-    def generate_resource_bar_image(self, current, maximum, is_hp=True):
+    def bar_sprite(self, current, maximum, is_hp=True):
         """
-        Generate an HP or MP bar as PIL Image object for compositing
+        Get the pre-rendered bar (background and fill, no text) for a value
         
         Args:
             current (int): Current value
@@ -233,142 +196,188 @@ class ImageGenerator:
             is_hp (bool): True for HP bar, False for MP bar
             
         Returns:
-            PIL.Image: Image object with the bar
+            PIL.Image: Shared sprite for the nearest percentage step, don't draw on it
         """
-        # Create a new image
-        img = Image.new('RGBA', (self.bar_width, self.bar_height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
+        if not self.bar_sprites:
+            self.build_bar_sprites()
         
-        # Calculate fill width
-        fill_ratio = max(0, min(1, current / maximum))
-        fill_width = int((self.bar_width - 2 * self.padding) * fill_ratio)
+        fill_ratio = max(0, min(1, current / maximum)) if maximum else 0
+        percent = int(fill_ratio * 100)
         
-        # Colors based on bar type
-        if is_hp:
-            fill_color = self.hp_color
-            bg_color = self.hp_bg_color
-            label = "HP"
-        else:
-            fill_color = self.mp_color
-            bg_color = self.mp_bg_color
-            label = "MP"
-        
-        # Draw background
-        draw.rectangle(
-            [(self.padding, self.padding), 
-             (self.bar_width - self.padding, self.bar_height - self.padding)],
-            fill=bg_color,
-            outline=(255, 255, 255)
-        )
+        # Never show an empty bar for a combatant that's still standing
+        if current > 0 and percent == 0:
+            percent = 1
         
-        # Draw filled portion
-        if fill_width > 0:
-            draw.rectangle(
-                [(self.padding + 2, self.padding + 2), 
-                 (self.padding + fill_width, self.bar_height - self.padding - 2)],
-                fill=fill_color
-            )
+        return self.bar_sprites[(is_hp, percent)]
+    
+    def build_bar_sprites(self):
+        """Pre-render the HP and MP bar fills for every percentage step."""
+        for is_hp in (True, False):
+            fill_color = self.hp_color if is_hp else self.mp_color
+            bg_color = self.hp_bg_color if is_hp else self.mp_bg_color
+            
+            for percent in range(101):
+                img = Image.new('RGBA', (self.bar_width, self.bar_height), (0, 0, 0, 0))
+                draw = ImageDraw.Draw(img)
+                fill_width = (self.bar_width - 2 * self.padding) * percent // 100
+                
+                # Draw background
+                draw.rectangle(
+                    [(self.padding, self.padding), 
+                     (self.bar_width - self.padding, self.bar_height - self.padding)],
+                    fill=bg_color,
+                    outline=(255, 255, 255)
+                )
+                
+                # Draw filled portion
+                if fill_width > 0:
+                    draw.rectangle(
+                        [(self.padding + 2, self.padding + 2), 
+                         (self.padding + fill_width, self.bar_height - self.padding - 2)],
+                        fill=fill_color
+                    )
+                
+                self.bar_sprites[(is_hp, percent)] = img
+    
+    def draw_bar_text(self, draw, origin, current, maximum, is_hp=True):
+        """
+        Draw the "HP: x/y" label centered on a bar
         
-        # Try to add text using a basic font
+        Args:
+            draw (ImageDraw): Drawing context of the image holding the bar
+            origin (tuple): Top-left corner of the bar in that image
+            current (int): Current value
+            maximum (int): Maximum value
+            is_hp (bool): True for HP bar, False for MP bar
+        """
         try:
-            # Create a default font
-            font = ImageFont.load_default()
+            font = self.assets.font()
             
             # Draw text
-            text = f"{label}: {current}/{maximum}"
+            text = f"{'HP' if is_hp else 'MP'}: {current}/{maximum}"
             
             # Calculate text size and position
             text_width = draw.textlength(text, font)
-            text_x = (self.bar_width - text_width) // 2
-            text_y = (self.bar_height - font.size) // 2
+            text_x = origin[0] + (self.bar_width - text_width) // 2
+            text_y = origin[1] + (self.bar_height - font.size) // 2
             
-            # Draw text with outline
-            for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-                draw.text((text_x + dx, text_y + dy), text, fill=(0, 0, 0), font=font)
-            draw.text((text_x, text_y), text, fill=self.text_color, font=font)
+            # Draw text with outline (one stroked pass rather than a draw per offset)
+            draw.text((text_x, text_y), text, fill=self.text_color, font=font,
+                      stroke_width=1, stroke_fill=(0, 0, 0))
             
         except Exception as e:
             print(f"Error adding text to bar: {e}")
+    
+    def generate_resource_bar_image(self, current, maximum, is_hp=True):
+        """
+        Generate an HP or MP bar as PIL Image object for compositing
+        
+        Args:
+            current (int): Current value
+            maximum (int): Maximum value
+            is_hp (bool): True for HP bar, False for MP bar
+            
+        Returns:
+            PIL.Image: Image object with the bar
+        """
+        img = self.bar_sprite(current, maximum, is_hp).copy()
+        self.draw_bar_text(ImageDraw.Draw(img), (0, 0), current, maximum, is_hp)
         
         return img
     
-    def generate_card_image(self, card_data, save_path=None):
+    def generate_card_image(self, card_data, save_path=None, artwork=None):
         """
-        Generate a visual card image
+        Generate a visual card image (served from the render cache when the card looks the same)
         
         Args:
             card_data (dict): Card data
             save_path (str, optional): Path to save the image
+            artwork (bytes, optional): Artwork thumbnail from the artwork cache
             
         Returns:
             discord.File: Discord file object containing the card image
         """
-        # Card dimensions
-        width, height = 300, 420
+        fields = self.card_render_fields(card_data, artwork)
+        data = self.render_cache.get_or_render("card", fields, lambda: self.render_card_png(fields, artwork))
         
-        # Create a new image
-        img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
+        # Save the image if path provided
+        if save_path:
+            with open(save_path, "wb") as f:
+                f.write(data)
         
-        # Rarity colors
-        rarity_colors = {
-            "Common": (150, 150, 150),      # Gray
-            "Uncommon": (0, 200, 0),        # Green
-            "Rare": (0, 112, 221),          # Blue
-            "Epic": (163, 53, 238),         # Purple
-            "Legendary": (255, 215, 0)      # Gold
-        }
+        # Create a Discord file
+        return discord.File(io.BytesIO(data), filename=f"card_{card_data.get('id', 'unknown')}.png")
+    
+    def card_render_fields(self, card_data, artwork=None):
+        """
+        Pick out the card fields that are actually drawn (the render cache key)
         
-        # Element colors
-        element_colors = {
-            "Fire": (255, 50, 50),
-            "Water": (50, 150, 255),
-            "Earth": (139, 69, 19),
-            "Air": (200, 200, 200),
-            "Electric": (255, 255, 0),
-            "Ice": (173, 216, 230),
-            "Light": (255, 255, 200),
-            "Dark": (75, 0, 130),
-            "Cute": (255, 182, 193),
-            "Sweet": (255, 105, 180),
-            "Star": (255, 223, 0)
+        Args:
+            card_data (dict): Card data
+            artwork (bytes, optional): Artwork thumbnail that will be drawn, if any
+            
+        Returns:
+            dict: Drawn values, with the defaults the card layout uses
+        """
+        return {
+            "image_url": card_data.get('image_url') if artwork else None,
+            "name": card_data.get('name', 'Unknown Card'),
+            "rarity": card_data.get('rarity', 'Common'),
+            "element": card_data.get('element', 'Earth'),
+            "attack": card_data.get('attack', 0),
+            "defense": card_data.get('defense', 0),
+            "speed": card_data.get('speed', 0),
+            "level": card_data.get('level', 1),
+            "evo_stage": card_data.get('evo_stage', 1),
+            "skill": card_data.get('skill', 'Unknown Skill'),
+            "skill_description": card_data.get('skill_description', 'No description'),
+            "mp_cost": card_data.get('mp_cost', 10),
+            "anime_series": card_data.get('anime_series', '')
         }
+    
+    def render_card_png(self, fields, artwork=None):
+        """
+        Draw a card and encode it as PNG
         
-        # Get colors
-        rarity_color = rarity_colors.get(card_data.get('rarity', 'Common'), (150, 150, 150))
-        element_color = element_colors.get(card_data.get('element', 'Earth'), (139, 69, 19))
-        
-        # Draw card border with rarity color
-        border_width = 5
-        draw.rectangle([(0, 0), (width, height)], fill=(30, 30, 30), outline=rarity_color, width=border_width)
-        
-        # Draw card header
-        header_height = 50
-        draw.rectangle([(border_width, border_width), (width - border_width, header_height)], 
-                      fill=rarity_color)
-        
-        # Draw element symbol in corner
-        element_square_size = 40
-        draw.rectangle(
-            [(width - element_square_size - border_width, border_width), 
-             (width - border_width, element_square_size + border_width)], 
-            fill=element_color
-        )
+        Args:
+            fields (dict): Drawn values from card_render_fields
+            artwork (bytes, optional): Artwork thumbnail (PNG) for the image area
+            
+        Returns:
+            bytes: The PNG image
+        """
+        # Card dimensions
+        width, height = CARD_SIZE
+        border_width = CARD_BORDER
+        header_height = CARD_HEADER_HEIGHT
+        element_square_size = ELEMENT_ICON_SIZE
+        
+        # Start from the preloaded frame (border and header in the rarity color)
+        img = self.assets.frame(fields['rarity']).copy()
+        draw = ImageDraw.Draw(img)
+        
+        # Element symbol in corner
+        img.paste(self.assets.icon(fields['element']), (width - element_square_size - border_width, border_width))
+        
+        # Artwork, centered in the image area
+        if artwork:
+            try:
+                with Image.open(io.BytesIO(artwork)) as art:
+                    art = art.convert('RGBA')
+                    art_left = border_width + (width - 2 * border_width - art.width) // 2
+                    art_top = header_height + 5 + (150 - art.height) // 2
+                    img.paste(art, (art_left, art_top), art)
+            except Exception as e:
+                print(f"Error adding artwork to card: {e}")
         
         # Add card info
         try:
-            font = ImageFont.load_default()
-            big_font_size = 16
+            font = self.assets.font()
             
             # Card name
-            name = card_data.get('name', 'Unknown Card')
+            name = fields['name']
             draw.text((border_width + 5, border_width + 5), name, fill=(255, 255, 255), font=font)
             
-            # Element symbol
-            element = card_data.get('element', 'Earth')
-            draw.text((width - element_square_size - border_width + 5, border_width + 5), 
-                      element[0], fill=(255, 255, 255), font=font)
-            
             # Image area placeholder
             image_area_top = header_height + 5
             image_area_height = 150
@@ -382,26 +391,26 @@ class ImageGenerator:
             stats_top = image_area_top + image_area_height + 10
             
             # Stats
-            attack = card_data.get('attack', 0)
-            defense = card_data.get('defense', 0)
-            speed = card_data.get('speed', 0)
+            attack = fields['attack']
+            defense = fields['defense']
+            speed = fields['speed']
             
             draw.text((border_width + 10, stats_top), f"ATK: {attack}", fill=(255, 100, 100), font=font)
             draw.text((border_width + 10, stats_top + 20), f"DEF: {defense}", fill=(100, 100, 255), font=font)
             draw.text((border_width + 10, stats_top + 40), f"SPD: {speed}", fill=(100, 255, 100), font=font)
             
             # Level
-            level = card_data.get('level', 1)
-            evo_stage = card_data.get('evo_stage', 1)
+            level = fields['level']
+            evo_stage = fields['evo_stage']
             
             level_text = f"Lv.{level} (Evo {evo_stage})"
             draw.text((width - 100, stats_top + 20), level_text, fill=(255, 255, 255), font=font)
             
             # Skill area
             skill_top = stats_top + 70
-            skill_name = card_data.get('skill', 'Unknown Skill')
-            skill_desc = card_data.get('skill_description', 'No description')
-            mp_cost = card_data.get('mp_cost', 10)
+            skill_name = fields['skill']
+            skill_desc = fields['skill_description']
+            mp_cost = fields['mp_cost']
             
             # Add skill box
             draw.rectangle(
@@ -441,7 +450,7 @@ class ImageGenerator:
                 draw.text((border_width + 5, desc_top + y_offset), line, fill=(255, 255, 255), font=font)
             
             # Add anime series
-            anime_series = card_data.get('anime_series', '')
+            anime_series = fields['anime_series']
             if anime_series:
                 draw.text(
                     (border_width + 5, height - border_width - 20), 
@@ -453,17 +462,120 @@ class ImageGenerator:
         except Exception as e:
             print(f"Error adding text to card: {e}")
         
-        # Save the image if path provided
-        if save_path:
-            img.save(save_path, format="PNG")
-        
-        # Convert to bytes for Discord
+        # Convert to bytes
         buffer = io.BytesIO()
         img.save(buffer, format="PNG")
-        buffer.seek(0)
+        return buffer.getvalue()
+
+class BattleScene:
+    """The static layers of one battle, with only the bars redrawn per turn."""
+    
+    # Canvas layout (player on the left, enemy on the right)
+    width, height = 800, 400
+    area_top = 50
+    
+    def __init__(self, generator, player_fields, enemy_fields):
+        """
+        Compose the static base image
         
-        # Create a Discord file
-        return discord.File(buffer, filename=f"card_{card_data.get('id', 'unknown')}.png")
+        Args:
+            generator (ImageGenerator): Renderer owning the fonts and bar sprites
+            player_fields (dict): Player card values from battle_scene_fields
+            enemy_fields (dict): Enemy card values from battle_scene_fields
+        """
+        self.generator = generator
+        self.player_left = 50
+        self.enemy_left = self.width // 2 + 50
+        
+        # Bar positions: (left, top) of HP and MP for each side
+        self.bar_origins = {
+            "player_hp": (self.player_left, self.area_top + 90),
+            "player_mp": (self.player_left, self.area_top + 130),
+            "enemy_hp": (self.enemy_left, self.area_top + 90),
+            "enemy_mp": (self.enemy_left, self.area_top + 130)
+        }
+        
+        self.base = self.compose_base(player_fields, enemy_fields)
+    
+    def compose_base(self, player, enemy):
+        """Draw everything that stays the same for the whole battle."""
+        img = Image.new('RGB', (self.width, self.height), (20, 20, 30))
+        draw = ImageDraw.Draw(img)
+        
+        # Draw background (simple gradient)
+        for y in range(self.height):
+            color = (20, 20, 30 + int(y * 40 / self.height))
+            draw.line([(0, y), (self.width, y)], fill=color)
+        
+        # Draw dividing line
+        draw.line([(self.width // 2, 0), (self.width // 2, self.height)], fill=(100, 100, 100), width=2)
+        
+        # Add card information
+        try:
+            font = self.generator.assets.font()
+            
+            for left, card in ((self.player_left, player), (self.enemy_left, enemy)):
+                # Name and card
+                name_text = f"{card['name']} (Lv.{card['level']} {card['rarity']})"
+                draw.text((left, 20), name_text, fill=(255, 255, 255), font=font)
+                
+                # Stats
+                stats_text = f"ATK: {card['attack']} | DEF: {card['defense']} | SPD: {card['speed']}"
+                draw.text((left, self.area_top + 30), stats_text, fill=(220, 220, 220), font=font)
+                
+                # Skill info
+                skill_text = f"Skill: {card['skill']} (MP: {card['mp_cost']})"
+                draw.text((left, self.area_top + 60), skill_text, fill=(180, 180, 255), font=font)
+            
+        except Exception as e:
+            print(f"Error adding text to battle scene: {e}")
+        
+        # Draw character placeholders
+        for left in (self.player_left, self.enemy_left):
+            draw.rectangle((left, self.area_top + 170, left + 200, self.area_top + 370),
+                           outline=(200, 200, 200), width=2)
+        
+        return img
+    
+    def render(self, player_hp, player_max_hp, player_mp, player_max_mp,
+               enemy_hp, enemy_max_hp, enemy_mp, enemy_max_mp):
+        """
+        Draw this turn's bars over a copy of the base
+        
+        Returns:
+            PIL.Image: The full scene
+        """
+        img = self.base.copy()
+        draw = ImageDraw.Draw(img)
+        
+        bars = (
+            ("player_hp", player_hp, player_max_hp, True),
+            ("player_mp", player_mp, player_max_mp, False),
+            ("enemy_hp", enemy_hp, enemy_max_hp, True),
+            ("enemy_mp", enemy_mp, enemy_max_mp, False)
+        )
+        for name, current, maximum, is_hp in bars:
+            origin = self.bar_origins[name]
+            sprite = self.generator.bar_sprite(current, maximum, is_hp)
+            img.paste(sprite, origin, sprite)
+            self.generator.draw_bar_text(draw, origin, current, maximum, is_hp)
+        
+        return img
+    
+    def render_png(self, *values):
+        """
+        Draw this turn's bars and encode the scene as PNG
+        
+        Args:
+            *values: HP/max HP/MP/max MP of the player, then of the enemy
+            
+        Returns:
+            bytes: The PNG image
+        """
+        buffer = io.BytesIO()
+        # Turn frames are short-lived, so favour encode speed over file size
+        self.render(*values).save(buffer, format="PNG", compress_level=1)
+        return buffer.getvalue()
 
 # Singleton instance
 image_generator = ImageGenerator()
\ No newline at end of file
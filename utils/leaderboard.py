@@ -0,0 +1,253 @@
+"""
+Materialized leaderboards.
+Every player's standing in each category is kept in a sorted in-memory
+list, so the top of a board is a slice and a player's rank is a binary
+search. Writes to the leaderboard columns of players are logged by triggers
+(see Database.ensure_leaderboard_triggers) and applied incrementally; a
+periodic full reload reconciles the boards with the table in case anything
+slipped past the log.
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+
+from database.database import LEADERBOARD_COLUMNS
+
+logger = logging.getLogger('bot.leaderboard')
+
+# Category -> columns it is ordered by (highest first)
+CATEGORIES = {
+    "level": ("level", "xp"),
+    "gold": ("gold",),
+    "wins": ("wins",),
+    "pvp": ("pvp_wins",),
+    "boss": ("boss_wins",)
+}
+
+class Leaderboard:
+    """One category's standings, best first."""
+
+    def __init__(self, columns):
+        """
+        Sets up an empty board
+
+        Args:
+            columns (tuple): Player columns the board is ordered by
+        """
+        self.columns = columns
+        self.entries = []  # (negated sort key, user_id), ascending = best first
+        self.keys = {}  # user_id -> negated sort key
+
+    def sort_key(self, row):
+        """Returns the negated ordering key of a player row."""
+        return tuple(-(row.get(column) or 0) for column in self.columns)
+
+    def update(self, user_id, row):
+        """
+        Moves a player to their place for a row of new values
+
+        Args:
+            user_id (int): Discord user ID
+            row (dict): The player's leaderboard columns
+        """
+        key = self.sort_key(row)
+        old_key = self.keys.get(user_id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self._remove_entry(user_id, old_key)
+
+        bisect.insort(self.entries, (key, user_id))
+        self.keys[user_id] = key
+
+    def remove(self, user_id):
+        """Drops a player from the board."""
+        key = self.keys.pop(user_id, None)
+        if key is not None:
+            self._remove_entry(user_id, key)
+
+    def _remove_entry(self, user_id, key):
+        index = bisect.bisect_left(self.entries, (key, user_id))
+        if index < len(self.entries) and self.entries[index] == (key, user_id):
+            del self.entries[index]
+
+    def top(self, k=10):
+        """Returns the user IDs of the best k players."""
+        return [user_id for _, user_id in self.entries[:k]]
+
+    def rank(self, user_id):
+        """
+        Finds a player's rank; ties share the better rank
+
+        Args:
+            user_id (int): Discord user ID
+
+        Returns:
+            int: 1-based rank, or None if the player isn't on the board
+        """
+        key = self.keys.get(user_id)
+        if key is None:
+            return None
+        return bisect.bisect_left(self.entries, (key,)) + 1
+
+    def __len__(self):
+        return len(self.entries)
+
+class LeaderboardService:
+    """Sorted leaderboards for every category, kept current from the change log.
+
+    sync() drains the leaderboard_changes log (an indexed range scan that is
+    empty most of the time); call it once before reading so the boards reflect
+    every committed write. start() runs reconcile() every reconcile_interval
+    seconds.
+    """
+
+    def __init__(self, db, reconcile_interval=600):
+        self.aio = db.aio
+        self.reconcile_interval = reconcile_interval
+
+        self.boards = {category: Leaderboard(columns) for category, columns in CATEGORIES.items()}
+        self.rows = {}  # user_id -> leaderboard columns
+
+        self.last_change = 0
+        self.reconciled_at = 0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    async def load(self):
+        """(Re)builds every board from the players table."""
+        async with self._lock:
+            await self._load()
+
+    async def _load(self):
+        # Note where the log is first, so changes made during the load are replayed
+        last_change = await self.aio.fetchval("SELECT MAX(id) FROM leaderboard_changes", default=None) or 0
+
+        rows = await self.aio.fetchall(
+            f"SELECT user_id, {', '.join(LEADERBOARD_COLUMNS)} FROM players", as_dict=True
+        )
+
+        boards = {category: Leaderboard(columns) for category, columns in CATEGORIES.items()}
+        by_user = {}
+        for row in rows:
+            user_id = row.pop("user_id")
+            by_user[user_id] = row
+
+        # Sort once instead of inserting one by one
+        for board in boards.values():
+            board.keys = {user_id: board.sort_key(row) for user_id, row in by_user.items()}
+            board.entries = sorted((key, user_id) for user_id, key in board.keys.items())
+
+        self.boards = boards
+        self.rows = by_user
+        self.last_change = last_change
+        self.reconciled_at = time.monotonic()
+
+        logger.info(f"Leaderboards loaded: {len(by_user)} players")
+
+    async def sync(self):
+        """Applies the logged player changes to the boards."""
+        async with self._lock:
+            await self._sync()
+
+    async def _sync(self):
+        changes = await self.aio.fetchall(
+            "SELECT id, user_id FROM leaderboard_changes WHERE id > ? ORDER BY id", (self.last_change,)
+        )
+        if not changes:
+            return
+
+        user_ids = list({user_id for _, user_id in changes})
+        placeholders = ", ".join("?" * len(user_ids))
+        rows = await self.aio.fetchall(
+            f"SELECT user_id, {', '.join(LEADERBOARD_COLUMNS)} FROM players WHERE user_id IN ({placeholders})",
+            user_ids, as_dict=True
+        )
+        current = {row.pop("user_id"): row for row in rows}
+
+        for user_id in user_ids:
+            row = current.get(user_id)
+            for board in self.boards.values():
+                if row is None:
+                    board.remove(user_id)
+                else:
+                    board.update(user_id, row)
+
+            if row is None:
+                self.rows.pop(user_id, None)
+            else:
+                self.rows[user_id] = row
+
+        self.last_change = changes[-1][0]
+        await self.aio.execute("DELETE FROM leaderboard_changes WHERE id <= ?", (self.last_change,))
+
+    async def reconcile(self):
+        """
+        Reloads every board from the table and reports any drift
+
+        Returns:
+            int: Number of players whose standings had drifted
+        """
+        async with self._lock:
+            await self._sync()
+            before = {user_id: dict(row) for user_id, row in self.rows.items()}
+            await self._load()
+
+        drift = sum(1 for user_id in before.keys() | self.rows.keys() if before.get(user_id) != self.rows.get(user_id))
+        if drift:
+            logger.warning(f"Leaderboard reconciliation corrected {drift} players")
+        return drift
+
+    def top(self, category, k=10):
+        """
+        Gets the best players of a category
+
+        Args:
+            category (str): One of CATEGORIES
+            k (int): Number of players
+
+        Returns:
+            list: (user_id, row) pairs, best first; row holds the leaderboard columns
+        """
+        return [(user_id, self.rows[user_id]) for user_id in self.boards[category].top(k)]
+
+    def rank(self, category, user_id):
+        """
+        Gets a player's rank in a category
+
+        Args:
+            category (str): One of CATEGORIES
+            user_id (int): Discord user ID
+
+        Returns:
+            tuple: (rank, number of ranked players); rank is None if the player has no profile
+        """
+        board = self.boards[category]
+        return board.rank(user_id), len(board)
+
+    def start(self):
+        """Starts the periodic reconciliation task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._reconcile_loop())
+
+    async def close(self):
+        """Stops the reconciliation task."""
+        if self._task is None:
+            return
+
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Leaderboard reconciliation failed: {e}")
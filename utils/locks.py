@@ -0,0 +1,151 @@
+"""
+Per-player locks and idempotency tokens for economy operations.
+Anything that reads a player's gold or items, checks it and writes it back
+holds that player's lock for the whole read-check-write, so two commands
+from the same player can't both pass the check; other players never wait.
+Commands with such a read-check-write (!buy, !use, !gacha, !multidraw,
+!daily, !hourly) run under their author's lock through user_locked; !accept
+locks both duelists while it loads them, checks both and spends their
+stamina with awaits in between.
+Locks are kept in a WeakValueDictionary and vanish as soon as nobody holds
+or waits on them, so idle players cost no memory. Plain spends of gold,
+items or materials don't need them: database/wallet.py makes the check and
+the deduction one guarded UPDATE.
+
+The locks aren't reentrant: code already holding a player's lock must not
+take it again (so lock either a command or the helper it calls, not both).
+
+Buttons that spend something claim an idempotency token for their message
+first, so a double click (two interactions for one press) is applied once.
+"""
+
+import time
+import asyncio
+import logging
+import weakref
+import functools
+import contextlib
+from collections import OrderedDict
+
+logger = logging.getLogger('bot.locks')
+
+class KeyedLocks:
+    """asyncio locks by key (e.g. Discord user ID), created on demand."""
+
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+
+    def __call__(self, key):
+        """
+        Gets the lock for a key; use as `async with USER_LOCKS(user_id):`
+
+        Args:
+            key: Any hashable key
+
+        Returns:
+            asyncio.Lock: The key's lock, alive while anyone holds a reference
+        """
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+    def locked(self, key):
+        """Checks whether a key's lock is currently held."""
+        lock = self._locks.get(key)
+        return lock is not None and lock.locked()
+
+    @contextlib.asynccontextmanager
+    async def many(self, *keys):
+        """
+        Holds the locks of several keys (e.g. both sides of a trade)
+
+        The locks are always taken in sorted order, so two callers locking
+        the same players can't deadlock each other.
+
+        Args:
+            *keys: Keys to lock; duplicates are locked once
+        """
+        async with contextlib.AsyncExitStack() as stack:
+            for key in sorted(set(keys)):
+                await stack.enter_async_context(self(key))
+            yield
+
+    def __len__(self):
+        return len(self._locks)
+
+class IdempotencyTokens:
+    """Tokens that can be claimed once, remembered for ttl seconds."""
+
+    def __init__(self, ttl=900):
+        """
+        Sets up an empty token set
+
+        Args:
+            ttl (float): Seconds a claimed token is remembered (longer than any view's timeout)
+        """
+        self.ttl = ttl
+        self._claimed = OrderedDict()  # token -> claim time, oldest first
+
+    def claim(self, token):
+        """
+        Claims a token
+
+        Args:
+            token (str): E.g. from interaction_token()
+
+        Returns:
+            bool: True the first time, False for any repeat within ttl
+        """
+        now = time.monotonic()
+        while self._claimed:
+            oldest, claimed_at = next(iter(self._claimed.items()))
+            if now - claimed_at < self.ttl:
+                break
+            del self._claimed[oldest]
+
+        if token in self._claimed:
+            logger.debug(f"Duplicate interaction ignored: {token}")
+            return False
+        self._claimed[token] = now
+        return True
+
+    def release(self, token):
+        """Forgets a claim so the action can be retried (e.g. after it failed)."""
+        self._claimed.pop(token, None)
+
+    def __len__(self):
+        return len(self._claimed)
+
+def interaction_token(interaction, action):
+    """
+    Builds the idempotency token of a button press
+
+    Args:
+        interaction (discord.Interaction): The button's interaction
+        action (str): What the button does, e.g. "evolve"
+
+    Returns:
+        str: Token that is the same for every click on that message's button
+    """
+    return f"{interaction.message.id}:{action}"
+
+def user_locked(func):
+    """
+    Runs a command while holding its author's lock
+
+    Usage (below the command decorator):
+        @commands.command(name="buy")
+        @user_locked
+        async def buy_command(self, ctx, ...):
+    """
+    @functools.wraps(func)
+    async def wrapper(self, ctx, *args, **kwargs):
+        async with USER_LOCKS(ctx.author.id):
+            return await func(self, ctx, *args, **kwargs)
+    return wrapper
+
+# Shared by every cog, keyed by Discord user ID
+USER_LOCKS = KeyedLocks()
+INTERACTION_TOKENS = IdempotencyTokens()
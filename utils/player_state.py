@@ -0,0 +1,284 @@
+"""
+Write-behind cache for hot player counters.
+Battles and rewards change the same few columns (stamina, XP, level, MP)
+over and over. Those rows are loaded once into PlayerState objects that
+serve reads from memory and record which columns changed; dirty rows are
+written back in batches every flush interval, at shutdown, and on demand
+before any economically sensitive operation (flush_player).
+
+Code that reads or writes a cached column with its own SQL calls
+flush_player() before and evict_player() after it, so neither side
+overwrites the other.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger('bot.player_state')
+
+# Table -> (key column, hot columns kept in memory)
+STATE_TABLES = {
+    "api_players": ("discord_id", ("id", "level", "xp", "stamina", "max_stamina", "stamina_regen_ts", "mp", "max_mp", "mp_regen_ts")),
+    "api_user_cards": ("id", ("player_id", "level", "xp")),
+    "players": ("user_id", ("stamina", "max_stamina", "stamina_regen_ts", "mp", "max_mp", "mp_regen_ts"))
+}
+
+# Seconds a change may sit in memory before it's written, unless flushed sooner
+FLUSH_INTERVAL = float(os.getenv("STATE_FLUSH_INTERVAL", 5))
+
+class PlayerState:
+    """One cached row: its values and the columns changed since the last flush.
+
+    Get the state again after any await instead of holding on to it, since
+    an evict_player() in between replaces it.
+    """
+
+    def __init__(self, cache, table, key, values, owner=None):
+        self.cache = cache
+        self.table = table
+        self.key = key
+        self.values = values
+        self.owner = owner  # Discord ID the row belongs to, for flush_player
+        self.dirty = set()
+        self.dirty_since = None
+
+    def __getitem__(self, column):
+        return self.values[column]
+
+    def get(self, column, default=None):
+        return self.values.get(column, default)
+
+    def set(self, column, value):
+        """Changes a column in memory; it's written on the next flush."""
+        if column not in self.values:
+            raise KeyError(f"{column} is not cached for {self.table}")
+        if self.values[column] == value:
+            return
+
+        self.values[column] = value
+        self.dirty.add(column)
+        self.cache.dirty.add((self.table, self.key))
+        if self.dirty_since is None:
+            self.dirty_since = time.monotonic()
+
+    def update(self, values):
+        """Changes several columns in memory (e.g. the result of regen.settle)."""
+        for column, value in values.items():
+            self.set(column, value)
+
+    def add(self, column, amount):
+        """Adds to a numeric column in memory and returns the new value."""
+        self.set(column, (self.values[column] or 0) + amount)
+        return self.values[column]
+
+    def snapshot(self):
+        """Returns the cached values as a plain dict."""
+        return dict(self.values)
+
+class PlayerStateCache:
+    """Cached rows of STATE_TABLES with interval, shutdown and on-demand flushes."""
+
+    def __init__(self, db, flush_interval=None, max_items=10000):
+        """
+        Sets up the cache
+
+        Args:
+            db (Database): Database with its async layer
+            flush_interval (float): Durability window in seconds, defaults to $STATE_FLUSH_INTERVAL or 5
+            max_items (int): Clean rows kept in memory before the least recently used are dropped
+        """
+        self.aio = db.aio
+        self.flush_interval = FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_items = max_items
+
+        self.states = OrderedDict()  # (table, key) -> PlayerState
+        self.dirty = set()  # (table, key) of rows with unwritten changes
+        self.flushes = 0
+        self.rows_written = 0
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+
+    async def get(self, table, key, owner=None):
+        """
+        Gets a cached row, loading it on a miss
+
+        Args:
+            table (str): One of STATE_TABLES
+            key: Value of the table's key column
+            owner (int): Discord ID of the row's owner (defaults to the key for player tables)
+
+        Returns:
+            PlayerState: The row, or None if it doesn't exist
+        """
+        state = self.states.get((table, key))
+        if state is not None:
+            self.states.move_to_end((table, key))
+            return state
+
+        key_column, columns = STATE_TABLES[table]
+        values = await self.aio.fetchone(
+            f"SELECT {', '.join(columns)} FROM {table} WHERE {key_column} = ?", (key,), as_dict=True
+        )
+        if values is None:
+            return None
+
+        # Another caller may have loaded it while we waited
+        state = self.states.get((table, key))
+        if state is None:
+            if owner is None and key_column != "id":
+                owner = key
+            state = PlayerState(self, table, key, values, owner)
+            self.states[(table, key)] = state
+            self._trim()
+        return state
+
+    def peek(self, table, key):
+        """Returns a cached row without loading it, or None."""
+        return self.states.get((table, key))
+
+    def overlay(self, table, key, row):
+        """
+        Replaces a row's cached columns with their (possibly unflushed) cached values
+
+        Args:
+            table (str): One of STATE_TABLES
+            key: Value of the table's key column
+            row (dict): Row read from the database; updated in place
+
+        Returns:
+            dict: The row
+        """
+        state = self.states.get((table, key))
+        if state is not None and row is not None:
+            for column, value in state.values.items():
+                if column in row:
+                    row[column] = value
+        return row
+
+    def evict(self, table, key):
+        """
+        Drops a row so the next get() rereads it
+
+        Unflushed changes are lost, so flush the row first.
+        """
+        self.states.pop((table, key), None)
+        self.dirty.discard((table, key))
+
+    def evict_player(self, discord_id):
+        """Drops every cached row owned by a player (flush them first)."""
+        for entry in [entry for entry, state in self.states.items() if state.owner == discord_id]:
+            self.evict(*entry)
+
+    def _trim(self):
+        # Only clean rows can be dropped; dirty ones wait for their flush
+        excess = len(self.states) - self.max_items
+        for entry in list(self.states):
+            if excess <= 0:
+                break
+            if entry not in self.dirty:
+                del self.states[entry]
+                excess -= 1
+
+    async def flush(self, entries=None):
+        """
+        Writes dirty rows back in one transaction
+
+        Args:
+            entries (iterable): (table, key) pairs to write, or None for every dirty row
+
+        Returns:
+            int: Number of rows written
+        """
+        async with self._flush_lock:
+            if entries is None:
+                entries = list(self.dirty)
+            else:
+                entries = [entry for entry in entries if entry in self.dirty]
+            if not entries:
+                return 0
+
+            # Group rows changing the same columns so each group is one executemany
+            batches = {}
+            written = []
+            for entry in entries:
+                state = self.states.get(entry)
+                if state is None or not state.dirty:
+                    self.dirty.discard(entry)
+                    continue
+
+                columns = tuple(sorted(state.dirty))
+                values = [state.values[column] for column in columns]
+                batches.setdefault((state.table, columns), []).append(values + [state.key])
+                written.append((entry, state, dict(zip(columns, values))))
+
+            def write_batches(tx):
+                for (table, columns), params_seq in batches.items():
+                    key_column = STATE_TABLES[table][0]
+                    assignments = ", ".join(f"{column} = ?" for column in columns)
+                    tx.executemany(f"UPDATE {table} SET {assignments} WHERE {key_column} = ?", params_seq)
+
+            await self.aio.transaction(write_batches)
+
+            # Columns changed again while the transaction ran stay dirty
+            for entry, state, values in written:
+                for column, value in values.items():
+                    if state.values[column] == value:
+                        state.dirty.discard(column)
+                if not state.dirty:
+                    state.dirty_since = None
+                    self.dirty.discard(entry)
+
+            self.flushes += 1
+            self.rows_written += len(written)
+            return len(written)
+
+    async def flush_player(self, discord_id):
+        """
+        Writes every dirty row owned by a player; call before economically sensitive operations
+
+        Args:
+            discord_id (int): Discord user ID
+
+        Returns:
+            int: Number of rows written
+        """
+        entries = [entry for entry in self.dirty if getattr(self.states.get(entry), "owner", None) == discord_id]
+        return await self.flush(entries)
+
+    def start(self):
+        """Starts the interval flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stops the interval flush and writes everything that's left."""
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        written = await self.flush()
+        logger.info(f"Player state flushed at shutdown ({written} rows)")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Player state flush failed: {e}")
+
+    def stats(self):
+        """Returns cache counters for monitoring."""
+        return {
+            "rows": len(self.states),
+            "dirty": len(self.dirty),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written
+        }
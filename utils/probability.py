@@ -1,101 +1,95 @@
 import random
 import math
 import logging
+from utils.sampler import AliasSampler
+from utils.elements import ELEMENTS
 
 logger = logging.getLogger('bot.probability')
 
-def calculate_critical(crit_rate):
+# Rarity weights per pack type (55% Common, 30% Uncommon, etc. for basic)
+PACK_RARITY_WEIGHTS = {
+    "basic": {"Common": 55, "Uncommon": 30, "Rare": 10, "Epic": 4, "Legendary": 1},
+    "premium": {"Common": 20, "Uncommon": 35, "Rare": 30, "Epic": 10, "Legendary": 5},
+    "legendary": {"Common": 5, "Uncommon": 15, "Rare": 35, "Epic": 30, "Legendary": 15}
+}
+
+# Default weights if unknown pack type
+DEFAULT_PACK_WEIGHTS = {"Common": 40, "Uncommon": 30, "Rare": 20, "Epic": 7, "Legendary": 3}
+
+# Compiled once at import; every pull is an O(1) alias draw
+PACK_RARITY_SAMPLERS = {
+    pack_type: AliasSampler.from_weights(weights)
+    for pack_type, weights in PACK_RARITY_WEIGHTS.items()
+}
+DEFAULT_PACK_SAMPLER = AliasSampler.from_weights(DEFAULT_PACK_WEIGHTS)
+
+def calculate_critical(crit_rate, rng=None):
     """
     Calculates if an attack is a critical hit based on the critical rate
     
     Args:
         crit_rate (float): The chance of a critical hit in percentage (e.g., 15.0 for 15%)
+        rng: Random source, defaults to the random module
         
     Returns:
         bool: True if critical hit, False otherwise
     """
-    return random.random() * 100 < crit_rate
+    return (rng or random).random() * 100 < crit_rate
 
-def calculate_dodge(dodge_rate):
+def calculate_dodge(dodge_rate, rng=None):
     """
     Calculates if an attack is dodged based on the dodge rate
     
     Args:
         dodge_rate (float): The chance of dodging in percentage (e.g., 10.0 for 10%)
+        rng: Random source, defaults to the random module
         
     Returns:
         bool: True if attack is dodged, False otherwise
     """
-    return random.random() * 100 < dodge_rate
+    return (rng or random).random() * 100 < dodge_rate
 
-def calculate_drop_chance(drop_rate):
+def calculate_drop_chance(drop_rate, rng=None):
     """
     Calculates if an item drops based on the drop rate
     
     Args:
         drop_rate (float): The chance of the item dropping (e.g., 0.1 for 10%)
+        rng: Random source, defaults to the random module
         
     Returns:
         bool: True if item drops, False otherwise
     """
-    return random.random() < drop_rate
+    return (rng or random).random() < drop_rate
 
-def calculate_gacha_rarity(pack_type):
+def calculate_gacha_rarity(pack_type, rng=None):
     """
     Calculates the rarity of a card pulled from a gacha pack
     
     Args:
         pack_type (str): The type of pack ('basic', 'premium', or 'legendary')
+        rng: Random source, defaults to the random module
         
     Returns:
         str: The rarity of the pulled card
     """
-    rarities = ["Common", "Uncommon", "Rare", "Epic", "Legendary"]
-    
-    # Define probability weights based on pack type
-    if pack_type == "basic":
-        weights = [55, 30, 10, 4, 1]  # 55% Common, 30% Uncommon, etc.
-    elif pack_type == "premium":
-        weights = [20, 35, 30, 10, 5]
-    elif pack_type == "legendary":
-        weights = [5, 15, 35, 30, 15]
-    else:
-        weights = [40, 30, 20, 7, 3]  # Default weights if unknown pack type
-    
-    # Normalize weights to add up to 1.0
-    total = sum(weights)
-    normalized_weights = [w / total for w in weights]
-    
-    # Cumulative distribution for weighted random selection
-    cumulative = 0
-    cumulative_weights = []
-    for weight in normalized_weights:
-        cumulative += weight
-        cumulative_weights.append(cumulative)
-    
-    # Roll random number between 0 and 1
-    roll = random.random()
-    
-    # Find which rarity the roll corresponds to
-    for i, threshold in enumerate(cumulative_weights):
-        if roll <= threshold:
-            logger.debug(f"Gacha roll: {roll}, got {rarities[i]} from {pack_type} pack")
-            return rarities[i]
-    
-    # Fallback to Common (should never happen due to cumulative weights)
-    return "Common"
+    sampler = PACK_RARITY_SAMPLERS.get(pack_type, DEFAULT_PACK_SAMPLER)
+    rarity = sampler.draw(rng)
+    logger.debug(f"Gacha roll: got {rarity} from {pack_type} pack")
+    return rarity
 
-def calculate_skill_proc(skill_chance):
+def calculate_skill_proc(skill_chance, rng=None):
     """
     Calculates if a skill triggers based on its activation chance
     
     Args:
         skill_chance (float): The chance of skill activation (e.g., 0.3 for 30%)
+        rng: Random source, defaults to the random module
         
     Returns:
         bool: True if skill triggers, False otherwise
     """
-    return random.random() < skill_chance
+    return (rng or random).random() < skill_chance
 
 def calculate_level_stats_bonus(base_stat, rarity, level_multiplier=0.1):
     """
@@ -180,33 +174,5 @@ def calculate_battle_element_effectiveness(attacker_element, defender_element):
     Returns:
         float: Damage multiplier based on element effectiveness
     """
-    # Element effectiveness chart
-    element_chart = {
-        "Fire": {"strong": ["Earth", "Ice"], "weak": ["Water"]},
-        "Water": {"strong": ["Fire"], "weak": ["Electric", "Ice"]},
-        "Earth": {"strong": ["Electric"], "weak": ["Fire", "Air"]},
-        "Air": {"strong": ["Earth"], "weak": ["Electric", "Ice"]},
-        "Electric": {"strong": ["Water", "Air"], "weak": ["Earth"]},
-        "Ice": {"strong": ["Water", "Air"], "weak": ["Fire"]},
-        "Light": {"strong": ["Dark"], "weak": []},
-        "Dark": {"strong": ["Light"], "weak": []},
-        "Cute": {"strong": ["Dark"], "weak": ["Light"]},
-        "Sweet": {"strong": ["Cute"], "weak": ["Dark"]},
-        "Star": {"strong": [], "weak": []},
-        "Wind": {"strong": ["Earth"], "weak": ["Electric"]},  # For Naruto characters
-        "Lightning": {"strong": ["Water"], "weak": ["Earth"]}  # For Naruto characters
-    }
-    
-    # Default is neutral effectiveness
-    multiplier = 1.0
-    
-    # Check if attacker's element exists in chart
-    if attacker_element in element_chart:
-        # Check if defender is weak to this element
-        if defender_element in element_chart[attacker_element]["strong"]:
-            multiplier = 1.5  # Super effective
-        # Check if defender resists this element
-        elif defender_element in element_chart[attacker_element]["weak"]:
-            multiplier = 0.75  # Not very effective
-            
-    return multiplier
+    # Looked up in the shared element registry's precomputed matrix
+    return ELEMENTS.multiplier(attacker_element, defender_element)
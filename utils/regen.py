@@ -0,0 +1,144 @@
+"""
+Lazy stamina and MP regeneration.
+Nothing ticks in the background: each resource stores its value together
+with a <resource>_regen_ts timestamp, and the regenerated value is computed
+from the elapsed time whenever it's read. Only spending (or any other
+change) writes the resource back, settling the regeneration up to that
+moment and carrying over the time towards the next point.
+
+The same rules apply to players and api_players rows, which both have
+stamina/max_stamina and mp/max_mp columns.
+"""
+
+import time
+
+# Resource -> seconds per point regenerated
+REGEN_INTERVALS = {
+    "stamina": 600,  # 1 stamina every 10 minutes
+    "mp": 30  # 1 MP every 30 seconds
+}
+
+def columns(resource):
+    """
+    Names the columns a resource is stored in
+
+    Args:
+        resource (str): One of REGEN_INTERVALS
+
+    Returns:
+        tuple: (value column, maximum column, timestamp column)
+    """
+    return resource, f"max_{resource}", f"{resource}_regen_ts"
+
+def regenerate(value, maximum, since, interval, now):
+    """
+    Applies the regeneration since a timestamp
+
+    Args:
+        value (int): Stored value
+        maximum (int): Cap regeneration stops at
+        since (int): Unix time the value was stored at (None or 0 for never)
+        interval (int): Seconds per point
+        now (int): Unix time to regenerate up to
+
+    Returns:
+        tuple: (regenerated value, timestamp the remaining progress counts from)
+    """
+    value = value or 0
+    since = since or 0
+    if value >= maximum:
+        # The clock idles while full (potions and rewards may overfill)
+        return value, now
+
+    points = max(0, now - since) // interval
+    if value + points >= maximum:
+        return maximum, now
+    return value + points, since + points * interval
+
+def current(row, resource, now=None):
+    """
+    Reads a resource with its regeneration applied, without writing anything
+
+    Args:
+        row: Player row or PlayerState holding the resource's columns
+        resource (str): One of REGEN_INTERVALS
+        now (int): Unix time, defaults to the current time
+
+    Returns:
+        int: Current value
+    """
+    value_column, maximum_column, ts_column = columns(resource)
+    now = int(time.time()) if now is None else now
+    value, _ = regenerate(row[value_column], row[maximum_column], row.get(ts_column), REGEN_INTERVALS[resource], now)
+    return value
+
+def settle(row, resource, delta=0, value=None, maximum=None, now=None):
+    """
+    Settles the regeneration so far and applies a change
+
+    Args:
+        row: Player row or PlayerState holding the resource's columns
+        resource (str): One of REGEN_INTERVALS
+        delta (int): Amount to add (negative to spend)
+        value (int): Value to set instead of adding delta
+        maximum (int): New maximum, if it changes
+        now (int): Unix time, defaults to the current time
+
+    Returns:
+        dict: Columns to write back
+    """
+    value_column, maximum_column, ts_column = columns(resource)
+    now = int(time.time()) if now is None else now
+    regenerated, since = regenerate(
+        row[value_column], row[maximum_column], row.get(ts_column), REGEN_INTERVALS[resource], now
+    )
+
+    maximum = row[maximum_column] if maximum is None else maximum
+    new_value = max(0, regenerated + delta if value is None else value)
+    if new_value >= maximum:
+        # Full again, so the clock idles from here
+        since = now
+
+    return {value_column: new_value, maximum_column: maximum, ts_column: since}
+
+def spend(state, resource, amount, now=None):
+    """
+    Spends a resource if the regenerated value covers it
+
+    The check and the deduction happen together with no await in between,
+    so two commands can't both spend the same stamina.
+
+    Args:
+        state (PlayerState): Cached row holding the resource's columns
+        resource (str): One of REGEN_INTERVALS
+        amount (int): Amount to spend
+        now (int): Unix time, defaults to the current time
+
+    Returns:
+        bool: True if it was spent, False if there wasn't enough
+    """
+    now = int(time.time()) if now is None else now
+    if current(state, resource, now) < amount:
+        return False
+    state.update(settle(state, resource, delta=-amount, now=now))
+    return True
+
+def seconds_to_full(row, resource, now=None):
+    """
+    Estimates when a resource is back at its maximum
+
+    Args:
+        row: Player row or PlayerState holding the resource's columns
+        resource (str): One of REGEN_INTERVALS
+        now (int): Unix time, defaults to the current time
+
+    Returns:
+        int: Seconds until full, 0 if it already is
+    """
+    value_column, maximum_column, ts_column = columns(resource)
+    now = int(time.time()) if now is None else now
+    interval = REGEN_INTERVALS[resource]
+    value, since = regenerate(row[value_column], row[maximum_column], row.get(ts_column), interval, now)
+    if value >= row[maximum_column]:
+        return 0
+    return (row[maximum_column] - value) * interval - (now - since)
@@ -0,0 +1,289 @@
+"""
+Content-addressed cache for rendered images.
+Renders are keyed by a hash of exactly the fields that get drawn, so two
+views of a card in the same state share one PNG, and any change to a drawn
+field (level, stats, evolution stage...) produces a new key by itself with
+no explicit invalidation. Encoded bytes live in an in-memory LRU backed by
+a size-bounded directory of PNG files (itself an LRU, like the artwork
+cache's), so a restart doesn't start cold.
+Callers on the event loop use aget/aput, which do the file I/O in a thread;
+get/put/get_or_render are for synchronous code.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger('bot.render_cache')
+
+class RenderCache:
+    """In-memory LRU of encoded images with a byte-bounded on-disk LRU tier."""
+
+    def __init__(self, disk_dir, max_items=512, max_bytes=128 * 1024 * 1024, version=1):
+        """
+        Sets up the cache
+
+        Args:
+            disk_dir (str): Directory for the on-disk tier, or None for memory only
+            max_items (int): Number of renders kept in memory
+            max_bytes (int): Disk budget; least recently used renders are deleted past it
+            version (int): Renderer version; bump it when the layout changes
+        """
+        self.disk_dir = disk_dir
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.version = version
+        self.memory = OrderedDict()
+        self.disk = OrderedDict()  # path -> size, least recently used first
+        self.disk_bytes = 0
+        self.indexed = False
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, kind, fields):
+        """
+        Hashes the drawn fields of a render
+
+        Args:
+            kind (str): What is rendered, e.g. "card"
+            fields (dict): Every value that affects the output
+
+        Returns:
+            str: Hex digest used as the cache key
+        """
+        payload = json.dumps([kind, self.version, fields], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.png")
+
+    def _remember(self, key, data):
+        self.memory[key] = data
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_items:
+            self.memory.popitem(last=False)
+
+    def _scan_disk(self):
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(".png"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+
+        # Oldest first, so eviction order survives restarts
+        return sorted(entries)
+
+    def _load_index(self, entries):
+        if self.indexed:
+            return []
+        for _, path, size in entries:
+            self.disk[path] = size
+            self.disk_bytes += size
+        self.indexed = True
+        return self._evict_disk()
+
+    def _index(self):
+        # Indexed on first use: the cache is also used where nothing is started
+        if not self.indexed:
+            self._remove_files(self._load_index(self._scan_disk()))
+
+    async def _index_async(self):
+        if self.indexed:
+            return
+        entries = await asyncio.to_thread(self._scan_disk)
+        evicted = self._load_index(entries)
+        if evicted:
+            await asyncio.to_thread(self._remove_files, evicted)
+
+    def _evict_disk(self):
+        # The index is updated right away; the caller deletes the returned files
+        evicted = []
+        while self.disk_bytes > self.max_bytes and self.disk:
+            path, size = self.disk.popitem(last=False)
+            self.disk_bytes -= size
+            evicted.append(path)
+        return evicted
+
+    @staticmethod
+    def _remove_files(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _read_file(path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def _write_file(self, path, data):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so readers never see a half-written file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write render {path} to disk: {e}")
+            return False
+        return True
+
+    def _lookup_memory(self, key):
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+        return data
+
+    def _after_read(self, key, path, data):
+        if data:
+            self.disk.move_to_end(path)
+            self._remember(key, data)
+            self.disk_hits += 1
+            return data
+
+        # Deleted behind our back (or never written)
+        self.disk_bytes -= self.disk.pop(path, 0)
+        self.misses += 1
+        return None
+
+    def _after_write(self, path, data):
+        self.disk_bytes += len(data) - self.disk.pop(path, 0)
+        self.disk[path] = len(data)
+        return self._evict_disk()
+
+    def get(self, key):
+        """
+        Looks a render up in memory, then on disk
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            bytes: The encoded image, or None on a miss
+        """
+        data = self._lookup_memory(key)
+        if data is not None:
+            return data
+
+        if self.disk_dir:
+            self._index()
+            path = self._path(key)
+            if path in self.disk:
+                return self._after_read(key, path, self._read_file(path))
+
+        self.misses += 1
+        return None
+
+    async def aget(self, key):
+        """
+        Same as get, with the disk access done in a thread
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            bytes: The encoded image, or None on a miss
+        """
+        data = self._lookup_memory(key)
+        if data is not None:
+            return data
+
+        if self.disk_dir:
+            await self._index_async()
+            path = self._path(key)
+            if path in self.disk:
+                return self._after_read(key, path, await asyncio.to_thread(self._read_file, path))
+
+        self.misses += 1
+        return None
+
+    def put(self, key, data):
+        """
+        Stores a render in memory and on disk
+
+        Args:
+            key (str): Cache key
+            data (bytes): The encoded image
+        """
+        self._remember(key, data)
+
+        if not self.disk_dir:
+            return
+
+        self._index()
+        path = self._path(key)
+        if self._write_file(path, data):
+            self._remove_files(self._after_write(path, data))
+
+    async def aput(self, key, data):
+        """
+        Same as put, with the disk access done in a thread
+
+        Args:
+            key (str): Cache key
+            data (bytes): The encoded image
+        """
+        self._remember(key, data)
+
+        if not self.disk_dir:
+            return
+
+        await self._index_async()
+        path = self._path(key)
+        if await asyncio.to_thread(self._write_file, path, data):
+            # The index is only touched on the event loop
+            evicted = self._after_write(path, data)
+            if evicted:
+                await asyncio.to_thread(self._remove_files, evicted)
+
+    def get_or_render(self, kind, fields, render):
+        """
+        Returns a cached render, drawing and storing it on a miss
+
+        Args:
+            kind (str): What is rendered, e.g. "card"
+            fields (dict): Every value that affects the output
+            render (callable): Called with no arguments on a miss, returns the encoded bytes
+
+        Returns:
+            bytes: The encoded image
+        """
+        key = self.key(kind, fields)
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def clear(self):
+        """Drops the in-memory tier (the disk tier is left alone)."""
+        self.memory.clear()
+
+    def stats(self):
+        """Returns hit/miss counters for monitoring."""
+        return {
+            "items": len(self.memory),
+            "disk_items": len(self.disk),
+            "disk_bytes": self.disk_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses
+        }
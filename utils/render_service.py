@@ -0,0 +1,173 @@
+"""
+Off-loop image rendering.
+PIL drawing and PNG encoding are CPU-bound and would stall the event loop
+for every other interaction, so the render service runs them in a pool of
+worker processes. Workers are started and warmed up (renderer and fonts
+loaded) at startup, callers simply await the encoded bytes or a ready
+discord.File, and a bounded number of in-flight jobs keeps a burst of
+renders from piling up an unbounded queue.
+"""
+
+import os
+import io
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import discord
+
+logger = logging.getLogger('bot.render_service')
+
+# Renderer methods a worker may be asked to run
+RENDER_JOBS = ("render_card_png", "render_battle_scene_png", "render_resource_bar_png")
+
+def _init_worker():
+    """Loads the renderer and its assets once per worker process (inherited as-is under fork)."""
+    from utils.image_generator import image_generator
+    image_generator.warm_up()
+
+def _warm_up():
+    return os.getpid()
+
+def _render(job, args, kwargs):
+    from utils.image_generator import image_generator
+    return getattr(image_generator, job)(*args, **kwargs)
+
+class RenderService:
+    """Awaitable front end for a process pool of image renderers."""
+
+    def __init__(self, workers=None, max_pending=None, artwork=None):
+        """
+        Configures the pool
+
+        Args:
+            workers (int): Worker processes, defaults to $RENDER_WORKERS or 2
+            max_pending (int): Jobs allowed in flight before callers wait, defaults to 4 per worker
+            artwork (ArtworkCache): Where card art comes from, or None to draw cards without it
+        """
+        self.artwork = artwork
+        self.workers = workers or int(os.getenv("RENDER_WORKERS", 2))
+        self.max_pending = max_pending or self.workers * 4
+        self.executor = None
+        self._slots = None
+        self.pending = 0
+
+    async def start(self):
+        """Starts the worker processes and waits until every one is warm."""
+        if self.executor is not None:
+            return
+
+        # Fork where available so workers inherit the loaded renderer and fonts
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker
+        )
+        self._slots = asyncio.Semaphore(self.max_pending)
+
+        # One trivial job per worker forces every process to spawn and initialize now
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, _warm_up) for _ in range(self.workers)
+        ))
+        logger.info(f"Render service started with {len(set(pids))} warm workers (max {self.max_pending} pending)")
+
+    async def close(self):
+        """Shuts the pool down, letting running jobs finish."""
+        if self.executor is None:
+            return
+
+        executor, self.executor = self.executor, None
+        await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def render(self, job, *args, **kwargs):
+        """
+        Runs a renderer method in the pool
+
+        Args:
+            job (str): One of RENDER_JOBS
+            *args, **kwargs: Arguments for the renderer method
+
+        Returns:
+            bytes: The encoded image
+        """
+        if job not in RENDER_JOBS:
+            raise ValueError(f"Unknown render job: {job}")
+        if self.executor is None:
+            raise RuntimeError("Render service is not started")
+
+        # Backpressure: wait for a free slot instead of queueing without bound
+        if self._slots.locked():
+            logger.debug(f"Render queue full ({self.max_pending} pending), waiting for a slot")
+
+        async with self._slots:
+            self.pending += 1
+            started = time.perf_counter()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.executor, _render, job, args, kwargs
+                )
+            finally:
+                self.pending -= 1
+                logger.debug(f"Rendered {job} in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    async def card_image(self, card_data):
+        """
+        Renders a card with its artwork, using the render cache before the pool
+
+        Args:
+            card_data (dict): Card data
+
+        Returns:
+            discord.File: The card image
+        """
+        from utils.image_generator import image_generator
+
+        artwork = None
+        if self.artwork is not None:
+            artwork = await self.artwork.thumbnail(card_data.get('image_url'))
+
+        cache = image_generator.render_cache
+        fields = image_generator.card_render_fields(card_data, artwork)
+        key = cache.key("card", fields)
+
+        data = await cache.aget(key)
+        if data is None:
+            data = await self.render("render_card_png", fields, artwork)
+            await cache.aput(key, data)
+
+        return discord.File(io.BytesIO(data), filename=f"card_{card_data.get('id', 'unknown')}.png")
+
+    async def battle_scene(self, *args, **kwargs):
+        """
+        Renders a battle scene in the pool (each worker keeps the static
+        layers of the matchups it has drawn, so later turns only redraw bars)
+
+        Args:
+            Same as ImageGenerator.generate_battle_scene, without save_path
+
+        Returns:
+            discord.File: The battle scene
+        """
+        data = await self.render("render_battle_scene_png", *args, **kwargs)
+        return discord.File(io.BytesIO(data), filename="battle_scene.png")
+
+    async def resource_bar(self, current, maximum, is_hp=True):
+        """
+        Renders an HP or MP bar in the pool
+
+        Args:
+            current (int): Current value
+            maximum (int): Maximum value
+            is_hp (bool): True for HP bar, False for MP bar
+
+        Returns:
+            discord.File: The bar image
+        """
+        data = await self.render("render_resource_bar_png", current, maximum, is_hp)
+        return discord.File(io.BytesIO(data), filename=f"{'hp' if is_hp else 'mp'}_bar.png")
@@ -2,56 +2,116 @@ import random
 import math
 import logging
 from utils.probability import calculate_drop_chance
+from utils.sampler import AliasSampler, DropTable
+from utils.boosts import BOOSTS
 
 logger = logging.getLogger('bot.rewards')
 
-def get_gold_drop(level, difficulty_multiplier=1.0, bonus_multiplier=1.0):
+# Bonus rolls on gold and EXP drops
+GOLD_BONUS_ROLL = AliasSampler.chance(0.1)  # 10% chance
+EXP_BONUS_ROLL = AliasSampler.chance(0.15)  # 15% chance
+
+# Random elemental core (IDs 6-11), equally likely
+ELEMENT_CORE_SAMPLER = AliasSampler.from_weights({core_id: 1 for core_id in range(6, 12)})
+
+# Material drop tables by enemy type, compiled once at import
+MATERIAL_DROP_TABLES = {
+    "normal": DropTable([
+        {"item": 1, "chance": 0.3, "quantity": (1, 2)},                  # Crystal Shard
+        {"item": 2, "chance": 0.15, "quantity": (1, 1), "min_level": 10}  # Magical Essence
+    ]),
+    "boss": DropTable([
+        {"item": 1, "chance": 0.8, "quantity": (2, 4)},                   # Crystal Shard
+        {"item": 2, "chance": 0.5, "quantity": (1, 3)},                   # Magical Essence
+        {"item": 3, "chance": 0.25, "quantity": (1, 2), "min_level": 15}  # Star Fragment
+    ]),
+    "raid": DropTable([
+        {"item": 1, "guaranteed": True, "quantity": (5, 10)},            # Crystal Shard
+        {"item": 2, "chance": 0.8, "quantity": (3, 6)},                   # Magical Essence
+        {"item": 3, "chance": 0.5, "quantity": (2, 4)},                   # Star Fragment
+        {"item": 4, "chance": 0.3, "quantity": (1, 1), "min_level": 30}   # Dragon Scale
+    ])
+}
+
+# Rolled for every enemy type
+COMMON_DROP_TABLE = DropTable([
+    # Very rare chance for cosmic dust
+    {"item": 5, "chance": 0.05, "quantity": (1, 1), "min_level": 40},
+    # Elemental Cores - placeholder until drops use the enemy's element
+    {"item": ELEMENT_CORE_SAMPLER, "chance": 0.2, "quantity": (1, 1), "min_level": 20}
+])
+
+def boosted(amount, user_id, kind):
+    """
+    Applies a player's active boost to a reward
+    
+    Args:
+        amount (int): The unboosted reward
+        user_id (int): Discord user ID of the player receiving it
+        kind (str): Boost kind ("gold" or "exp")
+        
+    Returns:
+        int: The reward with the boost's multiplier applied
+    """
+    return int(amount * BOOSTS.multiplier(user_id, kind))
+
+def get_gold_drop(level, difficulty_multiplier=1.0, bonus_multiplier=1.0, rng=None, user_id=None):
     """
     Calculate gold rewards from battles based on enemy level and other factors
     
     Args:
         level (int): The level of the enemy/boss
         difficulty_multiplier (float): Multiplier for difficulty (higher for bosses)
-        bonus_multiplier (float): Additional bonus multiplier (e.g., from boosts)
+        bonus_multiplier (float): Additional bonus multiplier
+        rng: Random source, defaults to the random module
+        user_id (int): Player receiving the gold, whose gold boost applies
         
     Returns:
         int: Amount of gold to award
     """
+    rng = rng or random
+    bonus_multiplier *= BOOSTS.multiplier(user_id, "gold")
+    
     # Base gold is level-dependent with randomness
-    base_gold = int((level * 15 + random.randint(0, level * 5)) * difficulty_multiplier * bonus_multiplier)
+    base_gold = int((level * 15 + rng.randint(0, level * 5)) * difficulty_multiplier * bonus_multiplier)
     
     # Add a small chance for bonus gold
-    if calculate_drop_chance(0.1):  # 10% chance
+    if GOLD_BONUS_ROLL.draw(rng):
         bonus = int(base_gold * 0.5)  # 50% bonus
         logger.debug(f"Bonus gold drop! +{bonus}")
         base_gold += bonus
     
     return base_gold
 
-def get_exp_drop(level, difficulty_multiplier=1.0, bonus_multiplier=1.0):
+def get_exp_drop(level, difficulty_multiplier=1.0, bonus_multiplier=1.0, rng=None, user_id=None):
     """
     Calculate experience rewards from battles based on enemy level and other factors
     
     Args:
         level (int): The level of the enemy/boss
         difficulty_multiplier (float): Multiplier for difficulty (higher for bosses)
-        bonus_multiplier (float): Additional bonus multiplier (e.g., from boosts)
+        bonus_multiplier (float): Additional bonus multiplier
+        rng: Random source, defaults to the random module
+        user_id (int): Player receiving the EXP, whose EXP boost applies
         
     Returns:
         int: Amount of experience to award
     """
+    rng = rng or random
+    bonus_multiplier *= BOOSTS.multiplier(user_id, "exp")
+    
     # Base EXP calculation with some randomness
-    base_exp = int((10 + level * 8 + random.randint(0, level * 3)) * difficulty_multiplier * bonus_multiplier)
+    base_exp = int((10 + level * 8 + rng.randint(0, level * 3)) * difficulty_multiplier * bonus_multiplier)
     
     # Add a small chance for bonus EXP
-    if calculate_drop_chance(0.15):  # 15% chance
+    if EXP_BONUS_ROLL.draw(rng):
         bonus = int(base_exp * 0.4)  # 40% bonus
         logger.debug(f"Bonus EXP drop! +{bonus}")
         base_exp += bonus
     
     return base_exp
 
-def get_material_rewards(enemy_level, enemy_type="normal", bonus_multiplier=1.0):
+def get_material_rewards(enemy_level, enemy_type="normal", bonus_multiplier=1.0, rng=None):
     """
     Determine material rewards from battles
     
@@ -59,70 +119,22 @@ def get_material_rewards(enemy_level, enemy_type="normal", bonus_multiplier=1.0)
         enemy_level (int): The level of the enemy/boss
         enemy_type (str): Type of enemy ("normal", "boss", "raid")
         bonus_multiplier (float): Additional bonus multiplier
+        rng: Random source, defaults to the random module
         
     Returns:
         list: List of tuples (material_id, quantity)
     """
+    rng = rng or random
+    
     rewards = []
     
     # Basic material drop rates based on enemy type
-    if enemy_type == "normal":
-        # Common material (Crystal Shard)
-        if calculate_drop_chance(0.3 * bonus_multiplier):  # 30% chance
-            quantity = random.randint(1, 2)
-            rewards.append((1, quantity))
-        
-        # Uncommon material (Magical Essence) for higher level enemies
-        if enemy_level >= 10 and calculate_drop_chance(0.15 * bonus_multiplier):  # 15% chance
-            quantity = 1
-            rewards.append((2, quantity))
-    
-    elif enemy_type == "boss":
-        # Common material (Crystal Shard)
-        if calculate_drop_chance(0.8 * bonus_multiplier):  # 80% chance
-            quantity = random.randint(2, 4)
-            rewards.append((1, quantity))
-        
-        # Uncommon material (Magical Essence)
-        if calculate_drop_chance(0.5 * bonus_multiplier):  # 50% chance
-            quantity = random.randint(1, 3)
-            rewards.append((2, quantity))
-        
-        # Rare material (Star Fragment) for higher level bosses
-        if enemy_level >= 15 and calculate_drop_chance(0.25 * bonus_multiplier):  # 25% chance
-            quantity = random.randint(1, 2)
-            rewards.append((3, quantity))
-    
-    elif enemy_type == "raid":
-        # Guaranteed common material (Crystal Shard)
-        quantity = random.randint(5, 10)
-        rewards.append((1, quantity))
-        
-        # High chance for uncommon material (Magical Essence)
-        if calculate_drop_chance(0.8 * bonus_multiplier):  # 80% chance
-            quantity = random.randint(3, 6)
-            rewards.append((2, quantity))
-        
-        # Better chance for rare material (Star Fragment)
-        if calculate_drop_chance(0.5 * bonus_multiplier):  # 50% chance
-            quantity = random.randint(2, 4)
-            rewards.append((3, quantity))
-        
-        # Epic material (Dragon Scale) for high level raids
-        if enemy_level >= 30 and calculate_drop_chance(0.3 * bonus_multiplier):  # 30% chance
-            quantity = 1
-            rewards.append((4, quantity))
-    
-    # Very rare chance for cosmic dust regardless of enemy type
-    if enemy_level >= 40 and calculate_drop_chance(0.05 * bonus_multiplier):  # 5% chance
-        rewards.append((5, 1))  # Cosmic Dust
-    
-    # Elemental Cores based on the enemy's element (would need enemy element info)
-    # This is just a placeholder logic - actual implementation would use the enemy's element
-    if enemy_level >= 20 and calculate_drop_chance(0.2 * bonus_multiplier):  # 20% chance
-        # Random elemental core (IDs 6-11)
-        element_core_id = random.randint(6, 11)
-        rewards.append((element_core_id, 1))
+    drop_table = MATERIAL_DROP_TABLES.get(enemy_type)
+    if drop_table:
+        rewards.extend(drop_table.roll(enemy_level, bonus_multiplier, rng))
+    
+    # Cosmic dust and elemental cores regardless of enemy type
+    rewards.extend(COMMON_DROP_TABLE.roll(enemy_level, bonus_multiplier, rng))
     
     return rewards
 
@@ -167,7 +179,7 @@ def get_daily_rewards(streak_days):
     
     return rewards
 
-def get_pvp_rewards(winner, loser, turns_taken):
+def get_pvp_rewards(winner, loser, turns_taken, rng=None):
     """
     Calculate rewards for PvP battles
     
@@ -175,10 +187,13 @@ def get_pvp_rewards(winner, loser, turns_taken):
         winner (int): Winner's level
         loser (int): Loser's level
         turns_taken (int): Number of battle turns
+        rng: Random source, defaults to the random module
         
     Returns:
         dict: Dictionary of rewards for winner {type: amount}
     """
+    rng = rng or random
+    
     # Base rewards
     base_gold = 100
     base_exp = 50
@@ -207,7 +222,7 @@ def get_pvp_rewards(winner, loser, turns_taken):
     material_chance = min(0.3, 0.1 + (loser * 0.01))  # Caps at 30%
     materials = []
     
-    if calculate_drop_chance(material_chance):
+    if calculate_drop_chance(material_chance, rng):
         if loser >= 20:
             materials.append((3, 1))  # Star Fragment
         elif loser >= 10:
@@ -221,7 +236,7 @@ def get_pvp_rewards(winner, loser, turns_taken):
         "materials": materials
     }
 
-def get_boss_rewards(boss_level, boss_id, player_performance=1.0):
+def get_boss_rewards(boss_level, boss_id, player_performance=1.0, rng=None):
     """
     Calculate rewards for boss battles
     
@@ -229,10 +244,13 @@ def get_boss_rewards(boss_level, boss_id, player_performance=1.0):
         boss_level (int): Level of the boss
         boss_id (int): ID of the boss (for specific drops)
         player_performance (float): Performance score (0.0-1.0)
+        rng: Random source, defaults to the random module
         
     Returns:
         dict: Dictionary of rewards {type: amount}
     """
+    rng = rng or random
+    
     # Base rewards scaled by boss level
     base_gold = boss_level * 50
     base_exp = boss_level * 25
@@ -251,24 +269,24 @@ def get_boss_rewards(boss_level, boss_id, player_performance=1.0):
     # Guaranteed materials based on boss level
     if boss_level >= 30:
         materials.append((4, 1))  # Dragon Scale
-        materials.append((3, random.randint(2, 4)))  # Star Fragments
+        materials.append((3, rng.randint(2, 4)))  # Star Fragments
     elif boss_level >= 15:
-        materials.append((3, random.randint(1, 3)))  # Star Fragments
-        materials.append((2, random.randint(2, 5)))  # Magical Essence
+        materials.append((3, rng.randint(1, 3)))  # Star Fragments
+        materials.append((2, rng.randint(2, 5)))  # Magical Essence
     else:
-        materials.append((2, random.randint(1, 3)))  # Magical Essence
-        materials.append((1, random.randint(3, 8)))  # Crystal Shards
+        materials.append((2, rng.randint(1, 3)))  # Magical Essence
+        materials.append((1, rng.randint(3, 8)))  # Crystal Shards
     
     # Chance for elemental cores based on boss's element (would be from database)
     # This is placeholder logic - actual implementation would use boss's element
     element_core_chance = min(0.8, 0.3 + (boss_level * 0.02))  # Caps at 80%
-    if calculate_drop_chance(element_core_chance):
+    if calculate_drop_chance(element_core_chance, rng):
         # Random elemental core (IDs 6-11)
-        element_core_id = random.randint(6, 11)
-        materials.append((element_core_id, random.randint(1, 2)))
+        element_core_id = ELEMENT_CORE_SAMPLER.draw(rng)
+        materials.append((element_core_id, rng.randint(1, 2)))
     
     # Rare chance for cosmic dust from high-level bosses
-    if boss_level >= 40 and calculate_drop_chance(0.15):  # 15% chance
+    if boss_level >= 40 and calculate_drop_chance(0.15, rng):  # 15% chance
         materials.append((5, 1))  # Cosmic Dust
     
     return {
@@ -0,0 +1,135 @@
+"""
+Seedable random number streams for battles and pulls.
+Instead of sharing the global random module, every battle and every chest
+opening draws from its own stream. The stream's seed is recorded with the
+result, so a disputed battle or pull can be replayed exactly from its log
+entry, and simulations can fan out over independent streams.
+"""
+
+import random
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # NumPy streams are optional
+    np = None
+
+logger = logging.getLogger('bot.rng')
+
+# Seeds are kept below 2**63 so they fit a SQLite INTEGER column
+SEED_BITS = 63
+
+class SeededRandom(random.Random):
+    """random.Random that remembers the seed it was created with."""
+
+    def __init__(self, seed):
+        super().__init__(seed)
+        self.seed_value = seed
+
+class RNGProvider:
+    """Hands out independent, reproducible random streams.
+
+    With no master seed, stream seeds come from the OS entropy pool. With a
+    master seed every stream seed is derived from it, which makes a whole
+    run (tests, benchmarks, simulations) deterministic.
+    """
+
+    def __init__(self, master_seed=None):
+        self.master_seed = master_seed
+        if master_seed is None:
+            self._seeder = random.SystemRandom()
+        else:
+            self._seeder = random.Random(master_seed)
+
+    def new_seed(self):
+        """
+        Generates a fresh stream seed
+
+        Returns:
+            int: A non-negative seed that fits in a SQLite INTEGER
+        """
+        return self._seeder.getrandbits(SEED_BITS)
+
+    def stream(self, seed=None):
+        """
+        Creates a random.Random stream
+
+        Args:
+            seed (int): Seed to replay, or None for a fresh one
+
+        Returns:
+            SeededRandom: The stream (its seed is in .seed_value)
+        """
+        if seed is None:
+            seed = self.new_seed()
+        return SeededRandom(seed)
+
+    def numpy_stream(self, seed=None):
+        """
+        Creates a NumPy Generator stream
+
+        Args:
+            seed (int): Seed to replay, or None for a fresh one
+
+        Returns:
+            tuple: (numpy.random.Generator, seed)
+        """
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        if seed is None:
+            seed = self.new_seed()
+        return np.random.default_rng(seed), seed
+
+    def spawn(self, count, seed=None):
+        """
+        Creates independent streams for parallel work
+
+        Args:
+            count (int): Number of streams
+            seed (int): Root seed to replay, or None for a fresh one
+
+        Returns:
+            tuple: (list of SeededRandom, root seed)
+        """
+        if seed is None:
+            seed = self.new_seed()
+
+        # Derived the same way with or without NumPy, so a root seed replays anywhere
+        root = random.Random(seed)
+        seeds = [root.getrandbits(SEED_BITS) for _ in range(count)]
+
+        return [SeededRandom(child_seed) for child_seed in seeds], seed
+
+# The provider the bot uses; tests and benchmarks can swap in a seeded one
+_provider = RNGProvider()
+
+def get_provider():
+    """Returns the active RNG provider."""
+    return _provider
+
+def set_provider(provider):
+    """
+    Replaces the active RNG provider
+
+    Args:
+        provider (RNGProvider): The new provider
+
+    Returns:
+        RNGProvider: The previous provider
+    """
+    global _provider
+    previous = _provider
+    _provider = provider
+    return previous
+
+def new_stream(seed=None):
+    """
+    Creates a stream from the active provider
+
+    Args:
+        seed (int): Seed to replay, or None for a fresh one
+
+    Returns:
+        SeededRandom: The stream (its seed is in .seed_value)
+    """
+    return _provider.stream(seed)
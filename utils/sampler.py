@@ -0,0 +1,190 @@
+"""
+Precompiled weighted samplers for rarity and drop rolls.
+Weight tables are compiled once into Vose alias tables, after which every
+draw is O(1): one uniform index and one biased coin flip, no matter how many
+outcomes the table has. Bulk pulls use sample(n), which is vectorized when
+handed a NumPy Generator.
+
+A random.Random stream is always consumed the same way (one draw() after
+another), whether or not NumPy is installed, so a recorded seed replays the
+same pulls on every install.
+"""
+
+import random
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only Generator streams need it
+    np = None
+
+logger = logging.getLogger('bot.sampler')
+
+class AliasSampler:
+    """Weighted sampler over a fixed set of outcomes (Vose's alias method)."""
+
+    def __init__(self, outcomes, weights):
+        """
+        Compiles the alias table
+
+        Args:
+            outcomes (list): The possible outcomes
+            weights (list): Non-negative weight of each outcome (need not sum to 1)
+        """
+        # Zero-weight outcomes can never be drawn, so leave them out entirely
+        pairs = [(outcome, weight) for outcome, weight in zip(outcomes, weights) if weight > 0]
+        if not pairs:
+            raise ValueError("AliasSampler needs at least one outcome with a positive weight")
+
+        self.outcomes = [outcome for outcome, _ in pairs]
+        total = float(sum(weight for _, weight in pairs))
+        self.probabilities = {outcome: weight / total for outcome, weight in pairs}
+
+        n = len(pairs)
+        scaled = [weight * n / total for _, weight in pairs]
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        # Pair each under-full column with an over-full one that tops it up
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # Whatever is left is full up to floating point error
+        for i in large + small:
+            self.prob[i] = 1.0
+
+        if np is not None:
+            self._np_prob = np.array(self.prob)
+            self._np_alias = np.array(self.alias)
+
+    @classmethod
+    def from_weights(cls, weights):
+        """
+        Compiles a sampler from an {outcome: weight} mapping
+
+        Args:
+            weights (dict): Weight of each outcome
+
+        Returns:
+            AliasSampler: The compiled sampler
+        """
+        return cls(list(weights.keys()), list(weights.values()))
+
+    @classmethod
+    def chance(cls, probability):
+        """
+        Compiles a True/False sampler for a fixed drop chance
+
+        Args:
+            probability (float): Chance of True (0.0-1.0)
+
+        Returns:
+            AliasSampler: Sampler drawing True with the given probability
+        """
+        probability = min(max(probability, 0.0), 1.0)
+        return cls([True, False], [probability, 1.0 - probability])
+
+    def draw(self, rng=None):
+        """
+        Draws a single outcome
+
+        Args:
+            rng: Random source with random() and randrange(), defaults to the random module
+
+        Returns:
+            The drawn outcome
+        """
+        rng = rng or random
+        i = rng.randrange(len(self.outcomes))
+        if rng.random() < self.prob[i]:
+            return self.outcomes[i]
+        return self.outcomes[self.alias[i]]
+
+    def sample(self, n, rng=None):
+        """
+        Draws n independent outcomes
+
+        Args:
+            n (int): Number of draws
+            rng: random.Random-like source or a NumPy Generator, defaults to the random module
+
+        Returns:
+            list: The drawn outcomes
+        """
+        if n <= 0:
+            return []
+
+        if not hasattr(rng, "integers"):
+            # Same draws as n calls to draw(), so seeded streams replay identically
+            return [self.draw(rng) for _ in range(n)]
+
+        columns = rng.integers(0, len(self.outcomes), size=n)
+        coins = rng.random(n)
+        chosen = np.where(coins < self._np_prob[columns], columns, self._np_alias[columns])
+        return [self.outcomes[i] for i in chosen]
+
+class DropTable:
+    """Independent drop chances compiled from a list of entries.
+
+    Each entry is a dict with:
+        item: material ID, or an AliasSampler to pick the item from
+        chance: drop chance (0.0-1.0) before bonus multipliers
+        guaranteed: always drops, regardless of chance and multipliers (optional)
+        quantity: (min, max) quantity, inclusive
+        min_level: lowest enemy level the entry applies to (optional)
+    """
+
+    def __init__(self, entries):
+        self.entries = [
+            {
+                "item": entry["item"],
+                "chance": entry.get("chance", 1.0),
+                "guaranteed": entry.get("guaranteed", False),
+                "quantity": tuple(entry.get("quantity", (1, 1))),
+                "min_level": entry.get("min_level", 0)
+            }
+            for entry in entries
+        ]
+
+    def roll(self, level=0, bonus_multiplier=1.0, rng=None):
+        """
+        Rolls every entry once
+
+        Args:
+            level (int): Enemy level, for entries with a min_level
+            bonus_multiplier (float): Multiplier applied to every chance
+            rng: Random source, defaults to the random module
+
+        Returns:
+            list: List of tuples (item, quantity)
+        """
+        rng = rng or random
+        drops = []
+
+        for entry in self.entries:
+            if level < entry["min_level"]:
+                continue
+            if not entry["guaranteed"] and rng.random() >= entry["chance"] * bonus_multiplier:
+                continue
+
+            item = entry["item"]
+            if isinstance(item, AliasSampler):
+                item = item.draw(rng)
+
+            min_qty, max_qty = entry["quantity"]
+            drops.append((item, rng.randint(min_qty, max_qty)))
+
+        return drops
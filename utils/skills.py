@@ -0,0 +1,334 @@
+"""
+Skill registry shared by all combat code.
+Every skill is compiled once, at startup or the first time it's seen, from
+its skill_description (and name) into an effect program: plain data saying
+how hard the skill hits, how much it heals, which status it inflicts and
+which stats it raises or lowers, for how long. Battles look the program up
+by skill name instead of scanning the name for keywords every turn, and
+tooling can read the same programs.
+
+Program fields:
+    skill: Skill name
+    kind: One of SKILL_KINDS, for display
+    multiplier: Damage multiplier (0 for skills that deal no damage)
+    heal: Fraction of max HP the user restores
+    status: (status, duration, chance) inflicted on the target, or None
+    modifiers: ((side, stat, multiplier, duration, chance), ...); side is "self" or "target"
+    mp_cost: MP cost (from the card, or estimated from the kind)
+    cooldown: Cooldown in turns (from the card, or estimated from the kind)
+    description: The text the program was compiled from
+"""
+
+import re
+import logging
+
+logger = logging.getLogger('bot.skills')
+
+# Skill kinds -> (label, what they do), in the order the compiler ranks them
+SKILL_KINDS = {
+    "healing": ("Healing", "Restores HP to the user"),
+    "ultimate": ("Ultimate", "Powerful special attack"),
+    "dot": ("DoT", "Deals damage over time"),
+    "status": ("Status", "Applies a status effect"),
+    "debuff": ("Debuff", "Decreases opponent's stats temporarily"),
+    "buff": ("Buff", "Increases user's stats temporarily"),
+    "damage": ("Damage", "Deals damage to the opponent")
+}
+
+# (MP cost, cooldown) for skills whose card doesn't set them
+KIND_COSTS = {
+    "healing": (30, 3),
+    "ultimate": (40, 5),
+    "dot": (25, 3),
+    "status": (25, 3),
+    "debuff": (30, 3),
+    "buff": (30, 3),
+    "damage": (20, 3)
+}
+
+# Status inflicted -> (words that inflict it, default duration, damage multiplier)
+STATUS_RULES = {
+    "burning": (r"burn\w*|fire(?!\s+an?\b)|flames?|flaming|flamethrower|damage over (?:time|\d+ turns?)", 3, 1.3),
+    "poisoned": (r"poison\w*|toxic|venom\w*", 3, 1.2),
+    "stunned": (r"stun\w*|paraly[sz]\w*|immobiliz\w*|freez\w*|frozen", 1, 1.2)
+}
+
+# Status -> verb used to describe it
+STATUS_VERBS = {"burning": "burn", "poisoned": "poison", "stunned": "stun"}
+
+# Stat words -> engine stats they modify
+STAT_WORDS = {
+    "attack": ("attack",),
+    "defense": ("defense",),
+    "defenses": ("defense",),
+    "speed": ("speed",),
+    "dodge": ("dodge_rate",),
+    "critical": ("crit_rate",),
+    "stats": ("attack", "defense", "speed")
+}
+
+# Verbs that change stats, and the stat they change when the text names none
+RAISE_VERBS = {"increas": "attack", "boost": "attack", "rais": "attack"}
+LOWER_VERBS = {"reduc": "attack", "lower": "attack", "decreas": "attack",
+               "weaken": "attack", "break": "defense", "slow": "speed"}
+
+HEAL_MULTIPLIER = 0.5  # Damage of a skill that also heals
+MODIFIER_MULTIPLIER = 1.2  # Damage of a skill that also changes stats
+ULTIMATE_MULTIPLIER = 2.0
+DEFAULT_MULTIPLIER = 1.5
+DEFAULT_HEAL = 0.25
+DEFAULT_MODIFIER = 0.3  # Stat change when the text gives no percentage
+DEFAULT_MODIFIER_TURNS = 2
+
+HEAL_PATTERN = re.compile(r"\b(?:heal(?:s|ed|ing)?|cure\w*|recover\w*|restor\w*)\b")
+SHIELD_PATTERN = re.compile(r"\babsorbs? (\d+)% of incoming damage\b")
+MODIFIER_PATTERN = re.compile(
+    r"\b(?P<verb>" + "|".join(list(RAISE_VERBS) + list(LOWER_VERBS)) + r")\w*\b(?P<rest>[^.,;]*)"
+)
+ULTIMATE_PATTERN = re.compile(
+    r"\b(?:ultimate|final|massive|devastating|heavy|enormous|incredibly powerful"
+    r"|extremely powerful|destroy\w*|destruct\w*|eliminat\w*)\b"
+)
+DAMAGE_PATTERN = re.compile(
+    r"\b(?:damag\w*|deals?|dealing|attacks?|strik\w*|blows?|blasts?|beams?|slash\w*|kicks?"
+    r"|punch\w*|slams?|crush\w*|pierc\w*|explosion|bullets?|fists?)\b"
+)
+CHANCE_PATTERN = re.compile(r"(\d+)%\s+(?:chance\s+to\s+(\w+)|(\w+)\s+chance)")
+MODIFIER_CHANCE_PATTERN = re.compile(r"(\d+)%\s+chance\s+to\s+(?:greatly\s+)?$")
+PERCENT_PATTERN = re.compile(r"(\d+)%")
+TURNS_PATTERN = re.compile(r"\b(?:for|over) (\d+) turns?\b")
+CLAUSE_END = re.compile(r"[.,;]| and | but ")
+
+# Where skills are loaded from at startup: table -> {program field: column}
+SKILL_SOURCES = {
+    "cards": {"mp_cost": "skill_mp_cost", "cooldown": "skill_cooldown"},
+    "api_cards": {"mp_cost": "mp_cost"},
+    "bosses": {}
+}
+
+def _clause(text, start):
+    """Returns the text from start to the end of its clause."""
+    end = CLAUSE_END.search(text, start)
+    return text[start:end.start() if end else len(text)]
+
+def _turns(text, default):
+    match = TURNS_PATTERN.search(text)
+    return int(match.group(1)) if match else default
+
+def compile_skill(skill, description=None, mp_cost=None, cooldown=None):
+    """
+    Compiles a skill into its effect program
+
+    Args:
+        skill (str): Skill name
+        description (str): The skill's skill_description
+        mp_cost (int): The card's MP cost, estimated from the kind if None
+        cooldown (int): The card's cooldown, estimated from the kind if None
+
+    Returns:
+        dict: The program (see the module docstring)
+    """
+    # The name backs up descriptions that don't spell out an effect ("Ruby Flame")
+    text = f"{description or ''}. {skill or ''}".lower()
+
+    # Stat changes first, then take them out so "reduces their attack" doesn't read as damage
+    modifiers = []
+    shield = SHIELD_PATTERN.search(text)
+    if shield:
+        modifiers.append(("self", "defense", 1 + int(shield.group(1)) / 100, _turns(_clause(text, shield.end()), 3), 1.0))
+        text = text[:shield.start()] + text[shield.end():]
+
+    remaining = text
+    for match in MODIFIER_PATTERN.finditer(text):
+        verb, rest = match.group("verb"), match.group("rest")
+        raising = verb in RAISE_VERBS
+        stats = [stat for word, stats in STAT_WORDS.items()
+                 if re.search(rf"\b{word}\b", rest) for stat in stats]
+        if not stats:
+            stats = [(RAISE_VERBS if raising else LOWER_VERBS)[verb]]
+
+        percent = PERCENT_PATTERN.search(rest)
+        change = int(percent.group(1)) / 100 if percent else DEFAULT_MODIFIER
+        if "greatly" in text[max(0, match.start() - 8):match.start()]:
+            change = max(change, 0.5)
+        duration = _turns(rest, DEFAULT_MODIFIER_TURNS)
+
+        # "30% chance to break their defense" only sometimes applies
+        chance = MODIFIER_CHANCE_PATTERN.search(text, 0, match.start())
+        chance = int(chance.group(1)) / 100 if chance else 1.0
+
+        side = "self" if raising else "target"
+        multiplier = round(1 + change if raising else max(0.1, 1 - change), 2)
+        for stat in dict.fromkeys(stats):
+            if not any(m[:2] == (side, stat) for m in modifiers):
+                modifiers.append((side, stat, multiplier, duration, chance))
+        remaining = remaining.replace(match.group(0), " ")
+
+    # Heals: the first percentage given in a healing clause, or the default
+    heal = 0
+    for match in HEAL_PATTERN.finditer(remaining):
+        percent = PERCENT_PATTERN.search(_clause(remaining, match.end()))
+        if percent:
+            heal = int(percent.group(1)) / 100
+            break
+        heal = heal or DEFAULT_HEAL
+
+    # Statuses: the first rule that matches, with its duration and chance from the text
+    chances = {}
+    for match in CHANCE_PATTERN.finditer(remaining):
+        chances[match.group(2) or match.group(3)] = int(match.group(1)) / 100
+
+    status = None
+    status_multiplier = None
+    for name, (words, default_turns, multiplier) in STATUS_RULES.items():
+        match = re.search(rf"\b(?:{words})\b", remaining)
+        if not match:
+            continue
+
+        chance = next((value for word, value in chances.items() if re.fullmatch(words, word)), 1.0)
+        if chance == 1.0 and "potentially" in remaining[max(0, match.start() - 16):match.start()]:
+            chance = 0.5
+        status = (name, _turns(_clause(remaining, match.start()), default_turns), chance)
+        status_multiplier = multiplier
+        break
+
+    ultimate = bool(ULTIMATE_PATTERN.search(remaining))
+
+    # Pure support skills (a heal or a self buff, nothing that hits) deal no damage
+    support = heal or any(side == "self" for side, *_ in modifiers)
+    if support and not status and not ultimate and not DAMAGE_PATTERN.search(remaining):
+        multiplier = 0
+    else:
+        candidates = [DEFAULT_MULTIPLIER] if not (heal or status or modifiers or ultimate) else []
+        if ultimate:
+            candidates.append(ULTIMATE_MULTIPLIER)
+        if status_multiplier:
+            candidates.append(status_multiplier)
+        if heal:
+            candidates.append(HEAL_MULTIPLIER)
+        if modifiers:
+            candidates.append(MODIFIER_MULTIPLIER)
+        multiplier = max(candidates)
+
+    if heal:
+        kind = "healing"
+    elif ultimate:
+        kind = "ultimate"
+    elif status:
+        kind = "status" if status[0] == "stunned" else "dot"
+    elif any(side == "target" for side, *_ in modifiers):
+        kind = "debuff"
+    elif modifiers:
+        kind = "buff"
+    else:
+        kind = "damage"
+
+    default_cost, default_cooldown = KIND_COSTS[kind]
+    return {
+        "skill": skill,
+        "kind": kind,
+        "multiplier": multiplier,
+        "heal": heal,
+        "status": status,
+        "modifiers": tuple(modifiers),
+        "mp_cost": default_cost if mp_cost is None else mp_cost,
+        "cooldown": default_cooldown if cooldown is None else cooldown,
+        "description": description
+    }
+
+def describe(program):
+    """
+    Writes a description of what a program does
+
+    Args:
+        program (dict): A compiled skill
+
+    Returns:
+        str: One sentence, e.g. "Deals 1.3x damage and inflicts burning for 3 turns."
+    """
+    parts = []
+    if program["multiplier"]:
+        if program["kind"] == "ultimate":
+            parts.append(f"Unleashes a devastating attack for {program['multiplier']:g}x damage")
+        else:
+            parts.append(f"Deals {program['multiplier']:g}x damage")
+    if program["heal"]:
+        parts.append(f"restores {int(program['heal'] * 100)}% of max HP")
+    if program["status"]:
+        name, duration, chance = program["status"]
+        verb, turns = STATUS_VERBS[name], f"the opponent for {duration} turn{'s' if duration != 1 else ''}"
+        parts.append(f"{verb}s {turns}" if chance >= 1 else f"has a {int(chance * 100)}% chance to {verb} {turns}")
+    for side, stat, multiplier, duration, chance in program["modifiers"]:
+        whose = "its" if side == "self" else "the opponent's"
+        change = "raises" if multiplier > 1 else "lowers"
+        effect = f"{whose} {stat.replace('_', ' ')} by {int(round(abs(multiplier - 1) * 100))}% for {duration} turns"
+        parts.append(f"{change} {effect}" if chance >= 1 else f"has a {int(chance * 100)}% chance to {change[:-1]} {effect}")
+
+    if not parts:
+        return "Deals significant damage to the opponent."
+    sentence = ", ".join(parts[:-1]) + (" and " if len(parts) > 1 else "") + parts[-1]
+    return sentence[0].upper() + sentence[1:] + "."
+
+class SkillRegistry:
+    """Compiled effect programs by skill name."""
+
+    def __init__(self):
+        self.programs = {}
+
+    async def load(self, db):
+        """
+        Compiles every skill of the card and boss tables
+
+        Args:
+            db (Database): Database with its async layer
+        """
+        programs = {}
+        for table, fields in SKILL_SOURCES.items():
+            try:
+                columns = [row[1] for row in await db.aio.fetchall(f"PRAGMA table_info({table})")]
+            except Exception as e:
+                logger.warning(f"Could not read {table} skills: {e}")
+                continue
+            if "skill" not in columns:
+                continue
+
+            # Only the cost columns this copy of the table has
+            selected = {field: column for field, column in fields.items() if column in columns}
+            select = ", ".join(["skill", "skill_description"] + [f"{column} AS {field}" for field, column in selected.items()])
+            for row in await db.aio.fetchall(f"SELECT DISTINCT {select} FROM {table}", as_dict=True):
+                if row["skill"] and row["skill"] not in programs:
+                    programs[row["skill"]] = compile_skill(
+                        row["skill"], row["skill_description"], row.get("mp_cost"), row.get("cooldown")
+                    )
+
+        self.programs = programs
+        logger.info(f"Compiled {len(programs)} skills")
+
+    def get(self, skill):
+        """Returns a skill's program, or None if it hasn't been compiled."""
+        return self.programs.get(skill)
+
+    def program(self, skill, description=None, mp_cost=None, cooldown=None):
+        """
+        Looks up a skill's program, compiling it on first sight
+
+        Args:
+            skill (str): Skill name
+            description (str): Its skill_description, used if it must be compiled
+            mp_cost (int): Its MP cost, used if it must be compiled
+            cooldown (int): Its cooldown, used if it must be compiled
+
+        Returns:
+            dict: The program, or None without a skill
+        """
+        if not skill:
+            return None
+
+        program = self.programs.get(skill)
+        if program is None:
+            program = compile_skill(skill, description, mp_cost, cooldown)
+            self.programs[skill] = program
+        return program
+
+# The registry every battle shares
+SKILLS = SkillRegistry()